@@ -12,33 +12,97 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_config import cfg
 from oslo_log import log
+from oslo_service import loopingcall
 
 from delfin import context
+from delfin import coordination
 from delfin import db
 from delfin import exception
+from delfin.alert_manager import deduplicator
+from delfin.common import constants
 from delfin.drivers import api as driver_manager
 from delfin.exporter import base_exporter
 
 LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+# Seconds between two checks for due alert summaries
+DEDUP_FLUSH_INTERVAL = 1
 
 
 class AlertProcessor(object):
     """Alert model translation and export functions"""
 
-    def __init__(self):
+    def __init__(self, worker_index=0):
         self.driver_manager = driver_manager.API()
-        self.exporter_manager = base_exporter.AlertExporterManager()
+        self.exporter_manager = base_exporter.AlertExporterManager(
+            worker_index)
+        self.deduplicator = None
+        if CONF.alert_dedup.enabled:
+            self.deduplicator = deduplicator.AlertDeduplicator.from_config(
+                self._export_summary)
+        self._flush_timer = None
+
+    def start(self):
+        if self.deduplicator is not None:
+            self._flush_timer = loopingcall.FixedIntervalLoopingCall(
+                self.deduplicator.flush)
+            self._flush_timer.start(interval=DEDUP_FLUSH_INTERVAL)
+
+    def stop(self):
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
+            self._flush_timer = None
+        if self.deduplicator is not None:
+            self.deduplicator.flush(final=True)
+        self.exporter_manager.stop()
 
     def process_alert_info(self, alert):
         """Fills alert model using driver manager interface."""
         ctxt = context.get_admin_context()
-        storage = db.storage_get(ctxt, alert['storage_id'])
-
         try:
             alert_model = self.driver_manager.parse_alert(ctxt,
                                                           alert['storage_id'],
                                                           alert)
+        except Exception as e:
+            LOG.error(e)
+            raise exception.InvalidResults(
+                "Failed to fill the alert model from driver.")
+
+        self._save_active(ctxt, alert['storage_id'], alert_model)
+        # Repeats are exported as summaries by the deduplicator
+        if self.deduplicator is not None and not self.deduplicator.check(
+                alert['storage_id'], alert_model):
+            return
+        self._export(ctxt, alert['storage_id'], alert_model)
+
+    def _save_active(self, ctxt, storage_id, alert_model):
+        """Save an alert received as trap as active, so that polling the
+        alerts of the storage does not export it again.
+        """
+        if alert_model.get('category') == constants.Category.RECOVERY:
+            return
+        try:
+            # Serialized with the alert polls of the storage
+            with coordination.Lock(storage_id):
+                db.alert_upsert(ctxt, dict(alert_model,
+                                           storage_id=storage_id))
+        except Exception as e:
+            LOG.warning('Failed to save active alert of storage {0}: {1}'
+                        .format(storage_id, e))
+
+    def export_alerts(self, ctxt, storage_id, alert_models):
+        """Export alert models which are already filled by the driver,
+        e.g. the ones polled from the storage.
+        """
+        for alert_model in alert_models:
+            self._export(ctxt, storage_id, alert_model)
+
+    def _export(self, ctxt, storage_id, alert_model):
+        storage = db.storage_get(ctxt, storage_id)
+        try:
             # Fill storage specific info
             alert_model['storage_id'] = storage['id']
             alert_model['storage_name'] = storage['name']
@@ -52,3 +116,6 @@ class AlertProcessor(object):
 
         # Export to base exporter which handles dispatch for all exporters
         self.exporter_manager.dispatch(ctxt, alert_model)
+
+    def _export_summary(self, storage_id, alert_model):
+        self._export(context.get_admin_context(), storage_id, alert_model)
@@ -0,0 +1,164 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+
+from delfin import metrics
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+alert_dedup_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Export the repeats of an alert, same storage, '
+                     'alert id, sequence number and location, as periodic '
+                     'summaries with their number of occurrences.'),
+    cfg.IntOpt('window',
+               default=60,
+               min=1,
+               help='Seconds after the last occurrence of an alert during '
+                    'which it is a repeat.'),
+    cfg.IntOpt('summary_interval',
+               default=60,
+               min=1,
+               help='Seconds between two summaries of the repeats of an '
+                    'alert.'),
+    cfg.IntOpt('max_entries',
+               default=10000,
+               min=1,
+               help='Alerts tracked at most, the least recently seen one '
+                    'is summarized and forgotten beyond it.'),
+]
+
+CONF.register_opts(alert_dedup_opts, "alert_dedup")
+
+SUPPRESSED = metrics.counter(
+    'delfin_alerts_suppressed_total',
+    'Repeats of alerts which were counted instead of being exported.')
+ENTRIES = metrics.gauge(
+    'delfin_alert_dedup_entries',
+    'Alerts tracked for repeats.')
+
+
+class _Entry(object):
+
+    def __init__(self, alert_model, now):
+        self.alert_model = alert_model
+        self.last_seen = now
+        self.last_emitted = now
+        # Occurrences since the last export
+        self.pending = 0
+
+
+class AlertDeduplicator(object):
+    """Coalesce the repeats of alerts.
+
+    The first occurrence of an alert is exported at once, its repeats
+    until no repeat came for `window` seconds are counted, and every
+    `summary_interval` seconds the latest repeat is exported with
+    occurrence_count set to the number of repeats since the last export.
+    At most `max_entries` alerts are tracked, least recently seen first
+    out.
+
+    :param emit: called with (storage_id, alert_model) for each summary
+    """
+
+    def __init__(self, emit, window, summary_interval, max_entries):
+        self.emit = emit
+        self.window = window
+        self.summary_interval = summary_interval
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, emit):
+        return cls(emit, CONF.alert_dedup.window,
+                   CONF.alert_dedup.summary_interval,
+                   CONF.alert_dedup.max_entries)
+
+    @staticmethod
+    def _key(storage_id, alert_model):
+        return (storage_id, alert_model.get('alert_id'),
+                alert_model.get('sequence_number'),
+                alert_model.get('location'))
+
+    @staticmethod
+    def _summary(key, entry):
+        return key[0], dict(entry.alert_model,
+                            occurrence_count=entry.pending)
+
+    def check(self, storage_id, alert_model, now=None):
+        """Track the alert, returns whether to export it now."""
+        now = time.time() if now is None else now
+        key = self._key(storage_id, alert_model)
+        summaries = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.last_seen > self.window:
+                # Over, a new occurrence from now on
+                del self._entries[key]
+                if entry.pending:
+                    summaries.append(self._summary(key, entry))
+                entry = None
+            if entry is None:
+                self._entries[key] = _Entry(alert_model, now)
+                while len(self._entries) > self.max_entries:
+                    old_key, old_entry = self._entries.popitem(last=False)
+                    if old_entry.pending:
+                        summaries.append(self._summary(old_key, old_entry))
+            else:
+                entry.alert_model = alert_model
+                entry.last_seen = now
+                entry.pending += 1
+                self._entries.move_to_end(key)
+                SUPPRESSED.inc()
+            ENTRIES.set(len(self._entries))
+        self._emit(summaries)
+        return entry is None
+
+    def flush(self, now=None, final=False):
+        """Export the summaries which are due and forget the alerts not
+        repeated within the window, or all of them when final.
+        """
+        now = time.time() if now is None else now
+        summaries = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                over = final or now - entry.last_seen > self.window
+                if entry.pending and (
+                        over or
+                        now - entry.last_emitted >= self.summary_interval):
+                    summaries.append(self._summary(key, entry))
+                    entry.pending = 0
+                    entry.last_emitted = now
+                if over:
+                    del self._entries[key]
+            ENTRIES.set(len(self._entries))
+        self._emit(summaries)
+
+    def _emit(self, summaries):
+        for storage_id, alert_model in summaries:
+            try:
+                self.emit(storage_id, alert_model)
+            except Exception as e:
+                LOG.warning('Failed to export the summary of alert {0} of '
+                            'storage {1}: {2}'.format(
+                                alert_model.get('alert_id'), storage_id, e))
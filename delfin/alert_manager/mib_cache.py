@@ -0,0 +1,359 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""On-disk cache of the MIB symbols resolved by the trap receiver.
+
+Loading the MIB modules of snmp_mib_path takes long, the cache keeps
+what resolving var binds needs from them: the module and symbol of each
+OID, and for the OBJECT-TYPEs their syntax, i.e. base type, display hint,
+named values and constraints. It is built once from the loaded MIBs and
+named after a digest of the MIB files, so that changing them builds a
+new one.
+
+The file is a header, an index of (key offset, key length, record offset,
+record length) sorted by key, then the keys, the dotted OIDs, and their
+records, JSON lists. It is read through mmap, lookups are binary searches
+over the index, so only the records used are read and decoded.
+"""
+
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+import pyasn1
+import pysnmp
+from oslo_log import log
+from pyasn1.error import PyAsn1Error
+from pyasn1.type import constraint
+from pyasn1.type import namedval
+from pyasn1.type import univ
+from pyasn1.type.base import AbstractSimpleAsn1Item
+from pysnmp.proto import rfc1902
+from pysnmp.proto import rfc1905
+from pysnmp.smi import builder
+from pysnmp.smi import error
+
+LOG = log.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MAGIC = b'DELFINMIB%03d' % FORMAT_VERSION
+CACHE_FILE_PREFIX = 'mibs-'
+CACHE_FILE_SUFFIX = '.cache'
+
+# Magic, digest, number of entries
+_HEADER = struct.Struct('<12s32sI')
+_ENTRY = struct.Struct('<IIII')
+
+# Node kinds
+SCALAR = 's'
+COLUMN = 'c'
+OTHER = 'o'
+
+# Syntax of the nodes which have one the cache can not rebuild
+UNSUPPORTED = 'x'
+
+# Value types of the SMI, and the ASN.1 ones some MIBs use directly
+_BASE_TYPES = (
+    rfc1902.Counter32, rfc1902.Counter64, rfc1902.Gauge32,
+    rfc1902.TimeTicks, rfc1902.Unsigned32, rfc1902.Integer32,
+    rfc1902.Integer, rfc1902.IpAddress, rfc1902.Opaque, rfc1902.Bits,
+    rfc1902.OctetString, rfc1902.ObjectIdentifier,
+    univ.Integer, univ.OctetString, univ.ObjectIdentifier,
+)
+_BASE_TYPES_BY_NAME = dict(
+    ('%s.%s' % (t.__module__.rsplit('.', 1)[-1], t.__name__), t)
+    for t in _BASE_TYPES)
+_BASE_TYPE_NAMES = dict((t, name) for name, t in _BASE_TYPES_BY_NAME.items())
+
+_SKIPPED_VALUES = (rfc1905.UnSpecified, rfc1905.NoSuchObject,
+                   rfc1905.NoSuchInstance, rfc1905.EndOfMibView)
+
+_tc_lock = threading.Lock()
+_textual_convention = None
+
+
+def _get_textual_convention():
+    """SNMPv2-TC::TextualConvention, which formats values by display
+    hint, loaded once.
+    """
+    global _textual_convention
+    with _tc_lock:
+        if _textual_convention is None:
+            mib_builder = builder.MibBuilder().loadModules('SNMPv2-TC')
+            _textual_convention, = mib_builder.importSymbols(
+                'SNMPv2-TC', 'TextualConvention')
+    return _textual_convention
+
+
+def digest(mib_path):
+    """Digest of the MIB modules in mib_path, and of the versions of
+    what reads them.
+    """
+    sha = hashlib.sha256()
+    sha.update(('%d %s %s' % (FORMAT_VERSION, pysnmp.__version__,
+                              pyasn1.__version__)).encode())
+    for path in sorted(glob.glob(os.path.join(mib_path, '*.py'))):
+        with open(path, 'rb') as f:
+            content = f.read()
+        sha.update(b'\0%s\0%d\0' % (os.path.basename(path).encode(),
+                                    len(content)))
+        sha.update(content)
+    return sha.hexdigest()
+
+
+def cache_file(cache_dir, mib_digest):
+    return os.path.join(cache_dir,
+                        CACHE_FILE_PREFIX + mib_digest + CACHE_FILE_SUFFIX)
+
+
+def _dump_constraint(spec):
+    if not isinstance(spec, constraint.AbstractConstraint):
+        json.dumps(spec)
+        return spec
+    return [type(spec).__name__, [_dump_constraint(value)
+                                  for value in spec._values]]
+
+
+def _load_constraint(spec):
+    if not isinstance(spec, list):
+        return spec
+    name, values = spec
+    return getattr(constraint, name)(*[_load_constraint(value)
+                                       for value in values])
+
+
+def _dump_syntax(syntax, textual_convention):
+    """[base type, display hint, named values, constraints] of syntax,
+    the hint is None when it is not a textual convention.
+    """
+    syntax_type = type(syntax)
+    base = next((t for t in syntax_type.__mro__ if t in _BASE_TYPE_NAMES),
+                None)
+    if base is None:
+        return UNSUPPORTED
+    # Only the formatting of pyasn1, pysnmp and textual conventions by
+    # display hint can be rebuilt
+    for name in ('clone', 'prettyIn', 'prettyOut', 'prettyPrint'):
+        owner = next(t for t in syntax_type.__mro__ if name in t.__dict__)
+        if (owner is not textual_convention and
+                not owner.__module__.startswith(('pyasn1.', 'pysnmp.'))):
+            return UNSUPPORTED
+    hint = None
+    if (textual_convention is not None and
+            issubclass(syntax_type, textual_convention)):
+        hint = syntax.displayHint
+    named_values = None
+    if getattr(syntax, 'namedValues', None):
+        named_values = list(syntax.namedValues.items())
+    try:
+        constraints = _dump_constraint(syntax.subtypeSpec)
+    except (TypeError, ValueError):
+        return UNSUPPORTED
+    return [_BASE_TYPE_NAMES[base], hint, named_values, constraints]
+
+
+def _load_syntax(spec):
+    base_name, hint, named_values, constraints = spec
+    base = _BASE_TYPES_BY_NAME[base_name]
+    attrs = {'subtypeSpec': _load_constraint(constraints)}
+    if named_values is not None:
+        attrs['namedValues'] = namedval.NamedValues(
+            *[tuple(pair) for pair in named_values])
+    bases = (base,)
+    if hint is not None:
+        attrs['displayHint'] = hint
+        bases = (_get_textual_convention(), base)
+    return type(base.__name__, bases, attrs)()
+
+
+def build(mib_view_controller, cache_dir, mib_digest):
+    """Write the cache of the MIBs loaded in mib_view_controller, and
+    remove the caches of other MIBs.
+
+    :returns: the path of the cache file
+    """
+    mib_builder = mib_view_controller.mibBuilder
+    scalar, column = mib_builder.importSymbols('SNMPv2-SMI', 'MibScalar',
+                                               'MibTableColumn')
+    # Each builder has its own, None when no MIB imports SNMPv2-TC
+    textual_convention = mib_builder.mibSymbols.get(
+        'SNMPv2-TC', {}).get('TextualConvention')
+    records = []
+    try:
+        oid, __, __ = mib_view_controller.getFirstNodeName()
+        while True:
+            mod_name, sym_name, __ = mib_view_controller.getNodeLocation(oid)
+            node, = mib_builder.importSymbols(mod_name, sym_name)
+            kind, syntax = OTHER, None
+            if isinstance(node, (scalar, column)):
+                kind = COLUMN if isinstance(node, column) else SCALAR
+                syntax = _dump_syntax(node.getSyntax(), textual_convention)
+            records.append(('.'.join(str(x) for x in oid).encode(),
+                            json.dumps([mod_name, sym_name, kind, syntax],
+                                       separators=(',', ':')).encode()))
+            oid, __, __ = mib_view_controller.getNextNodeName(oid)
+    except error.NoSuchObjectError:
+        pass
+    records.sort()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_file(cache_dir, mib_digest)
+    offset = _HEADER.size + _ENTRY.size * len(records)
+    entries, data = [], []
+    for key, record in records:
+        entries.append(_ENTRY.pack(offset, len(key), offset + len(key),
+                                   len(record)))
+        data += [key, record]
+        offset += len(key) + len(record)
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, bytes.fromhex(mib_digest),
+                             len(records)))
+        f.write(b''.join(entries))
+        f.write(b''.join(data))
+    os.replace(tmp_path, path)
+
+    for stale in glob.glob(os.path.join(
+            cache_dir, CACHE_FILE_PREFIX + '*' + CACHE_FILE_SUFFIX)):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except OSError as e:
+                LOG.warning('Failed to remove stale mib cache {0}: '
+                            '{1}'.format(stale, e))
+    return path
+
+
+class MibCache(object):
+    """MIB symbols read from a cache file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.digest, self.count = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError('%s is not a mib cache.' % path)
+        self.digest = self.digest.hex()
+        self._records = {}
+        self._syntaxes = {}
+
+    @classmethod
+    def open(cls, cache_dir, mib_digest):
+        """The cache of the MIBs of mib_digest, None if there is none."""
+        path = cache_file(cache_dir, mib_digest)
+        try:
+            cache = cls(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error) as e:
+            LOG.warning('Failed to open mib cache {0}: {1}'.format(path, e))
+            return None
+        if cache.digest != mib_digest:
+            cache.close()
+            return None
+        return cache
+
+    def close(self):
+        self._map.close()
+
+    def _find(self, key):
+        """Record of the dotted OID key, None if it is not cached."""
+        record = self._records.get(key)
+        if record is not None:
+            return record
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, record_offset, record_length = \
+                _ENTRY.unpack_from(self._map,
+                                   _HEADER.size + middle * _ENTRY.size)
+            middle_key = self._map[key_offset:key_offset + key_length]
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                record = json.loads(self._map[
+                    record_offset:record_offset + record_length].decode())
+                self._records[key] = record
+                return record
+        return None
+
+    def lookup(self, oid):
+        """(module, symbol, kind, syntax, suffix) of the node the nearest
+        to OID, None if no node is.
+        """
+        oid = tuple(oid)
+        for length in range(len(oid), 0, -1):
+            record = self._find('.'.join(str(x)
+                                         for x in oid[:length]).encode())
+            if record is not None:
+                return tuple(record) + (oid[length:],)
+        return None
+
+    def _syntax(self, oid, spec):
+        syntax = self._syntaxes.get(oid)
+        if syntax is None:
+            syntax = self._syntaxes[oid] = _load_syntax(spec)
+        return syntax
+
+    def resolve(self, oid, value):
+        """Resolve a var bind as resolveWithMib does.
+
+        :returns: the pretty print of the resolved var bind, e.g.
+                  'SNMPv2-MIB::sysUpTime.0 = 1234', but for the indices of
+                  table columns, printed as sub-identifiers. None when the
+                  cache can not resolve it alike, then the MIBs have to be
+                  loaded.
+        """
+        node = self.lookup(oid)
+        if node is None:
+            return None
+        mod_name, sym_name, kind, spec, suffix = node
+        name = self._pretty_name(mod_name, sym_name, suffix)
+        if kind == OTHER or isinstance(value, _SKIPPED_VALUES):
+            if not isinstance(value, AbstractSimpleAsn1Item):
+                return None
+            return '%s = %s' % (name, value.prettyPrint())
+        if spec == UNSUPPORTED:
+            return None
+        try:
+            value = self._syntax(tuple(oid[:len(oid) - len(suffix)]),
+                                 spec).clone(value)
+        except PyAsn1Error:
+            if not isinstance(value, AbstractSimpleAsn1Item):
+                return None
+        except Exception:
+            # Left to the MIBs to fail alike
+            return None
+        if rfc1902.ObjectIdentifier().isSuperTypeOf(value,
+                                                    matchConstraints=False):
+            target = self.lookup(value)
+            if target is None or (target[4] and target[2] == COLUMN):
+                # Indices are printed according to the syntax of the row
+                return None
+            return '%s = %s' % (name, self._pretty_name(target[0], target[1],
+                                                        target[4]))
+        return '%s = %s' % (name, value.prettyPrint())
+
+    @staticmethod
+    def _pretty_name(mod_name, sym_name, suffix):
+        name = '%s::%s' % (mod_name, sym_name)
+        if suffix:
+            name += '.' + '.'.join(str(x) for x in suffix)
+        return name
@@ -45,3 +45,10 @@ class AlertAPI(object):
                                  'sync_snmp_config',
                                  snmp_config_to_del=snmp_config_to_del,
                                  snmp_config_to_add=snmp_config_to_add)
+
+    def export_alerts(self, ctxt, storage_id, alert_models):
+        call_context = self.client.prepare(version='1.0')
+        return call_context.cast(ctxt,
+                                 'export_alerts',
+                                 storage_id=storage_id,
+                                 alert_models=alert_models)
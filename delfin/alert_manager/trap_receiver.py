@@ -15,6 +15,7 @@
 import os
 import re
 import six
+import socket
 
 from oslo_log import log
 from pysnmp.carrier.asyncore.dgram import udp
@@ -27,14 +28,24 @@ from delfin import context, cryptor
 from delfin import db
 from delfin import exception
 from delfin import manager
+from delfin import metrics
 from delfin.alert_manager import alert_processor
 from delfin.alert_manager import constants
+from delfin.alert_manager import mib_cache
 from delfin.common import constants as common_constants
 from delfin.db import api as db_api
 from delfin.i18n import _
 
 LOG = log.getLogger(__name__)
 
+TRAPS_RECEIVED = metrics.counter(
+    'delfin_traps_received_total',
+    'SNMP traps received by the trap receiver.')
+TRAPS_DROPPED = metrics.counter(
+    'delfin_traps_dropped_total',
+    'SNMP traps which failed to be processed, per error.',
+    ('reason',))
+
 # Mib file format to be loaded
 MIB_LOAD_FILE_FORMAT = '.py'
 
@@ -50,7 +61,12 @@ class TrapReceiver(manager.Manager):
         self.trap_receiver_address = kwargs.get('trap_receiver_address')
         self.trap_receiver_port = kwargs.get('trap_receiver_port')
         self.snmp_mib_path = kwargs.get('snmp_mib_path')
-        self.alert_processor = alert_processor.AlertProcessor()
+        self.snmp_mib_cache_path = kwargs.get('snmp_mib_cache_path')
+        self.mib_cache = None
+        self.trap_receiver_workers = kwargs.get('trap_receiver_workers', 1)
+        self.worker_index = 0
+        # Created in start, in the worker process when there are many
+        self.alert_processor = kwargs.get('alert_processor')
         super(TrapReceiver, self).__init__(host=kwargs.get('host'))
 
     def sync_snmp_config(self, ctxt, snmp_config_to_del=None,
@@ -61,6 +77,15 @@ class TrapReceiver(manager.Manager):
         if snmp_config_to_add is not None:
             self._add_snmp_config(ctxt, snmp_config_to_add)
 
+    def export_alerts(self, ctxt, storage_id, alert_models):
+        """Export the alerts polled from a storage by the task service."""
+        if self.alert_processor is None:
+            LOG.warning("Dropped %d polled alerts of storage %s, the trap "
+                        "receiver is not started." % (len(alert_models),
+                                                      storage_id))
+            return
+        self.alert_processor.export_alerts(ctxt, storage_id, alert_models)
+
     def _add_snmp_config(self, ctxt, new_config):
         LOG.info("Add snmp config:%s" % new_config)
         storage_id = new_config.get("storage_id")
@@ -165,13 +190,45 @@ class TrapReceiver(manager.Manager):
         except Exception:
             raise ValueError("Mib load failed.")
 
+    def _load_mibs(self):
+        """Loads the mibs, only the cache of them when it is up to date."""
+        if not self.snmp_mib_cache_path:
+            self._mib_builder()
+            return
+        try:
+            digest = mib_cache.digest(self.snmp_mib_path)
+            self.mib_cache = mib_cache.MibCache.open(
+                self.snmp_mib_cache_path, digest)
+        except Exception as e:
+            LOG.warning("Failed to read mib cache: %s" % e)
+            digest = None
+        if self.mib_cache is not None:
+            LOG.info("Loaded %d mib symbols from cache." %
+                     self.mib_cache.count)
+            return
+
+        self._mib_builder()
+        if digest is None:
+            return
+        try:
+            path = mib_cache.build(self.mib_view_controller,
+                                   self.snmp_mib_cache_path, digest)
+            self.mib_cache = mib_cache.MibCache(path)
+        except Exception as e:
+            LOG.warning("Failed to write mib cache: %s" % e)
+
     def _add_transport(self):
         """Configures the transport parameters for the snmp engine."""
         try:
+            transport = udp.UdpTransport()
+            if self.trap_receiver_workers > 1:
+                # Each worker process binds the same address and port
+                transport.socket.setsockopt(socket.SOL_SOCKET,
+                                            socket.SO_REUSEPORT, 1)
             config.addTransport(
                 self.snmp_engine,
                 udp.domainName,
-                udp.UdpTransport().openServerMode(
+                transport.openServerMode(
                     (self.trap_receiver_address, int(self.trap_receiver_port)))
             )
         except Exception:
@@ -184,9 +241,13 @@ class TrapReceiver(manager.Manager):
         oid = snmpTrapOID
         val = coldStart
         """
+        return TrapReceiver._parse_var_bind(var_bind.prettyPrint())
+
+    @staticmethod
+    def _parse_var_bind(var_bind_info):
+        """Extracts oid and value from the pretty print of a var bind."""
 
         # Separate out oid and value strings
-        var_bind_info = var_bind.prettyPrint()
         var_bind_info = var_bind_info.split("=", 1)
         oid = var_bind_info[0]
         val = var_bind_info[1]
@@ -203,6 +264,21 @@ class TrapReceiver(manager.Manager):
 
         return oid, val
 
+    def _resolve_var_bind(self, oid, value):
+        """Gets oid and value of a var bind from the mib cache, else from
+        the mibs, loaded at the first var bind not in the cache.
+        """
+        if self.mib_cache is not None:
+            var_bind_info = self.mib_cache.resolve(oid, value)
+            if var_bind_info is not None:
+                return self._parse_var_bind(var_bind_info)
+        if self.mib_view_controller is None:
+            self._mib_builder()
+        var_bind = rfc1902.ObjectType(
+            rfc1902.ObjectIdentity(oid), value).resolveWithMib(
+            self.mib_view_controller)
+        return self._extract_oid_value(var_bind)
+
     @staticmethod
     def _get_alert_source_by_host(source_ip):
         """Gets alert source for given source ip address."""
@@ -225,6 +301,7 @@ class TrapReceiver(manager.Manager):
     def _cb_fun(self, state_reference, context_engine_id, context_name,
                 var_binds, cb_ctx):
         """Callback function to process the incoming trap."""
+        TRAPS_RECEIVED.inc()
         exec_context = self.snmp_engine.observer.getExecutionContext(
             'rfc3412.receiveMessage:request')
         LOG.info('#Notification from %s \n#ContextEngineId: "%s" '
@@ -255,14 +332,10 @@ class TrapReceiver(manager.Manager):
                          "dropping it.") % source_ip)
                 raise exception.InvalidResults(msg)
 
-            var_binds = [rfc1902.ObjectType(
-                rfc1902.ObjectIdentity(x[0]), x[1]).resolveWithMib(
-                self.mib_view_controller) for x in var_binds]
-
             alert = {}
 
             for var_bind in var_binds:
-                oid, value = self._extract_oid_value(var_bind)
+                oid, value = self._resolve_var_bind(*var_bind)
                 alert[oid] = value
 
             # Fill additional info to alert info
@@ -273,9 +346,11 @@ class TrapReceiver(manager.Manager):
             self.alert_processor.process_alert_info(alert)
         except exception.DelfinException as e:
             # Log and end the trap processing error flow
+            TRAPS_DROPPED.inc(reason=type(e).__name__)
             err_msg = _("Failed to process alert report (%s).") % e.msg
             LOG.exception(err_msg)
         except Exception as e:
+            TRAPS_DROPPED.inc(reason=type(e).__name__)
             err_msg = six.text_type(e)
             LOG.exception(err_msg)
 
@@ -298,12 +373,15 @@ class TrapReceiver(manager.Manager):
 
     def start(self):
         """Starts the snmp trap receiver with necessary prerequisites."""
+        if self.alert_processor is None:
+            self.alert_processor = alert_processor.AlertProcessor(
+                self.worker_index)
         snmp_engine = engine.SnmpEngine()
         self.snmp_engine = snmp_engine
 
         try:
             # Load all the mibs and do snmp config
-            self._mib_builder()
+            self._load_mibs()
 
             self._load_snmp_config()
 
@@ -319,6 +397,7 @@ class TrapReceiver(manager.Manager):
             LOG.error(e)
             raise ValueError("Failed to setup for trap listener.")
 
+        self.alert_processor.start()
         try:
             LOG.info("Starting trap receiver.")
             snmp_engine.transportDispatcher.runDispatcher()
@@ -332,4 +411,6 @@ class TrapReceiver(manager.Manager):
         # process as it is shutdown
         if self.snmp_engine:
             self.snmp_engine.transportDispatcher.closeDispatcher()
+        if self.alert_processor:
+            self.alert_processor.stop()
         LOG.info("Trap receiver stopped.")
@@ -157,3 +157,14 @@ def get_sort_params(params, default_key='created_at', default_dir='desc'):
         sort_keys.append(sort_key.strip())
         sort_dirs.append(sort_dir.strip())
     return sort_keys, sort_dirs
+
+
+def build_error(e):
+    """The error body of exception e as in error responses, for the
+    outcome of an item of a batch request.
+    """
+    if not isinstance(e, exception.DelfinException):
+        e = exception.DelfinException()
+    return {'error_code': e.error_code,
+            'error_msg': e.msg,
+            'error_args': e.error_args}
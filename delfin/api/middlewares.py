@@ -12,16 +12,60 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+
 import webob.dec
 
 from delfin import context
+from delfin import metrics
+from delfin import tracing
 from delfin.wsgi import common as wsgi
 
+REQUEST_SECONDS = metrics.histogram(
+    'delfin_api_request_duration_seconds',
+    'Duration of the API requests per route.',
+    ('method', 'route', 'status'))
+
 
 class ContextWrapper(wsgi.Middleware):
-    """Add 'delfin.context' to req.environ"""
+    """Add 'delfin.context' to req.environ and trace the request.
+
+    A request with a W3C traceparent header joins the caller's trace.
+    """
+
+    @webob.dec.wsgify(RequestClass=wsgi.Request)
+    def __call__(self, req):
+        trace_id, span_id = tracing.parse_traceparent(
+            req.headers.get('traceparent'))
+        ctxt = context.RequestContext(trace_id=trace_id, span_id=span_id)
+        req.environ['delfin.context'] = ctxt
+        if not tracing.enabled():
+            return self.application
+        with tracing.span('api ' + req.method, ctxt,
+                          kind=tracing.KIND_SERVER,
+                          **{'http.method': req.method,
+                             'http.target': req.path}) as span:
+            res = req.get_response(self.application)
+            span.set_attribute('http.status_code', res.status_int)
+            res.headers['X-Trace-Id'] = span.trace_id
+            return res
+
+
+class RequestMetrics(wsgi.Middleware):
+    """Time the requests per route, as routed by the API router."""
 
     @webob.dec.wsgify(RequestClass=wsgi.Request)
     def __call__(self, req):
-        req.environ['delfin.context'] = context.RequestContext()
-        return self.application
+        begin = time.perf_counter()
+        status = 500
+        try:
+            res = req.get_response(self.application)
+            status = res.status_int
+            return res
+        finally:
+            # Route templates, not paths, to keep the label values bounded
+            route = req.environ.get('routes.route')
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - begin, method=req.method,
+                route=route.routepath if route is not None else 'unmatched',
+                status=status)
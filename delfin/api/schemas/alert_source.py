@@ -38,3 +38,25 @@ put = {
     'required': ['host', 'version'],
     'additionalProperties': False,
 }
+
+batch_put = {
+    'type': 'object',
+    'properties': {
+        'alert_sources': {
+            'type': 'array',
+            'minItems': 1,
+            'maxItems': 1000,
+            'items': {
+                'type': 'object',
+                'properties': dict(put['properties'],
+                                   storage_id={'type': 'string',
+                                               'minLength': 1,
+                                               'maxLength': 36}),
+                'required': ['storage_id'] + put['required'],
+                'additionalProperties': False,
+            },
+        },
+    },
+    'required': ['alert_sources'],
+    'additionalProperties': False,
+}
@@ -65,3 +65,17 @@ create = {
     ],
     'additionalProperties': False
 }
+
+batch_create = {
+    'type': 'object',
+    'properties': {
+        'storages': {
+            'type': 'array',
+            'minItems': 1,
+            'maxItems': 1000,
+            'items': create,
+        },
+    },
+    'required': ['storages'],
+    'additionalProperties': False,
+}
@@ -12,11 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import eventlet
 from oslo_log import log
 
 from delfin import db, cryptor
 from delfin import exception
 from delfin.alert_manager import rpcapi
+from delfin.api import api_utils
 from delfin.api import validation
 from delfin.api.common import wsgi
 from delfin.api.schemas import alert_source as schema_alert
@@ -42,8 +44,47 @@ class AlertSourceController(wsgi.Controller):
         alert_source = body
 
         alert_source["storage_id"] = id
+        return self._put(ctx, id, alert_source,
+                         snmp_validator.get_deadline())
+
+    @wsgi.response(200)
+    @validation.schema(schema_alert.batch_put)
+    def batch_put(self, req, body):
+        """Create or update the alert sources of many storages.
+
+        Their connectivity is validated concurrently, the response has the
+        outcome of each of them in the request order.
+        """
+        ctx = req.environ['delfin.context']
+        alert_sources = body['alert_sources']
+        storage_ids = [source['storage_id'] for source in alert_sources]
+        if len(set(storage_ids)) != len(storage_ids):
+            msg = "Each storage_id can be given at most once."
+            raise exception.InvalidInput(msg)
+        # The validations are bounded by the pool of snmp_validator
+        pool = eventlet.GreenPool(len(alert_sources))
+        deadline = snmp_validator.get_deadline()
+
+        def _put_one(alert_source):
+            storage_id = alert_source['storage_id']
+            try:
+                return {'storage_id': storage_id,
+                        'status': 'success',
+                        'alert_source': self._put(ctx, storage_id,
+                                                  alert_source, deadline)}
+            except Exception as e:
+                if not isinstance(e, exception.DelfinException):
+                    LOG.exception('Failed to put alert source of storage '
+                                  '%s: %s', storage_id, e)
+                return {'storage_id': storage_id,
+                        'status': 'failed',
+                        'error': api_utils.build_error(e)}
+
+        return {'alert_sources': list(pool.imap(_put_one, alert_sources))}
+
+    def _put(self, ctx, id, alert_source, deadline):
         db.storage_get(ctx, id)
-        alert_source = self._input_check(alert_source)
+        alert_source = self._input_check(alert_source, deadline)
 
         snmp_config_to_del = self._get_snmp_config_brief(ctx, id)
         if snmp_config_to_del is not None:
@@ -75,7 +116,7 @@ class AlertSourceController(wsgi.Controller):
         else:
             raise exception.AlertSourceNotFound(id)
 
-    def _input_check(self, alert_source):
+    def _input_check(self, alert_source, deadline=None):
         version = alert_source.get('version')
         plain_auth_key = None
         plain_priv_key = None
@@ -142,7 +183,8 @@ class AlertSourceController(wsgi.Controller):
         # update if valid
         alert_source = snmp_validator.validate_connectivity(alert_source,
                                                             plain_auth_key,
-                                                            plain_priv_key)
+                                                            plain_priv_key,
+                                                            deadline)
 
         return alert_source
 
@@ -15,7 +15,9 @@
 from oslo_log import log
 
 from delfin import db
+from delfin.api import api_utils
 from delfin.api.common import wsgi
+from delfin.api.views import alerts as alert_view
 from delfin.drivers import api as driver_manager
 
 LOG = log.getLogger(__name__)
@@ -25,6 +27,32 @@ class AlertController(wsgi.Controller):
     def __init__(self):
         super().__init__()
         self.driver_manager = driver_manager.API()
+        self.search_options = ['alert_id', 'sequence_number', 'alert_name',
+                               'severity', 'category', 'type',
+                               'resource_type', 'location']
+
+    def _get_alerts_search_options(self):
+        """Return alerts search options allowed ."""
+        return self.search_options
+
+    def index(self, req, id):
+        """List the active alerts of a storage, as of its last alert poll."""
+        ctxt = req.environ['delfin.context']
+        # Raise StorageNotFound for an unknown storage
+        db.storage_get(ctxt, id)
+        query_params = {}
+        query_params.update(req.GET)
+        # update options  other than filters
+        sort_keys, sort_dirs = api_utils.get_sort_params(query_params)
+        marker, limit, offset = api_utils.get_pagination_params(query_params)
+        # strip out options except supported search  options
+        api_utils.remove_invalid_options(ctxt, query_params,
+                                         self._get_alerts_search_options())
+        query_params['storage_id'] = id
+
+        alerts = db.alert_get_all(ctxt, marker, limit, sort_keys, sort_dirs,
+                                  query_params, offset)
+        return alert_view.build_alerts(alerts)
 
     @wsgi.response(200)
     def delete(self, req, id, sequence_number):
@@ -0,0 +1,51 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+import eventlet
+from oslo_config import cfg
+
+from delfin import db
+from delfin.api import api_utils
+from delfin.api.common import wsgi
+from delfin.api.views import jobs as job_view
+from delfin.common import constants
+
+CONF = cfg.CONF
+
+
+class JobController(wsgi.Controller):
+
+    def show(self, req, id):
+        """Show a job, after waiting up to the wait query parameter
+        seconds for it to finish.
+        """
+        ctxt = req.environ['delfin.context']
+        wait = api_utils.validate_integer(req.GET.get('wait', 0), 'wait',
+                                          0, CONF.job_max_wait)
+        deadline = time.monotonic() + wait
+        while True:
+            job, tasks = db.job_get(ctxt, id)
+            if job_view.job_status(tasks) in constants.JobStatus.FINISHED:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            eventlet.sleep(min(CONF.job_poll_interval, remaining))
+        return job_view.build_job(job, tasks)
+
+
+def create_resource():
+    return wsgi.Resource(JobController())
@@ -17,8 +17,10 @@ from delfin.api import extensions
 from delfin.api.v1 import access_info
 from delfin.api.v1 import alert_source
 from delfin.api.v1 import alerts
+from delfin.api.v1 import jobs
 from delfin.api.v1 import storage_pools
 from delfin.api.v1 import storages
+from delfin.api.v1 import sync_history
 from delfin.api.v1 import volumes
 
 
@@ -39,6 +41,11 @@ class APIRouter(common.APIRouter):
                        action="sync_all",
                        conditions={"method": ["POST"]})
 
+        mapper.connect("storages", "/storages/batch",
+                       controller=self.resources['storages'],
+                       action="batch_create",
+                       conditions={"method": ["POST"]})
+
         self.resources['access_info'] = access_info.create_resource()
         mapper.connect("storages", "/storages/{id}/access-info",
                        controller=self.resources['access_info'],
@@ -51,6 +58,10 @@ class APIRouter(common.APIRouter):
                        conditions={"method": ["PUT"]})
 
         self.resources['alert_sources'] = alert_source.create_resource()
+        mapper.connect("storages", "/storages/alert-sources",
+                       controller=self.resources['alert_sources'],
+                       action="batch_put",
+                       conditions={"method": ["POST"]})
         mapper.connect("storages", "/storages/{id}/alert-source",
                        controller=self.resources['alert_sources'],
                        action="put",
@@ -65,11 +76,27 @@ class APIRouter(common.APIRouter):
                        conditions={"method": ["DELETE"]})
 
         self.resources['alerts'] = alerts.create_resource()
+        mapper.connect("storages", "/storages/{id}/alerts",
+                       controller=self.resources['alerts'],
+                       action="index",
+                       conditions={"method": ["GET"]})
         mapper.connect("storages", "/storages/{id}/alerts/{sequence_number}",
                        controller=self.resources['alerts'],
                        action="delete",
                        conditions={"method": ["DELETE"]})
 
+        self.resources['sync_history'] = sync_history.create_resource()
+        mapper.connect("storages", "/storages/{id}/sync-history",
+                       controller=self.resources['sync_history'],
+                       action="index",
+                       conditions={"method": ["GET"]})
+
+        self.resources['jobs'] = jobs.create_resource()
+        mapper.connect("jobs", "/jobs/{id}",
+                       controller=self.resources['jobs'],
+                       action="show",
+                       conditions={"method": ["GET"]})
+
         self.resources['storage-pools'] = storage_pools.create_resource()
         mapper.resource("storage-pool", "storage-pools",
                         controller=self.resources['storage-pools'])
@@ -25,6 +25,7 @@ from delfin.api import api_utils
 from delfin.api import validation
 from delfin.api.common import wsgi
 from delfin.api.schemas import storages as schema_storages
+from delfin.api.views import jobs as job_view
 from delfin.api.views import storages as storage_view
 from delfin.common import constants
 from delfin.drivers import api as driverapi
@@ -66,7 +67,8 @@ class StorageController(wsgi.Controller):
     def show(self, req, id):
         ctxt = req.environ['delfin.context']
         storage = db.storage_get(ctxt, id)
-        return storage_view.build_storage(storage)
+        last_syncs = db.sync_history_get_latest(ctxt, id)
+        return storage_view.build_storage(storage, last_syncs)
 
     @wsgi.response(201)
     @validation.schema(schema_storages.create)
@@ -100,17 +102,60 @@ class StorageController(wsgi.Controller):
             LOG.error(msg)
         return storage_view.build_storage(storage)
 
+    @wsgi.response(200)
+    @validation.schema(schema_storages.batch_create)
+    def batch_create(self, req, body):
+        """Register many storage devices.
+
+        The storages are discovered concurrently and saved in bulk, then
+        their resources are synced. The response has the outcome of each
+        storage in the request order.
+        """
+        ctxt = req.environ['delfin.context']
+        results = [None] * len(body['storages'])
+        access_infos = []
+        indexes = []
+        for index, access_info_dict in enumerate(body['storages']):
+            if self._storage_exist(ctxt, access_info_dict):
+                results[index] = exception.StorageAlreadyExists()
+            else:
+                access_infos.append(access_info_dict)
+                indexes.append(index)
+
+        storages = self.driver_api.discover_storages(
+            ctxt, access_infos, CONF.storage_discovery_workers)
+        job_ids = {}
+        for index, storage in zip(indexes, storages):
+            results[index] = storage
+            if isinstance(storage, Exception):
+                continue
+            # Registration success, sync resource collection for this storage
+            try:
+                job_ids[index] = self.sync(req, storage['id'])['job']['id']
+            except Exception as e:
+                # Unexpected error occurred, while syncing resources.
+                msg = _('Failed to sync resources for storage: %(storage)s. '
+                        'Error: %(err)s') % {'storage': storage['id'],
+                                             'err': e}
+                LOG.error(msg)
+
+        return {'storages': [_build_result(result, job_ids.get(index))
+                             for index, result in enumerate(results)]}
+
     @wsgi.response(202)
     def delete(self, req, id):
         ctxt = req.environ['delfin.context']
         storage = db.storage_get(ctxt, id)
 
+        job, tasks = _create_job(ctxt, 'delete', [storage['id']])
         for subclass in task.StorageResourceTask.__subclasses__():
             self.task_rpcapi.remove_storage_resource(
                 ctxt,
                 storage['id'],
-                subclass.__module__ + '.' + subclass.__name__)
+                subclass.__module__ + '.' + subclass.__name__,
+                job_id=job['id'])
         self.task_rpcapi.remove_storage_in_cache(ctxt, storage['id'])
+        return job_view.build_job(job, tasks)
 
     @wsgi.response(202)
     def sync_all(self, req):
@@ -127,6 +172,7 @@ class StorageController(wsgi.Controller):
                   format(len(storages)))
         resource_count = len(task.StorageResourceTask.__subclasses__())
 
+        storage_ids = []
         for storage in storages:
             try:
                 _set_synced_if_ok(ctxt, storage['id'], resource_count)
@@ -135,11 +181,17 @@ class StorageController(wsgi.Controller):
                          % (storage['id'], e.msg))
                 continue
             else:
-                for subclass in task.StorageResourceTask.__subclasses__():
-                    self.task_rpcapi.sync_storage_resource(
-                        ctxt,
-                        storage['id'],
-                        subclass.__module__ + '.' + subclass.__name__)
+                storage_ids.append(storage['id'])
+
+        job, tasks = _create_job(ctxt, 'sync_all', storage_ids)
+        for storage_id in storage_ids:
+            for subclass in task.StorageResourceTask.__subclasses__():
+                self.task_rpcapi.sync_storage_resource(
+                    ctxt,
+                    storage_id,
+                    subclass.__module__ + '.' + subclass.__name__,
+                    job_id=job['id'])
+        return job_view.build_job(job, tasks)
 
     @wsgi.response(202)
     def sync(self, req, id):
@@ -152,11 +204,14 @@ class StorageController(wsgi.Controller):
         storage = db.storage_get(ctxt, id)
         resource_count = len(task.StorageResourceTask.__subclasses__())
         _set_synced_if_ok(ctxt, storage['id'], resource_count)
+        job, tasks = _create_job(ctxt, 'sync', [storage['id']])
         for subclass in task.StorageResourceTask.__subclasses__():
             self.task_rpcapi.sync_storage_resource(
                 ctxt,
                 storage['id'],
-                subclass.__module__ + '.' + subclass.__name__)
+                subclass.__module__ + '.' + subclass.__name__,
+                job_id=job['id'])
+        return job_view.build_job(job, tasks)
 
     def _storage_exist(self, context, access_info):
         access_info_dict = copy.deepcopy(access_info)
@@ -193,6 +248,28 @@ def create_resource():
     return wsgi.Resource(StorageController())
 
 
+def _build_result(result, job_id=None):
+    """The outcome of one storage of a batch request, with the job of its
+    initial sync if any.
+    """
+    if isinstance(result, Exception):
+        return {'status': 'failed', 'error': api_utils.build_error(result)}
+    return {'status': 'success',
+            'storage': storage_view.build_storage(result),
+            'job_id': job_id}
+
+
+def _create_job(context, action, storage_ids):
+    """Create a job of a task per storage resource of each storage."""
+    tasks = [{'storage_id': storage_id,
+              'task': subclass.__name__,
+              'status': constants.JobStatus.PENDING}
+             for storage_id in storage_ids
+             for subclass in task.StorageResourceTask.__subclasses__()]
+    return db.job_create(context, {'action': action}, tasks,
+                         CONF.job_expiration)
+
+
 @coordination.synchronized('{storage_id}')
 def _set_synced_if_ok(context, storage_id, resource_count):
     try:
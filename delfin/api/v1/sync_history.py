@@ -0,0 +1,52 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from delfin import db
+from delfin.api import api_utils
+from delfin.api.common import wsgi
+from delfin.api.views import sync_history as sync_history_view
+
+
+class SyncHistoryController(wsgi.Controller):
+
+    def __init__(self):
+        super(SyncHistoryController, self).__init__()
+        self.search_options = ['resource', 'mode', 'status', 'error']
+
+    def _get_sync_history_search_options(self):
+        """Return sync history search options allowed ."""
+        return self.search_options
+
+    def index(self, req, id):
+        ctxt = req.environ['delfin.context']
+        # Raise StorageNotFound for an unknown storage
+        db.storage_get(ctxt, id)
+        query_params = {}
+        query_params.update(req.GET)
+        # update options  other than filters
+        sort_keys, sort_dirs = api_utils.get_sort_params(query_params)
+        marker, limit, offset = api_utils.get_pagination_params(query_params)
+        # strip out options except supported search  options
+        api_utils.remove_invalid_options(
+            ctxt, query_params, self._get_sync_history_search_options())
+        query_params['storage_id'] = id
+
+        sync_histories = db.sync_history_get_all(ctxt, marker, limit,
+                                                 sort_keys, sort_dirs,
+                                                 query_params, offset)
+        return sync_history_view.build_sync_histories(sync_histories)
+
+
+def create_resource():
+    return wsgi.Resource(SyncHistoryController())
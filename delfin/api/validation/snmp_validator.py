@@ -11,6 +11,9 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import time
+
+import eventlet
 import six
 from oslo_config import cfg
 from pyasn1.type.univ import OctetString
@@ -22,6 +25,21 @@ from delfin.i18n import _
 
 CONF = cfg.CONF
 
+# Bounds the validations of the API worker, created on first use
+_POOL = None
+
+
+def _get_pool():
+    global _POOL
+    if _POOL is None:
+        _POOL = eventlet.GreenPool(CONF.snmp_validation_workers)
+    return _POOL
+
+
+def get_deadline():
+    """Time, as of time.monotonic(), validations of a request end by."""
+    return time.monotonic() + CONF.snmp_validation_timeout
+
 
 def validate_engine_id(engine_id):
     # Validate engine_id, check octet string can be formed from it
@@ -33,7 +51,14 @@ def validate_engine_id(engine_id):
         raise exception.InvalidInput(msg)
 
 
-def validate_connectivity(alert_source, plain_auth_key, plain_priv_key):
+def validate_connectivity(alert_source, plain_auth_key, plain_priv_key,
+                          deadline=None):
+    """Validate the alert source through an SNMP get to it.
+
+    The get runs in the bounded validation pool. It fails if it does not
+    end by deadline, get_deadline() if not set, its timeout is shortened
+    so that it does not hold a pool worker longer.
+    """
     # Fill optional parameters with default values if not set in input
     if not alert_source.get('port'):
         alert_source['port'] = constants.DEFAULT_SNMP_CONNECT_PORT
@@ -50,49 +75,15 @@ def validate_connectivity(alert_source, plain_auth_key, plain_priv_key):
     if CONF.snmp_validation_enabled is False:
         return alert_source
 
-    cmd_gen = cmdgen.CommandGenerator()
-
-    version = alert_source.get('version')
-    error_indication = None
+    if deadline is None:
+        deadline = get_deadline()
 
     # Connect to alert source through snmp get to check the configuration
     try:
-        if version.lower() == 'snmpv3':
-            auth_protocol = None
-            privacy_protocol = None
-            if alert_source['auth_protocol'] is not None:
-                auth_protocol = constants.AUTH_PROTOCOL_MAP.get(
-                    alert_source['auth_protocol'].lower())
-            if alert_source['privacy_protocol'] is not None:
-                privacy_protocol = constants.PRIVACY_PROTOCOL_MAP.get(
-                    alert_source['privacy_protocol'].lower())
-
-            error_indication, __, __, __ = cmd_gen.getCmd(
-                cmdgen.UsmUserData(alert_source['username'],
-                                   authKey=plain_auth_key,
-                                   privKey=plain_priv_key,
-                                   authProtocol=auth_protocol,
-                                   privProtocol=privacy_protocol),
-                cmdgen.UdpTransportTarget((alert_source['host'],
-                                           alert_source['port']),
-                                          timeout=alert_source[
-                                              'expiration'],
-                                          retries=alert_source[
-                                              'retry_num']),
-                constants.SNMP_QUERY_OID,
-            )
-        else:
-            error_indication, __, __, __ = cmd_gen.getCmd(
-                cmdgen.CommunityData(alert_source['community_string'],
-                                     contextName=alert_source['context_name']),
-                cmdgen.UdpTransportTarget((alert_source['host'],
-                                           alert_source['port']),
-                                          timeout=alert_source[
-                                              'expiration'],
-                                          retries=alert_source[
-                                              'retry_num']),
-                constants.SNMP_QUERY_OID,
-            )
+        with eventlet.Timeout(max(deadline - time.monotonic(), 0)):
+            error_indication = _get_pool().spawn(
+                _snmp_get, alert_source, plain_auth_key, plain_priv_key,
+                deadline).wait()
 
         if not error_indication:
             return alert_source
@@ -100,9 +91,60 @@ def validate_connectivity(alert_source, plain_auth_key, plain_priv_key):
         # Prepare exception with error_indication
         msg = (_("configuration validation failed with alert source for "
                  "reason: %s.") % error_indication)
+    except eventlet.Timeout:
+        msg = (_("configuration validation failed with alert source for "
+                 "reason: no response in %s seconds.")
+               % CONF.snmp_validation_timeout)
     except Exception as e:
         msg = (_("configuration validation failed with alert source for "
                  "reason: %s.") % six.text_type(e))
 
     # Since validation occur error, raise exception
     raise exception.InvalidResults(msg)
+
+
+def _snmp_get(alert_source, plain_auth_key, plain_priv_key, deadline):
+    """Get SNMP_QUERY_OID from the alert source, the attempts ending by
+    deadline.
+
+    :returns: the error indication of the get, if any
+    """
+    attempts = alert_source['retry_num'] + 1
+    timeout = min(alert_source['expiration'],
+                  (deadline - time.monotonic()) / attempts)
+    if timeout <= 0:
+        return _("no time left to validate it")
+    transport_target = cmdgen.UdpTransportTarget(
+        (alert_source['host'], alert_source['port']),
+        timeout=timeout,
+        retries=alert_source['retry_num'])
+
+    cmd_gen = cmdgen.CommandGenerator()
+    version = alert_source.get('version')
+    if version.lower() == 'snmpv3':
+        auth_protocol = None
+        privacy_protocol = None
+        if alert_source['auth_protocol'] is not None:
+            auth_protocol = constants.AUTH_PROTOCOL_MAP.get(
+                alert_source['auth_protocol'].lower())
+        if alert_source['privacy_protocol'] is not None:
+            privacy_protocol = constants.PRIVACY_PROTOCOL_MAP.get(
+                alert_source['privacy_protocol'].lower())
+
+        error_indication, __, __, __ = cmd_gen.getCmd(
+            cmdgen.UsmUserData(alert_source['username'],
+                               authKey=plain_auth_key,
+                               privKey=plain_priv_key,
+                               authProtocol=auth_protocol,
+                               privProtocol=privacy_protocol),
+            transport_target,
+            constants.SNMP_QUERY_OID,
+        )
+    else:
+        error_indication, __, __, __ = cmd_gen.getCmd(
+            cmdgen.CommunityData(alert_source['community_string'],
+                                 contextName=alert_source['context_name']),
+            transport_target,
+            constants.SNMP_QUERY_OID,
+        )
+    return error_indication
@@ -0,0 +1,67 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from delfin.common import constants
+
+
+def job_status(tasks):
+    """The status of a job, from the status of its tasks."""
+    statuses = {task['status'] for task in tasks}
+    if statuses & {constants.JobStatus.PENDING,
+                   constants.JobStatus.RUNNING}:
+        if statuses == {constants.JobStatus.PENDING}:
+            return constants.JobStatus.PENDING
+        return constants.JobStatus.RUNNING
+    if constants.JobStatus.FAILED in statuses:
+        return constants.JobStatus.FAILED
+    return constants.JobStatus.SUCCESS
+
+
+def build_job(job, tasks):
+    tasks_view = [build_job_task(task) for task in tasks]
+    done = [task for task in tasks
+            if task['status'] in constants.JobStatus.FINISHED]
+    ended = [task['ended_at'] for task in done if task['ended_at']]
+    view = {
+        'id': job['id'],
+        'action': job['action'],
+        'status': job_status(tasks),
+        'progress': {
+            'total': len(tasks),
+            'done': len(done),
+            'failed': len([task for task in done if task['status'] ==
+                           constants.JobStatus.FAILED]),
+        },
+        'created_at': job['created_at'],
+        'ended_at': max(ended, default=job['created_at'])
+        if len(done) == len(tasks) else None,
+        'tasks': tasks_view,
+    }
+    return dict(job=view)
+
+
+def build_job_task(task):
+    duration = None
+    if task['started_at'] and task['ended_at']:
+        duration = round(
+            (task['ended_at'] - task['started_at']).total_seconds(), 3)
+    return {
+        'storage_id': task['storage_id'],
+        'task': task['task'],
+        'status': task['status'],
+        'error': task['error'],
+        'started_at': task['started_at'],
+        'ended_at': task['ended_at'],
+        'duration': duration,
+    }
@@ -13,6 +13,7 @@
 # limitations under the License.
 import copy
 
+from delfin.api.views import sync_history as sync_history_view
 from delfin.common import constants
 
 
@@ -23,10 +24,15 @@ def build_storages(storages):
     return dict(storages=views)
 
 
-def build_storage(storage):
+def build_storage(storage, last_syncs=None):
     view = copy.deepcopy(storage)
     if view['sync_status'] == constants.SyncStatus.SYNCED:
         view['sync_status'] = 'SYNCED'
     else:
         view['sync_status'] = 'SYNCING'
-    return dict(view)
+    view = dict(view)
+    # Internal state of incremental sync
+    view.pop('sync_watermarks', None)
+    if last_syncs is not None:
+        view['last_sync'] = sync_history_view.build_last_syncs(last_syncs)
+    return view
@@ -0,0 +1,32 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import copy
+
+
+def build_sync_histories(sync_histories):
+    # Build list of sync history records
+    views = [build_sync_history(sync_history)
+             for sync_history in sync_histories]
+    return dict(sync_history=views)
+
+
+def build_sync_history(sync_history):
+    view = copy.deepcopy(sync_history)
+    return dict(view)
+
+
+def build_last_syncs(sync_histories):
+    # The latest sync of each resource, by resource
+    return {sync_history['resource']: build_sync_history(sync_history)
+            for sync_history in sync_histories}
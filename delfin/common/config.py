@@ -91,10 +91,43 @@ global_opts = [
     cfg.IntOpt('sync_task_expiration',
                default=1800,
                help='Sync task expiration in seconds.'),
+    cfg.IntOpt('job_expiration',
+               default=86400,
+               min=0,
+               help='Seconds the jobs of asynchronous API operations are '
+                    'kept for, 0 means to keep them all.'),
+    cfg.IntOpt('job_max_wait',
+               default=60,
+               min=0,
+               help='Seconds a job request waits at most for the job to '
+                    'finish.'),
+    cfg.FloatOpt('job_poll_interval',
+                 default=1.0,
+                 min=0.1,
+                 help='Seconds between two reads of a job a job request '
+                      'waits for.'),
+    cfg.IntOpt('storage_discovery_workers',
+               default=16,
+               min=1,
+               help='Storages discovered at once by a batch registration '
+                    'request.'),
     cfg.BoolOpt('snmp_validation_enabled',
                 default=True,
                 help='Whether alert source configuration to be validated '
                      'through snmp connectivity.'),
+    cfg.IntOpt('snmp_validation_workers',
+               default=16,
+               min=1,
+               help='SNMP connectivity validations an API worker runs at '
+                    'once, the others wait for one of them to end.'),
+    cfg.IntOpt('snmp_validation_timeout',
+               default=30,
+               min=1,
+               help='Seconds an alert source request waits at most for the '
+                    'SNMP connectivity validations of its alert sources, '
+                    'waiting for a free validation worker included. The '
+                    'expiration of the SNMP requests is shortened to meet '
+                    'it.'),
 ]
 
 CONF.register_opts(global_opts)
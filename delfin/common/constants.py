@@ -57,6 +57,38 @@ class SyncStatus(object):
     SYNCED = 0
 
 
+class SyncMode(object):
+    FULL = 'full'
+    INCREMENTAL = 'incremental'
+
+    ALL = (FULL, INCREMENTAL)
+
+
+class SyncResult(object):
+    SUCCESS = 'success'
+    FAILED = 'failed'
+
+    ALL = (SUCCESS, FAILED)
+
+
+class JobStatus(object):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    FAILED = 'failed'
+
+    ALL = (PENDING, RUNNING, SUCCESS, FAILED)
+    FINISHED = (SUCCESS, FAILED)
+
+
+class CircuitState(object):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    ALL = (CLOSED, OPEN, HALF_OPEN)
+
+
 class VolumeType(object):
     THICK = 'thick'
     THIN = 'thin'
@@ -38,7 +38,8 @@ class RequestContext(context.RequestContext):
                  read_deleted="no", roles=None, remote_address=None,
                  timestamp=None, request_id=None, auth_token=None,
                  overwrite=True, quota_class=None,
-                 service_catalog=None, **kwargs):
+                 service_catalog=None, trace_id=None, span_id=None,
+                 **kwargs):
         """Initialize RequestContext.
 
         :param read_deleted: 'no' indicates deleted records are hidden, 'yes'
@@ -48,6 +49,10 @@ class RequestContext(context.RequestContext):
         :param overwrite: Set to False to ensure that the greenthread local
             copy of the index is not overwritten.
 
+        :param trace_id: Trace the request belongs to, see delfin.tracing.
+
+        :param span_id: Span of the caller in the trace.
+
         :param kwargs: Extra arguments that might be present, but we ignore
             because they possibly came in from older rpc messages.
         """
@@ -86,6 +91,8 @@ class RequestContext(context.RequestContext):
             self.service_catalog = []
 
         self.quota_class = quota_class
+        self.trace_id = trace_id
+        self.span_id = span_id
 
     def _get_read_deleted(self):
         return self._read_deleted
@@ -112,7 +119,9 @@ class RequestContext(context.RequestContext):
             'timestamp': self.timestamp.isoformat() if hasattr(
                 self, 'timestamp') else None,
             'quota_class': getattr(self, 'quota_class', None),
-            'service_catalog': getattr(self, 'service_catalog', None)})
+            'service_catalog': getattr(self, 'service_catalog', None),
+            'trace_id': getattr(self, 'trace_id', None),
+            'span_id': getattr(self, 'span_id', None)})
         return values
 
     @classmethod
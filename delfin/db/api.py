@@ -44,6 +44,8 @@ these objects be simple dictionaries.
 from oslo_config import cfg
 from oslo_db import api as db_api
 
+from delfin import tracing
+
 db_opts = [
     cfg.StrOpt('db_backend',
                default='sqlalchemy',
@@ -54,8 +56,9 @@ CONF = cfg.CONF
 CONF.register_opts(db_opts, "database")
 
 _BACKEND_MAPPING = {'sqlalchemy': 'delfin.db.sqlalchemy.api'}
-IMPL = db_api.DBAPI(CONF.database.db_backend, backend_mapping=_BACKEND_MAPPING,
-                    lazy=True)
+IMPL = tracing.trace_calls(
+    db_api.DBAPI(CONF.database.db_backend, backend_mapping=_BACKEND_MAPPING,
+                 lazy=True), 'db.')
 
 
 def register_db():
@@ -98,6 +101,11 @@ def storage_create(context, values):
     return IMPL.storage_create(context, values)
 
 
+def storages_create(context, values):
+    """Add multiple storage devices."""
+    return IMPL.storages_create(context, values)
+
+
 def storage_update(context, storage_id, values):
     """Update a storage device with the values dictionary."""
     return IMPL.storage_update(context, storage_id, values)
@@ -275,6 +283,11 @@ def access_info_create(context, values):
     return IMPL.access_info_create(context, values)
 
 
+def access_infos_create(context, values):
+    """Create multiple storage access information."""
+    return IMPL.access_infos_create(context, values)
+
+
 def access_info_update(context, storage_id, values):
     """Update a storage access information with the values dictionary."""
     return IMPL.access_info_update(context, storage_id, values)
@@ -362,3 +375,109 @@ def alert_source_get_all(context, marker=None, limit=None, sort_keys=None,
     """
     return IMPL.alert_source_get_all(context, marker, limit, sort_keys,
                                      sort_dirs, filters, offset)
+
+
+def sync_history_create(context, values, max_records=None):
+    """Create a sync history record from the values dictionary.
+
+    :param max_records: number of the latest records of the storage and
+                        resource to keep, older ones are deleted
+    """
+    return IMPL.sync_history_create(context, values, max_records)
+
+
+def sync_history_get_all(context, marker=None, limit=None, sort_keys=None,
+                         sort_dirs=None, filters=None, offset=None):
+    """Retrieves all sync history records.
+
+    If no sort parameters are specified then the returned records are
+    sorted first by the 'created_at' key in descending order.
+
+    :param context: context of this request, it's helpful to trace the request
+    :param marker: the last item of the previous page, used to determine the
+                   next page of results to return
+    :param limit: maximum number of items to return
+    :param sort_keys: list of attributes by which results should be sorted,
+                      paired with corresponding item in sort_dirs
+    :param sort_dirs: list of directions in which results should be sorted,
+                      paired with corresponding item in sort_keys, for example
+                      'desc' for descending order
+    :param filters: dictionary of filters
+    :param offset: number of items to skip
+    :returns: list of sync history records
+    """
+    return IMPL.sync_history_get_all(context, marker, limit, sort_keys,
+                                     sort_dirs, filters, offset)
+
+
+def sync_history_get_latest(context, storage_id):
+    """Get the latest sync history record of each resource of a storage."""
+    return IMPL.sync_history_get_latest(context, storage_id)
+
+
+def sync_history_delete_by_storage(context, storage_id):
+    """Delete all the sync history records of a storage device."""
+    return IMPL.sync_history_delete_by_storage(context, storage_id)
+
+
+def alerts_create(context, values):
+    """Create multiple active alerts."""
+    return IMPL.alerts_create(context, values)
+
+
+def alert_upsert(context, values):
+    """Create an active alert, or update the one of the same storage with
+    the same alert_id, sequence_number and location.
+    """
+    return IMPL.alert_upsert(context, values)
+
+
+def alerts_delete(context, alert_id_list):
+    """Delete multiple active alerts."""
+    return IMPL.alerts_delete(context, alert_id_list)
+
+
+def alert_get_all(context, marker=None, limit=None, sort_keys=None,
+                  sort_dirs=None, filters=None, offset=None):
+    """Retrieves all active alerts.
+
+    If no sort parameters are specified then the returned alerts are
+    sorted first by the 'created_at' key in descending order.
+
+    :param context: context of this request, it's helpful to trace the request
+    :param marker: the last item of the previous page, used to determine the
+                   next page of results to return
+    :param limit: maximum number of items to return
+    :param sort_keys: list of attributes by which results should be sorted,
+                      paired with corresponding item in sort_dirs
+    :param sort_dirs: list of directions in which results should be sorted,
+                      paired with corresponding item in sort_keys, for example
+                      'desc' for descending order
+    :param filters: dictionary of filters
+    :param offset: number of items to skip
+    :returns: list of alerts
+    """
+    return IMPL.alert_get_all(context, marker, limit, sort_keys, sort_dirs,
+                              filters, offset)
+
+
+def alert_delete_by_storage(context, storage_id):
+    """Delete all the active alerts of a storage device."""
+    return IMPL.alert_delete_by_storage(context, storage_id)
+
+
+def job_create(context, values, tasks, expiration=None):
+    """Create a job and its tasks, remove the jobs created more than
+    expiration seconds ago.
+    """
+    return IMPL.job_create(context, values, tasks, expiration)
+
+
+def job_get(context, job_id):
+    """Get a job and its tasks."""
+    return IMPL.job_get(context, job_id)
+
+
+def job_task_update(context, job_id, storage_id, task, values):
+    """Update the task of a job run on a storage."""
+    return IMPL.job_task_update(context, job_id, storage_id, task, values)
@@ -19,6 +19,7 @@
 
 """Implementation of SQLAlchemy backend."""
 
+import datetime
 import sys
 
 import six
@@ -28,6 +29,7 @@ from oslo_db import options as db_options
 from oslo_db.sqlalchemy import session
 from oslo_db.sqlalchemy import utils as db_utils
 from oslo_log import log
+from oslo_utils import timeutils
 from oslo_utils import uuidutils
 from sqlalchemy import create_engine
 
@@ -172,6 +174,24 @@ def access_info_create(context, values):
                             session=session)
 
 
+def access_infos_create(context, access_infos):
+    """Create multiple storage access information."""
+    session = get_session()
+    access_info_refs = []
+    with session.begin():
+        for access_info in access_infos:
+            if not access_info.get('storage_id'):
+                access_info['storage_id'] = uuidutils.generate_uuid()
+
+            access_info_ref = models.AccessInfo()
+            access_info_ref.update(access_info)
+            access_info_refs.append(access_info_ref)
+
+        session.add_all(access_info_refs)
+
+    return access_info_refs
+
+
 def access_info_update(context, storage_id, values):
     """Update a storage access information with the values dictionary."""
     session = get_session()
@@ -248,6 +268,24 @@ def storage_create(context, values):
                         session=session)
 
 
+def storages_create(context, storages):
+    """Add multiple storage devices."""
+    session = get_session()
+    storage_refs = []
+    with session.begin():
+        for storage in storages:
+            if not storage.get('id'):
+                storage['id'] = uuidutils.generate_uuid()
+
+            storage_ref = models.Storage()
+            storage_ref.update(storage)
+            storage_refs.append(storage_ref)
+
+        session.add_all(storage_refs)
+
+    return storage_refs
+
+
 def storage_update(context, storage_id, values):
     """Update a storage device with the values dictionary."""
     session = get_session()
@@ -424,13 +462,24 @@ def volume_get_all(context, marker=None, limit=None, sort_keys=None,
         return query.all()
 
 
+def _filter_by_values(query, model, filters):
+    """Exact match filters, a list value matches any of its items."""
+    exact_filters = {}
+    for key, value in filters.items():
+        if isinstance(value, (list, tuple, set)):
+            query = query.filter(getattr(model, key).in_(value))
+        else:
+            exact_filters[key] = value
+    return query.filter_by(**exact_filters)
+
+
 @apply_like_filters(model=models.Volume)
 def _process_volume_info_filters(query, filters):
     """Common filter processing for volumes queries."""
     if filters:
         if not is_valid_model_filters(models.Volume, filters):
             return
-        query = query.filter_by(**filters)
+        query = _filter_by_values(query, models.Volume, filters)
 
     return query
 
@@ -577,7 +626,7 @@ def _process_storage_pool_info_filters(query, filters):
     if filters:
         if not is_valid_model_filters(models.StoragePool, filters):
             return
-        query = query.filter_by(**filters)
+        query = _filter_by_values(query, models.StoragePool, filters)
 
     return query
 
@@ -700,6 +749,256 @@ def alert_source_get_all(context, marker=None, limit=None, sort_keys=None,
         return query.all()
 
 
+def _sync_history_get_query(context, session=None):
+    return model_query(context, models.SyncHistory, session=session)
+
+
+def _sync_history_get(context, sync_history_id, session=None):
+    result = (_sync_history_get_query(context, session=session)
+              .filter_by(id=sync_history_id)
+              .first())
+
+    if not result:
+        raise exception.SyncHistoryNotFound(sync_history_id)
+
+    return result
+
+
+@apply_like_filters(model=models.SyncHistory)
+def _process_sync_history_filters(query, filters):
+    """Common filter processing for sync history queries."""
+    if filters:
+        if not is_valid_model_filters(models.SyncHistory, filters):
+            return
+        query = _filter_by_values(query, models.SyncHistory, filters)
+    return query
+
+
+def sync_history_create(context, values, max_records=None):
+    """Create a sync history record, keep the latest max_records ones of
+    the storage and resource.
+    """
+    if not values.get('id'):
+        values['id'] = uuidutils.generate_uuid()
+
+    record_ref = models.SyncHistory()
+    record_ref.update(values)
+
+    session = get_session()
+    with session.begin():
+        session.add(record_ref)
+        if max_records:
+            query = _sync_history_get_query(context, session).filter_by(
+                storage_id=values.get('storage_id'),
+                resource=values.get('resource'))
+            outdated = [row.id for row in query.with_entities(
+                models.SyncHistory.id).order_by(
+                models.SyncHistory.started_at.desc()).offset(max_records)]
+            if outdated:
+                query.filter(models.SyncHistory.id.in_(outdated)).delete(
+                    synchronize_session=False)
+
+    return record_ref
+
+
+def sync_history_get_all(context, marker=None, limit=None, sort_keys=None,
+                         sort_dirs=None, filters=None, offset=None):
+    """Retrieves all sync history records."""
+    session = get_session()
+    with session.begin():
+        query = _generate_paginate_query(context, session,
+                                         models.SyncHistory, marker, limit,
+                                         sort_keys, sort_dirs, filters,
+                                         offset)
+        if query is None:
+            return []
+        return query.all()
+
+
+def sync_history_get_latest(context, storage_id):
+    """Get the latest sync history record of each resource of a storage."""
+    session = get_session()
+    with session.begin():
+        latest = (_sync_history_get_query(context, session)
+                  .with_entities(models.SyncHistory.resource,
+                                 sqlalchemy.func.max(
+                                     models.SyncHistory.started_at)
+                                 .label('started_at'))
+                  .filter_by(storage_id=storage_id)
+                  .group_by(models.SyncHistory.resource)
+                  .subquery())
+        return (_sync_history_get_query(context, session)
+                .filter_by(storage_id=storage_id)
+                .join(latest, sqlalchemy.and_(
+                    models.SyncHistory.resource == latest.c.resource,
+                    models.SyncHistory.started_at == latest.c.started_at))
+                .all())
+
+
+def sync_history_delete_by_storage(context, storage_id):
+    """Delete all the sync history records of a storage device."""
+    _sync_history_get_query(context).filter_by(storage_id=storage_id).delete()
+
+
+def _alert_get_query(context, session=None):
+    return model_query(context, models.Alert, session=session)
+
+
+def _alert_get(context, alert_id, session=None):
+    result = (_alert_get_query(context, session=session)
+              .filter_by(id=alert_id)
+              .first())
+
+    if not result:
+        raise exception.AlertNotFound(alert_id)
+
+    return result
+
+
+@apply_like_filters(model=models.Alert)
+def _process_alert_filters(query, filters):
+    """Common filter processing for alert queries."""
+    if filters:
+        if not is_valid_model_filters(models.Alert, filters):
+            return
+        query = _filter_by_values(query, models.Alert, filters)
+    return query
+
+
+def alerts_create(context, alerts):
+    """Create multiple active alerts."""
+    session = get_session()
+    alert_refs = []
+    with session.begin():
+        for alert in alerts:
+            if not alert.get('id'):
+                alert['id'] = uuidutils.generate_uuid()
+
+            alert_ref = models.Alert()
+            alert_ref.update(alert)
+            alert_refs.append(alert_ref)
+
+        session.add_all(alert_refs)
+
+    return alert_refs
+
+
+def alert_upsert(context, values):
+    """Create an active alert, or update the one of the same storage with
+    the same alert_id, sequence_number and location.
+    """
+    columns = models.Alert.__table__.columns.keys()
+    values = {key: value for key, value in values.items()
+              if key in columns and key != 'id'}
+    session = get_session()
+    with session.begin():
+        alert_ref = _alert_get_query(context, session).filter_by(
+            storage_id=values['storage_id'],
+            alert_id=values.get('alert_id'),
+            sequence_number=values.get('sequence_number'),
+            location=values.get('location')).first()
+        if alert_ref is None:
+            alert_ref = models.Alert()
+            alert_ref.id = uuidutils.generate_uuid()
+        alert_ref.update(values)
+        session.add(alert_ref)
+
+    return alert_ref
+
+
+def alerts_delete(context, alert_id_list):
+    """Delete multiple active alerts."""
+    session = get_session()
+    with session.begin():
+        _alert_get_query(context, session).filter(
+            models.Alert.id.in_(alert_id_list)).delete(
+            synchronize_session=False)
+
+
+def alert_get_all(context, marker=None, limit=None, sort_keys=None,
+                  sort_dirs=None, filters=None, offset=None):
+    """Retrieves all active alerts."""
+    session = get_session()
+    with session.begin():
+        query = _generate_paginate_query(context, session, models.Alert,
+                                         marker, limit, sort_keys, sort_dirs,
+                                         filters, offset)
+        if query is None:
+            return []
+        return query.all()
+
+
+def alert_delete_by_storage(context, storage_id):
+    """Delete all the active alerts of a storage device."""
+    _alert_get_query(context).filter_by(storage_id=storage_id).delete()
+
+
+def _job_get_query(context, session=None):
+    return model_query(context, models.Job, session=session)
+
+
+def _job_task_get_query(context, session=None):
+    return model_query(context, models.JobTask, session=session)
+
+
+def job_create(context, values, tasks, expiration=None):
+    """Create a job and its tasks, remove the jobs created more than
+    expiration seconds ago.
+    """
+    if not values.get('id'):
+        values['id'] = uuidutils.generate_uuid()
+
+    job_ref = models.Job()
+    job_ref.update(values)
+    task_refs = []
+    for task in tasks:
+        task_ref = models.JobTask()
+        task_ref.update(task)
+        task_ref.id = uuidutils.generate_uuid()
+        task_ref.job_id = job_ref.id
+        task_refs.append(task_ref)
+
+    session = get_session()
+    with session.begin():
+        session.add(job_ref)
+        session.add_all(task_refs)
+        if expiration:
+            created_before = (timeutils.utcnow() -
+                              datetime.timedelta(seconds=expiration))
+            expired = [row.id for row in _job_get_query(
+                context, session).with_entities(models.Job.id).filter(
+                models.Job.created_at < created_before)]
+            if expired:
+                _job_task_get_query(context, session).filter(
+                    models.JobTask.job_id.in_(expired)).delete(
+                    synchronize_session=False)
+                _job_get_query(context, session).filter(
+                    models.Job.id.in_(expired)).delete(
+                    synchronize_session=False)
+
+    return job_ref, task_refs
+
+
+def job_get(context, job_id):
+    """Get a job and its tasks."""
+    session = get_session()
+    with session.begin():
+        job = _job_get_query(context, session).filter_by(id=job_id).first()
+        if not job:
+            raise exception.JobNotFound(job_id)
+        tasks = _job_task_get_query(context, session).filter_by(
+            job_id=job_id).all()
+    return job, tasks
+
+
+def job_task_update(context, job_id, storage_id, task, values):
+    """Update the task of a job run on a storage."""
+    session = get_session()
+    with session.begin():
+        return _job_task_get_query(context, session).filter_by(
+            job_id=job_id, storage_id=storage_id, task=task).update(values)
+
+
 PAGINATION_HELPERS = {
     models.AccessInfo: (_access_info_get_query, _process_access_info_filters,
                         _access_info_get),
@@ -713,6 +1012,9 @@ PAGINATION_HELPERS = {
                          _alert_source_get),
     models.Volume: (_volume_get_query, _process_volume_info_filters,
                     _volume_get),
+    models.SyncHistory: (_sync_history_get_query,
+                         _process_sync_history_filters, _sync_history_get),
+    models.Alert: (_alert_get_query, _process_alert_filters, _alert_get),
 }
 
 
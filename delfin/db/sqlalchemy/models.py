@@ -23,7 +23,8 @@ SQLAlchemy models for Delfin  data.
 from oslo_config import cfg
 from oslo_db.sqlalchemy import models
 from oslo_db.sqlalchemy.types import JsonEncodedDict
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, \
+    BigInteger, Text
 from sqlalchemy.ext.declarative import declarative_base
 
 from delfin.common import constants
@@ -76,6 +77,9 @@ class Storage(BASE, DelfinBase, models.SoftDeleteMixin):
     raw_capacity = Column(Integer)
     subscribed_capacity = Column(Integer)
     sync_status = Column(Integer, default=constants.SyncStatus.SYNCED)
+    circuit_state = Column(String(255), default=constants.CircuitState.CLOSED)
+    # Per resource type watermark of incremental sync
+    sync_watermarks = Column(JsonEncodedDict)
 
 
 class Volume(BASE, DelfinBase):
@@ -145,3 +149,63 @@ class AlertSource(BASE, DelfinBase):
     context_name = Column(String(255))
     retry_num = Column(Integer)
     expiration = Column(Integer)
+
+
+class SyncHistory(BASE, DelfinBase):
+    """Represents one sync run of a resource of a storage."""
+    __tablename__ = 'sync_history'
+    id = Column(String(36), primary_key=True)
+    storage_id = Column(String(36), index=True)
+    resource = Column(String(255))
+    mode = Column(String(255))
+    status = Column(String(255))
+    error = Column(String(255))
+    started_at = Column(DateTime)
+    ended_at = Column(DateTime)
+    duration = Column(Float)
+    phases = Column(JsonEncodedDict)
+    added = Column(Integer)
+    updated = Column(Integer)
+    deleted = Column(Integer)
+    unchanged = Column(Integer)
+    driver_calls = Column(Integer)
+    driver_requests = Column(Integer)
+
+
+class Job(BASE, DelfinBase):
+    """Represents an asynchronous API operation, done by its job tasks."""
+    __tablename__ = 'jobs'
+    id = Column(String(36), primary_key=True)
+    action = Column(String(255))
+
+
+class JobTask(BASE, DelfinBase):
+    """Represents a task of a job, run by a task service."""
+    __tablename__ = 'job_tasks'
+    id = Column(String(36), primary_key=True)
+    job_id = Column(String(36), index=True)
+    storage_id = Column(String(36))
+    task = Column(String(255))
+    status = Column(String(255))
+    error = Column(String(255))
+    started_at = Column(DateTime)
+    ended_at = Column(DateTime)
+
+
+class Alert(BASE, DelfinBase):
+    """Represents an active alert of a storage, as listed by its driver."""
+    __tablename__ = 'alerts'
+    id = Column(String(36), primary_key=True)
+    storage_id = Column(String(36), index=True)
+    alert_id = Column(String(255))
+    sequence_number = Column(String(255), index=True)
+    alert_name = Column(String(255))
+    severity = Column(String(255))
+    category = Column(String(255))
+    type = Column(String(255))
+    # Epoch in ms
+    occur_time = Column(BigInteger)
+    description = Column(Text)
+    recovery_advice = Column(Text)
+    resource_type = Column(String(255))
+    location = Column(String(255))
@@ -12,23 +12,147 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+
+import eventlet
 import six
 
 from oslo_log import log
 from oslo_utils import uuidutils
 
+from delfin import exception
+from delfin import metrics
+from delfin import tracing
+from delfin.drivers import circuit_breaker
 from delfin.drivers import helper
 from delfin.drivers import manager
+from delfin.drivers.utils import async_runner
 
 LOG = log.getLogger(__name__)
 
+CALL_SECONDS = metrics.histogram(
+    'delfin_driver_call_duration_seconds',
+    'Duration of the driver calls per vendor and method.',
+    ('vendor', 'method'))
+CALL_ERRORS = metrics.counter(
+    'delfin_driver_call_errors_total',
+    'Driver calls which failed, per vendor and method.',
+    ('vendor', 'method'))
+
+
+def _wait(result):
+    """Get the result of an async driver call."""
+    if asyncio.iscoroutine(result):
+        return async_runner.run(result)
+    return result
+
+
+def _vendor(driver):
+    """The package of the driver under delfin.drivers, e.g. huawei."""
+    module = type(driver).__module__.split('.')
+    if module[:2] == ['delfin', 'drivers'] and len(module) > 2:
+        return module[2]
+    return module[0]
+
 
 class API(object):
     def __init__(self):
         self.driver_manager = manager.DriverManager()
 
+    def _call_driver(self, context, storage_id, method, *args):
+        """Call a driver method behind the storage's circuit breaker."""
+        breaker = circuit_breaker.BREAKERS.get(storage_id)
+        with tracing.span('driver.' + method, context,
+                          storage_id=storage_id), breaker.protect(), \
+                self.driver_manager.use_driver(context,
+                                               storage_id) as driver:
+            vendor = _vendor(driver)
+            try:
+                with CALL_SECONDS.time(vendor=vendor, method=method):
+                    return _wait(getattr(driver, method)(context, *args))
+            except NotImplementedError:
+                # Not supported by the driver, not a failed call
+                raise
+            except Exception:
+                CALL_ERRORS.inc(vendor=vendor, method=method)
+                raise
+
     def discover_storage(self, context, access_info):
         """Discover a storage system with access information."""
+        storage, driver = self._get_new_storage(context, access_info)
+        try:
+            access_info = helper.create_access_info(context, access_info)
+            storage['id'] = access_info['storage_id']
+            storage = helper.create_storage(context, storage)
+        except Exception:
+            manager.discard_driver(driver)
+            raise
+        self.driver_manager.update_driver(storage['id'], driver)
+
+        LOG.info("Storage found successfully.")
+        return storage
+
+    def discover_storages(self, context, access_infos, concurrency):
+        """Discover storage systems, up to concurrency of them at once.
+        Their access information and storages are saved in bulk.
+
+        :returns: the storage, or the exception raised when discovering
+                  it, of each access information in order
+        """
+        def _discover(access_info):
+            try:
+                return self._get_new_storage(context, access_info)
+            except Exception as e:
+                LOG.error("Failed to discover storage {0}: {1}".format(
+                    access_info['storage_id'], e))
+                return e
+
+        for access_info in access_infos:
+            if 'storage_id' not in access_info:
+                access_info['storage_id'] = six.text_type(
+                    uuidutils.generate_uuid())
+        pool = eventlet.GreenPool(concurrency)
+        results = list(pool.imap(_discover, access_infos))
+
+        found = {}
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                continue
+            storage, driver = result
+            # The same storage given twice in the request
+            if storage['serial_number'] in found:
+                manager.discard_driver(driver)
+                results[index] = exception.StorageAlreadyExists()
+                continue
+            storage['id'] = access_infos[index]['storage_id']
+            found[storage['serial_number']] = index
+
+        indexes = sorted(found.values())
+        try:
+            helper.create_access_infos(
+                context, [access_infos[index] for index in indexes])
+            storages = helper.create_storages(
+                context, [results[index][0] for index in indexes])
+        except Exception as e:
+            LOG.error("Failed to save discovered storages: {0}".format(e))
+            for index in indexes:
+                manager.discard_driver(results[index][1])
+                results[index] = e
+            return results
+        for index, storage in zip(indexes, storages):
+            self.driver_manager.update_driver(storage['id'],
+                                              results[index][1])
+            results[index] = storage
+
+        LOG.info("{0} of {1} storages found successfully.".format(
+            len(indexes), len(access_infos)))
+        return results
+
+    def _get_new_storage(self, context, access_info):
+        """Get a storage not registered yet from its driver.
+
+        :returns: the storage and its driver
+        """
         if 'storage_id' not in access_info:
             access_info['storage_id'] = six.text_type(
                 uuidutils.generate_uuid())
@@ -36,24 +160,22 @@ class API(object):
         driver = self.driver_manager.get_driver(context,
                                                 cache_on_load=False,
                                                 **access_info)
-        storage = driver.get_storage(context)
-
-        # Need to validate storage response from driver
-        helper.check_storage_repetition(context, storage)
-        access_info = helper.create_access_info(context, access_info)
-        storage['id'] = access_info['storage_id']
-        storage = helper.create_storage(context, storage)
-        self.driver_manager.update_driver(storage['id'], driver)
+        try:
+            storage = _wait(driver.get_storage(context))
 
-        LOG.info("Storage found successfully.")
-        return storage
+            # Need to validate storage response from driver
+            helper.check_storage_repetition(context, storage)
+        except Exception:
+            manager.discard_driver(driver)
+            raise
+        return storage, driver
 
     def update_access_info(self, context, access_info):
         """Validate and update access information."""
         driver = self.driver_manager.get_driver(context,
                                                 cache_on_load=False,
                                                 **access_info)
-        storage_new = driver.get_storage(context)
+        storage_new = _wait(driver.get_storage(context))
 
         # Need to validate storage response from driver
         storage_id = access_info['storage_id']
@@ -69,21 +191,31 @@ class API(object):
     def remove_storage(self, context, storage_id):
         """Clear driver instance from driver factory."""
         self.driver_manager.remove_driver(storage_id)
+        circuit_breaker.BREAKERS.pop(storage_id)
 
     def get_storage(self, context, storage_id):
         """Get storage device information from storage system"""
-        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
-        return driver.get_storage(context)
+        return self._call_driver(context, storage_id, 'get_storage')
 
     def list_storage_pools(self, context, storage_id):
         """List all storage pools from storage system."""
-        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
-        return driver.list_storage_pools(context)
+        return self._call_driver(context, storage_id, 'list_storage_pools')
 
     def list_volumes(self, context, storage_id):
         """List all storage volumes from storage system."""
-        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
-        return driver.list_volumes(context)
+        return self._call_driver(context, storage_id, 'list_volumes')
+
+    def list_storage_pools_changed_since(self, context, storage_id,
+                                         watermark):
+        """List storage pools changed since watermark."""
+        return self._call_driver(context, storage_id,
+                                 'list_storage_pools_changed_since',
+                                 watermark)
+
+    def list_volumes_changed_since(self, context, storage_id, watermark):
+        """List storage volumes changed since watermark."""
+        return self._call_driver(context, storage_id,
+                                 'list_volumes_changed_since', watermark)
 
     def add_trap_config(self, context, storage_id, trap_config):
         """Config the trap receiver in storage system."""
@@ -95,10 +227,15 @@ class API(object):
 
     def parse_alert(self, context, storage_id, alert):
         """Parse alert data got from snmp trap server."""
-        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
-        return driver.parse_alert(context, alert)
+        with self.driver_manager.use_driver(context, storage_id) as driver:
+            return driver.parse_alert(context, alert)
+
+    def list_alerts(self, context, storage_id, query_para=None):
+        """List all current alerts from storage system."""
+        return self._call_driver(context, storage_id, 'list_alerts',
+                                 query_para)
 
     def clear_alert(self, context, storage_id, sequence_number):
         """Clear alert from storage system."""
-        driver = self.driver_manager.get_driver(context, storage_id=storage_id)
-        return driver.clear_alert(context, sequence_number)
+        return self._call_driver(context, storage_id, 'clear_alert',
+                                 sequence_number)
@@ -0,0 +1,178 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import socket
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+import requests.exceptions as r_exc
+
+from delfin import context as delfin_context
+from delfin import db
+from delfin import exception
+from delfin.common import constants
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+circuit_breaker_opts = [
+    cfg.IntOpt('circuit_failure_threshold',
+               default=3,
+               min=1,
+               help='Number of consecutive connection failures after which '
+                    'calls to a storage fail fast.'),
+    cfg.IntOpt('circuit_reset_timeout',
+               default=60,
+               min=1,
+               help='Seconds to fail fast before a single probe call is let '
+                    'through to a storage again.'),
+]
+
+CONF.register_opts(circuit_breaker_opts)
+
+# Failures meaning the storage could not be reached at all
+CONNECTION_ERRORS = (exception.ConnectTimeout,
+                     exception.SSHConnectTimeout,
+                     exception.StorageBackendUnreachable,
+                     r_exc.ConnectionError,
+                     r_exc.Timeout,
+                     socket.timeout,
+                     TimeoutError,
+                     ConnectionError)
+
+
+def is_connection_error(error):
+    """Check if an error, or an error it was raised from, is a connection
+    failure. Drivers often wrap the original error in their own exception.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, CONNECTION_ERRORS):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class CircuitBreaker(object):
+    """Fail fast on a storage after consecutive connection failures.
+
+    closed: calls pass, connection failures are counted.
+    open: calls fail with StorageCircuitOpen until reset_timeout passed.
+    half_open: a single probe call passes, others still fail fast. The
+    probe's result closes or re-opens the circuit.
+    """
+
+    def __init__(self, storage_id, failure_threshold=None,
+                 reset_timeout=None):
+        self.storage_id = storage_id
+        self.failure_threshold = failure_threshold or \
+            CONF.circuit_failure_threshold
+        self.reset_timeout = reset_timeout or CONF.circuit_reset_timeout
+        self.state = constants.CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        LOG.warning("Circuit of storage {0} changed from {1} to {2}".format(
+            self.storage_id, self.state, state))
+        self.state = state
+        try:
+            db.storage_update(delfin_context.get_admin_context(),
+                              self.storage_id, {'circuit_state': state})
+        except Exception as e:
+            LOG.error("Failed to save circuit state of storage {0}: {1}"
+                      .format(self.storage_id, e))
+
+    def before_call(self):
+        with self._lock:
+            if self.state == constants.CircuitState.OPEN:
+                if time.time() - self.opened_at < self.reset_timeout:
+                    remaining = self.reset_timeout - \
+                        int(time.time() - self.opened_at)
+                    raise exception.StorageCircuitOpen(self.storage_id,
+                                                       remaining)
+                self._set_state(constants.CircuitState.HALF_OPEN)
+            if self.state == constants.CircuitState.HALF_OPEN:
+                if self._probing:
+                    raise exception.StorageCircuitOpen(self.storage_id, 0)
+                self._probing = True
+
+    def on_success(self):
+        with self._lock:
+            self._probing = False
+            self.failures = 0
+            self._set_state(constants.CircuitState.CLOSED)
+
+    def on_failure(self, error):
+        with self._lock:
+            self._probing = False
+            if not is_connection_error(error):
+                # The storage answered, it is reachable
+                self.failures = 0
+                self._set_state(constants.CircuitState.CLOSED)
+                return
+            self.failures += 1
+            if self.state == constants.CircuitState.HALF_OPEN \
+                    or self.failures >= self.failure_threshold:
+                self.opened_at = time.time()
+                self._set_state(constants.CircuitState.OPEN)
+
+    @contextlib.contextmanager
+    def protect(self):
+        self.before_call()
+        try:
+            yield
+        except NotImplementedError:
+            # Nothing was asked to the storage
+            raise
+        except Exception as e:
+            self.on_failure(e)
+            raise
+        else:
+            self.on_success()
+        finally:
+            # Also when the call is killed, e.g. by eventlet.Timeout, so
+            # that a half open circuit lets the next probe through
+            with self._lock:
+                self._probing = False
+
+
+class CircuitBreakers(object):
+    """Circuit breakers of the storages, one per storage id."""
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, storage_id):
+        breaker = self._breakers.get(storage_id)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    storage_id, CircuitBreaker(storage_id))
+        return breaker
+
+    def pop(self, storage_id):
+        self._breakers.pop(storage_id, None)
+
+
+BREAKERS = CircuitBreakers()
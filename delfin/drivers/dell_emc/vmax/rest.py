@@ -25,6 +25,7 @@ import requests.exceptions as r_exc
 import six
 
 from delfin import exception
+from delfin.drivers.utils import http_client
 from delfin.i18n import _
 
 LOG = logging.getLogger(__name__)
@@ -71,23 +72,29 @@ class VMaxRest(object):
 
     def _establish_rest_session(self):
         """Establish the rest session.
-        :returns: requests.session() -- session, the rest session
+        :returns: HttpSession -- session, the rest session
         """
         LOG.info("Establishing REST session with %(base_uri)s",
                  {'base_uri': self.base_uri})
         if self.session:
             self.session.close()
-        session = requests.session()
-        session.headers = {'content-type': 'application/json',
-                           'accept': 'application/json',
-                           'Application-Type': 'delfin'}
+        session = http_client.create_session(
+            headers={'content-type': 'application/json',
+                     'accept': 'application/json',
+                     'Application-Type': 'delfin'},
+            trust_env=True)
         session.auth = requests.auth.HTTPBasicAuth(self.user, self.passwd)
 
-        if self.verify is not None:
-            session.verify = self.verify
+        session.verify = self.verify if self.verify is not None else True
 
         return session
 
+    def close_session(self):
+        """Close the rest session, a new one is set up on next request."""
+        if self.session:
+            self.session.close()
+            self.session = None
+
     def request(self, target_uri, method, params=None, request_object=None):
         """Sends a request (GET, POST, PUT, DELETE) to the target api.
         :param target_uri: target uri (string)
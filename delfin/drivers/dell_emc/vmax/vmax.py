@@ -31,6 +31,9 @@ class VMAXStorageDriver(driver.StorageDriver):
         self.client = client.VMAXClient(**kwargs)
         self.client.init_connection(kwargs)
 
+    def close(self):
+        self.client.rest.close_session()
+
     def get_storage(self, context):
         # Get the VMAX model
         array_details = self.client.get_array_details()
@@ -28,6 +28,22 @@ class StorageDriver(object):
         """
         self.storage_id = kwargs.get('storage_id', None)
 
+    def close(self):
+        """Release the sessions held on the storage system.
+
+        Called when the driver instance is dropped from the driver cache,
+        drivers holding a login session should log out here.
+        """
+        pass
+
+    @classmethod
+    def remove_storage(cls, storage_id):
+        """Drop the state kept for a storage beyond driver instances.
+
+        Called when the storage is removed from delfin.
+        """
+        pass
+
     @abc.abstractmethod
     def get_storage(self, context):
         """Get storage device information from storage system"""
@@ -43,6 +59,30 @@ class StorageDriver(object):
         """List all storage volumes from storage system."""
         pass
 
+    def list_storage_pools_changed_since(self, context, watermark):
+        """List storage pools changed since a watermark.
+
+        Optional, implemented by drivers whose storage system reports
+        changes(modification time, event sequence etc.). Sync then costs
+        the churn instead of a full listing.
+
+        :param watermark: value returned by the previous call, it is opaque
+            to delfin. None to start tracking changes from now on.
+        :returns: dict with 'watermark' to pass in the next call,
+            'upserts' the pools added or modified, in the format of
+            list_storage_pools, and 'deletions' the native_storage_pool_id
+            of the removed pools.
+        """
+        raise NotImplementedError()
+
+    def list_volumes_changed_since(self, context, watermark):
+        """List volumes changed since a watermark.
+
+        Same as list_storage_pools_changed_since, 'upserts' are in the
+        format of list_volumes and 'deletions' are native_volume_id.
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def add_trap_config(self, context, trap_config):
         """Config the trap receiver in storage system."""
@@ -81,11 +121,43 @@ class StorageDriver(object):
 
         pass
 
-    def list_alerts(self, context):
-        """List all current alerts from storage system."""
+    def list_alerts(self, context, query_para=None):
+        """List all current alerts from storage system.
+
+        :param query_para: optional dict to filter the alerts, 'begin_time'
+            and 'end_time' (epoch in ms) limit them to an occur time window.
+        """
         pass
 
     @abc.abstractmethod
     def clear_alert(self, context, sequence_number):
         """Clear alert from storage system."""
         pass
+
+
+class AsyncStorageDriver(StorageDriver):
+    """Base class of drivers implemented with asyncio.
+
+    The resource queries are coroutines, drivers.api runs them on the
+    process wide event loop of delfin.drivers.utils.async_runner so that
+    callers see the same results as from a StorageDriver.
+    """
+
+    @abc.abstractmethod
+    async def get_storage(self, context):
+        """Get storage device information from storage system"""
+        pass
+
+    @abc.abstractmethod
+    async def list_storage_pools(self, context):
+        """List all storage pools from storage system."""
+        pass
+
+    @abc.abstractmethod
+    async def list_volumes(self, context):
+        """List all storage volumes from storage system."""
+        pass
+
+    async def close(self):
+        """Release the sessions held on the storage system."""
+        pass
@@ -12,15 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import random
+import uuid
 
 import decorator
-import math
-import six
 import time
 from oslo_config import cfg
 from oslo_log import log
-from oslo_utils import uuidutils
 
 from delfin import exception
 from delfin.drivers import driver
@@ -40,6 +39,16 @@ fake_opts = [
     cfg.StrOpt('fake_page_query_limit',
                default='500',
                help='The limitation of volumes for each query.'),
+    cfg.IntOpt('fake_seed',
+               default=0,
+               help='Seed of the faked data, a device faked with the same '
+                    'seed and rest host always has the same resources.'),
+    cfg.FloatOpt('fake_churn_rate',
+                 default=0,
+                 min=0,
+                 max=1,
+                 help='Fraction of the volumes changed between two volume '
+                      'queries, evenly split in adds, deletes and updates.'),
 ]
 
 CONF.register_opts(fake_opts, "fake_driver")
@@ -53,6 +62,9 @@ MIN_POOL, MAX_POOL = 1, 100
 MIN_VOLUME, MAX_VOLUME = 1, 2000
 PAGE_LIMIT = 500
 
+# Multiplier of Knuth's multiplicative hash
+HASH_MULTIPLIER = 2654435761
+
 
 def get_range_val(range_str, t):
     try:
@@ -67,20 +79,37 @@ def get_range_val(range_str, t):
         raise exception.InvalidInput
 
 
-def wait_random(low, high):
-    @decorator.decorator
-    def _wait(f, *a, **k):
-        rd = random.randint(0, 100)
-        secs = low + (high - low) * rd / 100
-        time.sleep(secs)
-        return f(*a, **k)
+def _wait_secs():
+    rd = random.randint(0, 100)
+    return MIN_WAIT + (MAX_WAIT - MIN_WAIT) * rd / 100
+
+
+@decorator.decorator
+def wait_random(f, *a, **k):
+    time.sleep(_wait_secs())
+    return f(*a, **k)
+
 
-    return _wait
+async def async_wait_random():
+    await asyncio.sleep(_wait_secs())
+
+
+def _mix(*values):
+    """Cheap deterministic hash of integers, in [0, 2**32)."""
+    h = 0
+    for value in values:
+        h = ((h ^ value) * HASH_MULTIPLIER + 0x9e3779b9) % (2 ** 32)
+    return h
 
 
 class FakeStorageDriver(driver.StorageDriver):
     """FakeStorageDriver shows how to implement the StorageDriver,
     it also plays a role as faker to fake data for being tested by clients.
+
+    The data only depends on fake_seed and the rest host, volumes are
+    generated page by page from their index so millions of them can be
+    faked. Each volume query applies fake_churn_rate changes, which
+    list_volumes_changed_since reports.
     """
 
     def __init__(self, **kwargs):
@@ -95,13 +124,82 @@ class FakeStorageDriver(driver.StorageDriver):
             CONF.fake_driver.fake_volume_range, int)
         PAGE_LIMIT = int(CONF.fake_driver.fake_page_query_limit)
 
-    @wait_random(MIN_WAIT, MAX_WAIT)
+        rest = kwargs.get('rest') or {}
+        self.name = '{0}:{1}'.format(rest.get('host'), rest.get('port'))
+        self.seed = _mix(CONF.fake_driver.fake_seed,
+                         uuid.uuid5(uuid.NAMESPACE_DNS, self.name).int)
+        rng = random.Random(self.seed)
+        self.pool_count = rng.randint(MIN_POOL, MAX_POOL)
+        self.volume_count = rng.randint(MIN_VOLUME, MAX_VOLUME)
+        self.churn_rate = CONF.fake_driver.fake_churn_rate
+
+        # Volume indexes are [0, volume_end) minus deleted ones
+        self.volume_end = self.volume_count
+        self.deleted = set()
+        # index -> generation of its last update
+        self.updated = {}
+        self.generation = 0
+        # generation -> (added, deleted, updated) indexes, after the
+        # oldest watermark callers may still list changes since
+        self.changes = {}
+        self.oldest_watermark = None
+
+    @wait_random
     def get_storage(self, context):
-        # Do something here
-        sn = six.text_type(uuidutils.generate_uuid())
-        total, used, free = self._get_random_capacity()
-        raw = random.randint(2000, 3000)
-        subscribed = random.randint(3000, 4000)
+        return self._build_storage()
+
+    @wait_random
+    def list_storage_pools(self, ctx):
+        return self._build_pools()
+
+    def list_volumes(self, ctx):
+        self._churn()
+        volume_list = []
+        for page in self._volume_pages():
+            time.sleep(_wait_secs())
+            volume_list.extend(page)
+        return volume_list
+
+    def list_storage_pools_changed_since(self, context, watermark):
+        # Pools never change
+        return {'watermark': 0, 'upserts': [], 'deletions': []}
+
+    def list_volumes_changed_since(self, context, watermark):
+        if watermark is None:
+            if self.oldest_watermark is None:
+                self.oldest_watermark = self.generation
+            return {'watermark': self.generation}
+        if watermark > self.generation or self.oldest_watermark is None \
+                or watermark < self.oldest_watermark:
+            # Tracked by a former instance of the driver, or already
+            # superseded by a later watermark and forgotten
+            raise exception.InvalidInput(
+                'Unknown watermark {0}'.format(watermark))
+        # Asked since watermark, the caller saved it over the older ones
+        for generation in range(self.oldest_watermark + 1, watermark + 1):
+            self.changes.pop(generation, None)
+        self.oldest_watermark = watermark
+        self._churn()
+        return self._build_changes(watermark)
+
+    def add_trap_config(self, context, trap_config):
+        pass
+
+    def remove_trap_config(self, context, trap_config):
+        pass
+
+    def parse_alert(self, context, alert):
+        pass
+
+    def clear_alert(self, context, alert):
+        pass
+
+    def _build_storage(self):
+        sn = 0
+        for i in range(4):
+            sn = sn << 32 | _mix(self.seed, i)
+        sn = str(uuid.UUID(int=sn))
+        total, used, free = self._get_capacity(self.seed, 0)
         return {
             'name': 'fake_driver',
             'description': 'fake driver.',
@@ -114,18 +212,16 @@ class FakeStorageDriver(driver.StorageDriver):
             'total_capacity': total,
             'used_capacity': used,
             'free_capacity': free,
-            'raw_capacity': raw,
-            'subscribed_capacity': subscribed
+            'raw_capacity': 2000 + self.seed % 1000,
+            'subscribed_capacity': 3000 + self.seed % 1000
         }
 
-    @wait_random(MIN_WAIT, MAX_WAIT)
-    def list_storage_pools(self, ctx):
-        rd_pools_count = random.randint(MIN_POOL, MAX_POOL)
-        LOG.info("###########fake_pools number for %s: %d" % (self.storage_id,
-                                                              rd_pools_count))
+    def _build_pools(self):
+        LOG.info("###########fake_pools number for %s: %d" % (
+            self.storage_id, self.pool_count))
         pool_list = []
-        for idx in range(rd_pools_count):
-            total, used, free = self._get_random_capacity()
+        for idx in range(self.pool_count):
+            total, used, free = self._get_capacity(self.seed, idx, 1)
             p = {
                 "name": "fake_pool_" + str(idx),
                 "storage_id": self.storage_id,
@@ -139,57 +235,99 @@ class FakeStorageDriver(driver.StorageDriver):
             pool_list.append(p)
         return pool_list
 
-    def list_volumes(self, ctx):
-        # Get a random number as the volume count.
-        # rd_volumes_count = random.randint(MIN_VOLUME, MAX_VOLUME)
-        rd_volumes_count = random.randint(MIN_VOLUME, MAX_VOLUME)
+    def _churn(self):
+        """Move to the next generation, changing churn_rate of volumes."""
+        if not self.churn_rate:
+            return
+        self.generation += 1
+        live = self.volume_end - len(self.deleted)
+        count = max(int(live * self.churn_rate / 3), 1)
+        rng = random.Random(_mix(self.seed, self.generation))
+
+        added = list(range(self.volume_end, self.volume_end + count))
+        deleted, updated = [], []
+        for picked in (deleted, updated):
+            while len(picked) < count and live > len(deleted) + count:
+                idx = rng.randrange(self.volume_end)
+                if idx not in self.deleted and idx not in deleted \
+                        and idx not in updated:
+                    picked.append(idx)
+        self.volume_end += count
+        self.deleted.update(deleted)
+        for idx in deleted:
+            self.updated.pop(idx, None)
+        for idx in updated:
+            self.updated[idx] = self.generation
+        if self.oldest_watermark is not None:
+            self.changes[self.generation] = (added, deleted, updated)
+
+    def _build_changes(self, watermark):
+        upserts, deletions = set(), set()
+        for generation in range(watermark + 1, self.generation + 1):
+            added, deleted, updated = self.changes[generation]
+            upserts.update(added)
+            upserts.update(updated)
+            deletions.update(deleted)
+        upserts -= self.deleted
+        return {
+            'watermark': self.generation,
+            'upserts': [self._build_volume(idx) for idx in sorted(upserts)],
+            'deletions': ['fake_original_id_' + str(idx)
+                          for idx in sorted(deletions)],
+        }
+
+    def _volume_pages(self):
+        """Generate the volumes page by page, PAGE_LIMIT per page."""
         LOG.info("###########fake_volumes number for %s: %d" % (
-            self.storage_id, rd_volumes_count))
-        loops = math.ceil(rd_volumes_count / PAGE_LIMIT)
-        volume_list = []
-        for idx in range(loops):
-            start = idx * PAGE_LIMIT
-            end = (idx + 1) * PAGE_LIMIT
-            if idx == (loops - 1):
-                end = rd_volumes_count
-            vs = self._get_volume_range(start, end)
-            volume_list = volume_list + vs
-        return volume_list
+            self.storage_id, self.volume_end - len(self.deleted)))
+        for start in range(0, self.volume_end, PAGE_LIMIT):
+            end = min(start + PAGE_LIMIT, self.volume_end)
+            yield [self._build_volume(i) for i in range(start, end)
+                   if i not in self.deleted]
 
-    def add_trap_config(self, context, trap_config):
-        pass
+    def _build_volume(self, i):
+        version = self.updated.get(i, 0)
+        total, used, free = self._get_capacity(self.seed, i, 2, version)
+        return {
+            "name": "fake_vol_" + str(i),
+            "storage_id": self.storage_id,
+            "description": "Fake Volume",
+            "status": "normal",
+            "native_volume_id": "fake_original_id_" + str(i),
+            "native_storage_pool_id":
+                "fake_original_id_" + str(i % self.pool_count),
+            "wwn": "fake_wwn_" + str(i),
+            "total_capacity": total,
+            "used_capacity": used,
+            "free_capacity": free,
+        }
 
-    def remove_trap_config(self, context, trap_config):
-        pass
+    @staticmethod
+    def _get_capacity(*key):
+        h = _mix(*key)
+        total = 1000 + h % 1001
+        used = int((h >> 10) % 101 * total / 100)
+        free = total - used
+        return total, used, free
 
-    def parse_alert(self, context, alert):
-        pass
 
-    def clear_alert(self, context, alert):
-        pass
+class AsyncFakeStorageDriver(driver.AsyncStorageDriver, FakeStorageDriver):
+    """AsyncFakeStorageDriver shows how to implement the AsyncStorageDriver.
 
-    @wait_random(MIN_WAIT, MAX_WAIT)
-    def _get_volume_range(self, start, end):
-        volume_list = []
+    It fakes the same data as FakeStorageDriver, the volume pages are
+    queried concurrently.
+    """
 
-        for i in range(start, end):
-            total, used, free = self._get_random_capacity()
-            v = {
-                "name": "fake_vol_" + str(i),
-                "storage_id": self.storage_id,
-                "description": "Fake Volume",
-                "status": "normal",
-                "native_volume_id": "fake_original_id_" + str(i),
-                "wwn": "fake_wwn_" + str(i),
-                "total_capacity": total,
-                "used_capacity": used,
-                "free_capacity": free,
-            }
-            volume_list.append(v)
-        return volume_list
+    async def get_storage(self, context):
+        await async_wait_random()
+        return self._build_storage()
 
-    def _get_random_capacity(self):
-        total = random.randint(1000, 2000)
-        used = int(random.randint(0, 100) * total / 100)
-        free = total - used
-        return total, used, free
+    async def list_storage_pools(self, ctx):
+        await async_wait_random()
+        return self._build_pools()
+
+    async def list_volumes(self, ctx):
+        self._churn()
+        pages = list(self._volume_pages())
+        await asyncio.gather(*[async_wait_random() for __ in pages])
+        return [volume for page in pages for volume in page]
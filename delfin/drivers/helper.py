@@ -45,6 +45,12 @@ def create_access_info(context, access_info):
     return db.access_info_create(context, access_info)
 
 
+def create_access_infos(context, access_infos):
+    for access_info in access_infos:
+        encrypt_password(context, access_info)
+    return db.access_infos_create(context, access_infos)
+
+
 def update_access_info(context, storage_id, access_info):
     encrypt_password(context, access_info)
     return db.access_info_update(context,
@@ -56,6 +62,10 @@ def create_storage(context, storage):
     return db.storage_create(context, storage)
 
 
+def create_storages(context, storages):
+    return db.storages_create(context, storages)
+
+
 def update_storage(context, storage_id, storage):
     return db.storage_update(context, storage_id, storage)
 
@@ -66,9 +66,37 @@ class AlertHandler(object):
 
     default_me_category = 'storage-subsystem'
 
+    # Translation of showalert severity to alert model severity
+    CLI_SEVERITY_MAP = {"Major": constants.Severity.MAJOR,
+                        "Minor": constants.Severity.MINOR,
+                        "Critical": constants.Severity.CRITICAL,
+                        "Degraded": constants.Severity.WARNING,
+                        "Fatal": constants.Severity.FATAL,
+                        "Informational": constants.Severity.INFORMATIONAL,
+                        "Debug": constants.Severity.NOT_SPECIFIED}
+
+    # Translation of showalert state to alert model category
+    CLI_STATE_MAP = {"New": constants.Category.FAULT}
+
+    # showalert key -> (alert field, value translation)
+    ALERT_KEY_MAP = {
+        'Id': ('sequence_number', None),
+        'State': ('category', lambda v: AlertHandler.CLI_STATE_MAP.get(v, '')),
+        'MessageCode': ('alert_id', None),
+        'Time': ('occur_time', None),
+        'Severity': ('severity',
+                     lambda v: AlertHandler.CLI_SEVERITY_MAP.get(v, '')),
+        'Type': ('alert_name', None),
+        'Message': ('description', None),
+        'Component': ('location', None),
+    }
+
     def __init__(self, restclient=None, sshclient=None):
         self.restclient = restclient
         self.sshclient = sshclient
+        # High-water mark of the alerts listed from this storage
+        self.last_alert_id = None
+        self.last_alert_time = None
 
     def parse_alert(self, context, alert):
         """Parse alert data got from alert manager and fill the alert model."""
@@ -133,94 +161,112 @@ class AlertHandler(object):
                 reason='Failed to ssh Hpe3parStor')
         return re
 
-    def list_alerts(self, context):
+    def list_alerts(self, context, query_para=None):
+        """List alerts reported by showalert.
+
+        :param query_para: optional dict. 'begin_time' and 'end_time'
+            (epoch in ms) limit the alerts to an occur time window. With
+            'incremental' set to True only alerts newer than the ones
+            returned by the previous listing without time window of this
+            storage are returned.
+        """
+        query_para = query_para or {}
+        incremental = query_para.get('incremental', False)
+        begin_time = query_para.get('begin_time')
+        end_time = query_para.get('end_time')
+        last_alert_id = self.last_alert_id if incremental else None
         try:
-            # Get list of Hpe3parStor alerts
+            command_str = AlertHandler.HPE3PAR_COMMAND_SHOWALERT
+            lines = self.sshclient.doexec_lines(context, command_str)
             alert_list = []
-            try:
-                command_str = AlertHandler.HPE3PAR_COMMAND_SHOWALERT
-                reslist = self.sshclient.doexec(context, command_str)
-            except Exception as e:
-                LOG.error(e)
-                raise exception.StorageBackendException(
-                    reason='Failed to ssh Hpe3parStor')
-            message_code = ''
-            event_type = ''
-            severity = ''
-            state = ''
-            alarm_id = ''
-            occur_time = ''
-            alert_message = ''
-            component = ''
-
-            alertlist = reslist.split('\n')
-
-            for alertinfo in alertlist:
-                strline = alertinfo
-                if strline is not None and strline != '':
-                    # strline = strline.replace(" ", "")
-                    strinfo = strline.split(': ', 1)
-                    strinfo[0] = strinfo[0].replace(" ", "")
-                    if strinfo[0] == 'Id':
-                        alarm_id = strinfo[1]
-                    elif strinfo[0] == 'State':
-                        if strinfo[1] == 'New':
-                            state = constants.Category.FAULT
-                    elif strinfo[0] == 'MessageCode':
-                        message_code = strinfo[1]
-                    elif strinfo[0] == 'Time':
-                        occur_time = strinfo[1]
-                    elif strinfo[0] == 'Severity':
-                        if strinfo[1] == 'Major':
-                            severity = constants.Severity.MAJOR
-                        elif strinfo[1] == 'Minor':
-                            severity = constants.Severity.MINOR
-                        elif strinfo[1] == 'Critical':
-                            severity = constants.Severity.CRITICAL
-                        elif strinfo[1] == 'Degraded':
-                            severity = constants.Severity.WARNING
-                        elif strinfo[1] == 'Fatal':
-                            severity = constants.Severity.FATAL
-                        elif strinfo[1] == 'Informational':
-                            severity = constants.Severity.INFORMATIONAL
-                        elif strinfo[1] == 'Debug':
-                            severity = constants.Severity.NOT_SPECIFIED
-                    elif strinfo[0] == 'Type':
-                        event_type = strinfo[1]
-                    elif strinfo[0] == 'Message':
-                        alert_message = strinfo[1]
-                    elif strinfo[0] == 'Component':
-                        component = strinfo[1]
-
-                        alert_model = {
-                            'alert_id': message_code,
-                            'alert_name': event_type,
-                            'severity': severity,
-                            'category': state,
-                            'type': constants.EventType.EQUIPMENT_ALARM,
-                            'sequence_number': alarm_id,
-                            'occur_time': self.get_time_stamp(occur_time),
-                            'description': alert_message,
-                            'resource_type': constants.DEFAULT_RESOURCE_TYPE,
-                            'location': component
-                        }
-
-                        alert_list.append(alert_model)
-                        message_code = ''
-                        event_type = ''
-                        severity = ''
-                        state = ''
-                        alarm_id = ''
-                        occur_time = ''
-                        alert_message = ''
-                        component = ''
+            # Only moved once the whole output was read, else alerts after
+            # a failure would be skipped by the next incremental listing
+            mark = (self.last_alert_id, self.last_alert_time)
+            for alert_model in self._parse_alerts(lines, last_alert_id):
+                occur_time = alert_model['occur_time']
+                if begin_time is not None and (
+                        occur_time is None or occur_time < begin_time):
+                    continue
+                if end_time is not None and (
+                        occur_time is None or occur_time > end_time):
+                    continue
+                mark = self._high_water_mark(mark, alert_model)
+                alert_list.append(alert_model)
+            # Alerts out of a time window are still new to the next
+            # incremental listing, only full listings move the mark
+            if begin_time is None and end_time is None:
+                self.last_alert_id, self.last_alert_time = mark
             return alert_list
-
+        except exception.DelfinException as err:
+            LOG.error("Failed to list alerts from Hpe3parStor: {}"
+                      .format(err))
+            raise exception.StorageBackendException(
+                reason='Failed to ssh Hpe3parStor')
         except Exception as err:
             LOG.error(
-                "Failed to get pool metrics from Hpe3parStor: {}".format(err))
+                "Failed to list alerts from Hpe3parStor: {}".format(err))
             raise exception.StorageBackendException(
-                reason='Failed to get pool metrics from Hpe3parStor')
+                reason='Failed to get alerts from Hpe3parStor')
+
+    def _parse_alerts(self, lines, last_alert_id=None):
+        """Parse showalert output consumed line by line.
+
+        Each line is dispatched on its key through ALERT_KEY_MAP, the
+        Component line completes an alert. Alerts whose id is not newer
+        than last_alert_id are skipped without being parsed further.
+        """
+        alert = {}
+        skip = False
+        for line in lines:
+            key, sep, value = line.partition(': ')
+            if not sep:
+                continue
+            key = key.replace(' ', '')
+            if key == 'Id':
+                skip = last_alert_id is not None and \
+                    self._alert_id_int(value) <= last_alert_id
+            if skip:
+                continue
+            field = AlertHandler.ALERT_KEY_MAP.get(key)
+            if field is None:
+                continue
+            name, translate = field
+            alert[name] = translate(value) if translate else value
+            if key == 'Component':
+                yield self._build_listed_alert(alert)
+                alert = {}
+
+    def _build_listed_alert(self, alert):
+        return {
+            'alert_id': alert.get('alert_id', ''),
+            'alert_name': alert.get('alert_name', ''),
+            'severity': alert.get('severity', ''),
+            'category': alert.get('category', ''),
+            'type': constants.EventType.EQUIPMENT_ALARM,
+            'sequence_number': alert.get('sequence_number', ''),
+            'occur_time': self.get_time_stamp(alert.get('occur_time', '')),
+            'description': alert.get('description', ''),
+            'resource_type': constants.DEFAULT_RESOURCE_TYPE,
+            'location': alert.get('location', '')
+        }
+
+    @staticmethod
+    def _alert_id_int(alert_id):
+        try:
+            return int(alert_id)
+        except (TypeError, ValueError):
+            return -1
+
+    def _high_water_mark(self, mark, alert_model):
+        last_id, last_time = mark
+        alert_id = self._alert_id_int(alert_model['sequence_number'])
+        if last_id is None or alert_id > last_id:
+            last_id = alert_id
+        occur_time = alert_model['occur_time']
+        if occur_time is not None and (last_time is None or
+                                       occur_time > last_time):
+            last_time = occur_time
+        return last_id, last_time
 
     def get_time_stamp(self, time_str):
         """ Time stamp to time conversion
@@ -12,15 +12,75 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+import time
+
+import eventlet
+from oslo_config import cfg
 from oslo_log import log
 
 from delfin import exception
 from delfin.common import constants
 from delfin.drivers.hpe.hpe_3par import consts
 
+CONF = cfg.CONF
+
+hpe_3par_opts = [
+    cfg.IntOpt('health_cache_ttl',
+               default=600,
+               help='Time(in sec) a cached checkhealth result is served '
+                    'before it is refreshed in background.'),
+]
+
+CONF.register_opts(hpe_3par_opts, "hpe_3par_driver")
+
 LOG = log.getLogger(__name__)
 
 
+class HealthCache(object):
+    """Per-storage cache of checkhealth results.
+
+    Entries outlive driver instances, so a re-created driver keeps
+    serving the last known health of its storage.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._refreshing = set()
+
+    def get(self, storage_id):
+        """Return (status, checked_at) or (None, None) if never checked."""
+        return self._entries.get(storage_id, (None, None))
+
+    def set(self, storage_id, status):
+        self._entries[storage_id] = (status, time.time())
+
+    def pop(self, storage_id):
+        self._entries.pop(storage_id, None)
+
+    def refresh_async(self, storage_id, check_health):
+        """Refresh entry in a green thread unless one is running already."""
+        with self._lock:
+            if storage_id in self._refreshing:
+                return
+            self._refreshing.add(storage_id)
+
+        def _refresh():
+            try:
+                status = check_health()
+                if status is not None:
+                    self.set(storage_id, status)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(storage_id)
+
+        eventlet.spawn_n(_refresh)
+
+
+HEALTH_CACHE = HealthCache()
+
+
 class ComponentHandler():
     """Hpe3par's Component handler，Superclass,
     """
@@ -33,10 +93,49 @@ class ComponentHandler():
     def __init__(self, restclient=None, sshclient=None):
         self.restclient = restclient
         self.sshclient = sshclient
+        self.storage_id = None
 
     def set_storage_id(self, storage_id):
         self.storage_id = storage_id
 
+    def check_health(self, context):
+        """Check the hardware and software health of the storage system"""
+        try:
+            # return: System is healthy
+            command_str = ComponentHandler.HPE3PAR_COMMAND_CHECKHEALTH
+            reStr = self.sshclient.doexec(context, command_str)
+            if 'System is healthy' in reStr:
+                return constants.StorageStatus.NORMAL
+            return constants.StorageStatus.ABNORMAL
+        except Exception:
+            LOG.error('SSH check health Failed!')
+            return constants.StorageStatus.ABNORMAL
+
+    def get_health(self, context):
+        """Get the last known health of the storage and its age in sec.
+
+        A health older than health_cache_ttl is refreshed in background
+        and served meanwhile. Only when the storage was never checked in
+        this process the check runs inline.
+        """
+        status, checked_at = HEALTH_CACHE.get(self.storage_id)
+        if status is None:
+            status = self.check_health(context)
+            HEALTH_CACHE.set(self.storage_id, status)
+            return status, 0
+        age = time.time() - checked_at
+        if age > CONF.hpe_3par_driver.health_cache_ttl:
+            HEALTH_CACHE.refresh_async(
+                self.storage_id, lambda: self._refresh_health(context))
+        return status, age
+
+    def _refresh_health(self, context):
+        # The driver may have been closed meanwhile, its ssh client must
+        # not open new connections then
+        if self.sshclient.closed:
+            return None
+        return self.check_health(context)
+
     def get_storage(self, context):
         # get storage info
         storage = self.restclient.get_storage()
@@ -46,19 +145,9 @@ class ComponentHandler():
         status = constants.StorageStatus.OFFLINE
 
         if storage is not None:
-            try:
-                # Check the hardware and software health
-                # status of the storage system
-                # return: System is healthy
-                command_str = ComponentHandler.HPE3PAR_COMMAND_CHECKHEALTH
-                reStr = self.sshclient.doexec(context, command_str)
-                if 'System is healthy' in reStr:
-                    status = constants.StorageStatus.NORMAL
-                else:
-                    status = constants.StorageStatus.ABNORMAL
-            except Exception:
-                status = constants.StorageStatus.ABNORMAL
-                LOG.error('SSH check health Failed!')
+            status, age = self.get_health(context)
+            LOG.debug('Health of storage %s is %s, checked %d sec ago.',
+                      self.storage_id, status, age)
             # "Total capacity (MiB) in the system."
             total_cap = int(
                 storage.get('totalCapacityMiB')) * consts.MiB_TO_Bytes
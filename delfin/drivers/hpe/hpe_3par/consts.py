@@ -37,6 +37,8 @@ QUERY_PAGE_SIZE = 150
 # Connection timeout
 LOGIN_SOCKET_TIMEOUT = 4
 SOCKET_TIMEOUT = 30
+# Overall time(in sec) of a call including its retries
+CALL_BUDGET = 60
 # 403  The client request has an invalid session key.
 # The request came from a different IP address
 ERROR_SESSION_INVALID_CODE = 403
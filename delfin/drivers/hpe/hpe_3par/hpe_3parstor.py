@@ -42,10 +42,22 @@ class Hpe3parStorDriver(driver.StorageDriver):
         # init component handler
         self.comhandler = component_handler.ComponentHandler(
             restclient=self.restclient, sshclient=self.sshclient)
+        self.comhandler.set_storage_id(self.storage_id)
         # init component handler
         self.alert_handler = alert_handler.AlertHandler(
             restclient=self.restclient, sshclient=self.sshclient)
 
+    @classmethod
+    def remove_storage(cls, storage_id):
+        component_handler.HEALTH_CACHE.pop(storage_id)
+
+    def close(self):
+        self.sshclient.close()
+        try:
+            self.restclient.logout()
+        finally:
+            self.restclient.session.close()
+
     def get_storage(self, context):
         # get storage info
         return self.comhandler.get_storage(context)
@@ -59,9 +71,9 @@ class Hpe3parStorDriver(driver.StorageDriver):
         self.comhandler.set_storage_id(self.storage_id)
         return self.comhandler.list_volumes(context)
 
-    def list_alerts(self, context):
+    def list_alerts(self, context, query_para=None):
         # Get list of Hpe3parStor alerts
-        return self.alert_handler.list_alerts(context)
+        return self.alert_handler.list_alerts(context, query_para)
 
     def add_trap_config(self, context, trap_config):
         pass
@@ -22,6 +22,7 @@ from oslo_log import log as logging
 
 from delfin import exception
 from delfin.drivers.hpe.hpe_3par import consts
+from delfin.drivers.utils import http_client
 from delfin.i18n import _
 
 LOG = logging.getLogger(__name__)
@@ -63,29 +64,26 @@ class RestClient(object):
         self.REST_AUTH_TOKEN = None
 
     def init_http_head(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Connection": "keep-alive",
-            'Accept': 'application/json',
-            "Content-Type": "application/json"})
-        self.session.verify = False
-        if not self.enable_verify:
-            self.session.verify = False
-        else:
+        verify = False
+        if self.enable_verify:
             LOG.debug("Enable certificate verification, ca_path: {0}".format(
                 self.ca_path))
-            self.session.verify = self.ca_path
-        self.session.trust_env = False
+            verify = self.ca_path
+        self.session = http_client.create_session(
+            verify=verify,
+            headers={'Accept': 'application/json',
+                     "Content-Type": "application/json"})
 
     def do_call(self, url, data, method,
-                calltimeout=consts.SOCKET_TIMEOUT):
+                calltimeout=consts.SOCKET_TIMEOUT,
+                budget=consts.CALL_BUDGET):
         """Send requests to Hpe3par storage server.
         """
         if 'http' not in url:
             if self.san_address:
                 url = self.san_address + url
 
-        kwargs = {'timeout': calltimeout}
+        kwargs = {'timeout': calltimeout, 'budget': budget}
         if data:
             kwargs['data'] = json.dumps(data)
 
@@ -30,6 +30,8 @@ ERROR_CONNECT_TO_SERVER = -403
 ERROR_UNAUTHORIZED_TO_SERVER = -401
 
 SOCKET_TIMEOUT = 52
+# Overall time(in sec) of a call including its retries
+CALL_BUDGET = 60
 LOGIN_SOCKET_TIMEOUT = 4
 
 ERROR_VOLUME_NOT_EXIST = 1077939726
@@ -42,6 +44,8 @@ FILE_SYSTEM_POOL_TYPE = '2'
 
 SECTORS_SIZE = 512
 QUERY_PAGE_SIZE = 150
+MIN_QUERY_PAGE_SIZE = 50
+MAX_QUERY_PAGE_SIZE = 600
 
 THICK_LUNTYPE = '0'
 THIN_LUNTYPE = '1'
@@ -31,6 +31,12 @@ class OceanStorDriver(driver.StorageDriver):
         self.client.login()
         self.sector_size = consts.SECTORS_SIZE
 
+    def close(self):
+        try:
+            self.client.logout()
+        finally:
+            self.client.session.close()
+
     def get_storage(self, context):
 
         storage = self.client.get_storage()
@@ -15,7 +15,10 @@
 #    under the License.
 
 import json
+import time
 
+import eventlet
+from oslo_config import cfg
 from oslo_log import log as logging
 import requests
 import six
@@ -23,10 +26,54 @@ import six
 from delfin import exception
 from delfin.i18n import _
 from delfin.drivers.huawei.oceanstor import consts
+from delfin.drivers.utils import http_client
+
+CONF = cfg.CONF
+
+oceanstor_opts = [
+    cfg.BoolOpt('concurrent_query',
+                default=False,
+                help='Whether to fetch paginated resources with concurrent '
+                     'range queries after getting the object count.'),
+    cfg.IntOpt('query_concurrency',
+               default=4,
+               min=1,
+               help='The maximum number of range queries in flight for '
+                    'one paginated call.'),
+    cfg.FloatOpt('query_target_latency',
+                 default=2.0,
+                 help='Response latency(in sec) the page size of concurrent '
+                      'range queries is adapted to.'),
+]
+
+CONF.register_opts(oceanstor_opts, "oceanstor_driver")
 
 LOG = logging.getLogger(__name__)
 
 
+class AdaptivePageSizer(object):
+    """Adapt the page size of range queries to observed latency.
+
+    Page size doubles while responses come back well under the target
+    latency and halves when they exceed it, bounded by
+    [min_size, max_size].
+    """
+
+    def __init__(self, page_size, target_latency,
+                 min_size=consts.MIN_QUERY_PAGE_SIZE,
+                 max_size=consts.MAX_QUERY_PAGE_SIZE):
+        self.min_size = min(min_size, page_size)
+        self.max_size = max(max_size, page_size)
+        self.page_size = page_size
+        self.target_latency = target_latency
+
+    def observe(self, latency):
+        if latency > self.target_latency:
+            self.page_size = max(self.min_size, self.page_size // 2)
+        elif latency < self.target_latency / 2:
+            self.page_size = min(self.max_size, self.page_size * 2)
+
+
 class RestClient(object):
     """Common class for Huawei OceanStor storage system."""
 
@@ -49,15 +96,15 @@ class RestClient(object):
 
     def init_http_head(self):
         self.url = None
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Connection": "keep-alive",
-            "Content-Type": "application/json"})
-        self.session.verify = False
-        self.session.trust_env = False
+        # Keep enough pooled connections for concurrent range queries
+        self.session = http_client.create_session(
+            headers={"Content-Type": "application/json"},
+            pool_maxsize=max(CONF.driver_http.pool_maxsize,
+                             CONF.oceanstor_driver.query_concurrency))
 
     def do_call(self, url, data, method,
-                calltimeout=consts.SOCKET_TIMEOUT, log_filter_flag=False):
+                calltimeout=consts.SOCKET_TIMEOUT,
+                budget=consts.CALL_BUDGET, log_filter_flag=False):
         """Send requests to Huawei storage server.
 
         Send HTTPS call, get response in JSON.
@@ -66,7 +113,7 @@ class RestClient(object):
         if self.url:
             url = self.url + url
 
-        kwargs = {'timeout': calltimeout}
+        kwargs = {'timeout': calltimeout, 'budget': budget}
         if data:
             kwargs['data'] = json.dumps(data)
 
@@ -93,20 +140,14 @@ class RestClient(object):
 
         res_json = res.json()
         if not log_filter_flag:
-            LOG.info('\n\n\n\nRequest URL: %(url)s\n\n'
-                     'Call Method: %(method)s\n\n'
-                     'Request Data: %(data)s\n\n'
-                     'Response Data:%(res)s\n\n',
-                     {'url': url,
-                      'method': method,
-                      'data': data,
-                      'res': res_json})
+            http_client.log_response(url, method, data, res_json)
 
         return res_json
 
     def login(self):
         """Login Huawei storage array."""
         device_id = None
+        connect_failed = True
         for item_url in self.san_address:
             url = item_url + "xx/sessions"
             data = {"username": self.rest_username,
@@ -117,6 +158,8 @@ class RestClient(object):
                                   calltimeout=consts.LOGIN_SOCKET_TIMEOUT,
                                   log_filter_flag=True)
 
+            if result['error']['code'] != consts.ERROR_CONNECT_TO_SERVER:
+                connect_failed = False
             if (result['error']['code'] != 0) or ("data" not in result):
                 LOG.error("Login error. URL: %(url)s\n"
                           "Reason: %(reason)s.",
@@ -140,6 +183,8 @@ class RestClient(object):
         if device_id is None:
             msg = _("Failed to login with all rest URLs.")
             LOG.error(msg)
+            if connect_failed:
+                raise exception.StorageBackendUnreachable(msg)
             raise exception.StorageBackendException(reason=msg)
 
         return device_id
@@ -194,6 +239,55 @@ class RestClient(object):
 
         return result_list
 
+    def get_count(self, url, log_filter_flag=False):
+        """Get the number of objects of a resource, e.g. /lun/count."""
+        result = self.call(url + '/count', method='GET',
+                           log_filter_flag=log_filter_flag)
+
+        msg = _('Get resource count error.')
+        self._assert_rest_result(result, msg)
+        self._assert_data_in_result(result, msg)
+
+        return int(result['data']['COUNT'])
+
+    def concurrent_paginated_call(self, url, data=None, method=None,
+                                  log_filter_flag=False,
+                                  page_size=consts.QUERY_PAGE_SIZE,
+                                  concurrency=None):
+        """Fetch all range windows of a resource concurrently.
+
+        The object count is queried first so that windows can be issued
+        without waiting for the previous page. At most `concurrency`
+        windows are in flight, pages are yielded in order as a generator,
+        and the size of the next windows follows the observed latency.
+        """
+        if concurrency is None:
+            concurrency = CONF.oceanstor_driver.query_concurrency
+        count = self.get_count(url, log_filter_flag)
+        sizer = AdaptivePageSizer(
+            page_size, CONF.oceanstor_driver.query_target_latency)
+        msg = _('Query resource volume error')
+
+        def _windows():
+            start = 0
+            while start < count:
+                end = start + sizer.page_size
+                yield start, end
+                start = end
+
+        def _fetch(start, end):
+            url_p = '{0}?range=[{1}-{2}]'.format(url, start, end)
+            begin = time.time()
+            result = self.call(url_p, data, method, log_filter_flag)
+            sizer.observe(time.time() - begin)
+            self._assert_rest_result(result, msg)
+            return result.get('data', [])
+
+        pool = eventlet.GreenPool(concurrency)
+        for page in pool.starmap(_fetch, _windows()):
+            for item in page:
+                yield item
+
     def logout(self):
         """Logout the session."""
         url = "/sessions"
@@ -236,6 +330,9 @@ class RestClient(object):
 
     def get_all_volumes(self):
         url = "/lun"
+        if CONF.oceanstor_driver.concurrent_query:
+            return self.concurrent_paginated_call(url, None, "GET",
+                                                  log_filter_flag=True)
         return self.paginated_call(url, None, "GET", log_filter_flag=True)
 
     def get_all_pools(self):
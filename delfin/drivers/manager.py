@@ -12,18 +12,187 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import collections
+import contextlib
 import copy
 import six
 import stevedore
 import threading
+import time
 
+from oslo_config import cfg
 from oslo_log import log
 
 from delfin import exception
 from delfin import utils
 from delfin.drivers import helper
+from delfin.drivers.utils import async_runner
 
 LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+driver_manager_opts = [
+    cfg.IntOpt('driver_cache_size',
+               default=512,
+               min=1,
+               help='Max number of driver instances kept in memory, the '
+                    'least recently used one is closed beyond it.'),
+    cfg.IntOpt('driver_idle_timeout',
+               default=3600,
+               min=0,
+               help='Close a cached driver instance after it has not been '
+                    'used for this long(in sec), 0 means never.'),
+]
+
+CONF.register_opts(driver_manager_opts)
+
+
+class DriverCache(object):
+    """LRU cache of driver instances keyed by storage id.
+
+    Entries beyond `driver_cache_size` or idle for longer than
+    `driver_idle_timeout` are evicted and the driver's close() is called
+    so that its session on the storage system is released. Drivers taken
+    with acquire=True are in use until release(), an evicted driver in
+    use is only closed once its last user released it.
+    """
+
+    def __init__(self, max_size=None, idle_timeout=None):
+        self.max_size = max_size or CONF.driver_cache_size
+        self.idle_timeout = CONF.driver_idle_timeout \
+            if idle_timeout is None else idle_timeout
+        # storage_id -> (driver, last access time), oldest first
+        self._entries = collections.OrderedDict()
+        self._lock = threading.RLock()
+        # id(driver) -> number of users, of the drivers in use
+        self._users = {}
+        # id(driver) -> driver, evicted while in use
+        self._closing = {}
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def __contains__(self, storage_id):
+        return storage_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, storage_id, default=None, acquire=False):
+        with self._lock:
+            entry = self._entries.get(storage_id)
+            if entry is None:
+                self.stats['misses'] += 1
+                return default
+            self.stats['hits'] += 1
+            self._entries[storage_id] = (entry[0], time.time())
+            self._entries.move_to_end(storage_id)
+            driver = entry[0]
+            if acquire:
+                self._acquire(driver)
+        self.evict_idle()
+        return driver
+
+    def put(self, storage_id, driver, acquire=False):
+        """Cache a driver, taken in use at once when acquire is True."""
+        with self._lock:
+            if acquire:
+                self._acquire(driver)
+            self[storage_id] = driver
+
+    def _acquire(self, driver):
+        self._users[id(driver)] = self._users.get(id(driver), 0) + 1
+
+    def release(self, driver):
+        """Release a driver taken with acquire=True."""
+        with self._lock:
+            users = self._users.get(id(driver), 0) - 1
+            if users > 0:
+                self._users[id(driver)] = users
+                return
+            self._users.pop(id(driver), None)
+            driver = self._closing.pop(id(driver), None)
+        if driver is not None:
+            close_driver(driver)
+
+    def __getitem__(self, storage_id):
+        driver = self.get(storage_id)
+        if driver is None:
+            raise KeyError(storage_id)
+        return driver
+
+    def __setitem__(self, storage_id, driver):
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(storage_id, None)
+            if old is not None and old[0] is not driver:
+                evicted.append(old[0])
+            self._entries[storage_id] = (driver, time.time())
+            while len(self._entries) > self.max_size:
+                __, (old_driver, __) = self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+                evicted.append(old_driver)
+        self._close(evicted)
+        self.evict_idle()
+
+    def pop(self, storage_id, default=None):
+        with self._lock:
+            entry = self._entries.pop(storage_id, None)
+        if entry is None:
+            return default
+        self._close([entry[0]])
+        return entry[0]
+
+    def evict_idle(self):
+        """Evict the entries which have been idle for too long."""
+        if not self.idle_timeout:
+            return
+        evicted = []
+        expiry = time.time() - self.idle_timeout
+        with self._lock:
+            while self._entries:
+                __, (driver, last_used) = \
+                    next(iter(self._entries.items()))
+                if last_used > expiry:
+                    break
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+                evicted.append(driver)
+        self._close(evicted)
+
+    def _close(self, drivers):
+        idle = []
+        with self._lock:
+            for driver in drivers:
+                if id(driver) in self._users:
+                    # Closed by the release of its last user
+                    self._closing[id(driver)] = driver
+                else:
+                    idle.append(driver)
+        for driver in idle:
+            close_driver(driver)
+
+
+def close_driver(driver):
+    """Close a driver, failures are logged only."""
+    try:
+        result = driver.close()
+        if asyncio.iscoroutine(result):
+            async_runner.run(result)
+    except Exception as e:
+        LOG.warning("Failed to close driver of storage {0}: {1}"
+                    .format(driver.storage_id, e))
+
+
+def discard_driver(driver):
+    """Close the driver of a storage which was not registered and drop the
+    state kept for the storage beyond the driver.
+    """
+    close_driver(driver)
+    try:
+        type(driver).remove_storage(driver.storage_id)
+    except Exception as e:
+        LOG.warning("Failed to remove storage {0} from its driver: {1}"
+                    .format(driver.storage_id, e))
 
 
 @six.add_metaclass(utils.Singleton)
@@ -36,7 +205,20 @@ class DriverManager(stevedore.ExtensionManager):
         # The driver_factory will keep the driver instance for
         # each of storage systems so that the session between driver
         # and storage system is effectively used.
-        self.driver_factory = dict()
+        # Bounded, idle entries are closed and dropped.
+        self.driver_factory = DriverCache()
+
+    @contextlib.contextmanager
+    def use_driver(self, context, storage_id):
+        """Get the cached driver of a storage, which is not closed while
+        the block runs even if it is evicted meanwhile.
+        """
+        driver = self._get_driver_obj(context, True, acquire=True,
+                                      storage_id=storage_id)
+        try:
+            yield driver
+        finally:
+            self.driver_factory.release(driver)
 
     def get_driver(self, context, invoke_on_load=True,
                    cache_on_load=True, **kwargs):
@@ -62,20 +244,35 @@ class DriverManager(stevedore.ExtensionManager):
         self.driver_factory[storage_id] = driver
 
     def remove_driver(self, storage_id):
-        """Clear driver instance from driver factory."""
+        """Clear driver instance from driver factory and close it.
+
+        The state the drivers keep for the storage beyond driver
+        instances is dropped as well.
+        """
         self.driver_factory.pop(storage_id, None)
+        for extension in self.extensions:
+            try:
+                extension.plugin.remove_storage(storage_id)
+            except Exception as e:
+                LOG.warning("Failed to remove storage {0} from driver {1}: "
+                            "{2}".format(storage_id, extension.name, e))
 
-    def _get_driver_obj(self, context, cache_on_load=True, **kwargs):
+    def _get_driver_obj(self, context, cache_on_load=True, acquire=False,
+                        **kwargs):
         if not cache_on_load or not kwargs.get('storage_id'):
             cls = self._get_driver_cls(**kwargs)
             return cls(**kwargs)
 
-        if kwargs['storage_id'] in self.driver_factory:
-            return self.driver_factory[kwargs['storage_id']]
+        driver = self.driver_factory.get(kwargs['storage_id'],
+                                         acquire=acquire)
+        if driver is not None:
+            return driver
 
         with self._instance_lock:
-            if kwargs['storage_id'] in self.driver_factory:
-                return self.driver_factory[kwargs['storage_id']]
+            driver = self.driver_factory.get(kwargs['storage_id'],
+                                             acquire=acquire)
+            if driver is not None:
+                return driver
 
             access_info = copy.deepcopy(kwargs)
             storage_id = access_info.pop('storage_id')
@@ -87,7 +284,7 @@ class DriverManager(stevedore.ExtensionManager):
                 cls = self._get_driver_cls(**access_info)
                 driver = cls(**access_info)
 
-            self.driver_factory[storage_id] = driver
+            self.driver_factory.put(storage_id, driver, acquire=acquire)
             return driver
 
     def _get_driver_cls(self, **kwargs):
@@ -0,0 +1,134 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""HTTP client for async drivers, based on aiohttp.
+
+aiohttp is an optional dependency, only needed by drivers using this
+module. Retries and timeouts follow the [driver_http] options of
+delfin.drivers.utils.http_client.
+"""
+
+import asyncio
+import random
+import ssl
+
+from oslo_config import cfg
+from oslo_log import log
+
+from delfin import exception
+from delfin.drivers.utils import http_client
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+CONF = cfg.CONF
+LOG = log.getLogger(__name__)
+
+
+class AsyncRestClient(object):
+    """Pooled aiohttp session to one storage system.
+
+    :param base_url: prefix of the urls passed to request().
+    :param verify: False, True or the path of a CA bundle.
+    :param limit: max number of concurrent connections, many requests can
+        be in flight on them.
+    """
+
+    def __init__(self, base_url, verify=False, headers=None, limit=None):
+        if aiohttp is None:
+            raise exception.DelfinException(
+                message='aiohttp is required by async drivers')
+        self.base_url = base_url
+        self.verify = verify
+        self.headers = {'Accept-Encoding': 'gzip, deflate',
+                        'Content-Type': 'application/json'}
+        self.headers.update(headers or {})
+        self.limit = limit or CONF.driver_http.pool_maxsize
+        self.session = None
+
+    def _ssl_context(self):
+        if not self.verify:
+            return False
+        if self.verify is True:
+            return ssl.create_default_context()
+        return ssl.create_default_context(cafile=self.verify)
+
+    def _get_session(self):
+        # The session is bound to the running loop, create it lazily
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.limit,
+                                               ssl=self._ssl_context()),
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=CONF.driver_http.connect_timeout,
+                    sock_read=CONF.driver_http.read_timeout))
+        return self.session
+
+    async def request(self, method, url, data=None, params=None,
+                      budget=None):
+        """Send a request and return (status code, decoded json body).
+
+        Idempotent requests are retried on connection errors and
+        502/503/504, all of them within `budget` seconds when given.
+        """
+        session = self._get_session()
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + budget if budget else None
+        retriable = method.upper() in http_client.IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            timeout = None
+            if deadline:
+                timeout = aiohttp.ClientTimeout(
+                    total=max(deadline - loop.time(), 0))
+            try:
+                async with session.request(method, self.base_url + url,
+                                           json=data, params=params,
+                                           timeout=timeout) as res:
+                    body = None
+                    if res.content_type == 'application/json':
+                        body = await res.json()
+                    status = res.status
+                error = None
+                retry = retriable and \
+                    status in http_client.RETRY_STATUS_CODES
+            except (aiohttp.ClientConnectionError,
+                    asyncio.TimeoutError) as e:
+                error = e
+                retry = retriable or \
+                    isinstance(e, aiohttp.ClientConnectorError)
+
+            wait = min(CONF.driver_http.backoff_factor * (2 ** attempt) +
+                       random.uniform(0, CONF.driver_http.backoff_factor),
+                       CONF.driver_http.backoff_max)
+            if deadline and loop.time() + wait >= deadline:
+                retry = False
+            if not retry or attempt >= CONF.driver_http.max_retries:
+                if error is not None:
+                    raise exception.StorageBackendUnreachable(
+                        '{0} {1}: {2}'.format(method, url, error))
+                http_client.log_response(url, method, data, body)
+                return status, body
+
+            attempt += 1
+            LOG.debug('Retry {0} {1} in {2:.2f}s, attempt {3}'.format(
+                method, url, wait, attempt))
+            await asyncio.sleep(wait)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
@@ -0,0 +1,184 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Run coroutines of async drivers from the (green threaded) services."""
+
+import asyncio
+import collections
+import functools
+import importlib.util
+import sys
+
+import eventlet
+from eventlet import event
+from eventlet import hubs
+from eventlet import patcher
+from oslo_log import log
+import six
+
+from delfin import exception
+from delfin import utils
+
+LOG = log.getLogger(__name__)
+
+# The services are monkey patched by eventlet, the event loop needs the
+# original modules to run in a native thread.
+_threading = patcher.original('threading')
+_os = patcher.original('os')
+
+
+def _native_selectors():
+    """Load a copy of selectors bound to the unpatched select module.
+
+    eventlet strips epoll/poll from the patched one, so the loop would
+    fall back to (green) select().
+    """
+    spec = importlib.util.find_spec('selectors')
+    module = importlib.util.module_from_spec(spec)
+    saved = sys.modules['select']
+    sys.modules['select'] = patcher.original('select')
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        sys.modules['select'] = saved
+    return module
+
+
+class _GreenWaker(object):
+    """Wake green threads of one hub from the loop thread.
+
+    The loop thread queues the event to send and writes a byte to a pipe,
+    a green thread reading the pipe sends the queued events. One pipe
+    serves any number of waiting callers.
+    """
+
+    def __init__(self):
+        self.hub = hubs.get_hub()
+        self._ready = collections.deque()
+        self._rfd, self._wfd = _os.pipe()
+        _os.set_blocking(self._rfd, False)
+        _os.set_blocking(self._wfd, False)
+        eventlet.spawn_n(self._drain)
+
+    def _drain(self):
+        while True:
+            hubs.trampoline(self._rfd, read=True)
+            try:
+                _os.read(self._rfd, 4096)
+            except BlockingIOError:
+                pass
+            while self._ready:
+                self._ready.popleft().send()
+
+    def wake(self, green_event):
+        """Called in the loop thread."""
+        self._ready.append(green_event)
+        try:
+            _os.write(self._wfd, b'x')
+        except BlockingIOError:
+            # The pipe is full, so already readable
+            pass
+
+
+@six.add_metaclass(utils.Singleton)
+class AsyncRunner(object):
+    """Process wide asyncio event loop running in a native thread.
+
+    All coroutines share the one loop, so any number of them can be in
+    flight while each caller only waits for its own result.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._waker = None
+        self._lock = _threading.Lock()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._loop = asyncio.SelectorEventLoop(
+                _native_selectors().DefaultSelector())
+            self._thread = _threading.Thread(target=self._run_loop,
+                                             name='delfin-async-runner',
+                                             daemon=True)
+            self._thread.start()
+            LOG.info("Started asyncio loop for async drivers")
+
+    def _get_waker(self):
+        if self._waker is None:
+            with self._lock:
+                if self._waker is None:
+                    self._waker = _GreenWaker()
+        return self._waker
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the loop and wait for its result.
+
+        On timeout the coroutine is cancelled.
+        """
+        outcome = {}
+        if patcher.is_monkey_patched('thread') and \
+                self._get_waker().hub is hubs.get_hub():
+            # Only this green thread waits, the others keep running
+            done = event.Event()
+            notify = functools.partial(self._waker.wake, done)
+        else:
+            done = _threading.Event()
+            notify = done.set
+
+        async def _run():
+            try:
+                outcome['result'] = await coro
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                notify()
+
+        def _start():
+            outcome['task'] = self._loop.create_task(_run())
+
+        def _cancel():
+            outcome['task'].cancel()
+
+        self._ensure_loop()
+        self._loop.call_soon_threadsafe(_start)
+        done.wait(timeout)
+        if 'result' not in outcome and 'error' not in outcome:
+            self._loop.call_soon_threadsafe(_cancel)
+            raise exception.DelfinException(
+                message='Async driver call timed out')
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['result']
+
+    def stop(self):
+        with self._lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+            self._thread = None
+
+
+def run(coro, timeout=None):
+    return AsyncRunner().run(coro, timeout)
@@ -0,0 +1,229 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Shared HTTP transport for REST based drivers."""
+
+import contextlib
+import random
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+import requests
+from requests import adapters
+import requests.exceptions as r_exc
+
+from delfin import tracing
+
+CONF = cfg.CONF
+
+http_client_opts = [
+    cfg.IntOpt('pool_maxsize',
+               default=10,
+               min=1,
+               help='Max number of pooled connections per storage host.'),
+    cfg.IntOpt('max_retries',
+               default=3,
+               min=0,
+               help='Max number of retries of a failed request.'),
+    cfg.FloatOpt('backoff_factor',
+                 default=0.5,
+                 help='Base(in sec) of the exponential backoff between '
+                      'retries, a random jitter of up to the same amount '
+                      'is added to each wait.'),
+    cfg.FloatOpt('backoff_max',
+                 default=10,
+                 help='Max wait(in sec) between two retries.'),
+    cfg.FloatOpt('request_budget',
+                 default=120,
+                 min=0,
+                 help='Default overall time(in sec) of a request including '
+                      'its retries, 0 means unbounded.'),
+    cfg.FloatOpt('connect_timeout',
+                 default=10,
+                 help='Default timeout(in sec) for connecting to storage.'),
+    cfg.FloatOpt('read_timeout',
+                 default=60,
+                 help='Default timeout(in sec) for reading a response.'),
+    cfg.FloatOpt('body_log_sample_rate',
+                 default=0.01,
+                 min=0,
+                 max=1,
+                 help='Fraction of responses whose body is logged.'),
+]
+
+CONF.register_opts(http_client_opts, "driver_http")
+
+LOG = log.getLogger(__name__)
+
+# Counters of the requests sent by the current (green) thread
+_local = threading.local()
+
+# Status codes worth retrying, the request did not take effect
+RETRY_STATUS_CODES = (502, 503, 504)
+# Methods which are safe to repeat after the request was sent
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+
+class HttpSession(requests.Session):
+    """requests.Session with tuned pooling, retries and timeout budgets.
+
+    Each request is retried on connection errors and on 502/503/504 with
+    exponential backoff and jitter. Non idempotent requests are only
+    retried when the connection could not be set up. The keyword argument
+    `budget` (in sec) bounds the overall time of a call including its
+    retries, per attempt timeouts are shortened to fit in it. It defaults
+    to the session's budget. A connect timeout is not retried when the
+    rest of the budget cannot hold another connect attempt.
+    """
+
+    def __init__(self, pool_maxsize=None, max_retries=None, budget=None):
+        super(HttpSession, self).__init__()
+        if pool_maxsize is None:
+            pool_maxsize = CONF.driver_http.pool_maxsize
+        self.max_retries = CONF.driver_http.max_retries \
+            if max_retries is None else max_retries
+        self.budget = CONF.driver_http.request_budget \
+            if budget is None else budget
+        self.timeout = (CONF.driver_http.connect_timeout,
+                        CONF.driver_http.read_timeout)
+        adapter = adapters.HTTPAdapter(pool_connections=1,
+                                       pool_maxsize=pool_maxsize)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        self.headers.update({'Connection': 'keep-alive',
+                             'Accept-Encoding': 'gzip, deflate'})
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    def _backoff(self, attempt):
+        wait = CONF.driver_http.backoff_factor * (2 ** attempt)
+        wait += random.uniform(0, CONF.driver_http.backoff_factor)
+        return min(wait, CONF.driver_http.backoff_max)
+
+    @staticmethod
+    def _fit_timeout(timeout, remaining):
+        if remaining is None:
+            return timeout
+        if isinstance(timeout, tuple):
+            return tuple(min(t, remaining) if t else remaining
+                         for t in timeout)
+        return min(timeout, remaining) if timeout else remaining
+
+    @staticmethod
+    def _connect_timeout(timeout):
+        return timeout[0] if isinstance(timeout, tuple) else timeout
+
+    def request(self, method, url, **kwargs):
+        method = method.upper()
+        with tracing.span('http ' + method, kind=tracing.KIND_CLIENT,
+                          child_only=True,
+                          **{'http.method': method,
+                             'http.url': url.split('?')[0]}) as span:
+            if span is None:
+                return self._request(method, url, **kwargs)
+            with count_requests() as counter:
+                try:
+                    res = self._request(method, url, **kwargs)
+                finally:
+                    span.set_attribute('http.attempts', counter['requests'])
+            span.set_attribute('http.status_code', res.status_code)
+            return res
+
+    def _request(self, method, url, **kwargs):
+        budget = kwargs.pop('budget', self.budget)
+        timeout = kwargs.pop('timeout', None) or self.timeout
+        # Else a CA bundle from the environment overrides verify=False
+        kwargs.setdefault('verify', self.verify)
+        deadline = time.time() + budget if budget else None
+        attempt = 0
+        while True:
+            remaining = deadline - time.time() if deadline else None
+            self.stats['requests'] += 1
+            for counter in getattr(_local, 'counters', ()):
+                counter['requests'] += 1
+            try:
+                res = super(HttpSession, self).request(
+                    method, url,
+                    timeout=self._fit_timeout(timeout, remaining), **kwargs)
+                retry = res.status_code in RETRY_STATUS_CODES \
+                    and method in IDEMPOTENT_METHODS
+                error = None
+            except r_exc.SSLError:
+                self.stats['failures'] += 1
+                raise
+            except (r_exc.ConnectTimeout, r_exc.ConnectionError,
+                    r_exc.ReadTimeout) as e:
+                res = None
+                retry = isinstance(e, r_exc.ConnectTimeout) \
+                    or method in IDEMPOTENT_METHODS
+                error = e
+
+            wait = self._backoff(attempt)
+            if deadline:
+                remaining = deadline - time.time() - wait
+                if remaining <= 0:
+                    retry = False
+                elif isinstance(error, r_exc.ConnectTimeout) and \
+                        remaining < (self._connect_timeout(timeout) or 0):
+                    # Another attempt would most likely time out as well
+                    retry = False
+            if not retry or attempt >= self.max_retries:
+                if error is not None:
+                    self.stats['failures'] += 1
+                    raise error
+                return res
+
+            attempt += 1
+            self.stats['retries'] += 1
+            LOG.debug('Retry %(method)s %(url)s in %(wait).2fs, '
+                      'attempt %(attempt)s, reason: %(reason)s',
+                      {'method': method, 'url': url, 'wait': wait,
+                       'attempt': attempt,
+                       'reason': error or res.status_code})
+            time.sleep(wait)
+
+
+@contextlib.contextmanager
+def count_requests():
+    """Count the requests, retries included, which the current thread sends
+    through any HttpSession in the block.
+    """
+    counter = {'requests': 0}
+    counters = getattr(_local, 'counters', ())
+    _local.counters = counters + (counter,)
+    try:
+        yield counter
+    finally:
+        _local.counters = counters
+
+
+def create_session(verify=False, headers=None, pool_maxsize=None,
+                   max_retries=None, trust_env=False, budget=None):
+    """Create a session for talking to one storage system."""
+    session = HttpSession(pool_maxsize=pool_maxsize,
+                          max_retries=max_retries, budget=budget)
+    session.verify = verify
+    session.trust_env = trust_env
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def log_response(url, method, data, response):
+    """Log a request and its response body for a sample of the calls."""
+    if random.random() >= CONF.driver_http.body_log_sample_rate:
+        return
+    LOG.debug('Request URL: %(url)s, Call Method: %(method)s, '
+              'Request Data: %(data)s, Response Data: %(res)s',
+              {'url': url, 'method': method, 'data': data, 'res': response})
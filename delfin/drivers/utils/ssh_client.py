@@ -14,19 +14,30 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import os
+import socket
 
 import paramiko as paramiko
 
 from oslo_log import log as logging
 
 from delfin import exception
+from delfin import utils
 
 LOG = logging.getLogger(__name__)
 
 
 class SSHClient(object):
-    """Common class for Hpe 3parStor storage system."""
+    """Common class for Hpe 3parStor storage system.
+
+    Commands run over a per-storage pool of persistent ssh connections,
+    each command in its own channel of a pooled transport, so that the
+    TCP and SSH handshake is paid once per pooled connection.
+    """
     SOCKET_TIMEOUT = 30
+    # Max number of pooled connections to one storage
+    SSH_POOL_MAX_SIZE = 3
+    # Pooled connections unused longer than this(in sec) are re-created
+    SSH_IDLE_TIMEOUT = 300
 
     def __init__(self, **kwargs):
 
@@ -41,76 +52,117 @@ class SSHClient(object):
         self.ssh_conn_timeout = ssh_access.get('conn_timeout')
         if self.ssh_conn_timeout is None:
             self.ssh_conn_timeout = SSHClient.SOCKET_TIMEOUT
+        self.ssh_pool = None
+        self.closed = False
 
-    def connect(self):
-        self.ssh = paramiko.SSHClient()
-
+    def _known_hosts_file(self):
         if self.ssh_private_key is None:
-            self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        else:
-            path = os.getcwd()
-            filename = path + '\\' + self.ssh_host + 'known_hosts'
-            file = open(filename, 'w')
+            return None
+        filename = os.path.join(os.getcwd(),
+                                self.ssh_host + '_known_hosts')
+        with open(filename, 'w') as file:
             file.write(self.ssh_private_key)
-            file.close()
-            self.ssh.load_host_keys(filename)
-
-        self.ssh.connect(hostname=self.ssh_host, port=self.ssh_port,
-                         username=self.ssh_username,
-                         password=self.ssh_password,
-                         timeout=self.ssh_conn_timeout)
-
-    def execCommand(self, command_str):
-        result = None
-        try:
-            if command_str is not None:
-                if self.ssh is not None:
-                    stdin, stdout, stderr = self.ssh.exec_command(command_str)
-                    res, err = stdout.read(), stderr.read()
-                    re = res if res else err
-                    result = re.decode()
-        except Exception as e:
-            LOG.error(e)
-            result = e
-        return result
+        return filename
+
+    def get_pool(self):
+        if self.closed:
+            raise exception.SSHException('SSH client is closed')
+        if self.ssh_pool is None:
+            self.ssh_pool = utils.SSHPool(
+                self.ssh_host, self.ssh_port, self.ssh_conn_timeout,
+                self.ssh_username, password=self.ssh_password,
+                known_hosts=self._known_hosts_file(),
+                idle_timeout=SSHClient.SSH_IDLE_TIMEOUT,
+                max_size=SSHClient.SSH_POOL_MAX_SIZE)
+        return self.ssh_pool
+
+    def exec_command(self, ssh, command_str):
+        """Run one command in a new channel of the given connection."""
+        stdin, stdout, stderr = ssh.exec_command(command_str)
+        res, err = stdout.read(), stderr.read()
+        re = res if res else err
+        return re.decode()
 
     def close(self):
+        """Close all the pooled connections."""
+        self.closed = True
         try:
-            if self.ssh is not None:
-                # Close connection
-                self.ssh.close()
-                self.ssh = None
+            if self.ssh_pool is not None:
+                self.ssh_pool.close_all()
+                self.ssh_pool = None
         except Exception as e:
             LOG.error(e)
 
+    @staticmethod
+    def _is_timeout(e):
+        while e is not None:
+            if isinstance(e, (socket.timeout, TimeoutError)):
+                return True
+            e = e.__cause__ or e.__context__
+        return False
+
+    def _raise_ssh_exception(self, e):
+        LOG.error('doexec InvalidUsernameOrPassword error:{}'.format(e))
+        if isinstance(e, paramiko.AuthenticationException):
+            raise exception.InvalidUsernameOrPassword()
+        elif 'WSAETIMEDOUT' in str(e) or self._is_timeout(e):
+            raise exception.SSHConnectTimeout()
+        elif 'No authentication methods available' in str(e) \
+                or 'Authentication failed' in str(e):
+            raise exception.SSHInvalidUsernameOrPassword()
+        elif 'not a valid RSA private key file' in str(e):
+            raise exception.InvalidPrivateKey()
+        elif 'not found in known_hosts' in str(e):
+            raise exception.SSHNotFoundKnownHosts(self.ssh_host)
+        else:
+            raise exception.SSHException()
+
     def doexec(self, context, command_str):
-        """Clear alert from storage system."""
+        """Execute command on storage system over a pooled connection."""
         re = None
         try:
             if command_str is not None:
-                self.connect()
-                re = self.execCommand(command_str)
-        except paramiko.AuthenticationException as ae:
-            LOG.error('doexec Authentication error:{}'.format(ae))
-            raise exception.InvalidUsernameOrPassword()
+                pool = self.get_pool()
+                ssh = pool.get()
+                try:
+                    re = self.exec_command(ssh, command_str)
+                except Exception:
+                    # The connection is suspect, do not hand it out again
+                    pool.remove(ssh)
+                    raise
+                else:
+                    pool.put(ssh)
         except Exception as e:
-            LOG.error('doexec InvalidUsernameOrPassword error:{}'.format(e))
-            if 'WSAETIMEDOUT' in str(e):
-                raise exception.SSHConnectTimeout()
-            elif 'No authentication methods available' in str(e) \
-                    or 'Authentication failed' in str(e):
-                raise exception.SSHInvalidUsernameOrPassword()
-            elif 'not a valid RSA private key file' in str(e):
-                raise exception.InvalidPrivateKey()
-            elif 'not found in known_hosts' in str(e):
-                raise exception.SSHNotFoundKnownHosts(self.ssh_host)
-            else:
-                raise exception.SSHException()
-
-        finally:
-            self.close()
+            self._raise_ssh_exception(e)
         return re
 
+    def doexec_lines(self, context, command_str):
+        """Execute command and yield its output line by line.
+
+        The output is consumed from the channel as it arrives instead of
+        being read into memory as a whole. The pooled connection is held
+        until the generator is exhausted or closed.
+        """
+        try:
+            pool = self.get_pool()
+            ssh = pool.get()
+        except Exception as e:
+            self._raise_ssh_exception(e)
+        try:
+            stdin, stdout, stderr = ssh.exec_command(command_str)
+            for line in stdout:
+                yield line.rstrip('\r\n')
+        except GeneratorExit:
+            # Stopped early, drop the rest of the output with the channel
+            stdout.channel.close()
+            pool.put(ssh)
+            raise
+        except Exception as e:
+            pool.remove(ssh)
+            self._raise_ssh_exception(e)
+        else:
+            pool.put(ssh)
+
     def login(self, context):
         """Test SSH connection """
         version = ''
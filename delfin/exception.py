@@ -166,6 +166,18 @@ class VolumeNotFound(NotFound):
     msg_fmt = _("Volume {0} could not be found.")
 
 
+class SyncHistoryNotFound(NotFound):
+    msg_fmt = _("Sync history {0} could not be found.")
+
+
+class JobNotFound(NotFound):
+    msg_fmt = _("Job {0} could not be found.")
+
+
+class AlertNotFound(NotFound):
+    msg_fmt = _("Alert {0} could not be found.")
+
+
 class StorageDriverNotFound(NotFound):
     msg_fmt = _("Storage driver '{0}'could not be found.")
 
@@ -182,6 +194,16 @@ class StorageBackendException(DelfinException):
     msg_fmt = _("Exception from Storage Backend: {0}.")
 
 
+class StorageBackendUnreachable(StorageBackendException):
+    msg_fmt = _("Exception from Storage Backend: {0}.")
+
+
+class StorageCircuitOpen(DelfinException):
+    msg_fmt = _("Storage {0} is unreachable, calls to it are suspended "
+                "for {1} seconds.")
+    code = 503
+
+
 class SSHException(DelfinException):
     msg_fmt = _("Exception in SSH protocol negotiation or logic. {0}")
 
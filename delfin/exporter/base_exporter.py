@@ -12,13 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import threading
+import time
 
 from oslo_config import cfg
 from oslo_log import log
 import six
 from stevedore import extension
 
+from delfin import context
 from delfin import exception
+from delfin import metrics
+from delfin.exporter import spool as exporter_spool
 from delfin.i18n import _
 
 LOG = log.getLogger(__name__)
@@ -30,11 +36,71 @@ exporter_opts = [
     cfg.ListOpt('performance_exporters',
                 default=['PerformanceExporterExample'],
                 help="Which exporters for performance push."),
+    cfg.IntOpt('exporter_queue_size',
+               default=10000,
+               min=0,
+               help='Data queued for each exporter at most, 0 means to '
+                    'dispatch to the exporters one after the other on the '
+                    'caller thread.'),
+    cfg.IntOpt('exporter_batch_size',
+               default=100,
+               min=1,
+               help='Data dispatched to an exporter at once at most.'),
+    cfg.FloatOpt('exporter_batch_age',
+                 default=1.0,
+                 min=0,
+                 help='Seconds the oldest queued data waits for its batch '
+                      'to fill before the batch is dispatched.'),
+    cfg.StrOpt('exporter_overflow',
+               default='drop_oldest',
+               choices=['drop_oldest', 'drop_newest', 'block'],
+               help='What to do with data when the queue of an exporter '
+                    'is full: drop the oldest queued data, drop the new '
+                    'data, or block the caller until there is room.'),
+    cfg.FloatOpt('exporter_block_timeout',
+                 default=5.0,
+                 min=0,
+                 help='Seconds the caller blocks for room in the queue of '
+                      'an exporter at most, the data is dropped then.'),
+    cfg.FloatOpt('exporter_retry_interval',
+                 default=1.0,
+                 min=0,
+                 help='Seconds before exporting spooled data again after '
+                      'the exporter failed, doubled on each failure.'),
+    cfg.FloatOpt('exporter_max_retry_interval',
+                 default=60.0,
+                 min=0,
+                 help='Seconds between two retries of a failing exporter '
+                      'at most.'),
 ]
 
 CONF = cfg.CONF
 CONF.register_opts(exporter_opts)
 
+DISPATCH_SECONDS = metrics.histogram(
+    'delfin_exporter_dispatch_duration_seconds',
+    'Duration of the dispatches of data to each exporter.',
+    ('exporter',))
+DISPATCH_ERRORS = metrics.counter(
+    'delfin_exporter_dispatch_errors_total',
+    'Dispatches of data which failed, per exporter.',
+    ('exporter',))
+QUEUE_DEPTH = metrics.gauge(
+    'delfin_exporter_queue_depth',
+    'Data queued for each exporter.',
+    ('exporter',))
+DROPPED = metrics.counter(
+    'delfin_exporter_dropped_total',
+    'Data dropped as the queue of the exporter was full.',
+    ('exporter',))
+BATCH_SIZE = metrics.histogram(
+    'delfin_exporter_batch_size',
+    'Data dispatched at once to each exporter.',
+    ('exporter',), buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+
+OVERFLOW_DROP_OLDEST = 'drop_oldest'
+OVERFLOW_BLOCK = 'block'
+
 
 class BaseExporter(object):
     """Base class for data exporter."""
@@ -48,23 +114,210 @@ class BaseExporter(object):
         raise NotImplementedError()
 
 
+class ExporterWorker(object):
+    """Dispatch data to an exporter from a bounded queue on a thread of
+    its own, so that a slow exporter delays neither the caller nor the
+    other exporters.
+
+    The data is dispatched in batches of exporter_batch_size at most, a
+    batch goes once full or once its oldest data waited
+    exporter_batch_age seconds. When the queue is full, data is dropped
+    or the caller blocked as set by exporter_overflow.
+    """
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self.name = type(exporter).__name__
+        self.queue_size = CONF.exporter_queue_size
+        self.batch_size = CONF.exporter_batch_size
+        self.batch_age = CONF.exporter_batch_age
+        self.overflow = CONF.exporter_overflow
+        # (context, data, queued at)
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def _has_room(self):
+        return len(self._queue) < self.queue_size or self._stopped
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name='exporter-' + self.name)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def put(self, ctxt, data):
+        """Queue the data for the exporter."""
+        if not self.queue_size or self._stopped:
+            self._dispatch(ctxt, data)
+            return
+        dropped = 0
+        with self._cond:
+            self._start()
+            deadline = time.monotonic() + CONF.exporter_block_timeout
+            for item in data:
+                if not self._has_room() and self.overflow == OVERFLOW_BLOCK:
+                    self._cond.wait_for(
+                        self._has_room, max(deadline - time.monotonic(), 0))
+                if len(self._queue) >= self.queue_size:
+                    dropped += 1
+                    if self.overflow != OVERFLOW_DROP_OLDEST:
+                        continue
+                    self._queue.popleft()
+                self._queue.append((ctxt, item, time.monotonic()))
+            QUEUE_DEPTH.set(len(self._queue), exporter=self.name)
+            self._cond.notify_all()
+        if dropped:
+            DROPPED.inc(dropped, exporter=self.name)
+            LOG.warning('Queue of exporter {0} is full, dropped {1} '
+                        'data.'.format(self.name, dropped))
+
+    def _next_batch(self):
+        """Wait for a batch to be due, None once stopped and flushed."""
+        with self._cond:
+            while True:
+                if self._queue:
+                    wait = self.batch_age - (time.monotonic() -
+                                             self._queue[0][2])
+                    if (self._stopped or wait <= 0
+                            or len(self._queue) >= self.batch_size):
+                        break
+                elif self._stopped:
+                    return None
+                else:
+                    wait = None
+                self._cond.wait(wait)
+            batch = [self._queue.popleft() for __ in
+                     range(min(self.batch_size, len(self._queue)))]
+            QUEUE_DEPTH.set(len(self._queue), exporter=self.name)
+            self._cond.notify_all()
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            # The batch goes with the context of its first data
+            self._dispatch(batch[0][0], [item for __, item, __ in batch])
+
+    def _dispatch(self, ctxt, data):
+        """Dispatch the data to the exporter, returns whether it did."""
+        BATCH_SIZE.observe(len(data), exporter=self.name)
+        try:
+            with DISPATCH_SECONDS.time(exporter=self.name):
+                self.exporter.dispatch(ctxt, data)
+            return True
+        except exception.DelfinException as e:
+            DISPATCH_ERRORS.inc(exporter=self.name)
+            err_msg = _("Failed to export data (%s).") % e.msg
+            LOG.exception(err_msg)
+        except Exception as e:
+            DISPATCH_ERRORS.inc(exporter=self.name)
+            err_msg = six.text_type(e)
+            LOG.exception(err_msg)
+        return False
+
+    def stop(self, timeout=None):
+        """Dispatch the queued data and stop the thread, data put after
+        is dispatched on the caller thread.
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                LOG.warning('Exporter {0} did not flush its queue in {1}s.'
+                            .format(self.name, timeout))
+
+
+class SpoolWorker(ExporterWorker):
+    """Dispatch the data of a spool to an exporter on a thread of its
+    own, from the position of the exporter in the spool.
+
+    The position only moves once a batch is dispatched, a failed batch
+    is dispatched again after exporter_retry_interval, doubled on each
+    failure up to exporter_max_retry_interval. Data left in the spool
+    when the service stops is dispatched once it starts again.
+    """
+
+    def __init__(self, exporter, spool):
+        super(SpoolWorker, self).__init__(exporter)
+        self.spool = spool
+        self.spool.register(self.name)
+        self._appended = 0
+        # Dispatch what is left from before a restart
+        self._start()
+
+    def put(self, ctxt, data):
+        """Wake the thread up, the data is in the spool already."""
+        with self._cond:
+            self._appended += 1
+            self._cond.notify_all()
+
+    def _run(self):
+        retry_interval = CONF.exporter_retry_interval
+        while not self._stopped:
+            with self._cond:
+                appended = self._appended
+            records, position = self.spool.read(self.name, self.batch_size)
+            failed = False
+            wait = None
+            if records:
+                wait = self.batch_age - (time.time() - records[0]['at'])
+                if wait <= 0 or len(records) >= self.batch_size:
+                    # Spooled data is exported with an admin context
+                    if self._dispatch(context.get_admin_context(),
+                                      [record['data'] for record in records]):
+                        self.spool.commit(self.name, position)
+                        retry_interval = CONF.exporter_retry_interval
+                        continue
+                    failed = True
+                    wait = retry_interval
+                    retry_interval = min(
+                        retry_interval * 2,
+                        CONF.exporter_max_retry_interval)
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopped or (not failed and
+                                              self._appended != appended),
+                    wait)
+
+
 class BaseManager(BaseExporter):
-    def __init__(self, namespace):
+    def __init__(self, namespace, spool=None):
         self.extension_manager = extension.ExtensionManager(namespace)
         self.exporters = self._get_exporters()
+        self.spool = spool
+        if spool is None:
+            self.workers = [ExporterWorker(exporter)
+                            for exporter in self.exporters]
+        else:
+            self.workers = [SpoolWorker(exporter, spool)
+                            for exporter in self.exporters]
 
     def dispatch(self, ctxt, data):
         if not isinstance(data, (list, tuple)):
             data = [data]
-        for exporter in self.exporters:
-            try:
-                exporter.dispatch(ctxt, data)
-            except exception.DelfinException as e:
-                err_msg = _("Failed to export data (%s).") % e.msg
-                LOG.exception(err_msg)
-            except Exception as e:
-                err_msg = six.text_type(e)
-                LOG.exception(err_msg)
+        if self.spool is not None:
+            # Spooled before dispatch, to be exported even if the
+            # exporters are not available until after a restart
+            now = time.time()
+            self.spool.append([{'at': now, 'data': item} for item in data])
+        for worker in self.workers:
+            worker.put(ctxt, data)
+
+    def stop(self, timeout=10):
+        """Flush the queues of the exporters, waiting timeout seconds
+        at most for each. Spooled data is left in the spool.
+        """
+        for worker in self.workers:
+            worker.stop(timeout)
+        if self.spool is not None:
+            self.spool.close()
 
     def _get_exporters(self):
         """Get exporters from configuration file which
@@ -87,8 +340,13 @@ class BaseManager(BaseExporter):
 class AlertExporterManager(BaseManager):
     NAMESPACE = 'delfin.alert.exporters'
 
-    def __init__(self):
-        super(AlertExporterManager, self).__init__(self.NAMESPACE)
+    def __init__(self, worker_index=0):
+        spool = None
+        if CONF.alert_spool.enabled:
+            # A spool per worker process of the alert service
+            spool = exporter_spool.Spool.from_config('alert_spool',
+                                                     worker_index)
+        super(AlertExporterManager, self).__init__(self.NAMESPACE, spool)
 
     def _get_configured_exporters(self):
         return CONF.alert_exporters
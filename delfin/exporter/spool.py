@@ -0,0 +1,249 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Append-only on-disk spool of the data to export.
+
+Data is appended as JSON lines to segment files named after their
+sequence number, a new segment is started once the current one reaches
+segment_size. Each reader, one per exporter, reads from its own position
+which is saved once the read data has been exported, so that data not
+yet exported when the service stops is read again after it restarts.
+
+Segments read by all the readers are removed, older segments are also
+removed when the spool exceeds max_size or max_age whether read or not.
+"""
+
+import os
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+from oslo_serialization import jsonutils
+
+from delfin import metrics
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+alert_spool_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Write alerts to a spool on disk before exporting '
+                     'them, so that alerts are exported once their '
+                     'exporter is available again, also after a restart.'),
+    cfg.StrOpt('path',
+               default='$state_path/alert_spool',
+               help='Directory of the alert spool.'),
+    cfg.IntOpt('segment_size',
+               default=16 * 1024 * 1024,
+               min=1024,
+               help='Bytes of a spool segment file, a new one is started '
+                    'when the current one reaches it.'),
+    cfg.IntOpt('max_size',
+               default=1024 * 1024 * 1024,
+               min=0,
+               help='Bytes of the spool at most, the oldest segments are '
+                    'removed beyond it even if not exported yet. 0 means '
+                    'no limit.'),
+    cfg.IntOpt('max_age',
+               default=7 * 24 * 3600,
+               min=0,
+               help='Seconds a segment is kept at most, even if not '
+                    'exported yet. 0 means no limit.'),
+    cfg.BoolOpt('fsync',
+                default=False,
+                help='Sync each write to disk, so that alerts are not lost '
+                     'when the host fails, not only when the service '
+                     'restarts.'),
+]
+
+CONF.register_opts(alert_spool_opts, "alert_spool")
+
+SEGMENT_SUFFIX = '.seg'
+OFFSETS_DIR = 'offsets'
+
+SPOOL_BYTES = metrics.gauge(
+    'delfin_spool_bytes',
+    'Bytes of the segments of the spool.',
+    ('spool',))
+SPOOL_LOST = metrics.counter(
+    'delfin_spool_lost_total',
+    'Spool segments removed before a reader read them, per reader.',
+    ('spool', 'reader'))
+
+
+class Spool(object):
+    """Segment rotated spool in directory path, read by named readers.
+
+    A position in the spool is a (segment sequence number, byte offset)
+    tuple.
+    """
+
+    def __init__(self, path, segment_size, max_size=0, max_age=0,
+                 fsync=False):
+        self.path = path
+        self.name = os.path.basename(os.path.normpath(path))
+        self.segment_size = segment_size
+        self.max_size = max_size
+        self.max_age = max_age
+        self.fsync = fsync
+        self.positions = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(path, OFFSETS_DIR), exist_ok=True)
+        segments = self._segments()
+        self._seq = segments[-1] if segments else 1
+        self._file = open(self._segment_path(self._seq), 'ab')
+
+    @classmethod
+    def from_config(cls, group, shard=0):
+        """The spool set in config group, shard n > 0 is the spool at
+        the path of the group suffixed with .n.
+        """
+        conf = CONF[group]
+        path = '%s.%d' % (conf.path, shard) if shard else conf.path
+        return cls(path, conf.segment_size, conf.max_size, conf.max_age,
+                   conf.fsync)
+
+    def _segment_path(self, seq):
+        return os.path.join(self.path, '%020d%s' % (seq, SEGMENT_SUFFIX))
+
+    def _offset_path(self, reader):
+        return os.path.join(self.path, OFFSETS_DIR, reader)
+
+    def _segments(self):
+        """Sequence numbers of the segments, oldest first."""
+        return sorted(int(name[:-len(SEGMENT_SUFFIX)])
+                      for name in os.listdir(self.path)
+                      if name.endswith(SEGMENT_SUFFIX))
+
+    def register(self, reader):
+        """Add a reader, at its saved position if any, else at the end."""
+        try:
+            with open(self._offset_path(reader)) as f:
+                seq, offset = jsonutils.loads(f.read())
+        except FileNotFoundError:
+            with self._lock:
+                seq, offset = self._seq, self._file.tell()
+            # Saved now, so that records appended from now on are read
+            # after a restart even if none is committed before
+            self._save_position(reader, (seq, offset))
+        self.positions[reader] = (seq, offset)
+
+    def append(self, records):
+        """Append the records, each a JSON serializable object."""
+        lines = b''.join(jsonutils.dump_as_bytes(record) + b'\n'
+                         for record in records)
+        with self._lock:
+            if self._file.tell() >= self.segment_size:
+                self._rotate()
+            self._file.write(lines)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def _rotate(self):
+        self._file.close()
+        self._seq += 1
+        self._file = open(self._segment_path(self._seq), 'ab')
+        self._truncate()
+
+    def read(self, reader, max_records):
+        """Read records after the position of the reader.
+
+        :returns: the records, up to max_records, and the position after
+                  them, to be committed once they are processed.
+        """
+        seq, offset = self.positions[reader]
+        records = []
+        while len(records) < max_records:
+            # Segments before the current one are complete
+            current = self._seq
+            try:
+                f = open(self._segment_path(seq), 'rb')
+            except FileNotFoundError:
+                newer = [s for s in self._segments() if s > seq]
+                if not newer:
+                    break
+                LOG.warning('Spool segment {0} of {1} was removed before '
+                            'reader {2} read it.'.format(seq, self.name,
+                                                         reader))
+                SPOOL_LOST.inc(spool=self.name, reader=reader)
+                seq, offset = newer[0], 0
+                continue
+            with f:
+                f.seek(offset)
+                line = b''
+                while len(records) < max_records:
+                    line = f.readline()
+                    if not line.endswith(b'\n'):
+                        break
+                    offset += len(line)
+                    records.append(jsonutils.loads(line))
+            if len(records) >= max_records or seq >= current or line:
+                # Read enough, at the end of the spool or at a line
+                # being written
+                break
+            seq, offset = seq + 1, 0
+        return records, (seq, offset)
+
+    def _save_position(self, reader, position):
+        tmp_path = self._offset_path(reader) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(jsonutils.dumps(list(position)))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self._offset_path(reader))
+
+    def commit(self, reader, position):
+        """Save the position of the reader after it processed records."""
+        self._save_position(reader, position)
+        self.positions[reader] = tuple(position)
+        with self._lock:
+            self._truncate()
+
+    def _truncate(self):
+        """Remove the segments read by all the readers, and the oldest
+        beyond max_size or max_age. The current segment is kept.
+        """
+        read_seq = min([seq for seq, __ in self.positions.values()],
+                       default=self._seq)
+        sizes = []
+        for seq in self._segments():
+            try:
+                stat = os.stat(self._segment_path(seq))
+            except FileNotFoundError:
+                continue
+            sizes.append((seq, stat.st_size, stat.st_mtime))
+        total = sum(size for __, size, __ in sizes)
+        now = time.time()
+        for seq, size, mtime in sizes:
+            if seq >= self._seq:
+                break
+            if not (seq < read_seq
+                    or (self.max_size and total > self.max_size)
+                    or (self.max_age and now - mtime > self.max_age)):
+                continue
+            try:
+                os.remove(self._segment_path(seq))
+            except OSError as e:
+                LOG.warning('Failed to remove spool segment {0} of {1}: '
+                            '{2}'.format(seq, self.name, e))
+                continue
+            total -= size
+        SPOOL_BYTES.set(total, spool=self.name)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,313 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-process metrics exposed in the Prometheus text format.
+
+Modules define their metrics once at import time, e.g.
+
+    SYNC_SECONDS = metrics.histogram(
+        'delfin_sync_duration_seconds', 'Duration of resource syncs.',
+        ('resource', 'status'))
+
+and update them as they run. The API serves the metrics of its process
+at /metrics, the task and alert services at /metrics on
+[metrics]task_port and [metrics]alert_port.
+"""
+
+import bisect
+import contextlib
+import math
+import threading
+import time
+
+from oslo_config import cfg
+
+CONF = cfg.CONF
+
+metrics_opts = [
+    cfg.HostAddressOpt('listen',
+                       default='127.0.0.1',
+                       help='Address the task and alert services serve '
+                            'their metrics on. The metrics are served '
+                            'without authentication, only listen on a '
+                            'public address behind a firewall.'),
+    cfg.PortOpt('task_port',
+                default=8191,
+                help='Port the task service serves its metrics on, 0 '
+                     'means not to serve them.'),
+    cfg.PortOpt('alert_port',
+                default=8192,
+                help='Port the alert service serves its metrics on, 0 '
+                     'means not to serve them. With trap_receiver_workers, '
+                     'worker i serves them on alert_port + i.'),
+]
+
+CONF.register_opts(metrics_opts, "metrics")
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds in seconds, from fast API calls to full syncs of big storages
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+
+def _format_value(value):
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _escape(value, quote=True):
+    value = str(value).replace('\\', '\\\\').replace('\n', '\\n')
+    return value.replace('"', '\\"') if quote else value
+
+
+class Metric(object):
+    """A metric, one value per combination of its label values."""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError('Metric {0} has labels {1}, got {2}'.format(
+                self.name, list(self.labelnames), sorted(labels)))
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key, *extra):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join('{0}="{1}"'.format(name, _escape(value))
+                              for name, value in pairs) + '}'
+
+    def _samples(self):
+        """Yield (name suffix, labels, value) of each sample."""
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield '', self._labels(key), value
+
+    def render(self):
+        lines = ['# HELP {0} {1}'.format(self.name,
+                                         _escape(self.documentation, False)),
+                 '# TYPE {0} {1}'.format(self.name, self.type)]
+        lines += ['{0}{1}{2} {3}'.format(self.name, suffix, labels,
+                                         _format_value(value))
+                  for suffix, labels, value in self._samples()]
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """A value which only goes up, e.g. the number of received traps."""
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError('Counter {0} can not decrease'.format(self.name))
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def totals(self):
+        """Get the value of each tuple of label values counted so far."""
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(Metric):
+    """A value which goes up and down, e.g. the number of queued tasks."""
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super(Gauge, self).__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels):
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0)
+
+    @contextlib.contextmanager
+    def track(self, **labels):
+        """Count the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def set_function(self, function):
+        """Read the value from function when rendered, for values kept
+        elsewhere, e.g. the length of a queue.
+        """
+        if self.labelnames:
+            raise ValueError('Gauge {0} has labels, it can not be read '
+                             'from a function'.format(self.name))
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            yield '', '', self._function()
+        else:
+            for sample in super(Gauge, self)._samples():
+                yield sample
+
+
+class Histogram(Metric):
+    """Observed values counted in buckets, e.g. request durations."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        if 'le' in labelnames:
+            raise ValueError('Histogram {0} can not have label le'.format(
+                name))
+        super(Histogram, self).__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        if self.buckets[-1] != math.inf:
+            self.buckets += (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Count per bucket, sum, count
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Observe the seconds the block runs, also when it fails."""
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - begin, **labels)
+
+    def get(self, **labels):
+        """Get (count, sum) of the observed values."""
+        state = self._values.get(self._key(labels))
+        return (state[2], state[1]) if state else (0, 0.0)
+
+    def _samples(self):
+        with self._lock:
+            values = [(key, (list(state[0]), state[1], state[2]))
+                      for key, state in self._values.items()]
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield '_bucket', self._labels(
+                    key, ('le', _format_value(float(bound)))), cumulative
+            yield '_sum', self._labels(key), total
+            yield '_count', self._labels(key), count
+
+
+class Registry(object):
+    """The metrics of a process."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add the metric, or get the one of the same name if any so that
+        modules may define the same metric.
+        """
+        with self._lock:
+            registered = self._metrics.setdefault(metric.name, metric)
+        if (type(registered) is not type(metric)
+                or registered.labelnames != metric.labelnames):
+            raise ValueError('Metric {0} is already registered as a {1} '
+                             'with labels {2}'.format(
+                                 metric.name, registered.type,
+                                 list(registered.labelnames)))
+        return registered
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """The metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return ''.join(metric.render() + '\n' for metric in metrics)
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=(), registry=REGISTRY):
+    return registry.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=(), registry=REGISTRY):
+    return registry.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS,
+              registry=REGISTRY):
+    return registry.register(Histogram(name, documentation, labelnames,
+                                       buckets))
+
+
+def app(environ, start_response):
+    """WSGI application serving REGISTRY at /metrics."""
+    if environ.get('PATH_INFO', '') not in ('', '/', '/metrics'):
+        start_response('404 Not Found', [('Content-Type', 'text/plain')])
+        return [b'Not Found']
+    body = REGISTRY.render().encode('utf-8')
+    start_response('200 OK', [('Content-Type', CONTENT_TYPE),
+                              ('Content-Length', str(len(body)))])
+    if environ.get('REQUEST_METHOD') == 'HEAD':
+        return [b'']
+    return [body]
+
+
+def app_factory(global_conf, **local_conf):
+    """Paste factory of the /metrics application of the API."""
+    return app
@@ -32,6 +32,7 @@ from oslo_serialization import jsonutils
 
 import delfin.context
 import delfin.exception
+from delfin import tracing
 from delfin import utils
 
 CONF = cfg.CONF
@@ -115,7 +116,8 @@ class RequestContextSerializer(messaging.Serializer):
         return self._base.deserialize_entity(context, entity)
 
     def serialize_context(self, context):
-        return context.to_dict()
+        # The current span is the parent of the spans of the callee
+        return tracing.inject(context.to_dict())
 
     def deserialize_context(self, context):
         return delfin.context.RequestContext.from_dict(context)
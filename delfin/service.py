@@ -32,7 +32,9 @@ from oslo_utils import importutils
 
 from delfin import context
 from delfin import coordination
+from delfin import metrics
 from delfin import rpc
+from delfin import utils
 
 LOG = log.getLogger(__name__)
 
@@ -68,9 +70,22 @@ service_opts = [
     cfg.PortOpt('trap_receiver_port',
                 default=162,
                 help='Port at which trap receiver listens.'),
+    cfg.IntOpt('trap_receiver_workers',
+               default=1,
+               min=1,
+               help='Trap receiver processes of the alert service. They '
+                    'all bind trap_receiver_address and trap_receiver_port '
+                    'with SO_REUSEPORT, the kernel spreads the traps over '
+                    'them.'),
     cfg.StrOpt('snmp_mib_path',
                default='/var/lib/delfin/mibs',
                help='Path at which mib files to be loaded are placed.'),
+    cfg.StrOpt('snmp_mib_cache_path',
+               default='$state_path/mib_cache',
+               help='Directory of the cache of the symbols of the mibs of '
+                    'snmp_mib_path, rebuilt when they change. The trap '
+                    'receiver starts from it without loading the mibs. '
+                    'Empty means no cache.'),
 ]
 
 CONF = cfg.CONF
@@ -105,10 +120,29 @@ class Service(service.Service):
         self.saved_args, self.saved_kwargs = args, kwargs
         self.timers = []
         self.coordinator = coordination
+        self.metrics_server = None
+        # Index of the process among the worker processes of the service
+        self.worker_index = 0
+
+    def _start_metrics_server(self):
+        """Serve the metrics on [metrics]<topic>_port, if set."""
+        subtopic = self.topic.rpartition('delfin-')[2]
+        port = getattr(CONF.metrics, '%s_port' % subtopic, None)
+        if not port:
+            return
+        port += self.worker_index
+        self.metrics_server = wsgi.Server(CONF, 'metrics', metrics.app,
+                                          host=CONF.metrics.listen,
+                                          port=port)
+        self.metrics_server.start()
+        LOG.info('Serving metrics of %(topic)s on %(host)s:%(port)s.',
+                 {'topic': self.topic, 'host': CONF.metrics.listen,
+                  'port': port})
 
     def start(self):
         if self.coordinator:
             coordination.LOCK_COORDINATOR.start()
+        self._start_metrics_server()
 
         LOG.info('Starting %(topic)s node.', {'topic': self.topic})
         LOG.debug("Creating RPC server for service %s.", self.topic)
@@ -189,6 +223,12 @@ class Service(service.Service):
             self.rpcserver.stop()
         except Exception:
             pass
+        if self.metrics_server:
+            try:
+                self.metrics_server.stop()
+            except Exception:
+                pass
+            self.metrics_server = None
         for x in self.timers:
             try:
                 x.stop()
@@ -230,6 +270,8 @@ class AlertService(Service):
         kwargs['trap_receiver_address'] = CONF.trap_receiver_address
         kwargs['trap_receiver_port'] = CONF.trap_receiver_port
         kwargs['snmp_mib_path'] = CONF.snmp_mib_path
+        kwargs['snmp_mib_cache_path'] = CONF.snmp_mib_cache_path
+        kwargs['trap_receiver_workers'] = CONF.trap_receiver_workers
 
         service_obj = super(AlertService, cls).create(
             host=host, binary=binary, topic=topic, manager=manager,
@@ -241,6 +283,11 @@ class AlertService(Service):
         return service_obj
 
     def start(self):
+        if CONF.trap_receiver_workers > 1:
+            # Run in each worker process, after it is forked
+            self.worker_index = utils.claim_worker_index(
+                self.binary, CONF.trap_receiver_workers)
+            self.manager.worker_index = self.worker_index
         super(AlertService, self).start()
         self.manager.start()
 
@@ -17,40 +17,174 @@
 
 """
 
+import contextlib
+import time
+
 from oslo_config import cfg
 from oslo_log import log
+from oslo_service import periodic_task
 from oslo_utils import importutils
+from oslo_utils import timeutils
 
+from delfin import coordination
+from delfin import db
 from delfin import manager
+from delfin import metrics
+from delfin import tracing
+from delfin.common import constants
 from delfin.drivers import manager as driver_manager
+from delfin.task_manager import rpcapi as task_rpcapi
+from delfin.task_manager.tasks import task
 
 LOG = log.getLogger(__name__)
 CONF = cfg.CONF
 CONF.import_opt('periodic_interval', 'delfin.service')
 
+task_manager_opts = [
+    cfg.IntOpt('alert_poll_interval',
+               default=300,
+               min=0,
+               help='Seconds between two polls of the alerts of the '
+                    'storages. Polled alerts are kept as the active alerts '
+                    'of the storages, the new and the cleared ones are '
+                    'exported. Only one task service polls at a time. 0 '
+                    'means not to poll.'),
+]
+
+CONF.register_opts(task_manager_opts)
+
+ALERT_SYNC_TASK = task.AlertSyncTask.__module__ + '.' + \
+    task.AlertSyncTask.__name__
+
+QUEUE_DEPTH = metrics.gauge(
+    'delfin_task_queue_depth',
+    'Tasks received and not finished yet, including the ones waiting for '
+    'the lock of their storage.',
+    ('task',))
+
 
 class TaskManager(manager.Manager):
     """manage periodical tasks"""
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.1'
 
     def __init__(self, service_name=None, *args, **kwargs):
         super(TaskManager, self).__init__(*args, **kwargs)
+        self._next_alert_poll = time.time() + CONF.alert_poll_interval
+        self._alert_poll_lock = None
+
+    def _is_alert_poller(self):
+        """Elect the task service polling the alerts of all storages.
 
-    def sync_storage_resource(self, context, storage_id, resource_task):
+        The first service acquiring the lock keeps it, the others take
+        over when it is released by a stopped service.
+        """
+        if self._alert_poll_lock is None:
+            lock = coordination.Lock('alert-poller')
+            if not lock.acquire(blocking=False):
+                return False
+            LOG.info('This task service polls the alerts of the storages')
+            self._alert_poll_lock = lock
+        return True
+
+    @periodic_task.periodic_task
+    def poll_alerts(self, context):
+        """Cast an alert sync of each storage, to any task service, every
+        alert_poll_interval.
+        """
+        if not CONF.alert_poll_interval or \
+                time.time() < self._next_alert_poll:
+            return
+        try:
+            if not self._is_alert_poller():
+                return
+        except Exception as e:
+            LOG.error('Failed to elect the alert poller: {0}'.format(e))
+            return
+        self._next_alert_poll = time.time() + CONF.alert_poll_interval
+        rpcapi = task_rpcapi.TaskAPI()
+        try:
+            storages = db.storage_get_all(context)
+        except Exception as e:
+            LOG.error('Failed to get storages to poll alerts of: {0}'
+                      .format(e))
+            return
+        for storage in storages:
+            rpcapi.sync_storage_resource(context, storage['id'],
+                                         ALERT_SYNC_TASK)
+
+    def sync_storage_resource(self, context, storage_id, resource_task,
+                              job_id=None):
         LOG.debug("Received the sync_storage task: {0} request for storage"
                   " id:{1}".format(resource_task, storage_id))
         cls = importutils.import_class(resource_task)
         device_obj = cls(context, storage_id)
-        device_obj.sync()
+        with QUEUE_DEPTH.track(task=cls.__name__), \
+                tracing.span('task.sync ' + cls.__name__, context,
+                             kind=tracing.KIND_CONSUMER,
+                             storage_id=storage_id), \
+                self._job_task(context, job_id, storage_id, device_obj):
+            device_obj.sync()
 
-    def remove_storage_resource(self, context, storage_id, resource_task):
+    def remove_storage_resource(self, context, storage_id, resource_task,
+                                job_id=None):
         cls = importutils.import_class(resource_task)
         device_obj = cls(context, storage_id)
-        device_obj.remove()
+        with QUEUE_DEPTH.track(task=cls.__name__), \
+                tracing.span('task.remove ' + cls.__name__, context,
+                             kind=tracing.KIND_CONSUMER,
+                             storage_id=storage_id), \
+                self._job_task(context, job_id, storage_id, device_obj):
+            device_obj.remove()
+
+    @contextlib.contextmanager
+    def _job_task(self, context, job_id, storage_id, device_obj):
+        """Track the block as the task of job job_id, if any, run on the
+        storage. It failed if the block raised or the sync it ran failed.
+        """
+        if job_id is None:
+            yield
+            return
+        task_name = type(device_obj).__name__
+        self._update_job_task(context, job_id, storage_id, task_name,
+                              {'status': constants.JobStatus.RUNNING,
+                               'started_at': timeutils.utcnow()})
+        values = {'status': constants.JobStatus.SUCCESS}
+        try:
+            yield
+        except Exception as e:
+            values = {'status': constants.JobStatus.FAILED,
+                      'error': type(e).__name__}
+            raise
+        else:
+            record = getattr(device_obj, 'record', None)
+            if record is not None and record.error:
+                values = {'status': constants.JobStatus.FAILED,
+                          'error': record.error}
+        finally:
+            values['ended_at'] = timeutils.utcnow()
+            self._update_job_task(context, job_id, storage_id, task_name,
+                                  values)
+
+    @staticmethod
+    def _update_job_task(context, job_id, storage_id, task_name, values):
+        """Failing to track a job task does not fail the task."""
+        try:
+            db.job_task_update(context, job_id, storage_id, task_name,
+                               values)
+        except Exception as e:
+            LOG.warning('Failed to update task {0} of job {1}: {2}'.format(
+                task_name, job_id, e))
 
     def remove_storage_in_cache(self, context, storage_id):
         LOG.info('Remove storage device in memory for storage id:{0}'
                  .format(storage_id))
         drivers = driver_manager.DriverManager()
         drivers.remove_driver(storage_id)
+
+    @periodic_task.periodic_task(spacing=60)
+    def evict_idle_drivers(self, context):
+        cache = driver_manager.DriverManager().driver_factory
+        cache.evict_idle()
+        LOG.debug('Driver cache size:{0}, stats:{1}'.format(
+            len(cache), cache.stats))
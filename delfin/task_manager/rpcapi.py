@@ -20,6 +20,7 @@ import oslo_messaging as messaging
 from oslo_config import cfg
 
 from delfin import rpc
+from delfin import tracing
 
 CONF = cfg.CONF
 
@@ -30,9 +31,11 @@ class TaskAPI(object):
     API version history:
 
         1.0 - Initial version.
+        1.1 - Add job_id to sync_storage_resource and
+              remove_storage_resource.
     """
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.1'
 
     def __init__(self):
         super(TaskAPI, self).__init__()
@@ -40,22 +43,42 @@ class TaskAPI(object):
                                   version=self.RPC_API_VERSION)
         self.client = rpc.get_client(target, version_cap=self.RPC_API_VERSION)
 
-    def sync_storage_resource(self, context, storage_id, resource_task):
-        call_context = self.client.prepare(version='1.0')
-        return call_context.cast(context,
-                                 'sync_storage_resource',
-                                 storage_id=storage_id,
-                                 resource_task=resource_task)
+    def _cast(self, context, method, fanout=False, version='1.0', **kwargs):
+        call_context = self.client.prepare(version=version, fanout=fanout)
+        with tracing.span('rpc.cast ' + method, context,
+                          kind=tracing.KIND_CLIENT, **kwargs):
+            return call_context.cast(context, method, **kwargs)
 
-    def remove_storage_resource(self, context, storage_id, resource_task):
-        call_context = self.client.prepare(version='1.0')
-        return call_context.cast(context,
-                                 'remove_storage_resource',
-                                 storage_id=storage_id,
-                                 resource_task=resource_task)
+    def sync_storage_resource(self, context, storage_id, resource_task,
+                              job_id=None):
+        if job_id is None:
+            return self._cast(context,
+                              'sync_storage_resource',
+                              storage_id=storage_id,
+                              resource_task=resource_task)
+        return self._cast(context,
+                          'sync_storage_resource',
+                          version='1.1',
+                          storage_id=storage_id,
+                          resource_task=resource_task,
+                          job_id=job_id)
+
+    def remove_storage_resource(self, context, storage_id, resource_task,
+                                job_id=None):
+        if job_id is None:
+            return self._cast(context,
+                              'remove_storage_resource',
+                              storage_id=storage_id,
+                              resource_task=resource_task)
+        return self._cast(context,
+                          'remove_storage_resource',
+                          version='1.1',
+                          storage_id=storage_id,
+                          resource_task=resource_task,
+                          job_id=job_id)
 
     def remove_storage_in_cache(self, context, storage_id):
-        call_context = self.client.prepare(version='1.0', fanout=True)
-        return call_context.cast(context,
-                                 'remove_storage_in_cache',
-                                 storage_id=storage_id)
+        return self._cast(context,
+                          'remove_storage_in_cache',
+                          fanout=True,
+                          storage_id=storage_id)
@@ -12,19 +12,48 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextlib
 import inspect
+import time
 
 import decorator
+from oslo_config import cfg
 from oslo_log import log
+from oslo_utils import timeutils
 
 from delfin import coordination
 from delfin import db
 from delfin import exception
+from delfin import metrics
+from delfin.alert_manager import rpcapi as alert_rpcapi
 from delfin.common import constants
 from delfin.drivers import api as driverapi
+from delfin.drivers.utils import http_client
 from delfin.i18n import _
 
 LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+task_opts = [
+    cfg.IntOpt('full_sync_interval',
+               default=86400,
+               min=0,
+               help='Seconds between two full syncs of the resources of a '
+                    'storage whose driver lists changes since a watermark, '
+                    '0 means to always do full syncs.'),
+    cfg.IntOpt('sync_history_max_records',
+               default=100,
+               min=0,
+               help='Number of the latest sync history records kept for '
+                    'each resource of a storage, 0 means to keep all.'),
+]
+
+CONF.register_opts(task_opts)
+
+SYNC_SECONDS = metrics.histogram(
+    'delfin_sync_duration_seconds',
+    'Duration of the syncs of a resource of a storage.',
+    ('resource', 'mode', 'status'))
 
 
 def set_synced_after():
@@ -75,12 +104,93 @@ def check_deleted():
     return _check_deleted
 
 
+class SyncRecord(object):
+    """Timing, object counts and outcome of one sync run of a resource,
+    saved into the sync history when the run ends.
+    """
+
+    def __init__(self, context, storage_id, resource):
+        self.context = context
+        self.storage_id = storage_id
+        self.resource = resource
+        self.mode = constants.SyncMode.FULL
+        self.error = None
+        self.phases = {}
+        self.counts = {'added': 0, 'updated': 0, 'deleted': 0,
+                       'unchanged': 0}
+        self.driver_calls = 0
+        self.driver_requests = 0
+        self.started_at = timeutils.utcnow()
+        self._begin = time.time()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time a phase of the sync, a phase may be entered many times."""
+        begin = time.time()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + \
+                time.time() - begin
+
+    def call_driver(self, func, *args):
+        """Call a driver API in the fetch phase, counting its requests."""
+        with self.phase('fetch'), http_client.count_requests() as counter:
+            self.driver_calls += 1
+            try:
+                return func(*args)
+            finally:
+                self.driver_requests += counter['requests']
+
+    def count(self, add_list, update_list, delete_id_list, unchanged=0):
+        self.counts['added'] += len(add_list)
+        self.counts['updated'] += len(update_list) - unchanged
+        self.counts['deleted'] += len(delete_id_list)
+        self.counts['unchanged'] += unchanged
+
+    def fail(self, e):
+        self.error = type(e).__name__
+
+    def save(self):
+        """Save the record, failing to do so does not fail the sync."""
+        values = {
+            'storage_id': self.storage_id,
+            'resource': self.resource,
+            'mode': self.mode,
+            'status': constants.SyncResult.FAILED if self.error
+            else constants.SyncResult.SUCCESS,
+            'error': self.error,
+            'started_at': self.started_at,
+            'ended_at': timeutils.utcnow(),
+            'duration': round(time.time() - self._begin, 3),
+            'phases': {name: round(spent, 3)
+                       for name, spent in self.phases.items()},
+            'driver_calls': self.driver_calls,
+            'driver_requests': self.driver_requests,
+        }
+        values.update(self.counts)
+        SYNC_SECONDS.observe(values['duration'], resource=self.resource,
+                             mode=self.mode, status=values['status'])
+        try:
+            db.sync_history_create(self.context, values,
+                                   CONF.sync_history_max_records)
+        except Exception as e:
+            LOG.warning('Failed to save {0} sync history of storage {1}: '
+                        '{2}'.format(self.resource, self.storage_id, e))
+
+
 class StorageResourceTask(object):
 
     def __init__(self, context, storage_id):
         self.storage_id = storage_id
         self.context = context
         self.driver_api = driverapi.API()
+        # Record of the last sync, its outcome
+        self.record = None
+
+    def _new_record(self, resource):
+        self.record = SyncRecord(self.context, self.storage_id, resource)
+        return self.record
 
     def _classify_resources(self, storage_resources, db_resources, key):
         """
@@ -108,6 +218,131 @@ class StorageResourceTask(object):
 
         return add_list, update_list, delete_id_list
 
+    @staticmethod
+    def _count_unchanged(update_list, db_resources):
+        """Count the resources to update which equal their DB entries."""
+        db_by_id = {resource['id']: resource for resource in db_resources}
+        return sum(1 for resource in update_list
+                   if all(db_by_id[resource['id']].get(field) == value
+                          for field, value in resource.items()))
+
+    def _sync_all(self, record, list_all, key, get_all, create, update,
+                  delete):
+        """Sync all the resources listed by the driver into the DB."""
+        storage_resources = record.call_driver(list_all, self.context,
+                                               self.storage_id)
+        with record.phase('db_read'):
+            db_resources = get_all(self.context,
+                                   filters={"storage_id": self.storage_id})
+        with record.phase('classify'):
+            add_list, update_list, delete_id_list = \
+                self._classify_resources(storage_resources, db_resources,
+                                         key)
+            record.count(add_list, update_list, delete_id_list,
+                         self._count_unchanged(update_list, db_resources))
+        LOG.info('Full sync of {0} for {1}: add={2}, delete={3}, '
+                 'update={4}'.format(record.resource, self.storage_id,
+                                     len(add_list), len(delete_id_list),
+                                     len(update_list)))
+        with record.phase('db_write'):
+            if delete_id_list:
+                delete(self.context, delete_id_list)
+            if update_list:
+                update(self.context, update_list)
+            if add_list:
+                create(self.context, add_list)
+
+    def _get_watermark(self, resource):
+        try:
+            storage = db.storage_get(self.context, self.storage_id)
+        except exception.StorageNotFound:
+            return None
+        return (storage['sync_watermarks'] or {}).get(resource)
+
+    def _save_watermark(self, resource, watermark, reconciled_at=None):
+        lock = coordination.Lock(self.storage_id)
+        with lock:
+            storage = db.storage_get(self.context, self.storage_id)
+            watermarks = dict(storage['sync_watermarks'] or {})
+            state = watermarks.get(resource) or {}
+            watermarks[resource] = {
+                'watermark': watermark,
+                'reconciled_at': reconciled_at or state.get('reconciled_at')}
+            db.storage_update(self.context, self.storage_id,
+                              {'sync_watermarks': watermarks})
+
+    def _start_tracking(self, record, list_changed_since):
+        """Get the watermark to list later changes from.
+
+        :returns: None when the driver can not list changes.
+        """
+        try:
+            return record.call_driver(list_changed_since, self.context,
+                                      self.storage_id, None)['watermark']
+        except NotImplementedError:
+            return None
+        except Exception as e:
+            LOG.warning('Failed to get sync watermark of storage {0}: {1}'
+                        .format(self.storage_id, e))
+            return None
+
+    def _sync_changes(self, record, list_changed_since, key, get_all,
+                      create, update, delete):
+        """Sync the resources changed since the saved watermark.
+
+        :returns: False when a full sync is needed instead, because there
+            is no watermark, a full reconcile is due or changes can not be
+            listed.
+        """
+        resource = record.resource
+        state = self._get_watermark(resource)
+        if not state or state.get('watermark') is None:
+            return False
+        if not CONF.full_sync_interval or time.time() - \
+                (state.get('reconciled_at') or 0) >= CONF.full_sync_interval:
+            return False
+        try:
+            changes = record.call_driver(list_changed_since, self.context,
+                                         self.storage_id, state['watermark'])
+        except NotImplementedError:
+            return False
+        except Exception as e:
+            LOG.warning('Failed to list {0} changes of storage {1}, do a full '
+                        'sync: {2}'.format(resource, self.storage_id, e))
+            return False
+
+        record.mode = constants.SyncMode.INCREMENTAL
+        upserts = changes.get('upserts') or []
+        deletions = set(changes.get('deletions') or [])
+        native_ids = [item[key] for item in upserts] + list(deletions)
+        db_resources = []
+        if native_ids:
+            with record.phase('db_read'):
+                db_resources = get_all(
+                    self.context, filters={'storage_id': self.storage_id,
+                                           key: native_ids})
+        with record.phase('classify'):
+            add_list, update_list, __ = self._classify_resources(
+                upserts, db_resources, key)
+            delete_id_list = [item['id'] for item in db_resources
+                              if item[key] in deletions]
+            record.count(add_list, update_list, delete_id_list,
+                         self._count_unchanged(update_list, db_resources))
+        LOG.info('Incremental sync of {0} for {1}: add={2}, delete={3}, '
+                 'update={4}'.format(resource, self.storage_id,
+                                     len(add_list), len(delete_id_list),
+                                     len(update_list)))
+        with record.phase('db_write'):
+            if delete_id_list:
+                delete(self.context, delete_id_list)
+            if update_list:
+                update(self.context, update_list)
+            if add_list:
+                create(self.context, add_list)
+
+        self._save_watermark(resource, changes['watermark'])
+        return True
+
 
 class StorageDeviceTask(StorageResourceTask):
     def __init__(self, context, storage_id):
@@ -121,19 +356,26 @@ class StorageDeviceTask(StorageResourceTask):
         """
         LOG.info('Syncing storage device for storage id:{0}'.format(
             self.storage_id))
+        record = self._new_record('storage')
         try:
-            storage = self.driver_api.get_storage(self.context,
-                                                  self.storage_id)
+            storage = record.call_driver(self.driver_api.get_storage,
+                                         self.context, self.storage_id)
 
-            db.storage_update(self.context, self.storage_id, storage)
+            with record.phase('db_write'):
+                db.storage_update(self.context, self.storage_id, storage)
+            record.count([], [storage], [])
         except AttributeError as e:
+            record.fail(e)
             LOG.error(e)
         except Exception as e:
+            record.fail(e)
             msg = _('Failed to update storage entry in DB: {0}'
                     .format(e))
             LOG.error(msg)
         else:
             LOG.info("Syncing storage successful!!!")
+        finally:
+            record.save()
 
     def remove(self):
         LOG.info('Remove storage device for storage id:{0}'
@@ -142,6 +384,8 @@ class StorageDeviceTask(StorageResourceTask):
             db.storage_delete(self.context, self.storage_id)
             db.access_info_delete(self.context, self.storage_id)
             db.alert_source_delete(self.context, self.storage_id)
+            db.sync_history_delete_by_storage(self.context, self.storage_id)
+            db.alert_delete_by_storage(self.context, self.storage_id)
         except Exception as e:
             LOG.error('Failed to update storage entry in DB: {0}'.format(e))
 
@@ -158,33 +402,36 @@ class StoragePoolTask(StorageResourceTask):
         """
         LOG.info('Syncing storage pool for storage id:{0}'.format(
             self.storage_id))
+        record = self._new_record('storage_pool')
         try:
-            # collect the storage pools list from driver and database
-            storage_pools = self.driver_api.list_storage_pools(self.context,
-                                                               self.storage_id)
-            db_pools = db.storage_pool_get_all(self.context,
-                                               filters={"storage_id":
-                                                        self.storage_id})
-
-            add_list, update_list, delete_id_list = self._classify_resources(
-                storage_pools, db_pools, 'native_storage_pool_id'
-            )
-            if delete_id_list:
-                db.storage_pools_delete(self.context, delete_id_list)
-
-            if update_list:
-                db.storage_pools_update(self.context, update_list)
-
-            if add_list:
-                db.storage_pools_create(self.context, add_list)
+            if self._sync_changes(
+                    record, self.driver_api.list_storage_pools_changed_since,
+                    'native_storage_pool_id', db.storage_pool_get_all,
+                    db.storage_pools_create, db.storage_pools_update,
+                    db.storage_pools_delete):
+                return
+            watermark = self._start_tracking(
+                record, self.driver_api.list_storage_pools_changed_since)
+
+            self._sync_all(record, self.driver_api.list_storage_pools,
+                           'native_storage_pool_id', db.storage_pool_get_all,
+                           db.storage_pools_create, db.storage_pools_update,
+                           db.storage_pools_delete)
+
+            if watermark is not None:
+                self._save_watermark('storage_pool', watermark, time.time())
         except AttributeError as e:
+            record.fail(e)
             LOG.error(e)
         except Exception as e:
+            record.fail(e)
             msg = _('Failed to sync pools entry in DB: {0}'
                     .format(e))
             LOG.error(msg)
         else:
             LOG.info("Syncing storage pools successful!!!")
+        finally:
+            record.save()
 
     def remove(self):
         LOG.info('Remove storage pools for storage id:{0}'.format(
@@ -203,39 +450,151 @@ class StorageVolumeTask(StorageResourceTask):
         :return:
         """
         LOG.info('Syncing volumes for storage id:{0}'.format(self.storage_id))
+        record = self._new_record('volume')
         try:
-            # collect the volumes list from driver and database
-            storage_volumes = self.driver_api.list_volumes(self.context,
-                                                           self.storage_id)
-            db_volumes = db.volume_get_all(self.context,
-                                           filters={"storage_id":
-                                                    self.storage_id})
-
-            add_list, update_list, delete_id_list = self._classify_resources(
-                storage_volumes, db_volumes, 'native_volume_id'
-            )
-            LOG.info('###StorageVolumeTask for {0}:add={1},delete={2},'
-                     'update={3}'.format(self.storage_id,
-                                         len(add_list),
-                                         len(delete_id_list),
-                                         len(update_list)))
-            if delete_id_list:
-                db.volumes_delete(self.context, delete_id_list)
-
-            if update_list:
-                db.volumes_update(self.context, update_list)
-
-            if add_list:
-                db.volumes_create(self.context, add_list)
+            if self._sync_changes(
+                    record, self.driver_api.list_volumes_changed_since,
+                    'native_volume_id', db.volume_get_all,
+                    db.volumes_create, db.volumes_update, db.volumes_delete):
+                return
+            watermark = self._start_tracking(
+                record, self.driver_api.list_volumes_changed_since)
+
+            self._sync_all(record, self.driver_api.list_volumes,
+                           'native_volume_id', db.volume_get_all,
+                           db.volumes_create, db.volumes_update,
+                           db.volumes_delete)
+
+            if watermark is not None:
+                self._save_watermark('volume', watermark, time.time())
         except AttributeError as e:
+            record.fail(e)
             LOG.error(e)
         except Exception as e:
+            record.fail(e)
             msg = _('Failed to sync volumes entry in DB: {0}'
                     .format(e))
             LOG.error(msg)
         else:
             LOG.info("Syncing volumes successful!!!")
+        finally:
+            record.save()
 
     def remove(self):
         LOG.info('Remove volumes for storage id:{0}'.format(self.storage_id))
         db.volume_delete_by_storage(self.context, self.storage_id)
+
+
+class AlertSyncTask(object):
+    """Reconcile the active alerts of a storage kept in the DB with the
+    alerts listed by its driver, and export the new and the cleared ones,
+    so that alerts whose traps were lost are exported still.
+
+    It is not a StorageResourceTask, storage syncs neither run it nor
+    count it, the task manager runs it every alert_poll_interval.
+    """
+
+    # Fields of the alert model kept in the DB
+    FIELDS = ('alert_id', 'sequence_number', 'alert_name', 'severity',
+              'category', 'type', 'occur_time', 'description',
+              'recovery_advice', 'resource_type', 'location')
+
+    def __init__(self, context, storage_id):
+        self.storage_id = storage_id
+        self.context = context
+        self.driver_api = driverapi.API()
+        self.alert_rpcapi = alert_rpcapi.AlertAPI()
+
+    @staticmethod
+    def _key(alert):
+        # As the alert deduplicator identifies an alert
+        return (alert.get('alert_id'), alert.get('sequence_number'),
+                alert.get('location'))
+
+    @check_deleted()
+    def sync(self):
+        LOG.info('Syncing alerts for storage id:{0}'.format(self.storage_id))
+        record = SyncRecord(self.context, self.storage_id, 'alert')
+        try:
+            alert_list = record.call_driver(self.driver_api.list_alerts,
+                                            self.context, self.storage_id)
+        except NotImplementedError:
+            alert_list = None
+        except Exception as e:
+            record.fail(e)
+            LOG.error('Failed to list alerts of storage {0}: {1}'.format(
+                self.storage_id, e))
+            record.save()
+            return
+        if alert_list is None:
+            LOG.debug('Driver of storage {0} does not list alerts'.format(
+                self.storage_id))
+            return
+
+        try:
+            # Concurrent syncs would export the same alerts
+            with coordination.Lock(self.storage_id):
+                new_alerts, cleared_alerts = self._sync_db(record,
+                                                           alert_list)
+        except Exception as e:
+            record.fail(e)
+            LOG.error('Failed to sync alerts entry in DB: {0}'.format(e))
+            record.save()
+            return
+
+        alert_models = [dict(alert) for alert in new_alerts]
+        for alert in cleared_alerts:
+            alert_model = {field: alert[field] for field in self.FIELDS}
+            alert_model['category'] = constants.Category.RECOVERY
+            alert_model['clear_category'] = constants.ClearType.AUTOMATIC
+            alert_models.append(alert_model)
+        if alert_models:
+            with record.phase('export'):
+                try:
+                    self.alert_rpcapi.export_alerts(
+                        self.context, self.storage_id, alert_models)
+                except Exception as e:
+                    record.fail(e)
+                    LOG.error('Failed to export alerts of storage {0}: '
+                              '{1}'.format(self.storage_id, e))
+        record.save()
+
+    def _sync_db(self, record, alert_list):
+        """Save the listed alerts as the active ones.
+
+        :returns: the listed alerts not active before and the active
+                  alerts not listed anymore
+        """
+        with record.phase('db_read'):
+            db_alerts = db.alert_get_all(
+                self.context, filters={'storage_id': self.storage_id})
+        with record.phase('classify'):
+            listed = {}
+            for alert in alert_list:
+                listed.setdefault(self._key(alert), alert)
+            active = {self._key(alert): alert for alert in db_alerts}
+            new_alerts = [alert for key, alert in listed.items()
+                          if key not in active]
+            cleared_alerts = [alert for key, alert in active.items()
+                              if key not in listed]
+            kept = [alert for key, alert in active.items() if key in listed]
+            record.count(new_alerts, kept,
+                         [alert['id'] for alert in cleared_alerts],
+                         len(kept))
+        LOG.info('Alert sync for {0}: new={1}, cleared={2}, active={3}'
+                 .format(self.storage_id, len(new_alerts),
+                         len(cleared_alerts), len(listed)))
+        with record.phase('db_write'):
+            if cleared_alerts:
+                db.alerts_delete(self.context,
+                                 [alert['id'] for alert in cleared_alerts])
+            if new_alerts:
+                db.alerts_create(self.context, [
+                    dict({field: alert.get(field) for field in self.FIELDS},
+                         storage_id=self.storage_id)
+                    for alert in new_alerts])
+        return new_alerts, cleared_alerts
+
+    def remove(self):
+        LOG.info('Remove alerts for storage id:{0}'.format(self.storage_id))
+        db.alert_delete_by_storage(self.context, self.storage_id)
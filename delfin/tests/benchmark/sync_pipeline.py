@@ -0,0 +1,286 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""End to end benchmark of the storage sync pipeline.
+
+StorageDeviceTask, StoragePoolTask and StorageVolumeTask sync a fake
+storage into a file backed SQLite DB, for each size in three scenarios:
+
+- first: sync into the empty DB.
+- resync: sync again, nothing changed.
+- churn: sync after --churn-rate of the volumes changed.
+
+Each scenario runs in a fresh process so that its peak RSS is its own,
+the DB file carries the state over. Results are saved as JSON to be
+compared across commits, e.g.
+
+    python -m delfin.tests.benchmark.sync_pipeline --sizes 1000,10000 \\
+        --output sync.json
+"""
+
+import argparse
+import contextlib
+import functools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent import futures
+from unittest import mock
+
+from oslo_config import cfg
+from oslo_utils import uuidutils
+from sqlalchemy import event
+
+from delfin.common import config  # noqa
+from delfin import context
+from delfin import coordination
+from delfin import db
+from delfin.db.sqlalchemy import api as db_api
+from delfin.db.sqlalchemy import models
+from delfin.drivers import api as driverapi
+from delfin.drivers import fake_storage  # noqa
+from delfin.task_manager.tasks import task
+
+CONF = cfg.CONF
+
+SIZES = (1000, 10000, 100000, 1000000)
+SCENARIOS = ('first', 'resync', 'churn')
+PHASES = ('fetch', 'classify', 'db_read', 'db_write')
+
+TASKS = (task.StorageDeviceTask, task.StoragePoolTask,
+         task.StorageVolumeTask)
+FETCH_CALLS = ('get_storage', 'list_storage_pools', 'list_volumes',
+               'list_storage_pools_changed_since',
+               'list_volumes_changed_since')
+DB_READS = ('storage_get', 'storage_pool_get_all', 'volume_get_all')
+DB_WRITES = ('storage_update', 'storage_pools_create',
+             'storage_pools_update', 'storage_pools_delete',
+             'volumes_create', 'volumes_update', 'volumes_delete')
+
+
+class Profiler(object):
+    """Accumulate time and DB statements of the sync phases.
+
+    Time not spent in a phase, e.g. in locks, is reported as other.
+    """
+
+    def __init__(self):
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.statements = dict.fromkeys(PHASES + ('other',), 0)
+        self._phase = None
+
+    def on_statement(self, *args):
+        self.statements[self._phase or 'other'] += 1
+
+    def wrap(self, phase, func):
+        @functools.wraps(func)
+        def _timed(*args, **kwargs):
+            if self._phase is not None:
+                # Nested in a phase already
+                return func(*args, **kwargs)
+            self._phase = phase
+            begin = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.times[phase] += time.perf_counter() - begin
+                self._phase = None
+        return _timed
+
+    @contextlib.contextmanager
+    def instrument(self):
+        engine = db_api.get_engine()
+        patches = [mock.patch.object(
+            task.StorageResourceTask, '_classify_resources',
+            self.wrap('classify',
+                      task.StorageResourceTask._classify_resources))]
+        patches += [mock.patch.object(
+            driverapi.API, name,
+            self.wrap('fetch', getattr(driverapi.API, name)))
+            for name in FETCH_CALLS]
+        patches += [mock.patch.object(
+            db, name, self.wrap('db_read', getattr(db, name)))
+            for name in DB_READS]
+        patches += [mock.patch.object(
+            db, name, self.wrap('db_write', getattr(db, name)))
+            for name in DB_WRITES]
+        with contextlib.ExitStack() as stack:
+            for patch in patches:
+                stack.enter_context(patch)
+            event.listen(engine, 'before_cursor_execute', self.on_statement)
+            stack.callback(event.remove, engine, 'before_cursor_execute',
+                           self.on_statement)
+            yield self
+
+
+def _setup(workdir, size, pools, churn_rate, mode):
+    CONF([], project='delfin', default_config_files=[])
+    CONF.set_override('connection',
+                      'sqlite:///' + os.path.join(workdir, 'delfin.sqlite'),
+                      'database')
+    CONF.set_override('backend_type', 'file', 'coordination')
+    CONF.set_override('backend_server', os.path.join(workdir, 'locks'),
+                      'coordination')
+    CONF.set_override('fake_volume_range', '{0}-{0}'.format(size),
+                      'fake_driver')
+    CONF.set_override('fake_pool_range', '{0}-{0}'.format(pools),
+                      'fake_driver')
+    CONF.set_override('fake_api_time_range', '0-0', 'fake_driver')
+    CONF.set_override('fake_churn_rate', churn_rate, 'fake_driver')
+    if mode == 'full':
+        CONF.set_override('full_sync_interval', 0)
+    db.register_db()
+    coordination.LOCK_COORDINATOR.start()
+
+
+def _count(model, storage_id):
+    return db_api.get_session().query(model).filter_by(
+        storage_id=storage_id).count()
+
+
+def run_scenario(workdir, storage_id, size, scenario, pools=16,
+                 churn_rate=0.05, mode='full'):
+    """Run one scenario of the benchmark, returns its results."""
+    _setup(workdir, size, pools,
+           churn_rate if scenario == 'churn' else 0, mode)
+    ctx = context.get_admin_context()
+    try:
+        if scenario == 'first':
+            driverapi.API().discover_storage(ctx, {
+                'storage_id': storage_id,
+                'vendor': 'fake_storage',
+                'model': 'fake_driver',
+                'rest': {'host': '127.0.0.1', 'port': 8443,
+                         'username': 'admin', 'password': 'admin'}})
+
+        profiler = Profiler()
+        with profiler.instrument():
+            begin = time.perf_counter()
+            for task_cls in TASKS:
+                task_cls(ctx, storage_id).sync()
+            wall_time = time.perf_counter() - begin
+
+        return {
+            'size': size,
+            'scenario': scenario,
+            'mode': mode,
+            'wall_time': round(wall_time, 3),
+            'peak_rss_kb': resource.getrusage(
+                resource.RUSAGE_SELF).ru_maxrss,
+            'statements': sum(profiler.statements.values()),
+            'phases': dict(
+                {phase: round(spent, 3)
+                 for phase, spent in profiler.times.items()},
+                other=round(wall_time - sum(profiler.times.values()), 3)),
+            'phase_statements': profiler.statements,
+            # Check the sync really happened, tasks only log failures
+            'pools': _count(models.StoragePool, storage_id),
+            'volumes': _count(models.Volume, storage_id),
+        }
+    finally:
+        coordination.LOCK_COORDINATOR.stop()
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, pools, churn_rate, mode, timeout, workdir=None):
+    results = []
+    mp_context = multiprocessing.get_context('spawn')
+    for size in sizes:
+        size_dir = tempfile.mkdtemp(prefix='sync-{0}-'.format(size),
+                                    dir=workdir)
+        storage_id = uuidutils.generate_uuid()
+        try:
+            for scenario in SCENARIOS:
+                # A fresh process per scenario, for its own peak RSS
+                executor = futures.ProcessPoolExecutor(
+                    max_workers=1, mp_context=mp_context)
+                future = executor.submit(run_scenario, size_dir, storage_id,
+                                         size, scenario, pools, churn_rate,
+                                         mode)
+                try:
+                    result = future.result(timeout=timeout)
+                except futures.TimeoutError:
+                    result = {'size': size, 'scenario': scenario,
+                              'mode': mode,
+                              'error': 'timed out after {0}s'.format(timeout)}
+                    for process in executor._processes.values():
+                        process.kill()
+                except Exception as e:
+                    result = {'size': size, 'scenario': scenario,
+                              'mode': mode, 'error': repr(e)}
+                finally:
+                    executor.shutdown(wait=False)
+                print(json.dumps(result))
+                results.append(result)
+                if 'error' in result:
+                    # The DB state is unknown, skip the next scenarios
+                    break
+        finally:
+            shutil.rmtree(size_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m delfin.tests.benchmark.sync_pipeline',
+        description='Benchmark of storage syncs with the fake driver.')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        help='Comma separated numbers of volumes.')
+    parser.add_argument('--pools', type=int, default=16)
+    parser.add_argument('--churn-rate', type=float, default=0.05,
+                        help='Fraction of volumes changed before the churn '
+                             'scenario.')
+    parser.add_argument('--mode', choices=('full', 'incremental'),
+                        default='full',
+                        help='full: always list all the resources, '
+                             'incremental: list changes since the last '
+                             'sync when the driver supports it.')
+    parser.add_argument('--timeout', type=float, default=3600,
+                        help='Max seconds of one scenario.')
+    parser.add_argument('--workdir', default=None,
+                        help='Directory of the DB files.')
+    parser.add_argument('--output', default='sync_benchmark.json')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    report = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'pools': args.pools,
+        'churn_rate': args.churn_rate,
+        'results': run(sizes, args.pools, args.churn_rate, args.mode,
+                       args.timeout, args.workdir),
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print('Results saved to {0}'.format(args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,686 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark of the trap ingestion of the alert service.
+
+Starts a trap receiver and its alert processor on a local port, backed
+by a SQLite database in a temporary directory and by an exporter which
+only counts the alerts. Then sends it Huawei OceanStor, Dell EMC VMAX and
+HPE 3PAR traps, SNMPv2c and SNMPv3, at a given rate, from one process per
+simulated storage. Each storage sends from its own address in
+127.0.0.0/8, which is the host of its alert source.
+
+Synthetic traps carry the attributes that the alert handler of their
+driver parses, under the OIDs of a MIB module generated for the run.
+Recorded traps are replayed from a file of JSON lines, one trap per line:
+
+    {"vendor": "huawei", "var_binds": [["1.3.6.1.4.1.2011...", "value"]]}
+
+The MIB modules which resolve their OIDs go in --mib-path.
+
+Reports the sustained processing rate, the p50 and p99 latency of the
+receiver processing a trap, the p50 and p99 latency from sending a trap
+to exporting its alert, and the traps lost or dropped on the way. The
+other options of the alert service, e.g. of the exporter queues or the
+alert deduplication, are read from --config-file as usual:
+
+    python -m delfin.tests.benchmark.trap_ingestion --rate 2000 \\
+        --duration 30 --versions v3 --auth-protocol sha \\
+        --privacy-protocol aes
+"""
+
+import collections
+import datetime
+import itertools
+import math
+import multiprocessing
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import eventlet
+from oslo_config import cfg
+from oslo_config import types
+from oslo_log import log
+from oslo_serialization import jsonutils
+from oslo_utils import uuidutils
+from pysnmp.carrier.asyncore.dgram import udp
+from pysnmp.entity import config, engine
+from pysnmp.entity.rfc3413 import ntforg
+from pysnmp.proto import rfc1902
+
+from delfin.common import config as common_config  # noqa
+from delfin import context
+from delfin import cryptor
+from delfin import db
+from delfin import version
+from delfin.alert_manager import alert_processor
+from delfin.alert_manager import constants
+from delfin.alert_manager import trap_receiver
+from delfin.drivers.dell_emc.vmax import alert_handler as vmax_alert
+from delfin.drivers.hpe.hpe_3par import alert_handler as hpe_3par_alert
+from delfin.drivers.huawei.oceanstor import alert_handler as oceanstor_alert
+from delfin.drivers import manager as driver_manager
+from delfin.exporter import base_exporter
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+VERSION_V2C = 'v2c'
+VERSION_V3 = 'v3'
+
+AUTH_PROTOCOLS = {'md5': config.usmHMACMD5AuthProtocol,
+                  'sha': config.usmHMACSHAAuthProtocol,
+                  'none': config.usmNoAuthProtocol}
+PRIVACY_PROTOCOLS = {'aes': config.usmAesCfb128Protocol,
+                     'des': config.usmDESPrivProtocol,
+                     '3des': config.usm3DESEDEPrivProtocol,
+                     'none': config.usmNoPrivProtocol}
+
+# Objects of the synthetic traps, under an enterprise arc no driver uses
+BENCH_MIB = 'DELFIN-BENCH-MIB'
+BENCH_OID = (1, 3, 6, 1, 4, 1, 99999, 1)
+BENCH_TRAP_OID = BENCH_OID + (0, 1)
+SNMP_TRAP_OID = (1, 3, 6, 1, 6, 3, 1, 1, 4, 1, 0)
+
+# The description of synthetic traps carries the time they were sent at
+SENT_PREFIX = 'delfin trap bench sent='
+
+# Counters of the SNMP engine for traps rejected before the callback
+SNMP_REJECT_COUNTERS = (
+    ('__SNMPv2-MIB', 'snmpInASNParseErrs'),
+    ('__SNMPv2-MIB', 'snmpInBadCommunityNames'),
+    ('__SNMP-USER-BASED-SM-MIB', 'usmStatsUnknownEngineIDs'),
+    ('__SNMP-USER-BASED-SM-MIB', 'usmStatsUnknownUserNames'),
+    ('__SNMP-USER-BASED-SM-MIB', 'usmStatsNotInTimeWindows'),
+    ('__SNMP-USER-BASED-SM-MIB', 'usmStatsWrongDigests'),
+    ('__SNMP-USER-BASED-SM-MIB', 'usmStatsDecryptionErrors'),
+)
+
+
+def _oceanstor_trap(seq, description):
+    return collections.OrderedDict([
+        ('hwIsmReportingAlarmAlarmID', '0xF00A0001'),
+        ('hwIsmReportingAlarmFaultTitle', 'Disk fault'),
+        ('hwIsmReportingAlarmFaultLevel', 'majorAlarm'),
+        ('hwIsmReportingAlarmNodeCode', 'CTE0.A'),
+        ('hwIsmReportingAlarmFaultType', 'equipmentFault'),
+        ('hwIsmReportingAlarmAdditionInfo', description),
+        ('hwIsmReportingAlarmSerialNo', str(seq)),
+        ('hwIsmReportingAlarmFaultCategory', 'faultAlarm'),
+        ('hwIsmReportingAlarmRestoreAdvice', 'Replace the disk.'),
+        ('hwIsmReportingAlarmFaultTime', datetime.datetime.now().strftime(
+            oceanstor_alert.AlertHandler.TIME_PATTERN)),
+        ('hwIsmReportingAlarmLocationInfo', 'Disk CTE0.1'),
+    ])
+
+
+def _vmax_trap(seq, description):
+    return collections.OrderedDict([
+        ('emcAsyncEventCode', '1050'),
+        ('connUnitEventSeverity', 'warning'),
+        ('connUnitEventType', 'topology'),
+        ('connUnitEventDescr', description),
+        ('connUnitType', 'storage-subsystem'),
+        ('emcAsyncEventComponentType', '1024'),
+        ('emcAsyncEventComponentName', 'SYMMETRIX-000192601409'),
+        ('emcAsyncEventSource', 'symmetrix'),
+        ('connUnitEventId', str(seq)),
+        ('connUnitName', '000192601409'),
+    ])
+
+
+def _hpe_3par_trap(seq, description):
+    return collections.OrderedDict([
+        ('component', 'hw_disk 1'),
+        ('details', description),
+        ('nodeID', '0'),
+        ('severity', 'major'),
+        ('timeOccurred', time.strftime(
+            hpe_3par_alert.AlertHandler.TIME_PATTERN)),
+        ('id', str(seq)),
+        ('messageCode', '0x0270001'),
+        ('state', 'new'),
+        ('serialNumber', '1307327'),
+    ])
+
+
+# Vendor -> (model, alert handler class, synthetic trap)
+VENDORS = collections.OrderedDict([
+    ('huawei', ('OceanStor', oceanstor_alert.AlertHandler, _oceanstor_trap)),
+    ('vmax', ('VMAX', vmax_alert.AlertHandler, _vmax_trap)),
+    ('3par', ('3PAR', hpe_3par_alert.AlertHandler, _hpe_3par_trap)),
+])
+
+bench_opts = [
+    cfg.FloatOpt('rate',
+                 default=500,
+                 min=0.1,
+                 help='Traps sent per second, over all the storages.'),
+    cfg.FloatOpt('duration',
+                 default=10,
+                 min=0.1,
+                 help='Seconds to send traps for.'),
+    cfg.ListOpt('vendors',
+                item_type=types.String(choices=list(VENDORS)),
+                default=list(VENDORS),
+                help='Vendors of the storages sending traps.'),
+    cfg.ListOpt('versions',
+                item_type=types.String(choices=[VERSION_V2C, VERSION_V3]),
+                default=[VERSION_V2C, VERSION_V3],
+                help='SNMP versions, each vendor has a storage per '
+                     'version.'),
+    cfg.StrOpt('auth-protocol',
+               default='sha',
+               choices=list(AUTH_PROTOCOLS),
+               help='Authentication protocol of SNMPv3 traps.'),
+    cfg.StrOpt('privacy-protocol',
+               default='aes',
+               choices=list(PRIVACY_PROTOCOLS),
+               help='Privacy protocol of SNMPv3 traps.'),
+    cfg.StrOpt('trap-file',
+               help='Replay the recorded traps of this file instead of '
+                    'sending synthetic ones.'),
+    cfg.StrOpt('mib-path',
+               help='Directory of the MIB modules of the recorded traps.'),
+    cfg.FloatOpt('drain-timeout',
+                 default=10,
+                 min=0,
+                 help='Seconds to wait at most for the receiver to process '
+                      'the traps once all are sent.'),
+]
+
+
+def _bench_objects():
+    """Yield (OID, name) of the objects of the synthetic traps."""
+    for vendor_no, (__, __, trap) in enumerate(VENDORS.values(), 1):
+        for field_no, name in enumerate(trap(0, ''), 1):
+            yield BENCH_OID + (vendor_no, field_no), name
+
+
+def write_mib(mib_path):
+    """Write the MIB module of the synthetic traps in pysnmp format."""
+    objects = list(_bench_objects())
+    lines = ["OctetString, = mibBuilder.importSymbols('ASN1', 'OctetString')",
+             "MibScalar, = mibBuilder.importSymbols('SNMPv2-SMI', "
+             "'MibScalar')"]
+    lines += ['%s = MibScalar(%r, OctetString())' % (name, oid)
+              for oid, name in objects]
+    lines.append('mibBuilder.exportSymbols(%r, %s)' % (
+        BENCH_MIB, ', '.join('%s=%s' % (name, name)
+                             for __, name in objects)))
+    with open(os.path.join(mib_path, BENCH_MIB + '.py'), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def make_profiles(vendors, versions, auth_protocol='sha',
+                  privacy_protocol='aes'):
+    """A storage sending traps per vendor and SNMP version."""
+    profiles = []
+    for i, (vendor, snmp_version) in enumerate(
+            itertools.product(vendors, versions)):
+        profile = {'vendor': vendor,
+                   'version': snmp_version,
+                   'storage_id': uuidutils.generate_uuid(),
+                   'name': 'bench-%s-%s' % (vendor, snmp_version),
+                   'host': '127.0.0.%d' % (i + 2)}
+        if snmp_version == VERSION_V2C:
+            profile['community'] = 'bench%d' % i
+        else:
+            profile.update({
+                'username': 'bench%d' % i,
+                'engine_id': '800000000401%08x' % (i + 1),
+                'auth_protocol': auth_protocol,
+                'auth_key': 'bench-auth-key-%d' % i,
+                'privacy_protocol': privacy_protocol,
+                'privacy_key': 'bench-privacy-key-%d' % i})
+            if auth_protocol == 'none':
+                profile['privacy_protocol'] = 'none'
+        profiles.append(profile)
+    return profiles
+
+
+def load_trap_file(path):
+    """Get the recorded traps of each vendor, as (OID, value) pairs."""
+    traps = collections.defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                trap = jsonutils.loads(line)
+                traps[trap['vendor']].append(
+                    [(tuple(int(x) for x in oid.strip('.').split('.')),
+                      value) for oid, value in trap['var_binds']])
+    return traps
+
+
+def _alert_source(profile):
+    alert_source = {'storage_id': profile['storage_id'],
+                    'host': profile['host']}
+    if profile['version'] == VERSION_V2C:
+        alert_source.update({'version': 'snmpv2c',
+                             'community_string': profile['community']})
+        return alert_source
+
+    alert_source.update({'version': 'snmpv3',
+                         'username': profile['username'],
+                         'engine_id': profile['engine_id'],
+                         'security_level': 'noAuthnoPriv'})
+    if profile['auth_protocol'] != 'none':
+        alert_source.update({
+            'security_level': 'authNoPriv',
+            'auth_protocol': profile['auth_protocol'],
+            'auth_key': cryptor.encode(profile['auth_key'])})
+    if profile['privacy_protocol'] != 'none':
+        alert_source.update({
+            'security_level': 'authPriv',
+            'privacy_protocol': profile['privacy_protocol'],
+            'privacy_key': cryptor.encode(profile['privacy_key'])})
+    return alert_source
+
+
+class _SyncUdpTransport(udp.UdpTransport):
+    """Send each message at once instead of from the dispatcher loop."""
+
+    def sendMessage(self, outgoingMessage, transportAddress):
+        self.socket.sendto(outgoingMessage, transportAddress)
+
+
+def _sender_engine(profile, target):
+    if profile['version'] == VERSION_V2C:
+        snmp_engine = engine.SnmpEngine()
+        config.addV1System(snmp_engine, 'bench', profile['community'])
+        config.addTargetParams(snmp_engine, 'bench', 'bench',
+                               'noAuthNoPriv', mpModel=1)
+        config.addVacmUser(snmp_engine, 2, 'bench', 'noAuthNoPriv',
+                           notifySubTree=(1, 3, 6))
+    else:
+        snmp_engine = engine.SnmpEngine(
+            rfc1902.OctetString(hexValue=profile['engine_id']))
+        auth = profile['auth_protocol'] != 'none'
+        priv = profile['privacy_protocol'] != 'none'
+        config.addV3User(
+            snmp_engine, profile['username'],
+            AUTH_PROTOCOLS[profile['auth_protocol']],
+            profile['auth_key'] if auth else None,
+            PRIVACY_PROTOCOLS[profile['privacy_protocol']],
+            profile['privacy_key'] if priv else None)
+        level = 'authPriv' if priv else 'authNoPriv' if auth \
+            else 'noAuthNoPriv'
+        config.addTargetParams(snmp_engine, 'bench', profile['username'],
+                               level, mpModel=3)
+        config.addVacmUser(snmp_engine, 3, profile['username'], level,
+                           notifySubTree=(1, 3, 6))
+
+    transport = _SyncUdpTransport().openClientMode((profile['host'], 0))
+    transport.socket.setblocking(True)
+    config.addTransport(snmp_engine, udp.domainName, transport)
+    config.addTargetAddr(snmp_engine, 'receiver', udp.domainName, target,
+                         'bench', tagList='bench')
+    config.addNotificationTarget(snmp_engine, 'bench', 'bench-filter',
+                                 'bench', 'trap')
+    return snmp_engine
+
+
+def _var_binds(profile, seq, recorded):
+    if recorded:
+        return [(oid, rfc1902.ObjectIdentifier(value)
+                 if oid == SNMP_TRAP_OID else rfc1902.OctetString(value))
+                for oid, value in recorded[seq % len(recorded)]]
+    vendor_no = list(VENDORS).index(profile['vendor']) + 1
+    trap = VENDORS[profile['vendor']][2](
+        seq, '%s%.6f' % (SENT_PREFIX, time.time()))
+    var_binds = [(SNMP_TRAP_OID, rfc1902.ObjectIdentifier(BENCH_TRAP_OID))]
+    var_binds += [(BENCH_OID + (vendor_no, field_no, 0),
+                   rfc1902.OctetString(value))
+                  for field_no, value in enumerate(trap.values(), 1)]
+    return var_binds
+
+
+def _send(profile, target, rate, duration, recorded, ready, go, results):
+    """Send the traps of a storage, in a process of its own."""
+    snmp_engine = _sender_engine(profile, target)
+    originator = ntforg.NotificationOriginator()
+    context_name = rfc1902.OctetString('')
+    ready.put(profile['storage_id'])
+    go.wait()
+
+    interval = 1.0 / rate
+    begin = time.time()
+    sent = errors = 0
+    for seq in itertools.count():
+        now = time.time()
+        if now - begin >= duration:
+            break
+        due = begin + seq * interval
+        if due > now:
+            time.sleep(due - now)
+        try:
+            originator.sendVarBinds(snmp_engine, 'bench', None, context_name,
+                                    _var_binds(profile, seq + 1, recorded))
+            sent += 1
+        except Exception as e:
+            if not errors:
+                LOG.warning('Failed to send trap of storage {0}: {1}'
+                            .format(profile['name'], e))
+            errors += 1
+    results.put((profile['storage_id'], sent, errors, time.time() - begin))
+
+
+def sent_at(alert_model):
+    """Get the time a synthetic trap was sent at from its alert."""
+    description = alert_model.get('description') or ''
+    if not description.startswith(SENT_PREFIX):
+        return None
+    return float(description[len(SENT_PREFIX):])
+
+
+class BenchDriver(object):
+    """Parse the traps of a storage with the alert handler of its driver,
+    no session to the storage is needed.
+    """
+
+    def __init__(self, storage_id, handler):
+        self.storage_id = storage_id
+        self.handler = handler
+
+    def parse_alert(self, context, alert):
+        return self.handler.parse_alert(context, alert)
+
+    def close(self):
+        pass
+
+
+class NullExporter(base_exporter.BaseExporter):
+    """Count the exported alerts, and their latency since sent."""
+
+    def __init__(self):
+        self.count = 0
+        self.latencies = []
+
+    def dispatch(self, ctxt, data):
+        now = time.time()
+        for alert_model in data:
+            self.count += 1
+            sent = sent_at(alert_model)
+            if sent is not None:
+                self.latencies.append(now - sent)
+
+
+class BenchReceiver(trap_receiver.TrapReceiver):
+    """Trap receiver timing the processing of each trap."""
+
+    def __init__(self, *args, **kwargs):
+        super(BenchReceiver, self).__init__(*args, **kwargs)
+        self.listening = threading.Event()
+        self.latencies = []
+        self.first = None
+        self.last = None
+
+    def _add_transport(self):
+        super(BenchReceiver, self)._add_transport()
+        self.listening.set()
+
+    def _cb_fun(self, *args):
+        begin = time.monotonic()
+        super(BenchReceiver, self)._cb_fun(*args)
+        end = time.monotonic()
+        self.latencies.append(end - begin)
+        if self.first is None:
+            self.first = begin
+        self.last = end
+
+    def snmp_rejects(self):
+        """Traps the SNMP engine rejected, per counter."""
+        mib_builder = \
+            self.snmp_engine.msgAndPduDsp.mibInstrumController.mibBuilder
+        rejects = {}
+        for module, name in SNMP_REJECT_COUNTERS:
+            counter, = mib_builder.importSymbols(module, name)
+            if int(counter.syntax):
+                rejects[name] = int(counter.syntax)
+        return rejects
+
+
+def _free_port(address):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.bind((address, 0))
+        return sock.getsockname()[1]
+    finally:
+        sock.close()
+
+
+def _percentile(values, percent):
+    """Nearest rank percentile of the values, None when there are none."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = int(math.ceil(percent / 100.0 * len(values)))
+    return values[max(rank, 1) - 1]
+
+
+def _counter_delta(counter, before):
+    return {key[0] if len(key) == 1 else key: value - before.get(key, 0)
+            for key, value in counter.totals().items()
+            if value != before.get(key, 0)}
+
+
+def _wait_drained(receiver, exporter, sent, timeout):
+    """Wait for the receiver and exporter to catch up, or for timeout."""
+    deadline = time.monotonic() + timeout
+    last = None
+    while time.monotonic() < deadline:
+        state = (len(receiver.latencies), exporter.count)
+        if state[0] >= sent and state[1] >= state[0]:
+            return
+        if state == last:
+            # Nothing moved for a second, what is left was lost
+            return
+        last = state
+        time.sleep(1)
+
+
+def run(profiles, rate, duration, workdir, recorded=None, mib_path=None,
+        drain_timeout=10):
+    """Run the benchmark, the database must have been set up.
+
+    :param profiles: the storages sending traps, see make_profiles
+    :param rate: traps sent per second, spread over the storages
+    :param duration: seconds to send traps for
+    :param workdir: directory for the MIB modules of the receiver
+    :param recorded: recorded traps of each vendor, see load_trap_file,
+                     synthetic traps are sent when None
+    :param mib_path: directory of more MIB modules to load
+    :returns: dict of the results, see format_report
+    """
+    ctxt = context.get_admin_context()
+    receiver_mib_path = os.path.join(workdir, 'mibs')
+    os.makedirs(receiver_mib_path, exist_ok=True)
+    write_mib(receiver_mib_path)
+    if mib_path:
+        for name in os.listdir(mib_path):
+            if name.endswith(trap_receiver.MIB_LOAD_FILE_FORMAT):
+                shutil.copy(os.path.join(mib_path, name), receiver_mib_path)
+
+    drivers = driver_manager.DriverManager()
+    for profile in profiles:
+        model, handler, __ = VENDORS[profile['vendor']]
+        db.storage_create(ctxt, {'id': profile['storage_id'],
+                                 'name': profile['name'],
+                                 'vendor': profile['vendor'],
+                                 'model': model,
+                                 'serial_number': profile['storage_id']})
+        db.alert_source_create(ctxt, _alert_source(profile))
+        drivers.update_driver(profile['storage_id'],
+                              BenchDriver(profile['storage_id'], handler()))
+
+    # The alerts only go to the null exporter
+    exporter = NullExporter()
+    CONF.set_override('alert_exporters', [])
+    try:
+        processor = alert_processor.AlertProcessor()
+    finally:
+        CONF.clear_override('alert_exporters')
+    manager = processor.exporter_manager
+    manager.exporters.append(exporter)
+    if manager.spool is None:
+        manager.workers.append(base_exporter.ExporterWorker(exporter))
+    else:
+        manager.workers.append(base_exporter.SpoolWorker(exporter,
+                                                         manager.spool))
+
+    address = '127.0.0.1'
+    port = _free_port(address)
+    receiver = BenchReceiver(trap_receiver_address=address,
+                             trap_receiver_port=port,
+                             snmp_mib_path=receiver_mib_path,
+                             snmp_mib_cache_path=os.path.join(workdir,
+                                                              'mib_cache'),
+                             alert_processor=processor)
+    dropped_before = trap_receiver.TRAPS_DROPPED.totals()
+    exporter_dropped_before = base_exporter.DROPPED.totals()
+
+    # Senders are started and set up before the receiver, waiting for
+    # them blocks the green threads of the receiver
+    mp = multiprocessing.get_context('spawn')
+    ready, go, results = mp.Queue(), mp.Event(), mp.Queue()
+    senders = []
+    for profile in profiles:
+        sender = mp.Process(
+            target=_send, name='trap-bench-' + profile['name'],
+            args=(profile, (address, port), rate / len(profiles), duration,
+                  (recorded or {}).get(profile['vendor']), ready, go,
+                  results))
+        sender.daemon = True
+        sender.start()
+        senders.append(sender)
+    for __ in senders:
+        ready.get()
+
+    thread = threading.Thread(target=receiver.start, name='trap-bench')
+    thread.daemon = True
+    thread.start()
+    try:
+        if not receiver.listening.wait(30):
+            raise RuntimeError('Trap receiver failed to start.')
+        go.set()
+        while any(sender.is_alive() for sender in senders):
+            time.sleep(0.1)
+        per_storage = {}
+        for __ in senders:
+            storage_id, sent, errors, elapsed = results.get()
+            per_storage[storage_id] = (sent, errors, elapsed)
+        sent = sum(sent for sent, __, __ in per_storage.values())
+        _wait_drained(receiver, exporter, sent, drain_timeout)
+    finally:
+        if receiver.snmp_engine is not None:
+            receiver.snmp_engine.transportDispatcher.jobFinished(
+                constants.SNMP_DISPATCHER_JOB_ID)
+        thread.join(5)
+        receiver.stop()
+        for profile in profiles:
+            drivers.remove_driver(profile['storage_id'])
+
+    received = len(receiver.latencies)
+    rejects = receiver.snmp_rejects()
+    elapsed = max(elapsed for __, __, elapsed in per_storage.values())
+    return {
+        'sent': sent,
+        'send_errors': sum(errors for __, errors, __ in per_storage.values()),
+        'offered_rate': sent / elapsed if elapsed else 0.0,
+        'received': received,
+        'rate': (received / (receiver.last - receiver.first)
+                 if received > 1 else 0.0),
+        'processing_p50': _percentile(receiver.latencies, 50),
+        'processing_p99': _percentile(receiver.latencies, 99),
+        'exported': exporter.count,
+        'export_p50': _percentile(exporter.latencies, 50),
+        'export_p99': _percentile(exporter.latencies, 99),
+        'rejected': rejects,
+        'lost': max(sent - received - sum(rejects.values()), 0),
+        'dropped': _counter_delta(trap_receiver.TRAPS_DROPPED,
+                                  dropped_before),
+        'exporter_dropped': _counter_delta(base_exporter.DROPPED,
+                                           exporter_dropped_before).get(
+            type(exporter).__name__, 0),
+        'storages': [(profile['name'], profile['host']) +
+                     per_storage[profile['storage_id']][:2]
+                     for profile in profiles],
+    }
+
+
+def _ms(seconds):
+    return 'n/a' if seconds is None else '%.2fms' % (seconds * 1000)
+
+
+def _counts(counts):
+    return ', '.join('%s=%d' % item for item in sorted(counts.items())) \
+        or 'none'
+
+
+def format_report(result):
+    lines = [
+        'Sent        %d traps at %.1f/s, %d failed to send' % (
+            result['sent'], result['offered_rate'], result['send_errors']),
+        'Received    %d traps, processed at %.1f/s sustained' % (
+            result['received'], result['rate']),
+        'Exported    %d alerts' % result['exported'],
+        'Processing  p50 %s, p99 %s' % (_ms(result['processing_p50']),
+                                        _ms(result['processing_p99'])),
+        'Export      p50 %s, p99 %s since sent' % (
+            _ms(result['export_p50']), _ms(result['export_p99'])),
+        'Lost        %d, not received by the end of the drain timeout' % (
+            result['lost']),
+        'Rejected    %s' % _counts(result['rejected']),
+        'Dropped     %s' % _counts(result['dropped']),
+        'Exporter    %d dropped as its queue was full' % (
+            result['exporter_dropped']),
+    ]
+    lines += ['Storage     %s from %s: %d sent, %d failed' % storage
+              for storage in result['storages']]
+    return '\n'.join(lines)
+
+
+def main():
+    # Patched here rather than on import, the module is imported by the
+    # sender processes and the tests as well
+    eventlet.monkey_patch()
+    log.register_options(CONF)
+    CONF.register_cli_opts(bench_opts)
+    CONF(sys.argv[1:], project='delfin',
+         version=version.version_string())
+    log.setup(CONF, "delfin")
+
+    workdir = tempfile.mkdtemp(prefix='delfin-trap-ingestion-')
+    try:
+        CONF.import_group('database', 'delfin.db.sqlalchemy.api')
+        CONF.set_override('connection', 'sqlite:///' + os.path.join(
+            workdir, 'delfin.sqlite'), group='database')
+        db.register_db()
+        profiles = make_profiles(CONF.vendors, CONF.versions,
+                                 CONF.auth_protocol, CONF.privacy_protocol)
+        recorded = load_trap_file(CONF.trap_file) if CONF.trap_file \
+            else None
+        result = run(profiles, CONF.rate, CONF.duration, workdir, recorded,
+                     CONF.mib_path, CONF.drain_timeout)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(format_report(result))
+
+
+if __name__ == '__main__':
+    main()
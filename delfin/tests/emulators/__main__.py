@@ -0,0 +1,72 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Run an array emulator, e.g.
+
+    python -m delfin.tests.emulators oceanstor --port 8088 --volumes 100000
+
+and register a storage with its address and credentials.
+"""
+
+import argparse
+import time
+
+from delfin.tests.emulators import hpe_3par
+from delfin.tests.emulators import oceanstor
+from delfin.tests.emulators import unisphere
+
+EMULATORS = {
+    'oceanstor': oceanstor.OceanStorEmulator,
+    '3par': hpe_3par.Hpe3parEmulator,
+    'unisphere': unisphere.UnisphereEmulator,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m delfin.tests.emulators',
+        description='Loopback emulator of a storage array REST API.')
+    parser.add_argument('array', choices=sorted(EMULATORS))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8443)
+    parser.add_argument('--pools', type=int, default=4)
+    parser.add_argument('--volumes', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Seconds added to each response.')
+    parser.add_argument('--object-latency', type=float, default=0,
+                        help='Seconds added per returned object.')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='Fraction of requests failed with '
+                             '--error-status.')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--session-ttl', type=float, default=3600)
+    args = parser.parse_args()
+
+    emulator = EMULATORS[args.array](
+        host=args.host, port=args.port, pools=args.pools,
+        volumes=args.volumes, latency=args.latency,
+        object_latency=args.object_latency, error_rate=args.error_rate,
+        error_status=args.error_status, session_ttl=args.session_ttl)
+    with emulator:
+        print('{0} emulator listening on {1}'.format(args.array,
+                                                     emulator.url))
+        try:
+            while True:
+                time.sleep(60)
+                print(emulator.stats)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,328 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Loopback HTTPS server the array emulators are built on."""
+
+import datetime
+import gzip
+import json
+import os
+import random
+import re
+import socket
+import tempfile
+import time
+import uuid
+from urllib import parse
+
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from eventlet import patcher
+
+# Serve from native threads, also in monkey patched processes. Note that
+# importing eventlet.wsgi alone swaps http.server for a green copy.
+server = patcher.original('http.server')
+ssl = patcher.original('ssl')
+_threading = patcher.original('threading')
+Lock = _threading.Lock
+
+# Responses bigger than this are gzipped when the client accepts it
+GZIP_MIN_SIZE = 1024
+
+_cert_lock = Lock()
+_cert_files = None
+
+
+def self_signed_cert():
+    """Return (cert file, key file) of a self signed cert for localhost.
+
+    It is generated once per process, the emulators are only reached
+    through loopback by clients which do not verify certificates.
+    """
+    global _cert_files
+    with _cert_lock:
+        if _cert_files is not None:
+            return _cert_files
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048,
+                                       backend=default_backend())
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME,
+                                             u'localhost')])
+        now = datetime.datetime.utcnow()
+        cert = x509.CertificateBuilder().subject_name(name) \
+            .issuer_name(name) \
+            .public_key(key.public_key()) \
+            .serial_number(x509.random_serial_number()) \
+            .not_valid_before(now - datetime.timedelta(days=1)) \
+            .not_valid_after(now + datetime.timedelta(days=365)) \
+            .sign(key, hashes.SHA256(), default_backend())
+
+        cert_dir = tempfile.mkdtemp(prefix='delfin-emulator-')
+        cert_file = os.path.join(cert_dir, 'cert.pem')
+        key_file = os.path.join(cert_dir, 'key.pem')
+        with open(cert_file, 'wb') as f:
+            f.write(cert.public_bytes(serialization.Encoding.PEM))
+        with open(key_file, 'wb') as f:
+            f.write(key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.TraditionalOpenSSL,
+                serialization.NoEncryption()))
+        _cert_files = (cert_file, key_file)
+        return _cert_files
+
+
+def new_token():
+    return uuid.uuid4().hex
+
+
+class Request(object):
+    """A parsed request passed to the route handlers."""
+
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def param(self, name, default=None):
+        values = self.query.get(name)
+        return values[0] if values else default
+
+    def json(self):
+        if not self.body:
+            return {}
+        return json.loads(self.body.decode('utf-8'))
+
+
+class _Handler(server.BaseHTTPRequestHandler):
+    # Keep-alive, so connection reuse of the clients can be observed
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        if isinstance(self.request, ssl.SSLSocket):
+            # Handshake in the handler thread, not in the accept loop
+            self.request.do_handshake()
+        super(_Handler, self).setup()
+        self.server.emulator.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self):
+        emulator = self.server.emulator
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        url = parse.urlsplit(self.path)
+        request = Request(self.command, url.path,
+                          parse.parse_qs(url.query, keep_blank_values=True),
+                          self.headers, body)
+        status, result, sent_objects = emulator.handle(request)
+        self._respond(status, result)
+        emulator.count('objects', sent_objects)
+
+    def _respond(self, status, result):
+        headers = {}
+        if result is None:
+            data = b''
+        else:
+            data = json.dumps(result).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+            if len(data) >= GZIP_MIN_SIZE and \
+                    'gzip' in self.headers.get('Accept-Encoding', ''):
+                data = gzip.compress(data, compresslevel=1)
+                headers['Content-Encoding'] = 'gzip'
+        headers['Content-Length'] = str(len(data))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+
+class _Server(server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, emulator, address, ssl_context):
+        self.emulator = emulator
+        self.ssl_context = ssl_context
+        super(_Server, self).__init__(address, _Handler)
+
+    def get_request(self):
+        sock, addr = super(_Server, self).get_request()
+        # Headers and body are written apart, don't let Nagle delay them
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.ssl_context is not None:
+            sock = self.ssl_context.wrap_socket(
+                sock, server_side=True, do_handshake_on_connect=False)
+        return sock, addr
+
+    def handle_error(self, request, client_address):
+        # Clients dropping connections is expected while benchmarking
+        pass
+
+
+class Emulator(object):
+    """Base of the array emulators, a threaded HTTPS server on loopback.
+
+    Subclasses register their endpoints with route(). Objects are
+    generated from their index on each request so that counts in the
+    millions cost no memory.
+
+    :param latency: seconds added to each response.
+    :param object_latency: seconds added per returned object, so that the
+        cost of a page follows its size.
+    :param error_rate: fraction of authenticated requests answered with
+        error_status instead of being served.
+    :param error_status: status of the injected errors.
+    :param session_ttl: seconds after which an idle session expires.
+    :param seed: seed of the injected errors.
+    :param use_ssl: serve HTTPS, the drivers only speak HTTPS.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0,
+                 object_latency=0, error_rate=0, error_status=503,
+                 session_ttl=3600, seed=0, use_ssl=True):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.object_latency = object_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.session_ttl = session_ttl
+        self.use_ssl = use_ssl
+        self.routes = []
+        # token -> last access time
+        self.sessions = {}
+        self.stats = {}
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._server = None
+        self._thread = None
+
+    def route(self, method, pattern, handler, auth=True):
+        """Serve `method` on paths fully matching the regex `pattern`.
+
+        handler(request, *groups) returns (status, body) or
+        (status, body, number of returned objects).
+        """
+        self.routes.append((method, re.compile(pattern), handler, auth))
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + value
+
+    def new_session(self):
+        token = new_token()
+        with self._lock:
+            self.sessions[token] = time.time()
+        self.count('logins')
+        return token
+
+    def check_session(self, token):
+        with self._lock:
+            accessed_at = self.sessions.get(token)
+            if accessed_at is None:
+                return False
+            if time.time() - accessed_at > self.session_ttl:
+                del self.sessions[token]
+                return False
+            self.sessions[token] = time.time()
+            return True
+
+    def drop_session(self, token):
+        with self._lock:
+            return self.sessions.pop(token, None) is not None
+
+    def expire_sessions(self):
+        """Invalidate all sessions, as if the array restarted."""
+        with self._lock:
+            self.sessions.clear()
+
+    def authenticate(self, request):
+        """Return None when authenticated, else an error (status, body)."""
+        raise NotImplementedError
+
+    def not_found(self, request):
+        return 404, {'error': 'Not found: {0}'.format(request.path)}
+
+    def injected_error(self, request):
+        return self.error_status, {'error': 'Injected error'}
+
+    def handle(self, request):
+        self.count('requests')
+        for method, pattern, handler, auth in self.routes:
+            match = pattern.fullmatch(request.path)
+            if method != request.method or match is None:
+                continue
+            if auth:
+                error = self.authenticate(request)
+                if error is not None:
+                    self.count('unauthorized')
+                    return error + (0,)
+                if self.error_rate and \
+                        self._random.random() < self.error_rate:
+                    self.count('errors')
+                    return self.injected_error(request) + (0,)
+            result = handler(request, *match.groups())
+            if len(result) == 2:
+                result += (0,)
+            wait = self.latency + self.object_latency * result[2]
+            if wait:
+                time.sleep(wait)
+            return result
+        return self.not_found(request) + (0,)
+
+    @property
+    def url(self):
+        scheme = 'https' if self.use_ssl else 'http'
+        return '{0}://{1}:{2}'.format(scheme, self.host, self.port)
+
+    def start(self):
+        ssl_context = None
+        if self.use_ssl:
+            ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ssl_context.load_cert_chain(*self_signed_cert())
+        self._server = _Server(self, (self.host, self.port), ssl_context)
+        self.port = self._server.server_address[1]
+        self._thread = _threading.Thread(target=self._server.serve_forever,
+                                         name=type(self).__name__,
+                                         daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def page_window(start, end, total):
+    """Clip the [start, end) window of a paged query to `total` objects."""
+    start = max(int(start), 0)
+    return range(min(start, total), min(max(int(end), start), total))
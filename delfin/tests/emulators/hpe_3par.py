@@ -0,0 +1,143 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Emulator of the HPE 3PAR Web Services API (WSAPI)."""
+
+from delfin.tests.emulators import base
+
+SESSION_KEY_HEADER = 'X-HP3PAR-WSAPI-SessionKey'
+SERIAL_NUMBER = '1307327'
+
+
+def _error(code, desc):
+    return {'code': code, 'desc': desc}
+
+
+class Hpe3parEmulator(base.Emulator):
+    """3PAR array with `pools` CPGs and `volumes` virtual volumes.
+
+    Sessions are set up by POST /api/v1/credentials and carried by the
+    X-HP3PAR-WSAPI-SessionKey header, an unknown key gets 403 as from the
+    array. Collections are returned whole as {'total', 'members'}.
+    """
+
+    def __init__(self, pools=4, volumes=100, username='3paradm',
+                 password='3pardata', **kwargs):
+        super(Hpe3parEmulator, self).__init__(**kwargs)
+        self.pool_count = pools
+        self.volume_count = volumes
+        self.username = username
+        self.password = password
+
+        self.route('POST', '/api/v1/credentials', self.login, auth=False)
+        self.route('DELETE', '/api/v1/credentials/([^/]+)', self.logout,
+                   auth=False)
+        self.route('GET', '/api/v1/system', self.get_system)
+        self.route('GET', '/api/v1/capacity', self.get_capacity)
+        self.route('GET', '/api/v1/cpgs', self.list_cpgs)
+        self.route('GET', '/api/v1/volumes', self.list_volumes)
+        self.route('GET', '/api/v1/eventlog', self.list_events)
+
+    def authenticate(self, request):
+        if not self.check_session(request.headers.get(SESSION_KEY_HEADER)):
+            return 403, _error(6, 'invalid session key')
+
+    def not_found(self, request):
+        return 404, _error(23, 'resource not found')
+
+    def injected_error(self, request):
+        return self.error_status, _error(1, 'internal server error')
+
+    def login(self, request):
+        body = request.json()
+        if body.get('user') != self.username or \
+                body.get('password') != self.password:
+            return 400, _error(5, 'invalid username or password')
+        return 201, {'key': self.new_session()}
+
+    def logout(self, request, key):
+        if not self.drop_session(key):
+            return 403, _error(6, 'invalid session key')
+        return 200, None
+
+    def get_system(self, request):
+        return 200, {
+            'id': 7327,
+            'name': '3par-emulator',
+            'model': 'HPE_3PAR 8200',
+            'serialNumber': SERIAL_NUMBER,
+            'systemVersion': '3.3.1.410',
+            'location': 'Emulator',
+            'totalCapacityMiB': 2 ** 23,
+            'allocatedCapacityMiB': 2 ** 22,
+            'freeCapacityMiB': 2 ** 21,
+        }
+
+    def get_capacity(self, request):
+        return 200, {
+            'allCapacity': {
+                'totalMiB': 2 ** 23,
+                'allocated': {
+                    'system': {'internalMiB': 2 ** 15, 'spareMiB': 2 ** 16},
+                },
+            },
+        }
+
+    @staticmethod
+    def _usage(total_mib, used_mib):
+        return {'totalMiB': total_mib, 'rawTotalMiB': total_mib * 2,
+                'usedMiB': used_mib, 'rawUsedMiB': used_mib * 2}
+
+    def _cpg(self, idx):
+        total = 2 ** 16 * (idx + 1)
+        return {
+            'id': idx,
+            'name': 'CPG_{0:03d}'.format(idx),
+            'state': 1,
+            'UsrUsage': self._usage(total, total // 3),
+            'SAUsage': self._usage(total // 16, total // 64),
+            'SDUsage': self._usage(total // 8, total // 32),
+        }
+
+    def _volume(self, idx):
+        size = 1024 * (1 + idx % 64)
+        cpg = 'CPG_{0:03d}'.format(idx % self.pool_count)
+        return {
+            'id': idx,
+            'name': 'vv_{0:07d}'.format(idx),
+            'comment': '',
+            'state': 1,
+            'provisioningType': 2 if idx % 2 else 1,
+            'userCPG': cpg,
+            'snapCPG': cpg,
+            'sizeMiB': size,
+            'userSpace': {'reservedMiB': size * (idx % 10) // 10},
+            'adminSpace': {'reservedMiB': 0},
+            'snapshotSpace': {'reservedMiB': 0},
+            'wwn': '60002AC{0:025X}'.format(idx),
+        }
+
+    @staticmethod
+    def _collection(members):
+        return 200, {'total': len(members), 'members': members}, len(members)
+
+    def list_cpgs(self, request):
+        return self._collection([self._cpg(idx)
+                                 for idx in range(self.pool_count)])
+
+    def list_volumes(self, request):
+        return self._collection([self._volume(idx)
+                                 for idx in range(self.volume_count)])
+
+    def list_events(self, request):
+        return self._collection([])
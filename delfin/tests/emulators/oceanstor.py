@@ -0,0 +1,173 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Emulator of the Huawei OceanStor DeviceManager REST API."""
+
+import re
+
+from delfin.tests.emulators import base
+
+PREFIX = '/deviceManager/rest'
+DEVICE_ID = '2102351NPT10J3000001'
+SECTOR_SIZE = 512
+
+ERROR_UNAUTHORIZED = -401
+ERROR_WRONG_PASSWORD = 1077987870
+ERROR_OBJECT_NOT_EXIST = 1077948996
+
+
+def _result(data=None, code=0, description='0'):
+    result = {'error': {'code': code, 'description': description}}
+    if data is not None:
+        result['data'] = data
+    return result
+
+
+class OceanStorEmulator(base.Emulator):
+    """OceanStor array with `pools` storage pools and `volumes` LUNs.
+
+    Sessions are set up by POST xx/sessions and carried by the iBaseToken
+    header. Errors are reported in the body with HTTP 200, as the array
+    does. Resource lists are paged by `range=[start-end]` and counted by
+    /<resource>/count.
+    """
+
+    def __init__(self, pools=4, volumes=100, username='admin',
+                 password='Admin@123', **kwargs):
+        super(OceanStorEmulator, self).__init__(**kwargs)
+        self.pool_count = pools
+        self.volume_count = volumes
+        self.username = username
+        self.password = password
+
+        device = PREFIX + '/' + DEVICE_ID
+        self.route('POST', PREFIX + '/xx/sessions', self.login, auth=False)
+        self.route('DELETE', device + '/sessions', self.logout)
+        self.route('GET', device + '/system/', self.get_system)
+        self.route('GET', device + '/controller', self.get_controllers)
+        self.route('GET', device + '/storagepool', self.list_pools)
+        self.route('GET', device + '/storagepool/count', self.count_pools)
+        self.route('GET', device + '/lun', self.list_luns)
+        self.route('GET', device + '/lun/count', self.count_luns)
+        self.route('DELETE', device + '/alarm/currentalarm',
+                   self.clear_alarm)
+
+    def authenticate(self, request):
+        if not self.check_session(request.headers.get('iBaseToken')):
+            return 200, _result(code=ERROR_UNAUTHORIZED,
+                                description='Unauthorized')
+
+    def not_found(self, request):
+        return 200, _result(code=ERROR_OBJECT_NOT_EXIST,
+                            description='The object does not exist')
+
+    def injected_error(self, request):
+        return self.error_status, None
+
+    def login(self, request):
+        body = request.json()
+        if body.get('username') != self.username or \
+                body.get('password') != self.password:
+            return 200, _result(code=ERROR_WRONG_PASSWORD,
+                                description='The username or password is '
+                                            'incorrect.')
+        return 200, _result({'deviceid': DEVICE_ID,
+                             'iBaseToken': self.new_session(),
+                             'accountstate': 1,
+                             'username': self.username})
+
+    def logout(self, request):
+        self.drop_session(request.headers.get('iBaseToken'))
+        return 200, _result()
+
+    def get_system(self, request):
+        total = 2 ** 33
+        used = total // 4
+        return 200, _result({
+            'ID': DEVICE_ID,
+            'NAME': 'OceanStor 5500 V5',
+            'RUNNINGSTATUS': '1',
+            'HEALTHSTATUS': '1',
+            'LOCATION': 'Emulator',
+            'SECTORSIZE': str(SECTOR_SIZE),
+            'TOTALCAPACITY': str(total),
+            'USEDCAPACITY': str(used),
+            'userFreeCapacity': str(total - used),
+            'MEMBERDISKSCAPACITY': str(total * 2),
+        })
+
+    def get_controllers(self, request):
+        return 200, _result([{'ID': '0A', 'NAME': 'CTE0.A',
+                              'SOFTVER': 'V500R007C10'},
+                             {'ID': '0B', 'NAME': 'CTE0.B',
+                              'SOFTVER': 'V500R007C10'}])
+
+    @staticmethod
+    def _range(request, total):
+        match = re.match(r'\[(\d+)-(\d+)\]', request.param('range', ''))
+        if match is None:
+            return range(total)
+        return base.page_window(match.group(1), match.group(2), total)
+
+    @staticmethod
+    def _page(objects):
+        # The array leaves data out of empty pages
+        return 200, _result(objects or None), len(objects)
+
+    def _pool(self, idx):
+        total = 2 ** 30 * (idx + 1)
+        used = total // 3
+        return {
+            'ID': str(idx),
+            'NAME': 'StoragePool{0:03d}'.format(idx),
+            'RUNNINGSTATUS': '27',
+            'USAGETYPE': '1',
+            'USERTOTALCAPACITY': str(total),
+            'USERCONSUMEDCAPACITY': str(used),
+            'USERFREECAPACITY': str(total - used),
+        }
+
+    def _lun(self, idx):
+        capacity = 2 ** 21 * (1 + idx % 64)
+        return {
+            'ID': str(idx),
+            'NAME': 'lun_{0:07d}'.format(idx),
+            'DESCRIPTION': '',
+            'PARENTNAME': 'StoragePool{0:03d}'.format(idx % self.pool_count),
+            'RUNNINGSTATUS': '27',
+            'HEALTHSTATUS': '1',
+            'ALLOCTYPE': str(idx % 2),
+            'ENABLECOMPRESSION': 'false',
+            'ENABLEDEDUP': 'false',
+            'SECTORSIZE': str(SECTOR_SIZE),
+            'CAPACITY': str(capacity),
+            'ALLOCCAPACITY': str(capacity * (idx % 10) // 10),
+            'WWN': '6{0:031x}'.format(idx),
+        }
+
+    def list_pools(self, request):
+        return self._page([self._pool(idx) for idx in
+                           self._range(request, self.pool_count)])
+
+    def count_pools(self, request):
+        return 200, _result({'COUNT': str(self.pool_count)})
+
+    def list_luns(self, request):
+        return self._page([self._lun(idx) for idx in
+                           self._range(request, self.volume_count)])
+
+    def count_luns(self, request):
+        return 200, _result({'COUNT': str(self.volume_count)})
+
+    def clear_alarm(self, request):
+        return 200, _result()
@@ -0,0 +1,209 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Emulator of the Dell EMC Unisphere for PowerMax/VMAX REST API."""
+
+import base64
+import time
+
+from delfin.tests.emulators import base
+
+PREFIX = '/univmax/restapi'
+UNI_VERSION = 'V9.2.0.1'
+SYMMETRIX_ID = '000196800123'
+SYMM = '/(?:\\d+)/sloprovisioning/symmetrix/' + SYMMETRIX_ID
+
+
+def _message(message):
+    return {'message': message}
+
+
+class UnisphereEmulator(base.Emulator):
+    """Unisphere managing one array with `pools` SRPs and `volumes`
+    devices, each in its own storage group.
+
+    Each request carries basic auth. Volume lists are returned as
+    iterators: the first `max_page_size` results come with the list and
+    the rest is read from /common/Iterator/<id>/page?from=&to= (1 based,
+    inclusive) until the iterator expires after `iterator_ttl` seconds.
+    """
+
+    def __init__(self, pools=2, volumes=100, username='smc',
+                 password='smc', max_page_size=1000, iterator_ttl=600,
+                 **kwargs):
+        super(UnisphereEmulator, self).__init__(**kwargs)
+        self.pool_count = pools
+        self.volume_count = volumes
+        self.username = username
+        self.password = password
+        self.max_page_size = max_page_size
+        self.iterator_ttl = iterator_ttl
+        self.credentials = 'Basic ' + base64.b64encode(
+            '{0}:{1}'.format(username, password).encode()).decode()
+        # iterator id -> (expiration time, number of results)
+        self.iterators = {}
+        self._iterator_lock = base.Lock()
+
+        self.route('GET', PREFIX + '/version', self.get_version)
+        self.route('GET', PREFIX + '/(?:\\d+)/system/symmetrix/?',
+                   self.list_arrays)
+        self.route('GET', PREFIX + '/(?:\\d+)/system/symmetrix/([^/]+)',
+                   self.get_array)
+        self.route('GET', PREFIX + SYMM, self.get_capacity)
+        self.route('GET', PREFIX + SYMM + '/srp', self.list_srps)
+        self.route('GET', PREFIX + SYMM + '/srp/([^/]+)', self.get_srp)
+        self.route('GET', PREFIX + SYMM + '/volume', self.list_volumes)
+        self.route('GET', PREFIX + SYMM + '/volume/([0-9A-F]+)',
+                   self.get_volume)
+        self.route('GET', PREFIX + SYMM + '/storagegroup/([^/]+)',
+                   self.get_storage_group)
+        self.route('GET', PREFIX + '/common/Iterator/([^/]+)/page',
+                   self.get_iterator_page)
+        self.route('DELETE', PREFIX + '/common/Iterator/([^/]+)',
+                   self.delete_iterator)
+
+    def authenticate(self, request):
+        if request.headers.get('Authorization') != self.credentials:
+            return 401, _message('Unauthorized')
+
+    def not_found(self, request):
+        return 404, _message('Resource not found')
+
+    def injected_error(self, request):
+        return self.error_status, _message('Injected error')
+
+    def get_version(self, request):
+        return 200, {'version': UNI_VERSION}
+
+    def list_arrays(self, request):
+        return 200, {'symmetrixId': [SYMMETRIX_ID]}
+
+    def get_array(self, request, array):
+        if array != SYMMETRIX_ID:
+            return self.not_found(request)
+        return 200, {'symmetrixId': SYMMETRIX_ID,
+                     'model': 'PowerMax_2000',
+                     'ucode': '5978.669.669',
+                     'display_name': 'PowerMax-Emulator',
+                     'local': True}
+
+    def get_capacity(self, request):
+        return 200, {
+            'symmetrixId': SYMMETRIX_ID,
+            'system_capacity': {'usable_total_tb': 512.0,
+                                'usable_used_tb': 128.0,
+                                'subscribed_total_tb': 1024.0},
+            'physicalCapacity': {'total_capacity_gb': 786432.0},
+        }
+
+    @staticmethod
+    def _srp_name(idx):
+        return 'SRP_{0}'.format(idx + 1)
+
+    def list_srps(self, request):
+        return 200, {'srpId': [self._srp_name(idx)
+                               for idx in range(self.pool_count)]}
+
+    def get_srp(self, request, srp):
+        names = [self._srp_name(idx) for idx in range(self.pool_count)]
+        if srp not in names:
+            return self.not_found(request)
+        total = 64.0 * (names.index(srp) + 1)
+        return 200, {'srpId': srp,
+                     'srp_capacity': {'usable_total_tb': total,
+                                      'usable_used_tb': total / 4,
+                                      'subscribed_total_tb': total * 2}}
+
+    @staticmethod
+    def _device_id(idx):
+        return '{0:05X}'.format(idx + 1)
+
+    def _new_iterator(self, count):
+        iterator_id = base.new_token()
+        with self._iterator_lock:
+            now = time.time()
+            # Drop expired ones, as Unisphere does
+            for key, (expires_at, __) in list(self.iterators.items()):
+                if expires_at < now:
+                    del self.iterators[key]
+            self.iterators[iterator_id] = (now + self.iterator_ttl, count)
+        return iterator_id
+
+    def list_volumes(self, request):
+        count = self.volume_count
+        first = base.page_window(0, self.max_page_size, count)
+        result = {
+            'id': self._new_iterator(count),
+            'count': count,
+            'expirationTime': int((time.time() + self.iterator_ttl) * 1000),
+            'maxPageSize': self.max_page_size,
+        }
+        if count:
+            result['resultList'] = {
+                'result': [{'volumeId': self._device_id(idx)}
+                           for idx in first],
+                'from': 1,
+                'to': len(first),
+            }
+        return 200, result, len(first)
+
+    def get_iterator_page(self, request, iterator_id):
+        with self._iterator_lock:
+            expires_at, count = self.iterators.get(iterator_id, (0, 0))
+        if expires_at < time.time():
+            return 404, _message('Iterator {0} not found'.format(
+                iterator_id))
+        try:
+            start = int(request.param('from'))
+            end = int(request.param('to'))
+        except (TypeError, ValueError):
+            return 400, _message('from and to are required')
+        if end - start + 1 > self.max_page_size:
+            return 400, _message('Page size exceeds {0}'.format(
+                self.max_page_size))
+        window = base.page_window(start - 1, end, count)
+        return 200, {'from': start, 'to': end,
+                     'result': [{'volumeId': self._device_id(idx)}
+                                for idx in window]}, len(window)
+
+    def delete_iterator(self, request, iterator_id):
+        with self._iterator_lock:
+            self.iterators.pop(iterator_id, None)
+        return 204, None
+
+    def get_volume(self, request, device_id):
+        idx = int(device_id, 16) - 1
+        if not 0 <= idx < self.volume_count:
+            return self.not_found(request)
+        cap_mb = 1024.0 * (1 + idx % 64)
+        return 200, {
+            'volumeId': device_id,
+            'type': 'TDEV',
+            'status': 'Ready',
+            'cap_mb': cap_mb,
+            'allocated_percent': idx % 100,
+            'wwn': '60000970000196800123533030{0:06X}'.format(idx),
+            'num_of_storage_groups': 1,
+            'storageGroupId': ['SG_{0}'.format(idx % self.pool_count)],
+        }, 1
+
+    def get_storage_group(self, request, name):
+        try:
+            idx = int(name.split('_', 1)[1])
+        except (IndexError, ValueError):
+            return self.not_found(request)
+        if not 0 <= idx < self.pool_count:
+            return self.not_found(request)
+        return 200, {'storageGroupId': name,
+                     'srp': self._srp_name(idx),
+                     'compression': True}
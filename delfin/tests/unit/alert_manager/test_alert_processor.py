@@ -15,6 +15,7 @@
 import unittest
 from unittest import mock
 
+from oslo_config import cfg
 from oslo_utils import importutils
 
 from delfin import context
@@ -105,3 +106,32 @@ class AlertProcessorTestCase(unittest.TestCase):
         self.assertRaisesRegex(exception.InvalidResults,
                                "Failed to fill the alert model from driver.",
                                alert_processor_inst.process_alert_info, alert)
+
+    @mock.patch('delfin.db.storage_get')
+    @mock.patch('delfin.drivers.api.API.parse_alert')
+    @mock.patch('delfin.exporter.base_exporter'
+                '.AlertExporterManager.dispatch')
+    def test_process_alert_info_dedup(self, mock_export_model,
+                                      mock_parse_alert, mock_storage):
+        cfg.CONF.import_group('alert_dedup',
+                              'delfin.alert_manager.deduplicator')
+        cfg.CONF.set_override('enabled', True, 'alert_dedup')
+        self.addCleanup(cfg.CONF.clear_override, 'enabled', 'alert_dedup')
+        mock_storage.return_value = fakes.fake_storage_info()
+        mock_parse_alert.side_effect = \
+            lambda *args: fakes.fake_alert_model()
+        alert_processor_inst = self._get_alert_processor()
+        alert = {'storage_id': 'abcd-1234-56789'}
+        for __ in range(5):
+            alert_processor_inst.process_alert_info(alert)
+
+        # Repeats are neither looked up nor exported
+        self.assertEqual(1, mock_storage.call_count)
+        self.assertEqual(1, mock_export_model.call_count)
+
+        alert_processor_inst.stop()
+        self.assertEqual(2, mock_export_model.call_count)
+        summary = mock_export_model.call_args[0][1]
+        self.assertEqual(4, summary['occurrence_count'])
+        self.assertEqual(fakes.fake_storage_info()['name'],
+                         summary['storage_name'])
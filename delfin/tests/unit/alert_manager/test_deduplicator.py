@@ -0,0 +1,88 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from delfin import test
+from delfin.alert_manager import deduplicator
+from delfin.tests.unit.alert_manager import fakes
+
+
+class TestAlertDeduplicator(test.TestCase):
+
+    def setUp(self):
+        super(TestAlertDeduplicator, self).setUp()
+        self.summaries = []
+        self.dedup = deduplicator.AlertDeduplicator(
+            lambda storage_id, alert: self.summaries.append(
+                (storage_id, alert)),
+            window=60, summary_interval=30, max_entries=2)
+
+    @staticmethod
+    def _alert(**values):
+        alert = fakes.fake_alert_model()
+        alert.update(values)
+        return alert
+
+    def _counts(self):
+        return [(storage_id, alert['alert_id'], alert['occurrence_count'])
+                for storage_id, alert in self.summaries]
+
+    def test_first_occurrence_and_summary(self):
+        self.assertTrue(self.dedup.check('s1', self._alert(), now=0))
+        for now in range(1, 11):
+            self.assertFalse(self.dedup.check('s1', self._alert(), now=now))
+        # Another storage, another alert
+        self.assertTrue(self.dedup.check('s2', self._alert(), now=10))
+
+        self.dedup.flush(now=20)
+        self.assertEqual([], self.summaries)
+        self.dedup.flush(now=30)
+        self.assertEqual([('s1', '1050', 10)], self._counts())
+
+        # Nothing repeated since the summary
+        self.dedup.flush(now=60)
+        self.assertEqual(1, len(self.summaries))
+
+    def test_window(self):
+        self.assertTrue(self.dedup.check('s1', self._alert(), now=0))
+        self.assertFalse(self.dedup.check('s1', self._alert(), now=50))
+        # The window slides with each repeat
+        self.assertFalse(self.dedup.check('s1', self._alert(), now=100))
+        # Over, the pending repeats are summarized
+        self.assertTrue(self.dedup.check('s1', self._alert(), now=200))
+        self.assertEqual([('s1', '1050', 2)], self._counts())
+
+        self.dedup.flush(now=300)
+        self.assertEqual({}, self.dedup._entries)
+
+    def test_lru(self):
+        self.dedup.check('s1', self._alert(alert_id='1'), now=0)
+        self.dedup.check('s1', self._alert(alert_id='1'), now=1)
+        self.dedup.check('s1', self._alert(alert_id='2'), now=2)
+        self.dedup.check('s1', self._alert(alert_id='1'), now=3)
+        # Alert 2 is the least recently seen
+        self.assertTrue(self.dedup.check('s1', self._alert(alert_id='3'),
+                                         now=4))
+        self.assertEqual(2, len(self.dedup._entries))
+        self.assertEqual([], self.summaries)
+        self.assertTrue(self.dedup.check('s1', self._alert(alert_id='2'),
+                                         now=5))
+        # Alert 1 evicted with its repeats summarized
+        self.assertEqual([('s1', '1', 2)], self._counts())
+
+    def test_final_flush(self):
+        self.dedup.check('s1', self._alert(), now=0)
+        self.dedup.check('s1', self._alert(), now=1)
+        self.dedup.flush(now=2, final=True)
+        self.assertEqual([('s1', '1050', 1)], self._counts())
+        self.assertEqual({}, self.dedup._entries)
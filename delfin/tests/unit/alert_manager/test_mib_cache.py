@@ -0,0 +1,143 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from pysnmp.proto import rfc1902 as proto_rfc1902
+from pysnmp.smi import builder, rfc1902, view
+
+from delfin import test
+from delfin.alert_manager import mib_cache
+from delfin.alert_manager import trap_receiver
+from delfin.tests.benchmark import trap_ingestion
+
+
+class TestMibCache(test.TestCase):
+
+    def setUp(self):
+        super(TestMibCache, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.mib_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.mib_path)
+        trap_ingestion.write_mib(self.mib_path)
+
+    def test_resolve_like_mibs(self):
+        mib_builder = builder.MibBuilder().loadModules('SNMPv2-MIB',
+                                                       'RFC1213-MIB')
+        mib_view_controller = view.MibViewController(mib_builder)
+        path = mib_cache.build(mib_view_controller, self.cache_dir,
+                               'ab' * 32)
+        cache = mib_cache.MibCache(path)
+        self.addCleanup(cache.close)
+
+        var_binds = [
+            # Display hint, TimeTicks, OID values
+            ('1.3.6.1.2.1.1.1.0', proto_rfc1902.OctetString('fake')),
+            ('1.3.6.1.2.1.1.3.0', proto_rfc1902.TimeTicks(1234)),
+            ('1.3.6.1.2.1.1.2.0',
+             proto_rfc1902.ObjectIdentifier('1.3.6.1.6.3.1.1.5.3')),
+            ('1.3.6.1.6.3.1.1.4.1.0',
+             proto_rfc1902.ObjectIdentifier('1.3.6.1.4.1.99999.1')),
+            # Enumeration, in and out of range
+            ('1.3.6.1.6.3.1.1.6.1.0', proto_rfc1902.Integer(2)),
+            ('1.3.6.1.6.3.1.1.6.1.0', proto_rfc1902.Integer(9)),
+            # Not an object type
+            ('1.3.6.1.2.1.1.9', proto_rfc1902.Integer(1)),
+            ('1.3.6.1.4.1.99999.1.1', proto_rfc1902.OctetString('fake')),
+        ]
+        for oid, value in var_binds:
+            expected = rfc1902.ObjectType(
+                rfc1902.ObjectIdentity(oid), value).resolveWithMib(
+                mib_view_controller).prettyPrint()
+            oid = proto_rfc1902.ObjectName(oid)
+            self.assertEqual(expected, cache.resolve(oid, value))
+
+        # Column indices are printed as sub-identifiers, the same once
+        # parsed by the trap receiver
+        oid, value = '1.3.6.1.2.1.1.9.1.3.3', proto_rfc1902.OctetString('fake')
+        self.assertEqual(
+            trap_receiver.TrapReceiver._extract_oid_value(
+                rfc1902.ObjectType(rfc1902.ObjectIdentity(oid),
+                                   value).resolveWithMib(mib_view_controller)),
+            trap_receiver.TrapReceiver._parse_var_bind(
+                cache.resolve(proto_rfc1902.ObjectName(oid), value)))
+        self.assertEqual('SNMPv2-MIB::sysORDescr.3 = fake', cache.resolve(
+            proto_rfc1902.ObjectName('1.3.6.1.2.1.1.9.1.3.3'),
+            proto_rfc1902.OctetString('fake')))
+        # but in values they are printed according to the row
+        self.assertIsNone(cache.resolve(
+            proto_rfc1902.ObjectName('1.3.6.1.2.1.1.2.0'),
+            proto_rfc1902.ObjectIdentifier('1.3.6.1.2.1.1.9.1.3.3')))
+
+    def test_digest(self):
+        digest = mib_cache.digest(self.mib_path)
+        self.assertEqual(digest, mib_cache.digest(self.mib_path))
+        with open(os.path.join(self.mib_path, 'OTHER-MIB.py'), 'w') as f:
+            f.write('# Fake\n')
+        self.assertNotEqual(digest, mib_cache.digest(self.mib_path))
+
+    def test_open(self):
+        receiver = trap_receiver.TrapReceiver(snmp_mib_path=self.mib_path)
+        receiver._mib_builder()
+        old_path = mib_cache.build(receiver.mib_view_controller,
+                                   self.cache_dir, 'ab' * 32)
+        self.assertIsNone(mib_cache.MibCache.open(self.cache_dir, 'cd' * 32))
+
+        path = mib_cache.build(receiver.mib_view_controller, self.cache_dir,
+                               'cd' * 32)
+        self.assertFalse(os.path.exists(old_path))
+        cache = mib_cache.MibCache.open(self.cache_dir, 'cd' * 32)
+        self.addCleanup(cache.close)
+        self.assertEqual('cd' * 32, cache.digest)
+        mod_name, sym_name, kind, __, suffix = cache.lookup(
+            (1, 3, 6, 1, 4, 1, 99999, 1, 1, 1, 0))
+        self.assertEqual(('DELFIN-BENCH-MIB', 'hwIsmReportingAlarmAlarmID',
+                          mib_cache.SCALAR, (0,)),
+                         (mod_name, sym_name, kind, suffix))
+
+        with open(path, 'r+b') as f:
+            f.write(b'fake')
+        self.assertIsNone(mib_cache.MibCache.open(self.cache_dir, 'cd' * 32))
+
+    def test_trap_receiver(self):
+        receiver = trap_receiver.TrapReceiver(
+            snmp_mib_path=self.mib_path, snmp_mib_cache_path=self.cache_dir)
+        receiver._load_mibs()
+        self.assertIsNotNone(receiver.mib_view_controller)
+        var_binds = trap_ingestion._var_binds({'vendor': 'vmax'}, 7, None)
+        expected = [receiver._resolve_var_bind(oid, value)
+                    for oid, value in var_binds]
+
+        # Started again from the cache only
+        receiver = trap_receiver.TrapReceiver(
+            snmp_mib_path=self.mib_path, snmp_mib_cache_path=self.cache_dir)
+        with mock.patch.object(receiver, '_mib_builder') as mib_builder:
+            receiver._load_mibs()
+            self.assertEqual(expected,
+                             [receiver._resolve_var_bind(oid, value)
+                              for oid, value in var_binds])
+        mib_builder.assert_not_called()
+        self.assertIsNone(receiver.mib_view_controller)
+
+        # The mibs are loaded for what the cache can not resolve
+        with mock.patch.object(receiver.mib_cache, 'resolve',
+                               return_value=None):
+            self.assertEqual(expected,
+                             [receiver._resolve_var_bind(oid, value)
+                              for oid, value in var_binds])
+        self.assertIsNotNone(receiver.mib_view_controller)
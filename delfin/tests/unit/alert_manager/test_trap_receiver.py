@@ -99,6 +99,22 @@ class TrapReceiverTestCase(unittest.TestCase):
         # Verify that snmp engine transport config is set after _add_transport
         self.assertTrue(get_transport is not None)
 
+    def test_add_transport_reuse_port(self):
+        ports = []
+        for __ in range(2):
+            trap_receiver_inst = self._get_trap_receiver()
+            trap_receiver_inst.snmp_engine = engine.SnmpEngine()
+            trap_receiver_inst.trap_receiver_address = '127.0.0.1'
+            # The second worker binds the port of the first one
+            trap_receiver_inst.trap_receiver_port = ports[-1] if ports else 0
+            trap_receiver_inst.trap_receiver_workers = 2
+            trap_receiver_inst._add_transport()
+            transport = config.getTransport(trap_receiver_inst.snmp_engine,
+                                            udp.domainName)
+            self.addCleanup(transport.closeTransport)
+            ports.append(transport.socket.getsockname()[1])
+        self.assertEqual(ports[0], ports[1])
+
     def test_add_transport_exception(self):
         trap_receiver_inst = self._get_trap_receiver()
 
@@ -12,7 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
 import unittest
+from oslo_config import cfg
 from oslo_utils import importutils
 from unittest import mock
 
@@ -452,3 +454,69 @@ class AlertSourceControllerTestCase(unittest.TestCase):
                                                          "Connection failed.",
                                alert_controller_inst.put, req, fake_storage_id,
                                body=body)
+
+    @mock.patch('delfin.db.storage_get', mock.Mock())
+    @mock.patch('delfin.db.alert_source_get', mock.Mock(
+        side_effect=exception.AlertSourceNotFound('fake_id')))
+    @mock.patch('delfin.db.alert_source_create')
+    def test_batch_put(self, mock_alert_source_create):
+        req = fakes.HTTPRequest.blank('/storages/alert-sources')
+        mock_alert_source_create.return_value = fakes.fake_v3_alert_source()
+        body = {'alert_sources': [
+            dict(fakes.fake_v2_alert_source_config(), storage_id=str(i),
+                 host='10.0.0.%d' % i) for i in range(3)]}
+
+        def fake_getcmd(cmd_gen, auth_data, transport_target, *var_names,
+                        **kwargs):
+            if transport_target.transportAddr[0] == '10.0.0.1':
+                return "Connection failed", None, None, None
+            return None, None, None, None
+
+        alert_controller_inst = self._get_alert_controller()
+        with mock.patch('pysnmp.entity.rfc3413.oneliner.cmdgen'
+                        '.CommandGenerator.getCmd', fake_getcmd):
+            res = alert_controller_inst.batch_put(req, body=body)
+
+        self.assertEqual([('0', 'success'), ('1', 'failed'),
+                          ('2', 'success')],
+                         [(r['storage_id'], r['status'])
+                          for r in res['alert_sources']])
+        self.assertEqual('InvalidResults',
+                         res['alert_sources'][1]['error']['error_code'])
+        self.assertNotIn('auth_key', res['alert_sources'][0]['alert_source'])
+        self.assertEqual(2, mock_alert_source_create.call_count)
+
+        body['alert_sources'][1]['storage_id'] = '0'
+        self.assertRaises(exception.InvalidInput,
+                          alert_controller_inst.batch_put, req, body=body)
+
+    @mock.patch('delfin.db.storage_get', mock.Mock())
+    @mock.patch('delfin.db.alert_source_get', mock.Mock(
+        side_effect=exception.AlertSourceNotFound('fake_id')))
+    @mock.patch('delfin.db.alert_source_create', mock.Mock(
+        return_value=fakes.fake_v3_alert_source()))
+    @mock.patch('pysnmp.entity.rfc3413.oneliner.cmdgen.CommandGenerator'
+                '.getCmd', fakes.fake_getcmd_success)
+    def test_put_snmp_validation_deadline(self):
+        req = fakes.HTTPRequest.blank('/storages/fake_id/alert-source')
+        cfg.CONF.set_override('snmp_validation_timeout', 10)
+        self.addCleanup(cfg.CONF.clear_override, 'snmp_validation_timeout')
+        body = fakes.fake_v2_alert_source_config()
+        body['expiration'] = 60
+
+        alert_controller_inst = self._get_alert_controller()
+        with mock.patch('pysnmp.entity.rfc3413.oneliner.cmdgen'
+                        '.UdpTransportTarget') as mock_target:
+            alert_controller_inst.put(req, 'abcd-1234-5678', body=body)
+        # The 3 attempts end within the deadline
+        timeout = mock_target.call_args[1]['timeout']
+        self.assertLessEqual(timeout, 10 / 3)
+        self.assertGreater(timeout, 3)
+
+        # No time left
+        with mock.patch('delfin.api.validation.snmp_validator.get_deadline',
+                        return_value=time.monotonic()):
+            self.assertRaises(exception.InvalidResults,
+                              alert_controller_inst.put, req,
+                              'abcd-1234-5678',
+                              body=fakes.fake_v2_alert_source_config())
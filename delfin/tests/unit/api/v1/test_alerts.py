@@ -61,3 +61,21 @@ class AlertControllerTestCase(unittest.TestCase):
                                                           "found",
                                alert_controller_inst.delete, req,
                                fake_storage_id, fake_sequence_number)
+
+    @mock.patch('delfin.db.storage_get', mock.Mock())
+    @mock.patch('delfin.db.alert_get_all')
+    def test_list_alerts(self, mock_alert_get_all):
+        req = fakes.HTTPRequest.blank('/storages/fake_id/alerts'
+                                      '?severity=Major&fake_key=fake')
+        mock_alert_get_all.return_value = [{'id': 'fake_id',
+                                            'alert_id': '1',
+                                            'severity': 'Major'}]
+
+        alert_controller_inst = self._get_alert_controller()
+        res = alert_controller_inst.index(req, 'abcd-1234-5678')
+
+        filters = mock_alert_get_all.call_args[0][5]
+        self.assertEqual({'severity': 'Major',
+                          'storage_id': 'abcd-1234-5678'}, filters)
+        self.assertEqual({'alerts': [{'id': 'fake_id', 'alert_id': '1',
+                                      'severity': 'Major'}]}, res)
@@ -0,0 +1,88 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+from unittest import mock
+
+from delfin import db
+from delfin import exception
+from delfin import test
+from delfin.api.v1.jobs import JobController
+from delfin.tests.unit.api import fakes
+
+JOB = {'id': 'fake_job_id', 'action': 'sync',
+       'created_at': datetime.datetime(2020, 1, 1)}
+
+
+def _task(task, status, seconds=None, error=None):
+    started_at = ended_at = None
+    if seconds is not None:
+        started_at = datetime.datetime(2020, 1, 1)
+        ended_at = started_at + datetime.timedelta(seconds=seconds)
+    return {'storage_id': 'fake_id', 'task': task, 'status': status,
+            'error': error, 'started_at': started_at, 'ended_at': ended_at}
+
+
+class TestJobController(test.TestCase):
+
+    def setUp(self):
+        super(TestJobController, self).setUp()
+        self.controller = JobController()
+
+    @mock.patch.object(db, 'job_get')
+    def test_show(self, mock_job_get):
+        mock_job_get.return_value = JOB, [
+            _task('StorageDeviceTask', 'success', 2),
+            _task('StoragePoolTask', 'failed', 3, 'StorageBackendException'),
+            _task('StorageVolumeTask', 'running')]
+        req = fakes.HTTPRequest.blank('/jobs/fake_job_id')
+
+        job = self.controller.show(req, 'fake_job_id')['job']
+
+        self.assertEqual('running', job['status'])
+        self.assertEqual({'total': 3, 'done': 2, 'failed': 1},
+                         job['progress'])
+        self.assertIsNone(job['ended_at'])
+        self.assertEqual([2.0, 3.0, None],
+                         [task['duration'] for task in job['tasks']])
+        self.assertEqual('StorageBackendException', job['tasks'][1]['error'])
+        mock_job_get.assert_called_once_with(req.environ['delfin.context'],
+                                             'fake_job_id')
+
+        mock_job_get.return_value = JOB, [
+            _task('StorageDeviceTask', 'success', 2),
+            _task('StoragePoolTask', 'success', 3)]
+        job = self.controller.show(req, 'fake_job_id')['job']
+        self.assertEqual('success', job['status'])
+        self.assertEqual(datetime.datetime(2020, 1, 1, 0, 0, 3),
+                         job['ended_at'])
+
+    @mock.patch('eventlet.sleep')
+    @mock.patch.object(db, 'job_get')
+    def test_show_wait(self, mock_job_get, mock_sleep):
+        mock_job_get.side_effect = [
+            (JOB, [_task('StorageDeviceTask', 'pending')]),
+            (JOB, [_task('StorageDeviceTask', 'running')]),
+            (JOB, [_task('StorageDeviceTask', 'success', 1)])]
+        req = fakes.HTTPRequest.blank('/jobs/fake_job_id?wait=30')
+
+        job = self.controller.show(req, 'fake_job_id')['job']
+
+        self.assertEqual('success', job['status'])
+        self.assertEqual(3, mock_job_get.call_count)
+        self.assertEqual(2, mock_sleep.call_count)
+
+        self.flags(job_max_wait=10)
+        self.assertRaises(exception.InvalidInput, self.controller.show,
+                          req, 'fake_job_id')
@@ -37,11 +37,13 @@ class TestStorageController(test.TestCase):
                        mock.Mock(return_value={'id': 'fake_id'}))
     def test_delete(self):
         req = fakes.HTTPRequest.blank('/storages/fake_id')
-        self.controller.delete(req, 'fake_id')
+        res_dict = self.controller.delete(req, 'fake_id')
         ctxt = req.environ['delfin.context']
         db.storage_get.assert_called_once_with(ctxt, 'fake_id')
         self.task_rpcapi.remove_storage_resource.assert_called_with(
-            ctxt, 'fake_id', mock.ANY)
+            ctxt, 'fake_id', mock.ANY, job_id=res_dict['job']['id'])
+        self.assertEqual('delete', res_dict['job']['action'])
+        self.assertEqual('pending', res_dict['job']['status'])
         self.task_rpcapi.remove_storage_in_cache.assert_called_once_with(
             ctxt, 'fake_id')
 
@@ -164,10 +166,29 @@ class TestStorageController(test.TestCase):
             "used_capacity": 3126,
             "total_capacity": 1048576,
             'raw_capacity': 1610612736000,
-            'subscribed_capacity': 219902325555200
+            'subscribed_capacity': 219902325555200,
+            'last_sync': {},
         }
         self.assertDictEqual(expctd_dict, res_dict)
 
+    def test_show_with_last_sync(self):
+        self.mock_object(
+            db, 'storage_get',
+            fakes.fake_storages_show)
+        self.mock_object(
+            db, 'sync_history_get_latest',
+            mock.Mock(return_value=[{'resource': 'volume', 'duration': 1.5},
+                                    {'resource': 'storage', 'duration': 0.2}]))
+        req = fakes.HTTPRequest.blank(
+            '/storages/12c2d52f-01bc-41f5-b73f-7abf6f38a2a6')
+
+        res_dict = self.controller.show(req,
+                                        '12c2d52f-01bc-41f5-b73f-7abf6f38a2a6')
+        self.assertEqual(
+            {'volume': {'resource': 'volume', 'duration': 1.5},
+             'storage': {'resource': 'storage', 'duration': 0.2}},
+            res_dict['last_sync'])
+
     def test_show_with_invalid_id(self):
         self.mock_object(
             db, 'storage_get',
@@ -240,6 +261,72 @@ class TestStorageController(test.TestCase):
         }
         self.assertDictEqual(expctd_dict, res_dict)
 
+    def test_batch_create(self):
+        body = {'storages': [{
+            'model': 'fake_driver',
+            'vendor': 'fake_storage',
+            'rest': {
+                'username': 'admin',
+                'password': 'abcd',
+                'host': '10.0.0.%d' % i,
+                'port': 1234
+            }} for i in range(3)]}
+        # The first one is registered already
+        self.mock_object(
+            self.controller, '_storage_exist',
+            mock.Mock(side_effect=[True, False, False]))
+        storage = {
+            "id": "12c2d52f-01bc-41f5-b73f-7abf6f38a2a6",
+            'name': 'fake_driver',
+            'serial_number': '2102453JPN12KA000011',
+            "sync_status": constants.SyncStatus.SYNCED,
+        }
+        self.mock_object(
+            self.controller.driver_api, 'discover_storages',
+            mock.Mock(return_value=[
+                storage, exception.StorageBackendNotFound()]))
+        self.mock_object(self.controller, 'sync', mock.Mock(
+            return_value={'job': {'id': 'fake_job_id'}}))
+        self.flags(storage_discovery_workers=4)
+        req = fakes.HTTPRequest.blank('/storages/batch')
+
+        res_dict = self.controller.batch_create(req, body=body)
+
+        self.controller.driver_api.discover_storages.assert_called_once_with(
+            req.environ['delfin.context'], body['storages'][1:], 4)
+        self.controller.sync.assert_called_once_with(req, storage['id'])
+        self.assertEqual(['failed', 'success', 'failed'],
+                         [r['status'] for r in res_dict['storages']])
+        self.assertEqual('StorageAlreadyExists',
+                         res_dict['storages'][0]['error']['error_code'])
+        self.assertEqual('SYNCED',
+                         res_dict['storages'][1]['storage']['sync_status'])
+        self.assertEqual('fake_job_id', res_dict['storages'][1]['job_id'])
+        self.assertEqual('StorageBackendNotFound',
+                         res_dict['storages'][2]['error']['error_code'])
+
+    @mock.patch('delfin.api.v1.storages._set_synced_if_ok')
+    def test_sync_all(self, mock_set_synced):
+        self.mock_object(db, 'storage_get_all', mock.Mock(
+            return_value=[{'id': 'fake_id_1'}, {'id': 'fake_id_2'}]))
+        # A sync of the second one is running
+        mock_set_synced.side_effect = [None, exception.InvalidInput('')]
+        req = fakes.HTTPRequest.blank('/storages/sync')
+
+        res_dict = self.controller.sync_all(req)
+
+        job = res_dict['job']
+        self.assertEqual(('sync_all', 'pending'),
+                         (job['action'], job['status']))
+        self.assertEqual({'fake_id_1'},
+                         {task['storage_id'] for task in job['tasks']})
+        self.assertEqual(len(job['tasks']), job['progress']['total'])
+        calls = self.task_rpcapi.sync_storage_resource.call_args_list
+        self.assertEqual(len(job['tasks']), len(calls))
+        for call in calls:
+            self.assertEqual('fake_id_1', call[0][1])
+            self.assertEqual(job['id'], call[1]['job_id'])
+
     def test_create_when_storage_already_exists(self):
         self.mock_object(
             self.controller.driver_api, 'discover_storage',
@@ -0,0 +1,63 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from delfin import db
+from delfin import exception
+from delfin import test
+from delfin.api.v1.sync_history import SyncHistoryController
+from delfin.tests.unit.api import fakes
+
+STORAGE_ID = '12c2d52f-01bc-41f5-b73f-7abf6f38a2a6'
+
+
+class TestSyncHistoryController(test.TestCase):
+
+    def setUp(self):
+        super(TestSyncHistoryController, self).setUp()
+        self.controller = SyncHistoryController()
+
+    @mock.patch.object(db, 'sync_history_get_all')
+    @mock.patch.object(db, 'storage_get', mock.Mock())
+    def test_index(self, mock_get_all):
+        mock_get_all.return_value = [{
+            'id': 'fake_id',
+            'storage_id': STORAGE_ID,
+            'resource': 'volume',
+            'mode': 'full',
+            'status': 'success',
+            'duration': 12.5,
+            'phases': {'fetch': 10.0, 'db_write': 2.0},
+        }]
+        req = fakes.HTTPRequest.blank(
+            '/storages/%s/sync-history?resource=volume&name=x'
+            '&sort_key=duration&sort_dir=desc&limit=10' % STORAGE_ID)
+
+        res_dict = self.controller.index(req, STORAGE_ID)
+        self.assertEqual(mock_get_all.return_value,
+                         res_dict['sync_history'])
+        args = mock_get_all.call_args[0]
+        self.assertEqual(['duration'], args[3])
+        self.assertEqual(['desc'], args[4])
+        self.assertEqual({'resource': 'volume', 'storage_id': STORAGE_ID},
+                         args[5])
+
+    def test_index_with_invalid_storage(self):
+        self.mock_object(
+            db, 'storage_get',
+            mock.Mock(side_effect=exception.StorageNotFound('fake_id')))
+        req = fakes.HTTPRequest.blank('/storages/fake_id/sync-history')
+        self.assertRaises(exception.StorageNotFound,
+                          self.controller.index, req, 'fake_id')
@@ -1,3 +1,4 @@
+import datetime
 from unittest import mock
 
 from delfin import context, exception
@@ -285,3 +286,101 @@ class TestSIMDBAPI(test.TestCase):
             = fake_alert_source
         result = db_api.alert_source_create(ctxt, fake_alert_source)
         assert len(result) == 0
+
+    def test_sync_history(self):
+        storage_id = 'c5c91c98-91aa-40e6-85ac-37a1d3b32bd'
+        for minute in range(3):
+            for resource in ('volume', 'storage_pool'):
+                db_api.sync_history_create(ctxt, {
+                    'storage_id': storage_id,
+                    'resource': resource,
+                    'status': 'success',
+                    'started_at': datetime.datetime(2020, 1, 1, 0, minute),
+                    'duration': minute}, max_records=2)
+
+        # Only the 2 latest records of each resource are kept
+        records = db_api.sync_history_get_all(
+            ctxt, filters={'storage_id': storage_id, 'resource': 'volume'},
+            sort_keys=['started_at'], sort_dirs=['asc'])
+        self.assertEqual([1, 2], [r['duration'] for r in records])
+
+        latest = db_api.sync_history_get_latest(ctxt, storage_id)
+        self.assertEqual({('volume', 2), ('storage_pool', 2)},
+                         {(r['resource'], r['duration']) for r in latest})
+
+        db_api.sync_history_delete_by_storage(ctxt, storage_id)
+        self.assertEqual([], db_api.sync_history_get_latest(ctxt,
+                                                            storage_id))
+
+    def test_alerts(self):
+        storage_id = 'c5c91c98-91aa-40e6-85ac-37a1d3b32be'
+        refs = db_api.alerts_create(ctxt, [
+            {'storage_id': storage_id, 'alert_id': str(i),
+             'sequence_number': str(i), 'severity': 'Major',
+             'occur_time': 1600000000000 + i} for i in range(3)])
+
+        alerts = db_api.alert_get_all(
+            ctxt, filters={'storage_id': storage_id},
+            sort_keys=['occur_time'], sort_dirs=['desc'])
+        self.assertEqual(['2', '1', '0'], [a['alert_id'] for a in alerts])
+
+        db_api.alerts_delete(ctxt, [refs[0]['id']])
+        alerts = db_api.alert_get_all(ctxt,
+                                      filters={'storage_id': storage_id})
+        self.assertEqual({'1', '2'}, {a['alert_id'] for a in alerts})
+
+        # Same alert again, it is updated
+        db_api.alert_upsert(ctxt, {'storage_id': storage_id, 'alert_id': '1',
+                                   'sequence_number': '1',
+                                   'severity': 'Critical',
+                                   'storage_name': 'not a column'})
+        db_api.alert_upsert(ctxt, {'storage_id': storage_id, 'alert_id': '3',
+                                   'sequence_number': '3'})
+        alerts = db_api.alert_get_all(ctxt,
+                                      filters={'storage_id': storage_id})
+        self.assertEqual({('1', 'Critical'), ('2', 'Major'), ('3', None)},
+                         {(a['alert_id'], a['severity']) for a in alerts})
+
+        db_api.alert_delete_by_storage(ctxt, storage_id)
+        self.assertEqual([], db_api.alert_get_all(
+            ctxt, filters={'storage_id': storage_id}))
+
+    def test_storages_create(self):
+        access_infos = db_api.access_infos_create(ctxt, [
+            {'vendor': 'fake_vendor', 'model': 'fake_model'}
+            for __ in range(2)])
+        storages = db_api.storages_create(ctxt, [
+            {'id': access_info['storage_id'], 'name': 'fake_%d' % i,
+             'serial_number': 'fake_serial_%d' % i}
+            for i, access_info in enumerate(access_infos)])
+
+        for access_info, storage in zip(access_infos, storages):
+            self.assertEqual(
+                storage['name'],
+                db_api.storage_get(ctxt, access_info['storage_id'])['name'])
+            db_api.storage_delete(ctxt, storage['id'])
+            db_api.access_info_delete(ctxt, storage['id'])
+
+    def test_jobs(self):
+        job, tasks = db_api.job_create(ctxt, {'action': 'sync'}, [
+            {'storage_id': 'fake_id', 'task': 'StoragePoolTask',
+             'status': 'pending'},
+            {'storage_id': 'fake_id', 'task': 'StorageVolumeTask',
+             'status': 'pending'}])
+        db_api.job_task_update(ctxt, job['id'], 'fake_id', 'StoragePoolTask',
+                               {'status': 'success'})
+
+        job, tasks = db_api.job_get(ctxt, job['id'])
+        self.assertEqual('sync', job['action'])
+        self.assertEqual({('StoragePoolTask', 'success'),
+                          ('StorageVolumeTask', 'pending')},
+                         {(task['task'], task['status']) for task in tasks})
+
+        # Expired jobs are removed when a job is created
+        db_api.job_create(ctxt, {'action': 'sync'}, [], expiration=1)
+        db_api.job_get(ctxt, job['id'])
+        with mock.patch('oslo_utils.timeutils.utcnow', return_value=(
+                datetime.datetime.utcnow() + datetime.timedelta(hours=1))):
+            db_api.job_create(ctxt, {'action': 'sync'}, [], expiration=60)
+        self.assertRaises(exception.JobNotFound, db_api.job_get, ctxt,
+                          job['id'])
@@ -13,10 +13,16 @@
 # limitations under the License.
 
 from unittest import TestCase, mock
+import socket
+import time
 import unittest
 
+import paramiko
+
 from delfin import exception
 from delfin import context
+from delfin import utils
+from delfin.drivers.hpe.hpe_3par import component_handler
 from delfin.drivers.hpe.hpe_3par.hpe_3parstor import Hpe3parStorDriver
 from delfin.drivers.hpe.hpe_3par.rest_client import RestClient
 from delfin.drivers.utils.ssh_client import SSHClient
@@ -67,6 +73,14 @@ def create_driver():
         return Hpe3parStorDriver(**kwargs)
 
 
+def alerts_time(output, index):
+    """Get occur time in ms of the index-th alert in showalert output"""
+    times = [line.split(': ', 1)[1] for line in output.split('\n')
+             if line.startswith('Time')]
+    return int(time.mktime(time.strptime(
+        times[index], '%Y-%m-%d %H:%M:%S CST')) * 1000)
+
+
 class TestHpe3parStorageDriver(TestCase):
 
     def test_a_init(self):
@@ -102,6 +116,99 @@ class TestHpe3parStorageDriver(TestCase):
         self.assertIn('Exception in SSH protocol negotiation or logic',
                       str(exc.exception))
 
+    def test_d_ssh_pool(self):
+        driver = create_driver()
+        ssh = mock.MagicMock()
+        ssh.exec_command.return_value = (
+            None, mock.Mock(**{'read.return_value': b'System is healthy'}),
+            mock.Mock(**{'read.return_value': b''}))
+        with mock.patch.object(utils.SSHPool, 'create',
+                               return_value=ssh) as create:
+            for _ in range(3):
+                re = driver.sshclient.doexec(context, 'checkhealth')
+                self.assertEqual('System is healthy', re)
+            # Connection is set up once and reused for all commands
+            create.assert_called_once()
+            self.assertEqual(3, ssh.exec_command.call_count)
+
+            # Idle connections are replaced on next use
+            ssh.last_used = 0
+            driver.sshclient.doexec(context, 'checkhealth')
+            self.assertEqual(2, create.call_count)
+
+            # Broken connections are dropped from the pool
+            ssh.exec_command.side_effect = Exception('Socket is closed')
+            with self.assertRaises(exception.SSHException):
+                driver.sshclient.doexec(context, 'checkhealth')
+            self.assertEqual(0, driver.sshclient.ssh_pool.current_size)
+
+            # Authentication failures of new connections are reported
+            auth_error = paramiko.AuthenticationException('Bad password')
+            with mock.patch.object(utils.SSHPool, 'create',
+                                   side_effect=auth_error):
+                with self.assertRaises(exception.InvalidUsernameOrPassword):
+                    driver.sshclient.doexec(context, 'checkhealth')
+
+            # Socket timeouts are reported as connect timeouts
+            ssh.exec_command.side_effect = socket.timeout('timed out')
+            with self.assertRaises(exception.SSHConnectTimeout):
+                driver.sshclient.doexec(context, 'checkhealth')
+
+        driver.sshclient.close()
+        self.assertIsNone(driver.sshclient.ssh_pool)
+
+    def test_g_get_storage_health_cache(self):
+        driver = create_driver()
+        component_handler.HEALTH_CACHE.pop(driver.storage_id)
+        storage = {'name': 'hp3par', 'model': 'InServ F200',
+                   'serialNumber': '1307327', 'systemVersion': '3.1.2.484',
+                   'location': '', 'totalCapacityMiB': 1024,
+                   'freeCapacityMiB': 512, 'allocatedCapacityMiB': 256}
+        capacity = {'allCapacity': {'allocated': {'system': {
+            'internalMiB': 16, 'spareMiB': 16}}}}
+        with mock.patch.object(RestClient, 'get_storage',
+                               return_value=storage), \
+                mock.patch.object(RestClient, 'get_capacity',
+                                  return_value=capacity), \
+                mock.patch.object(SSHClient, 'doexec',
+                                  return_value='System is healthy') as ssh, \
+                mock.patch.object(component_handler.eventlet,
+                                  'spawn_n') as spawn:
+            # First check of a storage runs inline
+            self.assertEqual('normal', driver.get_storage(context)['status'])
+            self.assertEqual(1, ssh.call_count)
+
+            # Fresh health is served from cache
+            self.assertEqual('normal', driver.get_storage(context)['status'])
+            self.assertEqual(1, ssh.call_count)
+            spawn.assert_not_called()
+
+            # Stale health is served and refreshed in background
+            status, _ = component_handler.HEALTH_CACHE.get(
+                driver.storage_id)
+            component_handler.HEALTH_CACHE._entries[driver.storage_id] = (
+                status, 0)
+            ssh.return_value = 'Checking health'
+            self.assertEqual('normal', driver.get_storage(context)['status'])
+            self.assertEqual(1, spawn.call_count)
+            spawn.call_args[0][0]()
+            self.assertEqual(2, ssh.call_count)
+            self.assertEqual('abnormal',
+                             driver.get_storage(context)['status'])
+
+        # The health outlives the driver, until the storage is removed
+        with mock.patch.object(RestClient, 'logout'):
+            driver.close()
+        self.assertEqual('abnormal', component_handler.HEALTH_CACHE.get(
+            driver.storage_id)[0])
+        # A closed driver does not refresh it, nor opens ssh connections
+        self.assertIsNone(driver.comhandler._refresh_health(context))
+        self.assertRaises(exception.SSHException,
+                          driver.sshclient.get_pool)
+        Hpe3parStorDriver.remove_storage(driver.storage_id)
+        self.assertEqual((None, None), component_handler.HEALTH_CACHE.get(
+            driver.storage_id))
+
     def test_e_list_storage_pools(self):
         driver = create_driver()
         expected = [
@@ -469,6 +576,83 @@ class TestHpe3parStorageDriver(TestCase):
             self.assertIn('Exception from Storage Backend',
                           str(exc.exception))
 
+    def test_h_list_alerts(self):
+        driver = create_driver()
+        output = """
+Id          : 1
+State       : New
+MessageCode : 0x2200de
+Time        : 2020-07-21 10:45:10 CST
+Severity    : Degraded
+Type        : Component state change
+Message     : Node 0, Power Supply 1, Battery 0 Degraded
+Component   : 110.143.132.231
+
+Id          : 2
+State       : Acknowledged
+MessageCode : 0x0270001
+Time        : 2020-07-22 10:45:10 CST
+Severity    : Major
+Type        : CPG growth limit
+Message     : CPG cxd SA growth limit reached
+Component   : 110.143.132.231
+"""
+        with mock.patch.object(SSHClient, 'doexec_lines',
+                               side_effect=lambda *a: iter(
+                                   output.split('\n'))):
+            alerts = driver.list_alerts(context)
+            self.assertEqual(2, len(alerts))
+            self.assertEqual('0x2200de', alerts[0]['alert_id'])
+            self.assertEqual('Component state change',
+                             alerts[0]['alert_name'])
+            self.assertEqual('Warning', alerts[0]['severity'])
+            self.assertEqual('Fault', alerts[0]['category'])
+            self.assertEqual('1', alerts[0]['sequence_number'])
+            self.assertEqual('Major', alerts[1]['severity'])
+            self.assertEqual('', alerts[1]['category'])
+            self.assertEqual('110.143.132.231', alerts[1]['location'])
+
+            # Nothing newer than the high-water mark
+            alerts = driver.list_alerts(context, {'incremental': True})
+            self.assertEqual([], alerts)
+
+            # Occur time window
+            alerts = driver.list_alerts(
+                context, {'begin_time': alerts_time(output, 1)})
+            self.assertEqual(['2'], [a['sequence_number'] for a in alerts])
+
+            # A window listing does not move the high-water mark
+            driver.alert_handler.last_alert_id = None
+            driver.list_alerts(context,
+                               {'begin_time': alerts_time(output, 1)})
+            alerts = driver.list_alerts(context, {'incremental': True})
+            self.assertEqual(['1', '2'],
+                             [a['sequence_number'] for a in alerts])
+
+        driver.alert_handler.last_alert_id = 1
+
+        def broken_output(*args):
+            # The connection breaks after the first listed alert
+            for line in output.split('\n')[:20]:
+                yield line
+            raise exception.SSHException()
+
+        with mock.patch.object(SSHClient, 'doexec_lines',
+                               side_effect=broken_output):
+            with self.assertRaises(exception.StorageBackendException):
+                driver.list_alerts(context, {'incremental': True})
+        self.assertEqual(1, driver.alert_handler.last_alert_id)
+
+        with mock.patch.object(SSHClient, 'doexec_lines',
+                               return_value=iter(output.split('\n'))):
+            alerts = driver.list_alerts(context, {'incremental': True})
+            self.assertEqual(['2'], [a['sequence_number'] for a in alerts])
+
+        with mock.patch.object(SSHClient, 'doexec_lines',
+                               side_effect=exception.SSHException):
+            with self.assertRaises(exception.StorageBackendException):
+                driver.list_alerts(context)
+
     def test_i_clear_alert(self):
         driver = create_driver()
         alert = {'storage_id': 'abcd-1234-56789',
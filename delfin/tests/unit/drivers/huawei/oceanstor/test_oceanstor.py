@@ -17,7 +17,8 @@ from unittest import TestCase, mock
 from delfin import exception
 from delfin import context
 from delfin.drivers.huawei.oceanstor.oceanstor import OceanStorDriver, consts
-from delfin.drivers.huawei.oceanstor.rest_client import RestClient
+from delfin.drivers.huawei.oceanstor.rest_client import RestClient, \
+    AdaptivePageSizer
 from requests import Session
 
 
@@ -327,3 +328,41 @@ class TestOceanStorStorageDriver(TestCase):
                 driver.list_volumes(context)
             self.assertIn('Exception from Storage Backend',
                           str(exc.exception))
+
+    def test_concurrent_paginated_call(self):
+        driver = create_driver()
+        luns = [{'ID': str(i)} for i in range(7)]
+
+        def fake_call(url, data=None, method=None, log_filter_flag=False):
+            if url.endswith('/count'):
+                return {'data': {'COUNT': str(len(luns))},
+                        'error': {'code': 0}}
+            start, end = url.split('range=[')[1].rstrip(']').split('-')
+            return {'data': luns[int(start):int(end)],
+                    'error': {'code': 0}}
+
+        with mock.patch.object(RestClient, 'call', side_effect=fake_call):
+            result = driver.client.concurrent_paginated_call(
+                '/lun', None, 'GET', page_size=2, concurrency=3)
+            self.assertEqual(luns, list(result))
+
+        ret = {'error': {'code': 1077949069, 'description': 'error'}}
+        with mock.patch.object(RestClient, 'call', return_value=ret):
+            with self.assertRaises(exception.StorageBackendException):
+                list(driver.client.concurrent_paginated_call(
+                    '/lun', None, 'GET'))
+
+    def test_adaptive_page_sizer(self):
+        sizer = AdaptivePageSizer(150, 2.0, min_size=50, max_size=600)
+        sizer.observe(0.1)
+        self.assertEqual(300, sizer.page_size)
+        sizer.observe(0.1)
+        sizer.observe(0.1)
+        self.assertEqual(600, sizer.page_size)
+        sizer.observe(1.5)
+        self.assertEqual(600, sizer.page_size)
+        sizer.observe(5)
+        sizer.observe(5)
+        sizer.observe(5)
+        sizer.observe(5)
+        self.assertEqual(50, sizer.page_size)
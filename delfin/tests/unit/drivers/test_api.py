@@ -22,6 +22,7 @@ from delfin import exception
 import sys
 sys.modules['delfin.cryptor'] = mock.Mock()
 
+from delfin.drivers import api as api_module
 from delfin.drivers.api import API
 from delfin.drivers.fake_storage import FakeStorageDriver
 
@@ -128,6 +129,52 @@ class TestDriverAPI(TestCase):
         msg = "Storage driver 'fake_storage wrong_model'could not be found"
         self.assertIn(msg, str(exc.exception))
 
+    @mock.patch.object(FakeStorageDriver, 'get_storage')
+    @mock.patch('delfin.db.storages_create')
+    @mock.patch('delfin.db.access_infos_create')
+    @mock.patch('delfin.db.storage_get_all')
+    def test_discover_storages(self, mock_storage_get_all,
+                               mock_access_infos_create,
+                               mock_storages_create, mock_get_storage):
+        access_infos = [dict(copy.deepcopy(ACCESS_INFO), storage_id=str(i))
+                        for i in range(4)]
+        access_infos[3].pop('storage_id')
+        storages = [dict(STORAGE, serial_number=str(i)) for i in range(4)]
+        # The second is already registered, the last one is the first one
+        storages[3]['serial_number'] = '0'
+        mock_get_storage.side_effect = storages
+        mock_storage_get_all.side_effect = \
+            lambda ctxt, filters: [{}] if filters['serial_number'] == '1' \
+            else []
+        mock_storages_create.side_effect = lambda ctxt, values: values
+
+        api = API()
+        with mock.patch.object(FakeStorageDriver, 'close') as mock_close:
+            results = api.discover_storages(context, access_infos, 2)
+        # The drivers of the storages not registered are closed
+        self.assertEqual(2, mock_close.call_count)
+
+        self.assertEqual(['0', '2'], [r['id'] for r in results[::2]])
+        self.assertIsInstance(results[1], exception.StorageAlreadyExists)
+        self.assertIsInstance(results[3], exception.StorageAlreadyExists)
+        mock_access_infos_create.assert_called_once_with(
+            context, [access_infos[0], access_infos[2]])
+        self.assertEqual(['0', '2'], [s['serial_number'] for s in
+                                      mock_storages_create.call_args[0][1]])
+        self.assertIn('2', api.driver_manager.driver_factory)
+
+        mock_get_storage.side_effect = storages[:1]
+        mock_storages_create.side_effect = exception.DelfinException()
+        with mock.patch.object(FakeStorageDriver, 'close') as mock_close, \
+                mock.patch.object(FakeStorageDriver,
+                                  'remove_storage') as mock_remove:
+            results = api.discover_storages(
+                context, [dict(ACCESS_INFO, storage_id='4')], 1)
+        self.assertIsInstance(results[0], exception.DelfinException)
+        mock_close.assert_called_once_with()
+        # The state kept for the storage is dropped as well
+        mock_remove.assert_called_once_with('4')
+
     @mock.patch.object(FakeStorageDriver, 'get_storage')
     @mock.patch('delfin.db.storage_update')
     @mock.patch('delfin.db.access_info_update')
@@ -276,6 +323,13 @@ class TestDriverAPI(TestCase):
         api.list_volumes(context, storage_id)
         mock_fake.assert_called_once()
 
+        # Methods a driver does not support are not counted as errors
+        errors = dict(api_module.CALL_ERRORS._values)
+        mock_fake.side_effect = NotImplementedError
+        self.assertRaises(NotImplementedError, api.list_volumes, context,
+                          storage_id)
+        self.assertEqual(errors, api_module.CALL_ERRORS._values)
+
     @mock.patch.object(FakeStorageDriver, 'parse_alert')
     @mock.patch('delfin.db.storage_create')
     @mock.patch('delfin.db.access_info_create')
@@ -0,0 +1,102 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import TestCase, mock
+
+import eventlet
+
+from delfin import exception
+from delfin.common import constants
+from delfin.drivers import circuit_breaker
+
+
+def call(breaker, error=None):
+    with breaker.protect():
+        if error:
+            raise error
+
+
+@mock.patch('delfin.db.storage_update')
+class TestCircuitBreaker(TestCase):
+
+    def test_open_and_fail_fast(self, mock_update):
+        breaker = circuit_breaker.CircuitBreaker(
+            '12345', failure_threshold=2, reset_timeout=60)
+        self.assertRaises(exception.ConnectTimeout, call, breaker,
+                          exception.ConnectTimeout())
+        self.assertEqual(constants.CircuitState.CLOSED, breaker.state)
+        self.assertRaises(exception.ConnectTimeout, call, breaker,
+                          exception.ConnectTimeout())
+        self.assertEqual(constants.CircuitState.OPEN, breaker.state)
+        self.assertRaises(exception.StorageCircuitOpen, call, breaker)
+        mock_update.assert_called_once_with(
+            mock.ANY, '12345',
+            {'circuit_state': constants.CircuitState.OPEN})
+
+    def test_other_errors_keep_closed(self, mock_update):
+        breaker = circuit_breaker.CircuitBreaker(
+            '12345', failure_threshold=1, reset_timeout=60)
+        self.assertRaises(exception.InvalidResults, call, breaker,
+                          exception.InvalidResults(''))
+        self.assertEqual(constants.CircuitState.CLOSED, breaker.state)
+        mock_update.assert_not_called()
+
+    def test_wrapped_connection_errors(self, mock_update):
+        breaker = circuit_breaker.CircuitBreaker(
+            '12345', failure_threshold=2, reset_timeout=60)
+
+        def wrapped_call():
+            with breaker.protect():
+                try:
+                    raise exception.StorageBackendUnreachable('down')
+                except Exception:
+                    raise exception.StorageBackendException('failed')
+
+        for _ in range(2):
+            self.assertRaises(exception.StorageBackendException,
+                              wrapped_call)
+        self.assertEqual(constants.CircuitState.OPEN, breaker.state)
+
+    @mock.patch('time.time')
+    def test_half_open_probe(self, mock_time, mock_update):
+        breaker = circuit_breaker.CircuitBreaker(
+            '12345', failure_threshold=1, reset_timeout=60)
+        mock_time.return_value = 1000
+        self.assertRaises(exception.StorageBackendUnreachable, call, breaker,
+                          exception.StorageBackendUnreachable('down'))
+
+        # The failed probe opens the circuit again
+        mock_time.return_value = 1061
+        self.assertRaises(exception.ConnectTimeout, call, breaker,
+                          exception.ConnectTimeout())
+        self.assertEqual(constants.CircuitState.OPEN, breaker.state)
+        self.assertRaises(exception.StorageCircuitOpen, call, breaker)
+
+        # Only one probe at a time, its success closes the circuit
+        mock_time.return_value = 1122
+        breaker.before_call()
+        self.assertEqual(constants.CircuitState.HALF_OPEN, breaker.state)
+        self.assertRaises(exception.StorageCircuitOpen, call, breaker)
+        breaker.on_success()
+        self.assertEqual(constants.CircuitState.CLOSED, breaker.state)
+        call(breaker)
+
+        # A probe killed by a timeout does not keep the circuit half open
+        self.assertRaises(exception.StorageBackendUnreachable, call, breaker,
+                          exception.StorageBackendUnreachable('down'))
+        mock_time.return_value = 1183
+        self.assertRaises(eventlet.Timeout, call, breaker, eventlet.Timeout())
+        self.assertEqual(constants.CircuitState.HALF_OPEN, breaker.state)
+        call(breaker)
+        self.assertEqual(constants.CircuitState.CLOSED, breaker.state)
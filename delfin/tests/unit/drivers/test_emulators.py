@@ -0,0 +1,181 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from unittest import TestCase
+import unittest
+
+from oslo_config import cfg
+
+from delfin.drivers.dell_emc.vmax.vmax import VMAXStorageDriver
+from delfin.drivers.hpe.hpe_3par.rest_client import RestClient \
+    as Hpe3parRestClient
+from delfin.drivers.huawei.oceanstor.oceanstor import OceanStorDriver
+from delfin.drivers.utils import async_http_client
+from delfin.drivers.utils import async_runner
+from delfin.tests.emulators import hpe_3par
+from delfin.tests.emulators import oceanstor
+from delfin.tests.emulators import unisphere
+
+CONF = cfg.CONF
+
+
+def access_info(emulator):
+    return {
+        "storage_id": "12345",
+        "rest": {
+            "host": emulator.host,
+            "port": str(emulator.port),
+            "username": emulator.username,
+            "password": emulator.password,
+        },
+        "extra_attributes": {},
+    }
+
+
+class EmulatorTestCase(TestCase):
+
+    def setUp(self):
+        super(EmulatorTestCase, self).setUp()
+        CONF.set_override('backoff_factor', 0.01, 'driver_http')
+        self.addCleanup(CONF.clear_override, 'backoff_factor', 'driver_http')
+
+    def start(self, emulator):
+        emulator.start()
+        self.addCleanup(emulator.stop)
+        return emulator
+
+
+class TestOceanStorEmulator(EmulatorTestCase):
+
+    def test_driver(self):
+        emulator = self.start(oceanstor.OceanStorEmulator(volumes=1000))
+        driver = OceanStorDriver(**access_info(emulator))
+
+        storage = driver.get_storage(None)
+        self.assertEqual(oceanstor.DEVICE_ID, storage['serial_number'])
+        self.assertEqual('V500R007C10', storage['firmware_version'])
+        pools = driver.list_storage_pools(None)
+        self.assertEqual(4, len(pools))
+        volumes = driver.list_volumes(None)
+        self.assertEqual(1000, len(volumes))
+        self.assertEqual(['0', '1', '2', '3'],
+                         sorted({v['native_storage_pool_id']
+                                 for v in volumes}))
+        # All calls went over the one kept alive connection
+        self.assertEqual(1, emulator.stats['connections'])
+
+        # Relogin when the session is lost
+        emulator.expire_sessions()
+        self.assertEqual(4, len(driver.list_storage_pools(None)))
+        self.assertEqual(2, emulator.stats['logins'])
+
+        driver.close()
+        self.assertEqual({}, emulator.sessions)
+
+    def test_concurrent_paging(self):
+        CONF.set_override('concurrent_query', True, 'oceanstor_driver')
+        self.addCleanup(CONF.clear_override, 'concurrent_query',
+                        'oceanstor_driver')
+        emulator = self.start(oceanstor.OceanStorEmulator(volumes=1234))
+        driver = OceanStorDriver(**access_info(emulator))
+
+        volumes = driver.list_volumes(None)
+        self.assertEqual([str(i) for i in range(1234)],
+                         [v['native_volume_id'] for v in volumes])
+
+    def test_injected_errors(self):
+        emulator = self.start(oceanstor.OceanStorEmulator(volumes=1000,
+                                                          error_rate=0.3))
+        driver = OceanStorDriver(**access_info(emulator))
+
+        self.assertEqual(4, len(driver.list_storage_pools(None)))
+        self.assertEqual(1000, len(driver.list_volumes(None)))
+        self.assertGreater(emulator.stats['errors'], 0)
+        self.assertGreater(driver.client.session.stats['retries'], 0)
+
+
+class TestHpe3parEmulator(EmulatorTestCase):
+
+    def test_rest_client(self):
+        emulator = self.start(hpe_3par.Hpe3parEmulator(volumes=500))
+        client = Hpe3parRestClient(**access_info(emulator))
+        client.login()
+
+        self.assertEqual(hpe_3par.SERIAL_NUMBER,
+                         client.get_storage()['serialNumber'])
+        self.assertEqual(4, client.get_all_pools()['total'])
+        self.assertEqual(500, len(client.get_all_volumes()['members']))
+
+        # A lost session gets 403, the client logs in again
+        emulator.expire_sessions()
+        self.assertEqual(500, client.get_all_volumes()['total'])
+        self.assertGreater(emulator.stats['logins'], 1)
+
+
+@unittest.skipIf(async_http_client.aiohttp is None, 'aiohttp not installed')
+class TestAsyncRestClient(EmulatorTestCase):
+
+    def test_requests(self):
+        CONF.set_override('max_retries', 10, 'driver_http')
+        self.addCleanup(CONF.clear_override, 'max_retries', 'driver_http')
+        emulator = self.start(hpe_3par.Hpe3parEmulator(volumes=300,
+                                                       error_rate=0.3))
+
+        async def _requests():
+            client = async_http_client.AsyncRestClient(emulator.url)
+            try:
+                status, body = await client.request(
+                    'POST', '/api/v1/credentials',
+                    {'user': emulator.username,
+                     'password': emulator.password})
+                self.assertEqual(201, status)
+                client.headers[hpe_3par.SESSION_KEY_HEADER] = body['key']
+                # A new session picks up the session key
+                await client.close()
+                return await asyncio.gather(*[
+                    client.request('GET', '/api/v1/volumes')
+                    for __ in range(20)])
+            finally:
+                await client.close()
+
+        results = async_runner.run(_requests())
+        # All the requests in flight at once, the errors retried
+        self.assertEqual({(200, 300)},
+                         {(status, body['total'])
+                          for status, body in results})
+        self.assertGreater(emulator.stats['errors'], 0)
+
+
+class TestUnisphereEmulator(EmulatorTestCase):
+
+    def test_driver(self):
+        emulator = self.start(
+            unisphere.UnisphereEmulator(volumes=250, max_page_size=100))
+        driver = VMAXStorageDriver(**access_info(emulator))
+
+        self.assertEqual(unisphere.SYMMETRIX_ID, driver.client.array_id)
+        self.assertEqual('92', driver.client.uni_version)
+        storage = driver.get_storage(None)
+        self.assertEqual('PowerMax_2000', storage['model'])
+        pools = driver.list_storage_pools(None)
+        self.assertEqual(['SRP_1', 'SRP_2'], [p['name'] for p in pools])
+
+        # The volume list is read through the iterator in 3 pages
+        volumes = driver.list_volumes(None)
+        self.assertEqual(250, len(volumes))
+        self.assertEqual('000FA', volumes[-1]['native_volume_id'])
+        self.assertEqual({'SRP_1', 'SRP_2'},
+                         {v['native_storage_pool_id'] for v in volumes})
+        driver.close()
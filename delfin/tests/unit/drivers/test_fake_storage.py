@@ -0,0 +1,102 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import TestCase
+
+from oslo_config import cfg
+
+from delfin import exception
+from delfin.drivers.fake_storage import FakeStorageDriver
+
+CONF = cfg.CONF
+
+ACCESS_INFO = {
+    "storage_id": "12345",
+    "vendor": "fake_storage",
+    "model": "fake_driver",
+    "rest": {
+        "host": "10.0.0.1",
+        "port": "8443",
+        "username": "user",
+        "password": "pass"
+    }
+}
+
+
+class TestFakeStorageDriver(TestCase):
+
+    def setUp(self):
+        super(TestFakeStorageDriver, self).setUp()
+        CONF.set_override('fake_api_time_range', '0-0', 'fake_driver')
+        CONF.set_override('fake_volume_range', '900-1200', 'fake_driver')
+        CONF.set_override('fake_page_query_limit', '100', 'fake_driver')
+        self.addCleanup(CONF.clear_override, 'fake_api_time_range',
+                        'fake_driver')
+        self.addCleanup(CONF.clear_override, 'fake_volume_range',
+                        'fake_driver')
+        self.addCleanup(CONF.clear_override, 'fake_page_query_limit',
+                        'fake_driver')
+        self.addCleanup(CONF.clear_override, 'fake_churn_rate',
+                        'fake_driver')
+
+    def test_deterministic(self):
+        driver = FakeStorageDriver(**ACCESS_INFO)
+        other = FakeStorageDriver(**ACCESS_INFO)
+        self.assertEqual(driver.get_storage(None), other.get_storage(None))
+        self.assertEqual(driver.list_storage_pools(None),
+                         other.list_storage_pools(None))
+        volumes = driver.list_volumes(None)
+        self.assertEqual(volumes, other.list_volumes(None))
+        self.assertEqual(volumes, driver.list_volumes(None))
+
+        ACCESS_INFO['rest']['host'] = '10.0.0.2'
+        self.addCleanup(ACCESS_INFO['rest'].update, host='10.0.0.1')
+        other = FakeStorageDriver(**ACCESS_INFO)
+        self.assertNotEqual(driver.get_storage(None)['serial_number'],
+                            other.get_storage(None)['serial_number'])
+
+    def test_churn(self):
+        CONF.set_override('fake_churn_rate', 0.03, 'fake_driver')
+        driver = FakeStorageDriver(**ACCESS_INFO)
+        volumes = {v['native_volume_id']: v for v in
+                   driver.list_volumes(None)}
+        watermark = driver.list_volumes_changed_since(None, None)['watermark']
+        driver.list_volumes(None)
+        changes = driver.list_volumes_changed_since(None, watermark)
+        self.assertEqual(watermark + 2, changes['watermark'])
+        count = len(volumes) * 0.03 / 3
+        self.assertGreater(len(changes['deletions']), count * 1.8)
+
+        # Replaying the changes on the first listing gives the current one
+        for volume in changes['upserts']:
+            volumes[volume['native_volume_id']] = volume
+        for native_id in changes['deletions']:
+            volumes.pop(native_id, None)
+        current = {v['native_volume_id']: v for page in
+                   driver._volume_pages() for v in page}
+        self.assertEqual(current, volumes)
+
+        self.assertRaises(exception.InvalidInput,
+                          driver.list_volumes_changed_since, None, 100)
+
+        # Only the changes since the last asked watermark are kept
+        driver.list_volumes(None)
+        self.assertEqual([watermark + 1, watermark + 2, watermark + 3],
+                         sorted(driver.changes))
+        changes = driver.list_volumes_changed_since(None,
+                                                    changes['watermark'])
+        self.assertEqual([watermark + 3, watermark + 4],
+                         sorted(driver.changes))
+        self.assertRaises(exception.InvalidInput,
+                          driver.list_volumes_changed_since, None, watermark)
@@ -0,0 +1,80 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import TestCase, mock
+
+from delfin.drivers import manager
+
+
+class TestDriverCache(TestCase):
+
+    def test_lru_eviction(self):
+        cache = manager.DriverCache(max_size=2, idle_timeout=0)
+        drivers = [mock.Mock(storage_id=str(i)) for i in range(3)]
+        cache['0'] = drivers[0]
+        cache['1'] = drivers[1]
+        self.assertIs(drivers[0], cache.get('0'))
+        cache['2'] = drivers[2]
+
+        self.assertNotIn('1', cache)
+        drivers[1].close.assert_called_once_with()
+        drivers[0].close.assert_not_called()
+        self.assertIsNone(cache.get('1'))
+        self.assertEqual({'hits': 1, 'misses': 1, 'evictions': 1},
+                         cache.stats)
+
+        drivers[0].close.side_effect = Exception('logout failed')
+        self.assertIs(drivers[0], cache.pop('0'))
+        self.assertEqual(1, len(cache))
+
+    @mock.patch('time.time')
+    def test_idle_eviction(self, mock_time):
+        cache = manager.DriverCache(max_size=10, idle_timeout=60)
+        drivers = [mock.Mock(storage_id=str(i)) for i in range(2)]
+        mock_time.return_value = 1000
+        cache['0'] = drivers[0]
+        mock_time.return_value = 1030
+        cache['1'] = drivers[1]
+
+        mock_time.return_value = 1070
+        self.assertIs(drivers[1], cache.get('1'))
+        self.assertNotIn('0', cache)
+        drivers[0].close.assert_called_once_with()
+        drivers[1].close.assert_not_called()
+
+    def test_in_use_not_closed(self):
+        cache = manager.DriverCache(max_size=1, idle_timeout=0)
+        drivers = [mock.Mock(storage_id=str(i)) for i in range(3)]
+        cache.put('0', drivers[0], acquire=True)
+        self.assertIs(drivers[0], cache.get('0', acquire=True))
+
+        # Evicted while two users sync with it
+        cache['1'] = drivers[1]
+        self.assertNotIn('0', cache)
+        cache.release(drivers[0])
+        drivers[0].close.assert_not_called()
+        cache.release(drivers[0])
+        drivers[0].close.assert_called_once_with()
+
+        # Replaced by update_driver while in use
+        self.assertIs(drivers[1], cache.get('1', acquire=True))
+        cache['1'] = drivers[2]
+        drivers[1].close.assert_not_called()
+        cache.release(drivers[1])
+        drivers[1].close.assert_called_once_with()
+
+        # Released drivers are closed at once when evicted
+        cache.release(cache.get('1', acquire=True))
+        cache.pop('1')
+        drivers[2].close.assert_called_once_with()
@@ -0,0 +1,68 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from unittest import TestCase, mock
+
+from delfin import exception
+from delfin.drivers import api
+from delfin.drivers import fake_storage
+from delfin.drivers.utils import async_runner
+
+
+async def add(a, b):
+    await asyncio.sleep(0)
+    return a + b
+
+
+async def fail():
+    raise exception.ConnectTimeout()
+
+
+async def sleep(state):
+    try:
+        await asyncio.sleep(1)
+    except asyncio.CancelledError:
+        state['cancelled'] = True
+        raise
+
+
+class TestAsyncRunner(TestCase):
+
+    def test_run(self):
+        self.assertEqual(3, async_runner.run(add(1, 2)))
+        self.assertRaises(exception.ConnectTimeout, async_runner.run, fail())
+        self.assertRaises(exception.DelfinException, async_runner.run,
+                          asyncio.sleep(1), 0.01)
+
+    def test_timeout_cancels(self):
+        state = {}
+        self.assertRaises(exception.DelfinException, async_runner.run,
+                          sleep(state), 0.01)
+        # The next call runs after the cancellation on the loop
+        async_runner.run(add(1, 2))
+        self.assertTrue(state.get('cancelled'))
+
+    def test_async_fake_driver(self):
+        driver = fake_storage.AsyncFakeStorageDriver(storage_id='12345')
+        for name in ('MIN_WAIT', 'MAX_WAIT'):
+            patcher = mock.patch.object(fake_storage, name, 0)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        storage = api._wait(driver.get_storage(None))
+        self.assertEqual('fake_driver', storage['name'])
+
+        volumes = api._wait(driver.list_volumes(None))
+        self.assertEqual(['fake_vol_' + str(i) for i in range(len(volumes))],
+                         [v['name'] for v in volumes])
@@ -0,0 +1,106 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import TestCase, mock
+
+from requests import Session
+import requests.exceptions as r_exc
+
+from delfin.drivers.utils import http_client
+
+
+def response(status_code):
+    res = mock.Mock()
+    res.status_code = status_code
+    return res
+
+
+@mock.patch('time.sleep')
+class TestHttpClient(TestCase):
+
+    def test_create_session(self, mock_sleep):
+        session = http_client.create_session(
+            verify='/ca.pem', headers={'Accept': 'application/json'},
+            pool_maxsize=8)
+        self.assertEqual('/ca.pem', session.verify)
+        self.assertFalse(session.trust_env)
+        self.assertEqual('gzip, deflate', session.headers['Accept-Encoding'])
+        self.assertEqual('application/json', session.headers['Accept'])
+        self.assertEqual(8, session.get_adapter('https://a')._pool_maxsize)
+
+    @mock.patch.object(Session, 'request')
+    def test_retry_idempotent(self, mock_request, mock_sleep):
+        mock_request.side_effect = [r_exc.ConnectionError(), response(503),
+                                    response(200)]
+        session = http_client.create_session(max_retries=3)
+        res = session.get('https://a/b', timeout=5)
+        self.assertEqual(200, res.status_code)
+        self.assertEqual(3, mock_request.call_count)
+        self.assertEqual(2, mock_sleep.call_count)
+        self.assertEqual({'requests': 3, 'retries': 2, 'failures': 0},
+                         session.stats)
+
+        mock_request.reset_mock(side_effect=True)
+        mock_request.side_effect = r_exc.ConnectionError()
+        self.assertRaises(r_exc.ConnectionError, session.get, 'https://a/b')
+        self.assertEqual(4, mock_request.call_count)
+
+    @mock.patch.object(Session, 'request')
+    def test_no_retry_post(self, mock_request, mock_sleep):
+        mock_request.side_effect = [response(503)]
+        session = http_client.create_session()
+        self.assertEqual(503, session.post('https://a/b').status_code)
+
+        mock_request.side_effect = [r_exc.ReadTimeout()]
+        self.assertRaises(r_exc.ReadTimeout, session.post, 'https://a/b')
+
+        mock_request.side_effect = [r_exc.ConnectTimeout(), response(200)]
+        self.assertEqual(200, session.post('https://a/b').status_code)
+        self.assertEqual(4, mock_request.call_count)
+
+    @mock.patch.object(Session, 'request')
+    def test_budget(self, mock_request, mock_sleep):
+        mock_request.return_value = response(503)
+        session = http_client.create_session(max_retries=10)
+        session.get('https://a/b', timeout=(10, 60), budget=0.2)
+        self.assertEqual(1, mock_request.call_count)
+        timeout = mock_request.call_args[1]['timeout']
+        self.assertTrue(all(t <= 0.2 for t in timeout))
+
+    @mock.patch('time.time')
+    @mock.patch.object(Session, 'request')
+    def test_budget_connect_timeout(self, mock_request, mock_time,
+                                    mock_sleep):
+        mock_request.side_effect = r_exc.ConnectTimeout()
+        # The first attempt used the whole connect timeout
+        mock_time.side_effect = [0, 0, 52]
+        session = http_client.create_session(budget=60)
+        self.assertEqual(60, session.budget)
+        self.assertRaises(r_exc.ConnectTimeout, session.get, 'https://a/b',
+                          timeout=52)
+        self.assertEqual(1, mock_request.call_count)
+        mock_sleep.assert_not_called()
+
+    @mock.patch.object(Session, 'request')
+    def test_count_requests(self, mock_request, mock_sleep):
+        mock_request.side_effect = [response(503), response(200),
+                                    response(200), response(200)]
+        session = http_client.create_session()
+        with http_client.count_requests() as outer:
+            session.get('https://a/b')
+            with http_client.count_requests() as inner:
+                session.get('https://a/c')
+        session.get('https://a/d')
+        self.assertEqual(3, outer['requests'])
+        self.assertEqual(1, inner['requests'])
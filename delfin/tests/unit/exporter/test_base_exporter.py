@@ -0,0 +1,201 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from delfin import test
+from delfin.exporter import base_exporter
+
+
+class RecordingExporter(base_exporter.BaseExporter):
+
+    def __init__(self, gate=None):
+        self.batches = []
+        self.gate = gate
+        self.entered = threading.Event()
+        self.dispatched = threading.Event()
+
+    def dispatch(self, ctxt, data):
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append(list(data))
+        self.dispatched.set()
+
+
+class FailingExporter(base_exporter.BaseExporter):
+
+    def dispatch(self, ctxt, data):
+        raise ValueError()
+
+
+class TestExporterWorker(test.TestCase):
+
+    def _worker(self, exporter, **overrides):
+        for name, value in overrides.items():
+            self.override_config(name, value)
+        worker = base_exporter.ExporterWorker(exporter)
+        self.addCleanup(worker.stop, 5)
+        return worker
+
+    def test_batch_by_size(self):
+        exporter = RecordingExporter()
+        worker = self._worker(exporter, exporter_batch_size=3,
+                              exporter_batch_age=60)
+        worker.put(None, [1, 2])
+        self.assertFalse(exporter.dispatched.wait(0.2))
+        worker.put(None, [3, 4])
+        self.assertTrue(exporter.dispatched.wait(5))
+        worker.stop(5)
+        self.assertEqual([[1, 2, 3], [4]], exporter.batches)
+
+    def test_batch_by_age(self):
+        exporter = RecordingExporter()
+        worker = self._worker(exporter, exporter_batch_size=100,
+                              exporter_batch_age=0.05)
+        worker.put(None, [1, 2])
+        self.assertTrue(exporter.dispatched.wait(5))
+        self.assertEqual([[1, 2]], exporter.batches)
+
+    def test_overflow(self):
+        for overflow, expected in (('drop_oldest', [[0], [2, 3]]),
+                                   ('drop_newest', [[0], [1, 2]]),
+                                   ('block', [[0], [1, 2]])):
+            gate = threading.Event()
+            exporter = RecordingExporter(gate)
+            worker = self._worker(exporter, exporter_queue_size=2,
+                                  exporter_batch_size=2,
+                                  exporter_batch_age=0,
+                                  exporter_overflow=overflow,
+                                  exporter_block_timeout=0.05)
+            dropped = base_exporter.DROPPED.get(exporter='RecordingExporter')
+            worker.put(None, [0])
+            # The exporter hangs on the first batch, the queue fills up
+            self.assertTrue(exporter.entered.wait(5))
+            worker.put(None, [1, 2, 3])
+            self.assertEqual(2, base_exporter.QUEUE_DEPTH.get(
+                exporter='RecordingExporter'))
+            gate.set()
+            worker.stop(5)
+            self.assertEqual(expected, exporter.batches, overflow)
+            self.assertEqual(dropped + 1, base_exporter.DROPPED.get(
+                exporter='RecordingExporter'))
+
+    def test_synchronous(self):
+        exporter = RecordingExporter()
+        worker = self._worker(exporter, exporter_queue_size=0)
+        worker.put(None, [1, 2])
+        self.assertEqual([[1, 2]], exporter.batches)
+        self.assertIsNone(worker._thread)
+
+    def test_failing_exporter(self):
+        worker = self._worker(FailingExporter(), exporter_queue_size=0)
+        errors = base_exporter.DISPATCH_ERRORS.get(exporter='FailingExporter')
+        worker.put(None, [1])
+        self.assertEqual(errors + 1, base_exporter.DISPATCH_ERRORS.get(
+            exporter='FailingExporter'))
+
+    def test_stop_flushes(self):
+        exporter = RecordingExporter()
+        worker = self._worker(exporter, exporter_batch_age=60)
+        worker.put(None, [1, 2])
+        worker.stop(5)
+        self.assertEqual([[1, 2]], exporter.batches)
+        # Data put once stopped is dispatched on the caller thread
+        worker.put(None, [3])
+        self.assertEqual([[1, 2], [3]], exporter.batches)
+
+
+class TestBaseManager(test.TestCase):
+
+    @mock.patch.object(base_exporter.BaseManager, '_get_exporters')
+    def test_slow_exporter_isolated(self, mock_exporters):
+        gate = threading.Event()
+        slow, fast = RecordingExporter(gate), RecordingExporter()
+        mock_exporters.return_value = [slow, fast]
+        self.override_config('exporter_batch_age', 0)
+        manager = base_exporter.BaseManager('delfin.alert.exporters')
+        self.addCleanup(manager.stop, 5)
+
+        manager.dispatch(None, {'alert': 1})
+        self.assertTrue(fast.dispatched.wait(5))
+        self.assertEqual([[{'alert': 1}]], fast.batches)
+        self.assertEqual([], slow.batches)
+        gate.set()
+        manager.stop(5)
+        self.assertEqual([[{'alert': 1}]], slow.batches)
+
+
+class FlakyExporter(RecordingExporter):
+
+    def __init__(self, failures):
+        super(FlakyExporter, self).__init__()
+        self.failures = failures
+
+    def dispatch(self, ctxt, data):
+        if self.failures:
+            self.failures -= 1
+            raise ValueError()
+        super(FlakyExporter, self).dispatch(ctxt, data)
+
+
+class TestSpoolWorker(test.TestCase):
+
+    def setUp(self):
+        super(TestSpoolWorker, self).setUp()
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.override_config('enabled', True, group='alert_spool')
+        self.override_config('path', path, group='alert_spool')
+        self.override_config('exporter_batch_age', 0)
+        self.override_config('exporter_retry_interval', 0.01)
+
+    def _manager(self, exporter):
+        with mock.patch.object(base_exporter.BaseManager, '_get_exporters',
+                               return_value=[exporter]):
+            manager = base_exporter.AlertExporterManager()
+        self.addCleanup(manager.stop, 5)
+        return manager
+
+    @staticmethod
+    def _wait_for(exporter, count):
+        deadline = time.time() + 5
+        while sum(map(len, exporter.batches)) < count:
+            if time.time() > deadline:
+                raise AssertionError('Exported {0}'.format(exporter.batches))
+            time.sleep(0.01)
+
+    def test_retry_until_exported(self):
+        exporter = FlakyExporter(failures=3)
+        manager = self._manager(exporter)
+        manager.dispatch(None, {'alert': 1})
+        self._wait_for(exporter, 1)
+        self.assertEqual([[{'alert': 1}]], exporter.batches)
+
+    def test_replay_after_restart(self):
+        exporter = FlakyExporter(failures=1000)
+        manager = self._manager(exporter)
+        manager.dispatch(None, [{'alert': 1}, {'alert': 2}])
+        manager.stop(5)
+        self.assertEqual([], exporter.batches)
+
+        # Same exporter, same position in the spool
+        exporter = FlakyExporter(failures=0)
+        self._manager(exporter)
+        self._wait_for(exporter, 2)
+        self.assertEqual([[{'alert': 1}, {'alert': 2}]], exporter.batches)
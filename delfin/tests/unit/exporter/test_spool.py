@@ -0,0 +1,142 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import time
+
+from delfin import test
+from delfin.exporter import spool
+
+
+class TestSpool(test.TestCase):
+
+    def setUp(self):
+        super(TestSpool, self).setUp()
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def _spool(self, **kwargs):
+        kwargs.setdefault('segment_size', 1024)
+        new_spool = spool.Spool(self.path, **kwargs)
+        self.addCleanup(new_spool.close)
+        return new_spool
+
+    def _segments(self):
+        return sorted(name for name in os.listdir(self.path)
+                      if name.endswith(spool.SEGMENT_SUFFIX))
+
+    def test_read_commit(self):
+        s = self._spool()
+        s.register('a')
+        s.register('b')
+        s.append([{'id': 1}, {'id': 2}, {'id': 3}])
+
+        records, position = s.read('a', 2)
+        self.assertEqual([{'id': 1}, {'id': 2}], records)
+        # Not committed, read again
+        self.assertEqual(records, s.read('a', 2)[0])
+        s.commit('a', position)
+        self.assertEqual([{'id': 3}], s.read('a', 10)[0])
+        # Each reader has its own position
+        self.assertEqual(3, len(s.read('b', 10)[0]))
+
+    def test_new_reader_starts_at_end(self):
+        s = self._spool()
+        s.append([{'id': 1}])
+        s.register('a')
+        s.append([{'id': 2}])
+        self.assertEqual([{'id': 2}], s.read('a', 10)[0])
+
+    def test_rotation_and_truncation(self):
+        s = self._spool()
+        s.register('a')
+        s.register('b')
+        for i in range(100):
+            s.append([{'id': i, 'padding': 'x' * 50}])
+        self.assertGreater(len(self._segments()), 3)
+
+        records, position = s.read('a', 1000)
+        self.assertEqual(list(range(100)), [r['id'] for r in records])
+        s.commit('a', position)
+        # b has not read them, segments are kept
+        self.assertGreater(len(self._segments()), 3)
+        records, position = s.read('b', 1000)
+        s.commit('b', position)
+        self.assertEqual(1, len(self._segments()))
+
+    def test_restart(self):
+        s = self._spool()
+        s.register('a')
+        s.append([{'id': i, 'padding': 'x' * 50} for i in range(10)])
+        records, position = s.read('a', 4)
+        s.commit('a', position)
+        s.append([{'id': 10}])
+        s.close()
+
+        s = self._spool()
+        s.register('a')
+        self.assertEqual(list(range(4, 11)),
+                         [r['id'] for r in s.read('a', 100)[0]])
+
+    def test_max_size(self):
+        s = self._spool(max_size=2048)
+        s.register('a')
+        for i in range(100):
+            s.append([{'id': i, 'padding': 'x' * 50}])
+        self.assertLessEqual(len(self._segments()), 3)
+
+        lost = spool.SPOOL_LOST.get(spool=s.name, reader='a')
+        records, __ = s.read('a', 1000)
+        # The oldest records were removed unread
+        self.assertEqual(99, records[-1]['id'])
+        self.assertGreater(records[0]['id'], 0)
+        self.assertEqual(lost + 1, spool.SPOOL_LOST.get(spool=s.name,
+                                                        reader='a'))
+
+    def test_max_age(self):
+        s = self._spool(max_age=60)
+        s.register('a')
+        for i in range(30):
+            s.append([{'id': i, 'padding': 'x' * 50}])
+        old = time.time() - 120
+        aged = self._segments()[:-1]
+        self.assertTrue(aged)
+        for name in aged:
+            os.utime(os.path.join(self.path, name), (old, old))
+        # Rotate, removing the aged segments although not read
+        s.append([{'id': 30, 'padding': 'x' * 1024}])
+        s.append([{'id': 31}])
+        self.assertFalse(set(aged) & set(self._segments()))
+        self.assertEqual(31, s.read('a', 1000)[0][-1]['id'])
+
+    def test_partial_line(self):
+        s = self._spool()
+        s.register('a')
+        s.append([{'id': 1}])
+        with open(os.path.join(self.path, self._segments()[-1]), 'ab') as f:
+            f.write(b'{"id": ')
+        records, position = s.read('a', 10)
+        self.assertEqual([{'id': 1}], records)
+        s.commit('a', position)
+        self.assertEqual([], s.read('a', 10)[0])
+
+    def test_from_config_shard(self):
+        self.override_config('path', os.path.join(self.path, 'alerts'),
+                             group='alert_spool')
+        for shard, name in ((0, 'alerts'), (2, 'alerts.2')):
+            s = spool.Spool.from_config('alert_spool', shard)
+            self.addCleanup(s.close)
+            self.assertEqual(os.path.join(self.path, name), s.path)
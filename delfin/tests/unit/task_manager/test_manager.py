@@ -0,0 +1,91 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from delfin import context
+from delfin import exception
+from delfin import test
+from delfin.task_manager import manager
+from delfin.task_manager.tasks import task
+
+POOL_TASK = 'delfin.task_manager.tasks.task.StoragePoolTask'
+
+
+class TestTaskManager(test.TestCase):
+
+    def setUp(self):
+        super(TestTaskManager, self).setUp()
+        self.manager = manager.TaskManager()
+        self.ctxt = context.get_admin_context()
+
+    @mock.patch('delfin.db.job_task_update')
+    @mock.patch.object(task.StoragePoolTask, 'sync', autospec=True)
+    def test_sync_job_task(self, mock_sync, mock_job_task_update):
+        self.manager.sync_storage_resource(self.ctxt, 'fake_id', POOL_TASK,
+                                           job_id='fake_job_id')
+        running, done = mock_job_task_update.call_args_list
+        self.assertEqual((self.ctxt, 'fake_job_id', 'fake_id',
+                          'StoragePoolTask'), running[0][:4])
+        self.assertEqual('running', running[0][4]['status'])
+        self.assertEqual('success', done[0][4]['status'])
+        self.assertIn('ended_at', done[0][4])
+
+        # The sync recorded its failure
+        def _failed_sync(device_obj):
+            device_obj._new_record('storage_pool').fail(
+                exception.StorageBackendException('timeout'))
+        mock_sync.side_effect = _failed_sync
+        mock_job_task_update.reset_mock()
+        self.manager.sync_storage_resource(self.ctxt, 'fake_id', POOL_TASK,
+                                           job_id='fake_job_id')
+        values = mock_job_task_update.call_args[0][4]
+        self.assertEqual(('failed', 'StorageBackendException'),
+                         (values['status'], values['error']))
+
+        # Not part of a job
+        mock_job_task_update.reset_mock()
+        self.manager.sync_storage_resource(self.ctxt, 'fake_id', POOL_TASK)
+        self.assertFalse(mock_job_task_update.called)
+
+    @mock.patch('delfin.db.job_task_update')
+    @mock.patch.object(task.StoragePoolTask, 'remove')
+    def test_remove_job_task(self, mock_remove, mock_job_task_update):
+        mock_remove.side_effect = exception.StorageNotFound('fake_id')
+        self.assertRaises(exception.StorageNotFound,
+                          self.manager.remove_storage_resource, self.ctxt,
+                          'fake_id', POOL_TASK, job_id='fake_job_id')
+        values = mock_job_task_update.call_args[0][4]
+        self.assertEqual(('failed', 'StorageNotFound'),
+                         (values['status'], values['error']))
+
+    @mock.patch('delfin.task_manager.rpcapi.TaskAPI.sync_storage_resource')
+    @mock.patch('delfin.db.storage_get_all')
+    def test_poll_alerts(self, mock_storage_get_all, mock_sync):
+        mock_storage_get_all.return_value = [{'id': 'fake_id'}]
+        other = manager.TaskManager()
+        for task_manager in (self.manager, other):
+            task_manager._next_alert_poll = 0
+            task_manager.poll_alerts(self.ctxt)
+        # Only the elected task service polls
+        mock_sync.assert_called_once_with(self.ctxt, 'fake_id',
+                                          manager.ALERT_SYNC_TASK)
+
+        # Not again before alert_poll_interval passed
+        self.manager.poll_alerts(self.ctxt)
+        self.assertEqual(1, mock_sync.call_count)
+        self.manager._next_alert_poll = 0
+        self.manager.poll_alerts(self.ctxt)
+        self.assertEqual(2, mock_sync.call_count)
+        self.manager._alert_poll_lock.release()
@@ -15,6 +15,9 @@
 
 from unittest import mock
 
+from delfin import db
+from delfin import exception
+from delfin.alert_manager import alert_processor
 from delfin.drivers import fake_storage
 from delfin.task_manager.tasks import task
 from delfin.task_manager.tasks.task import StorageDeviceTask
@@ -99,9 +102,11 @@ class TestStorageDeviceTask(test.TestCase):
         mock_get_storage.return_value = fake_storage_obj.get_storage(context)
         storage_obj.sync()
 
+    @mock.patch('delfin.db.alert_delete_by_storage')
     @mock.patch('delfin.db.storage_delete')
     @mock.patch('delfin.db.alert_source_delete')
-    def test_successful_remove(self, mock_alert_del, mock_strg_del):
+    def test_successful_remove(self, mock_alert_del, mock_strg_del,
+                               mock_active_alert_del):
         storage_obj = task.StorageDeviceTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         storage_obj.remove()
@@ -110,6 +115,8 @@ class TestStorageDeviceTask(test.TestCase):
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         mock_alert_del.assert_called_with(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+        mock_active_alert_del.assert_called_with(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
 
 
 class TestStoragePoolTask(test.TestCase):
@@ -198,9 +205,222 @@ class TestStorageVolumeTask(test.TestCase):
         vol_obj.sync()
         self.assertTrue(mock_vol_del.called)
 
+    @mock.patch.object(coordination.LOCK_COORDINATOR, 'get_lock')
+    @mock.patch('delfin.drivers.api.API.list_volumes_changed_since')
+    @mock.patch('delfin.drivers.api.API.list_volumes')
+    @mock.patch('delfin.db.storage_update')
+    @mock.patch('delfin.db.storage_get')
+    @mock.patch('delfin.db.volume_get_all')
+    @mock.patch('delfin.db.volumes_delete')
+    @mock.patch('delfin.db.volumes_update')
+    @mock.patch('delfin.db.volumes_create')
+    def test_sync_changes(self, mock_vol_create, mock_vol_update,
+                          mock_vol_del, mock_vol_get_all, mock_storage_get,
+                          mock_storage_update, mock_list_vols,
+                          mock_list_changes, get_lock):
+        vol_obj = task.StorageVolumeTask(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+        db_storage = dict(storage, sync_status=0, sync_watermarks=None)
+        mock_storage_get.return_value = db_storage
+
+        # No watermark yet, full sync and start tracking
+        mock_list_changes.return_value = {'watermark': 10}
+        mock_list_vols.return_value = vols_list
+        mock_vol_get_all.return_value = list()
+        vol_obj.sync()
+        self.assertTrue(mock_list_vols.called)
+        mock_list_changes.assert_called_with(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda', None)
+        watermarks = mock_storage_update.call_args[0][2]['sync_watermarks']
+        self.assertEqual(10, watermarks['volume']['watermark'])
+
+        # Only the changes are synced
+        mock_list_vols.reset_mock()
+        db_storage['sync_watermarks'] = watermarks
+        new_vol = dict(vols_list[0], native_volume_id='new_vol')
+        mock_list_changes.return_value = {
+            'watermark': 12, 'upserts': [vols_list[0], new_vol],
+            'deletions': ['deleted_vol']}
+        mock_vol_get_all.return_value = [
+            vols_list[0], dict(vols_list[0], id='deleted_id',
+                               native_volume_id='deleted_vol')]
+        vol_obj.sync()
+        self.assertFalse(mock_list_vols.called)
+        mock_list_changes.assert_called_with(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda', 10)
+        self.assertEqual(['fake_original_id_' + str(id), 'new_vol',
+                          'deleted_vol'],
+                         mock_vol_get_all.call_args[1]['filters'][
+                             'native_volume_id'])
+        mock_vol_del.assert_called_with(context, ['deleted_id'])
+        mock_vol_update.assert_called_with(context, [vols_list[0]])
+        mock_vol_create.assert_called_with(context, [new_vol])
+        watermarks = mock_storage_update.call_args[0][2]['sync_watermarks']
+        self.assertEqual(12, watermarks['volume']['watermark'])
+
+        # Periodic full reconcile
+        watermarks['volume']['reconciled_at'] = 0
+        db_storage['sync_watermarks'] = watermarks
+        vol_obj.sync()
+        self.assertTrue(mock_list_vols.called)
+
+    @mock.patch.object(coordination.LOCK_COORDINATOR, 'get_lock')
+    @mock.patch('delfin.drivers.api.API.list_volumes_changed_since',
+                mock.Mock(side_effect=NotImplementedError))
+    @mock.patch('delfin.drivers.api.API.list_volumes')
+    @mock.patch('delfin.db.sync_history_create')
+    @mock.patch('delfin.db.volume_get_all')
+    @mock.patch('delfin.db.volumes_update', mock.Mock())
+    @mock.patch('delfin.db.volumes_create', mock.Mock())
+    def test_sync_history(self, mock_vol_get_all, mock_history_create,
+                          mock_list_vols, get_lock):
+        vol_obj = task.StorageVolumeTask(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+        new_vol = dict(vols_list[0], native_volume_id='new_vol')
+        changed_vol = dict(vols_list[0], native_volume_id='changed_vol',
+                           used_capacity=0)
+        mock_list_vols.return_value = [dict(vols_list[0]), new_vol,
+                                       dict(changed_vol, used_capacity=1)]
+        mock_vol_get_all.return_value = [
+            vols_list[0], dict(changed_vol, id='changed_id')]
+        vol_obj.sync()
+
+        values = mock_history_create.call_args[0][1]
+        self.assertEqual('c5c91c98-91aa-40e6-85ac-37a1d3b32bda',
+                         values['storage_id'])
+        self.assertEqual('volume', values['resource'])
+        self.assertEqual('full', values['mode'])
+        self.assertEqual('success', values['status'])
+        self.assertIsNone(values['error'])
+        self.assertEqual((1, 1, 0, 1), (values['added'], values['updated'],
+                                        values['deleted'],
+                                        values['unchanged']))
+        # Tracking the changes and listing the volumes
+        self.assertEqual(2, values['driver_calls'])
+        self.assertEqual({'fetch', 'db_read', 'classify', 'db_write'},
+                         set(values['phases']))
+        self.assertLessEqual(values['started_at'], values['ended_at'])
+
+        mock_list_vols.side_effect = exception.StorageBackendException(
+            'timeout')
+        vol_obj.sync()
+        values = mock_history_create.call_args[0][1]
+        self.assertEqual('failed', values['status'])
+        self.assertEqual('StorageBackendException', values['error'])
+
     @mock.patch('delfin.db.volume_delete_by_storage')
     def test_remove(self, mock_vol_del):
         vol_obj = task.StorageVolumeTask(
             context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
         vol_obj.remove()
         self.assertTrue(mock_vol_del.called)
+
+
+class TestAlertSyncTask(test.TestCase):
+    def _alert(self, alert_id, **kwargs):
+        alert = {field: None for field in task.AlertSyncTask.FIELDS}
+        alert.update(alert_id=alert_id, sequence_number=alert_id,
+                     location='fake_location', category='Fault')
+        alert.update(kwargs)
+        return alert
+
+    @mock.patch.object(coordination.LOCK_COORDINATOR, 'get_lock')
+    @mock.patch('delfin.alert_manager.rpcapi.AlertAPI.export_alerts')
+    @mock.patch('delfin.drivers.api.API.list_alerts')
+    @mock.patch('delfin.db.sync_history_create')
+    @mock.patch('delfin.db.alert_get_all')
+    @mock.patch('delfin.db.alerts_create')
+    @mock.patch('delfin.db.alerts_delete')
+    def test_sync(self, mock_alerts_delete, mock_alerts_create,
+                  mock_alert_get_all, mock_history_create, mock_list_alerts,
+                  mock_export, get_lock):
+        alert_obj = task.AlertSyncTask(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+        mock_list_alerts.return_value = [self._alert('kept'),
+                                         self._alert('new'),
+                                         self._alert('new')]
+        mock_alert_get_all.return_value = [
+            self._alert('kept', id='kept_id'),
+            self._alert('cleared', id='cleared_id')]
+        alert_obj.sync()
+
+        self.assertTrue(get_lock.called)
+        mock_alerts_delete.assert_called_with(context, ['cleared_id'])
+        created = mock_alerts_create.call_args[0][1]
+        self.assertEqual(['new'], [a['alert_id'] for a in created])
+        self.assertEqual('c5c91c98-91aa-40e6-85ac-37a1d3b32bda',
+                         created[0]['storage_id'])
+        exported = mock_export.call_args[0][2]
+        self.assertEqual([('new', 'Fault'), ('cleared', 'Recovery')],
+                         [(a['alert_id'], a['category']) for a in exported])
+        values = mock_history_create.call_args[0][1]
+        self.assertEqual('alert', values['resource'])
+        self.assertEqual('success', values['status'])
+        self.assertEqual((1, 0, 1, 1), (values['added'], values['updated'],
+                                        values['deleted'],
+                                        values['unchanged']))
+
+        # Nothing changed, nothing to export
+        mock_export.reset_mock()
+        mock_alerts_create.reset_mock()
+        mock_list_alerts.return_value = [self._alert('kept')]
+        mock_alert_get_all.return_value = [self._alert('kept', id='kept_id')]
+        alert_obj.sync()
+        self.assertFalse(mock_export.called)
+        self.assertFalse(mock_alerts_create.called)
+
+    @mock.patch('delfin.alert_manager.rpcapi.AlertAPI.export_alerts')
+    @mock.patch('delfin.drivers.api.API.list_alerts')
+    @mock.patch('delfin.db.sync_history_create')
+    @mock.patch('delfin.db.alert_get_all')
+    def test_sync_not_listed(self, mock_alert_get_all, mock_history_create,
+                             mock_list_alerts, mock_export):
+        alert_obj = task.AlertSyncTask(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+        # The driver does not list alerts
+        mock_list_alerts.return_value = None
+        alert_obj.sync()
+        self.assertFalse(mock_alert_get_all.called)
+        self.assertFalse(mock_history_create.called)
+
+        mock_list_alerts.side_effect = exception.StorageBackendException(
+            'timeout')
+        alert_obj.sync()
+        self.assertFalse(mock_alert_get_all.called)
+        self.assertFalse(mock_export.called)
+        values = mock_history_create.call_args[0][1]
+        self.assertEqual('failed', values['status'])
+
+    @mock.patch('delfin.exporter.base_exporter.AlertExporterManager.dispatch')
+    @mock.patch('delfin.db.storage_get')
+    @mock.patch('delfin.drivers.api.API.parse_alert')
+    @mock.patch('delfin.alert_manager.rpcapi.AlertAPI.export_alerts')
+    @mock.patch('delfin.drivers.api.API.list_alerts')
+    def test_sync_after_trap(self, mock_list_alerts, mock_export,
+                             mock_parse_alert, mock_storage_get,
+                             mock_dispatch):
+        storage_id = 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda'
+        ctxt = context.get_admin_context()
+        mock_parse_alert.return_value = self._alert('trap')
+        processor = alert_processor.AlertProcessor()
+        mock_storage_get.return_value = {
+            'id': storage_id, 'name': 'fake', 'vendor': 'fake',
+            'model': 'fake', 'serial_number': 'fake'}
+        processor.process_alert_info({'storage_id': storage_id})
+        self.assertEqual(1, mock_dispatch.call_count)
+
+        # The alert received as trap is not exported again by the poll
+        mock_storage_get.side_effect = exception.StorageNotFound(storage_id)
+        mock_list_alerts.return_value = [self._alert('trap')]
+        task.AlertSyncTask(ctxt, storage_id).sync()
+        self.assertFalse(mock_export.called)
+        self.assertEqual(['trap'], [a['alert_id'] for a in db.alert_get_all(
+            ctxt, filters={'storage_id': storage_id})])
+
+    @mock.patch('delfin.db.alert_delete_by_storage')
+    def test_remove(self, mock_alert_del):
+        alert_obj = task.AlertSyncTask(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
+        alert_obj.remove()
+        mock_alert_del.assert_called_with(
+            context, 'c5c91c98-91aa-40e6-85ac-37a1d3b32bda')
@@ -0,0 +1,152 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+import webob
+import webob.dec
+
+from delfin import metrics
+from delfin import test
+from delfin.api import middlewares
+from delfin.drivers import api as driverapi
+from delfin.exporter import base_exporter
+
+
+class MetricsTestCase(test.TestCase):
+
+    def setUp(self):
+        super(MetricsTestCase, self).setUp()
+        self.registry = metrics.Registry()
+
+    def test_counter(self):
+        counter = metrics.counter('fake_total', 'Fake "things".\nMore.',
+                                  ('vendor',), registry=self.registry)
+        counter.inc(vendor='huawei')
+        counter.inc(2, vendor='hpe')
+        counter.inc(vendor='huawei')
+        self.assertEqual(2, counter.get(vendor='huawei'))
+        self.assertRaises(ValueError, counter.inc, -1, vendor='hpe')
+        self.assertRaises(ValueError, counter.inc, method='get_storage')
+        self.assertEqual('# HELP fake_total Fake "things".\\nMore.\n'
+                         '# TYPE fake_total counter\n'
+                         'fake_total{vendor="huawei"} 2\n'
+                         'fake_total{vendor="hpe"} 2\n',
+                         self.registry.render())
+
+    def test_gauge(self):
+        gauge = metrics.gauge('fake_depth', 'Fake depth.', ('task',),
+                              registry=self.registry)
+        with gauge.track(task='a'):
+            with gauge.track(task='a'):
+                self.assertEqual(2, gauge.get(task='a'))
+        self.assertEqual(0, gauge.get(task='a'))
+        gauge.set(1.5, task='b')
+        self.assertIn('fake_depth{task="b"} 1.5\n', self.registry.render())
+        self.assertRaises(ValueError, gauge.set_function, lambda: 1)
+
+        queue = [1, 2, 3]
+        size = metrics.gauge('fake_size', 'Fake size.',
+                             registry=self.registry)
+        size.set_function(lambda: len(queue))
+        queue.pop()
+        self.assertIn('fake_size 2\n', self.registry.render())
+
+    def test_histogram(self):
+        histogram = metrics.histogram('fake_seconds', 'Fake durations.',
+                                      ('method',), buckets=(0.125, 1),
+                                      registry=self.registry)
+        for value in (0.0625, 0.125, 0.5, 5):
+            histogram.observe(value, method='get')
+        self.assertEqual((4, 5.6875), histogram.get(method='get'))
+        self.assertEqual('# HELP fake_seconds Fake durations.\n'
+                         '# TYPE fake_seconds histogram\n'
+                         'fake_seconds_bucket{method="get",le="0.125"} 2\n'
+                         'fake_seconds_bucket{method="get",le="1.0"} 3\n'
+                         'fake_seconds_bucket{method="get",le="+Inf"} 4\n'
+                         'fake_seconds_sum{method="get"} 5.6875\n'
+                         'fake_seconds_count{method="get"} 4\n',
+                         self.registry.render())
+
+        with mock.patch('time.perf_counter', side_effect=[10.0, 10.25]):
+            self.assertRaises(ValueError, self._fail_timed, histogram)
+        self.assertEqual((1, 0.25), histogram.get(method='fail'))
+
+    @staticmethod
+    def _fail_timed(histogram):
+        with histogram.time(method='fail'):
+            raise ValueError()
+
+    def test_register_twice(self):
+        first = metrics.counter('fake_total', 'Fake.', ('vendor',),
+                                registry=self.registry)
+        self.assertIs(first, metrics.counter('fake_total', 'Fake.',
+                                             ('vendor',),
+                                             registry=self.registry))
+        self.assertRaises(ValueError, metrics.gauge, 'fake_total', 'Fake.',
+                          ('vendor',), registry=self.registry)
+        self.assertRaises(ValueError, metrics.counter, 'fake_total',
+                          'Fake.', ('method',), registry=self.registry)
+
+    def test_app(self):
+        res = webob.Request.blank('/metrics').get_response(metrics.app)
+        self.assertEqual(200, res.status_int)
+        self.assertEqual(metrics.CONTENT_TYPE, res.headers['Content-Type'])
+        self.assertIn('# TYPE delfin_api_request_duration_seconds '
+                      'histogram\n', res.text)
+
+        res = webob.Request.blank('/other').get_response(metrics.app)
+        self.assertEqual(404, res.status_int)
+
+    def test_request_metrics(self):
+        route = mock.Mock(routepath='/storages/{id}')
+
+        @webob.dec.wsgify
+        def router(req):
+            req.environ['routes.route'] = route
+            return webob.Response(status=404)
+
+        app = middlewares.RequestMetrics(router)
+        before = middlewares.REQUEST_SECONDS.get(
+            method='GET', route='/storages/{id}', status='404')[0]
+        webob.Request.blank('/storages/fake_id').get_response(app)
+        self.assertEqual(before + 1, middlewares.REQUEST_SECONDS.get(
+            method='GET', route='/storages/{id}', status='404')[0])
+
+    def test_driver_vendor(self):
+        def driver(module):
+            return type('FakeDriver', (), {'__module__': module})()
+
+        self.assertEqual('fake_storage', driverapi._vendor(
+            driver('delfin.drivers.fake_storage')))
+        self.assertEqual('huawei', driverapi._vendor(
+            driver('delfin.drivers.huawei.oceanstor.oceanstor')))
+        self.assertEqual('acme', driverapi._vendor(driver('acme.driver')))
+
+    def test_exporter_dispatch(self):
+        class FailingExporter(base_exporter.BaseExporter):
+            def dispatch(self, ctxt, data):
+                raise ValueError()
+
+        self.override_config('exporter_queue_size', 0)
+        worker = base_exporter.ExporterWorker(FailingExporter())
+        errors = base_exporter.DISPATCH_ERRORS.get(exporter='FailingExporter')
+        count, __ = base_exporter.DISPATCH_SECONDS.get(
+            exporter='FailingExporter')
+        worker.put(None, [{}])
+        self.assertEqual(
+            errors + 1,
+            base_exporter.DISPATCH_ERRORS.get(exporter='FailingExporter'))
+        self.assertEqual(count + 1, base_exporter.DISPATCH_SECONDS.get(
+            exporter='FailingExporter')[0])
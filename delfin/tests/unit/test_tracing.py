@@ -0,0 +1,149 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+
+import webob
+
+from delfin import context
+from delfin import db
+from delfin import rpc
+from delfin import test
+from delfin import tracing
+from delfin.api import middlewares
+
+
+class ListSink(tracing.SpanSink):
+    spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+class TracingTestCase(test.TestCase):
+
+    def setUp(self):
+        super(TracingTestCase, self).setUp()
+        self.override_config('enabled', True, group='tracing')
+        self.override_config('sink', __name__ + '.ListSink', group='tracing')
+        tracing.reset_sink()
+        self.addCleanup(tracing.reset_sink)
+        ListSink.spans = []
+
+    def test_disabled(self):
+        self.override_config('enabled', False, group='tracing')
+        with tracing.span('op') as span:
+            self.assertIsNone(span)
+        self.assertEqual([], ListSink.spans)
+
+    def test_nested_spans(self):
+        with tracing.span('parent', storage_id='fake_id') as parent:
+            with tracing.span('child') as child:
+                self.assertIs(child, tracing.current_span())
+            self.assertRaises(ValueError, self._fail)
+        self.assertIsNone(tracing.current_span())
+
+        finished_child, failed, finished_parent = ListSink.spans
+        self.assertIs(child, finished_child)
+        self.assertIs(parent, finished_parent)
+        self.assertEqual(parent.trace_id, child.trace_id)
+        self.assertEqual(parent.span_id, child.parent_id)
+        self.assertIsNone(parent.parent_id)
+        self.assertEqual({'storage_id': 'fake_id'}, parent.attributes)
+        self.assertIsInstance(failed.error, ValueError)
+        self.assertEqual(2, failed.to_otlp()['status']['code'])
+        self.assertGreaterEqual(parent.end_time, child.end_time)
+
+    @staticmethod
+    def _fail():
+        with tracing.span('failed'):
+            raise ValueError('fake error')
+
+    def test_child_only(self):
+        with tracing.span('orphan', child_only=True) as span:
+            self.assertIsNone(span)
+        with tracing.span('parent'):
+            with tracing.span('child', child_only=True) as span:
+                self.assertIsNotNone(span)
+
+    def test_propagation_over_rpc(self):
+        serializer = rpc.RequestContextSerializer(None)
+        ctxt = context.RequestContext()
+        with tracing.span('rpc.cast') as cast:
+            values = serializer.serialize_context(ctxt)
+        # On the task manager side
+        remote_ctxt = serializer.deserialize_context(
+            json.loads(json.dumps(values)))
+        with tracing.span('task.sync', remote_ctxt) as task:
+            pass
+        self.assertEqual(cast.trace_id, task.trace_id)
+        self.assertEqual(cast.span_id, task.parent_id)
+
+    def test_db_calls(self):
+        with tracing.span('task'):
+            db.storage_get_all(context.get_admin_context())
+        # Not traced out of a span
+        db.storage_get_all(context.get_admin_context())
+        self.assertEqual(['db.storage_get_all', 'task'],
+                         [span.name for span in ListSink.spans])
+
+    def test_api_request(self):
+        trace_id = 'a' * 32
+        app = middlewares.ContextWrapper(webob.Response(status=202))
+        req = webob.Request.blank(
+            '/v1/storages/sync', method='POST',
+            headers={'traceparent': '00-{0}-{1}-01'.format(trace_id,
+                                                           'b' * 16)})
+        res = req.get_response(app)
+        self.assertEqual(trace_id, res.headers['X-Trace-Id'])
+        span, = ListSink.spans
+        self.assertEqual('b' * 16, span.parent_id)
+        self.assertEqual(202, span.attributes['http.status_code'])
+        self.assertEqual('/v1/storages/sync',
+                         span.attributes['http.target'])
+
+    def test_parse_traceparent(self):
+        self.assertEqual(('0af7651916cd43dd8448eb211c80319c',
+                          'b7ad6b7169203331'),
+                         tracing.parse_traceparent(
+                             '00-0af7651916cd43dd8448eb211c80319c-'
+                             'b7ad6b7169203331-01'))
+        self.assertEqual((None, None), tracing.parse_traceparent('bad'))
+        self.assertEqual((None, None), tracing.parse_traceparent(None))
+
+    def test_file_sink(self):
+        span_file = os.path.join(tempfile.mkdtemp(), 'spans.json')
+        self.addCleanup(os.remove, span_file)
+        self.override_config('span_file', span_file, group='tracing')
+        self.override_config('sink', 'delfin.tracing.FileSink',
+                             group='tracing')
+        tracing.reset_sink()
+        with tracing.span('driver.list_volumes', count=3, ratio=0.5):
+            pass
+
+        with open(span_file) as f:
+            document = json.loads(f.readline())
+        span = document['resourceSpans'][0]['scopeSpans'][0]['spans'][0]
+        self.assertEqual('driver.list_volumes', span['name'])
+        self.assertEqual(32, len(span['traceId']))
+        self.assertEqual(16, len(span['spanId']))
+        self.assertNotIn('parentSpanId', span)
+        self.assertEqual(
+            [{'key': 'count', 'value': {'intValue': '3'}},
+             {'key': 'ratio', 'value': {'doubleValue': 0.5}}],
+            span['attributes'])
+        self.assertLessEqual(int(span['startTimeUnixNano']),
+                             int(span['endTimeUnixNano']))
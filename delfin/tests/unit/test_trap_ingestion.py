@@ -0,0 +1,89 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import socket
+import tempfile
+import time
+
+from pysnmp.entity.rfc3413 import ntforg
+from pysnmp.proto import rfc1902 as proto_rfc1902
+from pysnmp.smi import rfc1902
+
+from delfin import test
+from delfin.alert_manager import trap_receiver
+from delfin.tests.benchmark import trap_ingestion
+
+
+class TestTrapIngestion(test.TestCase):
+
+    def test_synthetic_traps_parse(self):
+        mib_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, mib_path)
+        trap_ingestion.write_mib(mib_path)
+        receiver = trap_receiver.TrapReceiver(snmp_mib_path=mib_path)
+        receiver._mib_builder()
+
+        for vendor, (__, handler, __) in trap_ingestion.VENDORS.items():
+            before = time.time()
+            var_binds = trap_ingestion._var_binds({'vendor': vendor}, 7, None)
+            alert = dict(receiver._extract_oid_value(
+                rfc1902.ObjectType(rfc1902.ObjectIdentity(oid),
+                                   value).resolveWithMib(
+                    receiver.mib_view_controller))
+                for oid, value in var_binds)
+            alert_model = handler().parse_alert(None, alert)
+            self.assertEqual('7', alert_model['sequence_number'])
+            self.assertTrue(before <= trap_ingestion.sent_at(alert_model)
+                            <= time.time())
+
+    def test_sender_engine(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(sock.close)
+        sock.bind(('127.0.0.1', 0))
+        sock.settimeout(5)
+        target = sock.getsockname()
+        originator = ntforg.NotificationOriginator()
+        profiles = trap_ingestion.make_profiles(['vmax'], ['v2c', 'v3'],
+                                                'md5', 'des')
+        for profile in profiles:
+            snmp_engine = trap_ingestion._sender_engine(profile, target)
+            transport = snmp_engine.transportDispatcher.getTransport(
+                trap_ingestion.udp.domainName)
+            self.addCleanup(transport.closeTransport)
+            originator.sendVarBinds(
+                snmp_engine, 'bench', None, proto_rfc1902.OctetString(''),
+                trap_ingestion._var_binds(profile, 1, None))
+            __, address = sock.recvfrom(65535)
+            self.assertEqual(profile['host'], address[0])
+
+    def test_report(self):
+        self.assertIsNone(trap_ingestion._percentile([], 50))
+        values = list(range(1, 101))
+        self.assertEqual(50, trap_ingestion._percentile(values, 50))
+        self.assertEqual(99, trap_ingestion._percentile(values, 99))
+        self.assertEqual(1, trap_ingestion._percentile([1], 99))
+
+        report = trap_ingestion.format_report({
+            'sent': 100, 'send_errors': 0, 'offered_rate': 10.0,
+            'received': 98, 'rate': 9.8, 'processing_p50': 0.002,
+            'processing_p99': 0.01, 'exported': 97, 'export_p50': 0.5,
+            'export_p99': None, 'rejected': {'usmStatsWrongDigests': 1},
+            'lost': 1, 'dropped': {'InvalidInput': 1},
+            'exporter_dropped': 0,
+            'storages': [('bench-vmax-v3', '127.0.0.2', 100, 0)]})
+        self.assertIn('p50 2.00ms, p99 10.00ms', report)
+        self.assertIn('p50 500.00ms, p99 n/a', report)
+        self.assertIn('usmStatsWrongDigests=1', report)
+        self.assertIn('InvalidInput=1', report)
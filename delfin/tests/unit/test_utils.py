@@ -0,0 +1,66 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import tempfile
+from unittest import mock
+
+import eventlet
+
+from delfin import test
+from delfin import utils
+
+
+class TestClaimWorkerIndex(test.TestCase):
+
+    def setUp(self):
+        super(TestClaimWorkerIndex, self).setUp()
+        state_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, state_path)
+        self.override_config('state_path', state_path)
+        self.addCleanup(self._release)
+
+    @staticmethod
+    def _release():
+        while utils._worker_locks:
+            utils._worker_locks.pop().close()
+
+    def test_claim(self):
+        self.assertEqual(0, utils.claim_worker_index('delfin-alert', 2))
+        self.assertEqual(1, utils.claim_worker_index('delfin-alert', 2))
+        self.assertRaises(RuntimeError, utils.claim_worker_index,
+                          'delfin-alert', 2)
+        # Another service has its own indexes
+        self.assertEqual(0, utils.claim_worker_index('delfin-task', 2))
+
+        # Released when the holder exits
+        utils._worker_locks.pop(0).close()
+        self.assertEqual(0, utils.claim_worker_index('delfin-alert', 2))
+
+
+class TestSSHPool(test.TestCase):
+
+    def test_remove_wakes_waiter(self):
+        pool = utils.SSHPool('127.0.0.1', 22, 10, 'user', password='pwd',
+                             max_size=1)
+        with mock.patch.object(utils.SSHPool, 'create') as create:
+            ssh = pool.get()
+            waiter = eventlet.spawn(pool.get)
+            eventlet.sleep(0)
+            # The broken connection's slot goes to the blocked caller
+            pool.remove(ssh)
+            with eventlet.Timeout(1):
+                waiter.wait()
+        self.assertEqual(2, create.call_count)
+        self.assertEqual(1, pool.current_size)
@@ -0,0 +1,287 @@
+# Copyright 2020 The SODA Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Lightweight distributed tracing.
+
+A span times one operation, e.g. an API request, a task, a driver call,
+an HTTP request or a DB API call. Spans started in a span are its
+children, the current span is kept per (green) thread. Across RPC the
+trace context is carried by the RequestContext, see
+delfin.rpc.RequestContextSerializer.
+
+Finished spans are exported to the sink class set by [tracing]sink.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+
+from oslo_config import cfg
+from oslo_log import log
+from oslo_utils import importutils
+
+LOG = log.getLogger(__name__)
+CONF = cfg.CONF
+
+tracing_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Record spans of API requests, tasks, driver calls, '
+                     'HTTP requests and DB API calls.'),
+    cfg.StrOpt('sink',
+               default='delfin.tracing.FileSink',
+               help='Class the finished spans are exported to.'),
+    cfg.StrOpt('span_file',
+               default='/var/log/delfin/spans.json',
+               help='File FileSink appends spans to, one OTLP/JSON '
+                    'document per line.'),
+]
+
+CONF.register_opts(tracing_opts, "tracing")
+
+# Kinds of span, as in OTLP
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+KIND_CONSUMER = 5
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+_local = threading.local()
+_sink = None
+
+
+def _new_id(n_bytes):
+    return os.urandom(n_bytes).hex()
+
+
+class Span(object):
+    """A timed operation of a trace."""
+
+    def __init__(self, name, trace_id, parent_id=None, kind=KIND_INTERNAL,
+                 attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start_time = time.time_ns()
+        self.end_time = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.end_time = time.time_ns()
+
+    @property
+    def duration(self):
+        """Seconds the span lasted, up to now when not finished."""
+        return ((self.end_time or time.time_ns()) - self.start_time) / 1e9
+
+    @staticmethod
+    def _value(value):
+        if isinstance(value, bool):
+            return {'boolValue': value}
+        if isinstance(value, int):
+            return {'intValue': str(value)}
+        if isinstance(value, float):
+            return {'doubleValue': value}
+        return {'stringValue': str(value)}
+
+    def to_otlp(self):
+        """The span in the OTLP/JSON encoding."""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_time),
+            'endTimeUnixNano': str(self.end_time),
+            'attributes': [{'key': key, 'value': self._value(value)}
+                           for key, value in self.attributes.items()
+                           if value is not None],
+            'status': {'code': 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.error is not None:
+            span['status'] = {'code': 2,
+                              'message': '{0}: {1}'.format(
+                                  type(self.error).__name__, self.error)}
+        return span
+
+
+class SpanSink(metaclass=ABCMeta):
+    """Receives the finished spans."""
+
+    @abstractmethod
+    def export(self, span):
+        pass
+
+
+class FileSink(SpanSink):
+    """Append each span to [tracing]span_file as one OTLP/JSON
+    ExportTraceServiceRequest per line, which OTLP tools can load
+    without a collector running.
+    """
+
+    def __init__(self):
+        self.path = CONF.tracing.span_file
+        self.resource = {'attributes': [
+            {'key': 'service.name',
+             'value': {'stringValue': os.path.basename(sys.argv[0])}},
+            {'key': 'host.name', 'value': {'stringValue': CONF.host}},
+        ]}
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps({'resourceSpans': [{
+            'resource': self.resource,
+            'scopeSpans': [{'scope': {'name': 'delfin'},
+                            'spans': [span.to_otlp()]}],
+        }]})
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+
+class LogSink(SpanSink):
+    """Log each span, for when no span file is wanted."""
+
+    def export(self, span):
+        LOG.info('Span %(name)s trace=%(trace)s span=%(span)s '
+                 'parent=%(parent)s duration=%(duration).3fs '
+                 'attributes=%(attributes)s error=%(error)s',
+                 {'name': span.name, 'trace': span.trace_id,
+                  'span': span.span_id, 'parent': span.parent_id,
+                  'duration': span.duration, 'attributes': span.attributes,
+                  'error': span.error})
+
+
+def _get_sink():
+    global _sink
+    if _sink is None:
+        _sink = importutils.import_object(CONF.tracing.sink)
+    return _sink
+
+
+def reset_sink():
+    """Load the sink again from the config on next export."""
+    global _sink
+    _sink = None
+
+
+def _export(span):
+    try:
+        _get_sink().export(span)
+    except Exception as e:
+        LOG.warning('Failed to export span {0}: {1}'.format(span.name, e))
+
+
+def enabled():
+    return CONF.tracing.enabled
+
+
+def current_span():
+    return getattr(_local, 'span', None)
+
+
+@contextlib.contextmanager
+def span(name, context=None, kind=KIND_INTERNAL, child_only=False,
+         **attributes):
+    """Time the block as a span, yields the span or None when not traced.
+
+    The span is a child of the current span, else of the span carried by
+    the context, else it starts a new trace unless child_only is set.
+    """
+    if not CONF.tracing.enabled:
+        yield None
+        return
+    parent = current_span()
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    elif getattr(context, 'trace_id', None):
+        trace_id, parent_id = context.trace_id, context.span_id
+    elif child_only:
+        yield None
+        return
+    else:
+        trace_id, parent_id = _new_id(16), None
+
+    new_span = Span(name, trace_id, parent_id, kind, attributes)
+    _local.span = new_span
+    try:
+        yield new_span
+    except Exception as e:
+        new_span.error = e
+        raise
+    finally:
+        _local.span = parent
+        new_span.finish()
+        _export(new_span)
+
+
+def inject(values):
+    """Put the trace context of the current span into context values."""
+    current = current_span()
+    if current is not None:
+        values['trace_id'] = current.trace_id
+        values['span_id'] = current.span_id
+    return values
+
+
+def parse_traceparent(header):
+    """Get (trace id, parent span id) from a W3C traceparent header."""
+    match = _TRACEPARENT.match((header or '').strip().lower())
+    if not match:
+        return None, None
+    return match.group(1), match.group(2)
+
+
+class _TracedAPI(object):
+
+    def __init__(self, api, prefix):
+        self._api = api
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if not CONF.tracing.enabled or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def _traced(*args, **kwargs):
+            current = current_span()
+            if current is not None and current.name.startswith(self._prefix):
+                # Called back from a traced call, part of its span
+                return attr(*args, **kwargs)
+            with span(self._prefix + name, child_only=True):
+                return attr(*args, **kwargs)
+        return _traced
+
+
+def trace_calls(api, prefix):
+    """Proxy of api which times each call of a traced operation as a span
+    named prefix + method name, calls nested in such a span are not
+    timed apart.
+    """
+    return _TracedAPI(api, prefix)
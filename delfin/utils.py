@@ -19,6 +19,7 @@
 """Utilities and helper functions."""
 
 import contextlib
+import fcntl
 import functools
 import inspect
 import os
@@ -29,8 +30,10 @@ import shutil
 import sys
 import tempfile
 import threading
+import time
 
 from eventlet import pools
+from eventlet import queue
 import logging
 from oslo_concurrency import lockutils
 from oslo_concurrency import processutils
@@ -100,7 +103,12 @@ def execute(*cmd, **kwargs):
 
 
 class SSHPool(pools.Pool):
-    """A simple eventlet pool to hold ssh connections."""
+    """A simple eventlet pool to hold ssh connections.
+
+    Connections are checked for liveness before being handed out, and
+    connections which stayed unused in the pool longer than idle_timeout
+    (in seconds) are closed and replaced.
+    """
 
     def __init__(self, ip, port, conn_timeout, login, password=None,
                  privatekey=None, *args, **kwargs):
@@ -110,11 +118,16 @@ class SSHPool(pools.Pool):
         self.password = password
         self.conn_timeout = conn_timeout if conn_timeout else None
         self.path_to_private_key = privatekey
+        self.known_hosts = kwargs.pop('known_hosts', None)
+        self.idle_timeout = kwargs.pop('idle_timeout', None)
         super(SSHPool, self).__init__(*args, **kwargs)
 
     def create(self):  # pylint: disable=method-hidden
         ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        if self.known_hosts:
+            ssh.load_host_keys(self.known_hosts)
+        else:
+            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         look_for_keys = True
         if self.path_to_private_key:
             self.path_to_private_key = os.path.expanduser(
@@ -124,12 +137,11 @@ class SSHPool(pools.Pool):
             look_for_keys = False
         try:
             LOG.debug("ssh.connect: ip: %s, port: %s, username: %s, "
-                      "password: %s, key_filename: %s, look_for_keys: %s, "
+                      "key_filename: %s, look_for_keys: %s, "
                       "timeout: %s, banner_timeout: %s",
                       self.ip,
                       self.port,
                       self.login,
-                      self.password,
                       self.path_to_private_key,
                       look_for_keys,
                       self.conn_timeout,
@@ -146,40 +158,94 @@ class SSHPool(pools.Pool):
                 transport = ssh.get_transport()
                 transport.set_keepalive(self.conn_timeout)
             return ssh
+        except paramiko.AuthenticationException as e:
+            LOG.error("Authentication failed connecting via ssh: %s", e)
+            raise
         except Exception as e:
             msg = _("Check whether private key or password are correctly "
                     "set. Error connecting via ssh: %s") % e
             LOG.error(msg)
             raise exception.SSHException(msg)
 
+    def _is_usable(self, ssh):
+        """Check that a pooled connection is alive and not idle too long."""
+        last_used = getattr(ssh, 'last_used', None)
+        if self.idle_timeout and last_used is not None and \
+                time.time() - last_used > self.idle_timeout:
+            return False
+        transport = ssh.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            # Write to the socket so that a peer which went away
+            # silently is detected here instead of on the next command.
+            transport.send_ignore()
+        except Exception:
+            return False
+        return True
+
     def get(self):
         """Return an item from the pool, when one is available.
 
         This may cause the calling greenthread to block. Check if a
-        connection is active before returning it. For dead connections
-        create and return a new connection.
+        connection is active before returning it. For dead or idle
+        connections create and return a new connection.
         """
         if self.free_items:
             conn = self.free_items.popleft()
             if conn:
-                if conn.get_transport().is_active():
+                if self._is_usable(conn):
                     return conn
                 else:
                     conn.close()
-            return self.create()
+            try:
+                return self.create()
+            except Exception:
+                self._free_slot()
+                raise
         if self.current_size < self.max_size:
             created = self.create()
             self.current_size += 1
             return created
-        return self.channel.get()
+        conn = self.channel.get()
+        if conn is None:
+            # The slot of a removed connection was handed over
+            try:
+                return self.create()
+            except Exception:
+                self._free_slot()
+                raise
+        return conn
+
+    def put(self, ssh):
+        """Return an ssh client to the pool and record its last use."""
+        ssh.last_used = time.time()
+        super(SSHPool, self).put(ssh)
 
     def remove(self, ssh):
-        """Close an ssh client and remove it from free_items."""
+        """Close an ssh client and drop it from the pool."""
         ssh.close()
         if ssh in self.free_items:
             self.free_items.remove(ssh)
-            if self.current_size > 0:
-                self.current_size -= 1
+        self._free_slot()
+
+    def _free_slot(self):
+        """Hand the slot of a dropped connection to a blocked get(), which
+        then creates a new connection, or else release it.
+        """
+        if self.waiting():
+            try:
+                self.channel.put(None, block=False)
+                return
+            except queue.Full:
+                pass
+        if self.current_size > 0:
+            self.current_size -= 1
+
+    def close_all(self):
+        """Close all the free connections of the pool."""
+        while self.free_items:
+            self.remove(self.free_items.popleft())
 
 
 def check_ssh_injection(cmd_list):
@@ -301,6 +367,31 @@ def check_string_length(value, name, min_length=0, max_length=None,
         raise exception.InvalidInput(msg)
 
 
+# Files locked by claim_worker_index, for as long as the process lives
+_worker_locks = []
+
+
+def claim_worker_index(name, workers):
+    """Claim the lowest index below workers which no other process of
+    service name holds, e.g. to give each worker process files of its own.
+    The claim is held until the process exits.
+    """
+    os.makedirs(CONF.state_path, exist_ok=True)
+    for index in range(workers):
+        path = os.path.join(CONF.state_path,
+                            '%s-worker-%d.lock' % (name, index))
+        lock_file = open(path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            continue
+        _worker_locks.append(lock_file)
+        return index
+    raise RuntimeError('All the {0} worker indexes of {1} are held by '
+                       'other processes.'.format(workers, name))
+
+
 def service_is_up(service):
     """Check whether a service is up based on last heartbeat."""
     last_heartbeat = service['updated_at'] or service['created_at']
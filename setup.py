@@ -24,6 +24,10 @@ setup(
     license="Apache 2.0",
     packages=find_packages(exclude=("tests", "tests.*")),
     python_requires=">=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*",
+    extras_require={
+        # HTTP client of async drivers
+        'async': ['aiohttp>=3.6'],
+    },
     entry_points={
         'delfin.alert.exporters': [
             'example = delfin.exporter.example:AlertExporterExample'
@@ -33,6 +37,7 @@ setup(
         ],
         'delfin.storage.drivers': [
             'fake_storage fake_driver = delfin.drivers.fake_storage:FakeStorageDriver',
+            'fake_storage async_fake_driver = delfin.drivers.fake_storage:AsyncFakeStorageDriver',
             'dellemc vmax = delfin.drivers.dell_emc.vmax.vmax:VMAXStorageDriver',
             'hpe 3par = delfin.drivers.hpe.hpe_3par.hpe_3parstor:Hpe3parStorDriver',
             'huawei oceanstor = delfin.drivers.huawei.oceanstor.oceanstor:OceanStorDriver'